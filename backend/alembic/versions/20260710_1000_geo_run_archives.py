@@ -0,0 +1,67 @@
+"""geo_run_archives
+
+Retention GEO — stockage froid du raw_answer :
+- table geo_run_archives : raw_answer compresse (zlib), 1 ligne par run archive
+- geo_runs.raw_answer_archived_at : marqueur (raw_answer NULL en table chaude)
+
+Additif (nouvelle table + colonne nullable) -> prod-safe. Les donnees sont
+deplacees ensuite par la task geo_archive_raw_answers_task, par lots.
+
+Revision ID: geo_run_archives_001
+Revises: lead_signals_001
+Create Date: 2026-07-10
+"""
+import zlib
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = "geo_run_archives_001"
+down_revision = "lead_signals_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "geo_runs",
+        sa.Column("raw_answer_archived_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "geo_run_archives",
+        sa.Column(
+            "run_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("geo_runs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("codec", sa.Text(), nullable=False, server_default="zlib"),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("raw_size", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_geo_run_archives_organization_id", "geo_run_archives", ["organization_id"]
+    )
+
+
+def downgrade() -> None:
+    # Rehydrate les raw_answer avant de supprimer l'archive (pas de perte).
+    # zlib n'existe pas cote SQL : decompression en Python, ligne par ligne.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT run_id, payload FROM geo_run_archives"))
+    for run_id, payload in rows:
+        bind.execute(
+            sa.text("UPDATE geo_runs SET raw_answer = :txt WHERE id = :rid"),
+            {"txt": zlib.decompress(payload).decode("utf-8"), "rid": run_id},
+        )
+    op.drop_table("geo_run_archives")
+    op.drop_column("geo_runs", "raw_answer_archived_at")
@@ -0,0 +1,183 @@
+"""partition_monthly
+
+Partitionnement RANGE mensuel des deux tables a croissance non bornee :
+- geo_runs   : cle run_at      (scorer, alertes, gaps, dashboard filtrent par jour)
+- activities : cle created_at  (timeline, dashboards filtrent les dates recentes)
+
+Conversion par copie (PostgreSQL n'a pas d'ALTER ... PARTITION BY) :
+1. renommer la table existante en <table>_legacy
+2. creer la table mere partitionnee (LIKE legacy INCLUDING DEFAULTS)
+3. creer une partition par mois, du plus vieux mois present au mois courant
+   + 3 mois, plus une partition DEFAULT (filet, doit rester vide)
+4. copier les lignes, supprimer legacy
+5. PK (id, cle) — le partitionnement impose la cle dans toute contrainte unique —
+   puis FK sortantes et index recrees sur la mere (propages aux partitions)
+
+geo_runs : l'index unique anti-doublon par JOUR (expression) ne peut pas vivre sur
+la mere -> pose sur chaque partition (un jour = une seule partition mensuelle).
+geo_run_archives perd sa FK vers geo_runs (plus d'unicite sur id seul) : les
+orphelins sont purges par le job de retention.
+
+Migration LOURDE (reecriture complete des deux tables, verrou exclusif pendant
+la copie) : a jouer en fenetre de maintenance. Les mois suivants sont crees par
+la task beat partitions_ensure_task (app/db/partitions.py).
+
+Revision ID: partition_monthly_001
+Revises: geo_run_archives_001
+Create Date: 2026-07-10
+"""
+from datetime import UTC, date, datetime
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "partition_monthly_001"
+down_revision = "geo_run_archives_001"
+branch_labels = None
+depends_on = None
+
+_MONTHS_AHEAD = 3
+
+# table -> (cle de partition, FK sortantes, index non-uniques)
+# Les definitions reprennent a l'identique les migrations d'origine
+# (baseline, geo_module_001, geo_org_id_001, mt_tables_001, mt_softdelete_001).
+_TABLES: dict[str, dict] = {
+    "geo_runs": {
+        "key": "run_at",
+        "fks": [
+            ("geo_runs_prompt_id_fkey", "prompt_id", "geo_prompts", "CASCADE"),
+            ("geo_runs_brand_id_fkey", "brand_id", "geo_brands", "CASCADE"),
+        ],
+        "indexes": [
+            ("ix_geo_runs_organization_id", "organization_id"),
+            ("ix_geo_runs_brand_engine_run_at", "brand_id, engine, run_at"),
+            ("ix_geo_runs_prompt_run_at", "prompt_id, run_at"),
+        ],
+        "local_unique": (
+            "prompt_engine_idx_day",
+            "(prompt_id, engine, run_index, ((run_at AT TIME ZONE 'UTC')::date))",
+        ),
+    },
+    "activities": {
+        "key": "created_at",
+        "fks": [
+            ("activities_contact_id_fkey", "contact_id", "contacts", "CASCADE"),
+            ("activities_company_id_fkey", "company_id", "companies", "CASCADE"),
+            ("activities_deal_id_fkey", "deal_id", "deals", "SET NULL"),
+            ("activities_user_id_fkey", "user_id", "users", "CASCADE"),
+            ("fk_activities_organization_id", "organization_id", "organizations", "RESTRICT"),
+        ],
+        "indexes": [
+            ("ix_activities_type", "type"),
+            ("ix_activities_contact_id", "contact_id"),
+            ("ix_activities_company_id", "company_id"),
+            ("ix_activities_deal_id", "deal_id"),
+            ("ix_activities_user_id", "user_id"),
+            ("ix_activities_organization_id", "organization_id"),
+            # Tri/fenetre des listes (plus recentes d'abord)
+            ("ix_activities_created_at", "created_at"),
+        ],
+        "local_unique": None,
+    },
+}
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(table: str, month: date, local_unique: tuple | None) -> None:
+    name = f"{table}_y{month.year:04d}m{month.month:02d}"
+    end = _add_months(month, 1)
+    op.execute(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{end.isoformat()} 00:00:00+00')"
+    )
+    if local_unique is not None:
+        suffix, columns = local_unique
+        op.execute(f"CREATE UNIQUE INDEX uq_{name}_{suffix} ON {name} {columns}")
+
+
+def _partition_table(table: str, spec: dict) -> None:
+    key = spec["key"]
+    legacy = f"{table}_legacy"
+    bind = op.get_bind()
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE ({key})"
+    )
+
+    # Plage de mois : du plus ancien present (ou mois courant) a courant + N.
+    current = datetime.now(UTC).date().replace(day=1)
+    oldest = bind.exec_driver_sql(f"SELECT min({key}) FROM {legacy}").scalar()  # noqa: S608
+    first = oldest.astimezone(UTC).date().replace(day=1) if oldest else current
+    month = min(first, current)
+    while month <= _add_months(current, _MONTHS_AHEAD):
+        _create_partition(table, month, spec["local_unique"])
+        month = _add_months(month, 1)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    if spec["local_unique"] is not None:
+        suffix, columns = spec["local_unique"]
+        op.execute(
+            f"CREATE UNIQUE INDEX uq_{table}_default_{suffix} ON {table}_default {columns}"
+        )
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")  # noqa: S608
+    # CASCADE : emporte la FK geo_run_archives -> geo_runs_legacy.
+    op.execute(f"DROP TABLE {legacy} CASCADE")
+
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {key})")
+    for name, column, target, ondelete in spec["fks"]:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {target} (id) ON DELETE {ondelete}"
+        )
+    for name, columns in spec["indexes"]:
+        op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+
+def _unpartition_table(table: str, spec: dict) -> None:
+    partitioned = f"{table}_partitioned"
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+    op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")  # noqa: S608
+    # Supprime la mere ET ses partitions (et leurs index locaux).
+    op.execute(f"DROP TABLE {partitioned} CASCADE")
+
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+    for name, column, target, ondelete in spec["fks"]:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {target} (id) ON DELETE {ondelete}"
+        )
+    for name, columns in spec["indexes"]:
+        if name == "ix_activities_created_at":
+            continue  # ajoute par cette migration uniquement
+        op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+    if spec["local_unique"] is not None:
+        suffix, columns = spec["local_unique"]
+        op.execute(f"CREATE UNIQUE INDEX uq_{table}_{suffix} ON {table} {columns}")
+
+
+def upgrade() -> None:
+    for table, spec in _TABLES.items():
+        _partition_table(table, spec)
+
+
+def downgrade() -> None:
+    for table, spec in _TABLES.items():
+        _unpartition_table(table, spec)
+    # Orphelins toleres sans FK : a purger avant de reposer la contrainte.
+    op.execute(
+        "DELETE FROM geo_run_archives a "
+        "WHERE NOT EXISTS (SELECT 1 FROM geo_runs r WHERE r.id = a.run_id)"
+    )
+    op.execute(
+        "ALTER TABLE geo_run_archives ADD CONSTRAINT geo_run_archives_run_id_fkey "
+        "FOREIGN KEY (run_id) REFERENCES geo_runs (id) ON DELETE CASCADE"
+    )
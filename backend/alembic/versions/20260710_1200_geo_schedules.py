@@ -0,0 +1,122 @@
+"""geo_schedules
+
+Scheduler GEO nocturne :
+- geo_schedules : cadence de mesure par marque x moteur (every_days, n_runs)
+- geo_scheduled_batches : file des batches planifies (eta etalee sur la fenetre
+  nocturne, statut planned -> queued -> running -> done|failed)
+
+Additif (nouvelles tables) -> prod-safe.
+
+Revision ID: geo_schedules_001
+Revises: partition_monthly_001
+Create Date: 2026-07-10
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+# revision identifiers, used by Alembic.
+revision = "geo_schedules_001"
+down_revision = "partition_monthly_001"
+branch_labels = None
+depends_on = None
+
+
+def _timestamps() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "geo_schedules",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "brand_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("geo_brands.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("engine", sa.Text(), nullable=False),
+        sa.Column("every_days", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("n_runs", sa.Integer(), nullable=False, server_default="3"),
+        sa.Column("active", sa.Boolean(), nullable=False, server_default=sa.text("true")),
+        sa.Column("last_planned_on", sa.Date(), nullable=True),
+        *_timestamps(),
+        sa.UniqueConstraint("brand_id", "engine", name="uq_geo_schedules_brand_engine"),
+    )
+    op.create_index("ix_geo_schedules_organization_id", "geo_schedules", ["organization_id"])
+    op.create_index("ix_geo_schedules_brand_id", "geo_schedules", ["brand_id"])
+
+    op.create_table(
+        "geo_scheduled_batches",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "schedule_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("geo_schedules.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "brand_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("geo_brands.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("engine", sa.Text(), nullable=False),
+        sa.Column("night", sa.Date(), nullable=False),
+        sa.Column("eta", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("prompt_ids", JSONB(), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column("n_runs", sa.Integer(), nullable=False, server_default="3"),
+        sa.Column("runs_planned", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("status", sa.Text(), nullable=False, server_default=sa.text("'planned'")),
+        sa.Column("task_id", sa.Text(), nullable=True),
+        sa.Column("runs_success", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("runs_failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        *_timestamps(),
+        sa.UniqueConstraint(
+            "schedule_id", "night", name="uq_geo_scheduled_batches_schedule_night"
+        ),
+    )
+    op.create_index(
+        "ix_geo_scheduled_batches_organization_id",
+        "geo_scheduled_batches",
+        ["organization_id"],
+    )
+    op.create_index(
+        "ix_geo_scheduled_batches_brand_id", "geo_scheduled_batches", ["brand_id"]
+    )
+    op.create_index(
+        "ix_geo_scheduled_batches_status_eta", "geo_scheduled_batches", ["status", "eta"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("geo_scheduled_batches")
+    op.drop_table("geo_schedules")
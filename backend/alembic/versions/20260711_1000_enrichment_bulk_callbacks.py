@@ -0,0 +1,94 @@
+"""enrichment_bulk_callbacks
+
+Ingestion rapide des callbacks bulkDone Icypeas :
+- enrichment_bulk_callbacks : payload brut stage a la reception (accuse
+  immediat), traite ensuite par chunks (curseur items_processed). Unicite
+  (bulk_id, payload_hash) -> re-livraison identique idempotente.
+- enrichment_bulks.valid : compteur incremental (avec done/found) -> stats du
+  job agregees sur les bulks, sans recompter les items.
+
+Additif (table + colonne avec defaut) -> prod-safe. Backfill de `valid` pour les
+bulks existants (items found a certitude valide).
+
+Revision ID: enrichment_bulk_callbacks_001
+Revises: geo_schedules_001
+Create Date: 2026-07-11
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+# revision identifiers, used by Alembic.
+revision = "enrichment_bulk_callbacks_001"
+down_revision = "geo_schedules_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "enrichment_bulks",
+        sa.Column("valid", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    # Certitudes Icypeas mappees 'valid' (adapters/icypeas._CERTAINTY_MAP)
+    op.execute(
+        """
+        UPDATE enrichment_bulks b SET valid = (
+            SELECT count(*) FROM enrichment_bulk_items i
+            WHERE i.bulk_id = b.id AND i.status = 'found'
+              AND i.certainty IN ('ultra_sure', 'very_sure', 'probable')
+        )
+        """
+    )
+
+    op.create_table(
+        "enrichment_bulk_callbacks",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "bulk_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("enrichment_bulks.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("payload_hash", sa.Text(), nullable=False),
+        sa.Column("payload_json", JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("status", sa.Text(), nullable=False, server_default=sa.text("'received'")),
+        sa.Column("items_total", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("items_processed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.UniqueConstraint(
+            "bulk_id", "payload_hash", name="uq_enrichment_bulk_callbacks_bulk_hash"
+        ),
+    )
+    op.create_index(
+        "ix_enrichment_bulk_callbacks_organization_id",
+        "enrichment_bulk_callbacks",
+        ["organization_id"],
+    )
+    op.create_index(
+        "ix_enrichment_bulk_callbacks_status", "enrichment_bulk_callbacks", ["status"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("enrichment_bulk_callbacks")
+    op.drop_column("enrichment_bulks", "valid")
@@ -0,0 +1,83 @@
+"""enrichment_gouv_cache
+
+Cache partage (toutes orgs) des resolutions de l'API gouv recherche-entreprises :
+- enrichment_gouv_cache : (kind, key) -> Company serialisee ; payload NULL =
+  cache negatif. kind = siren | name.
+- enrichment_domain_checks : candidat domaine -> le site repond-il.
+Les deux portent expires_at (TTL positif / negatif) indexe pour la purge.
+
+Additif (tables neuves) -> prod-safe.
+
+Revision ID: enrichment_gouv_cache_001
+Revises: enrichment_bulk_callbacks_001
+Create Date: 2026-07-12
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+# revision identifiers, used by Alembic.
+revision = "enrichment_gouv_cache_001"
+down_revision = "enrichment_bulk_callbacks_001"
+branch_labels = None
+depends_on = None
+
+
+def _timestamps() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "enrichment_gouv_cache",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("kind", sa.Text(), nullable=False),
+        sa.Column("key", sa.Text(), nullable=False),
+        sa.Column("payload_json", JSONB(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        *_timestamps(),
+        sa.UniqueConstraint("kind", "key", name="uq_enrichment_gouv_cache_kind_key"),
+    )
+    op.create_index(
+        "ix_enrichment_gouv_cache_expires_at", "enrichment_gouv_cache", ["expires_at"]
+    )
+
+    op.create_table(
+        "enrichment_domain_checks",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("domain", sa.Text(), nullable=False, unique=True),
+        sa.Column("responds", sa.Boolean(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        *_timestamps(),
+    )
+    op.create_index(
+        "ix_enrichment_domain_checks_expires_at", "enrichment_domain_checks", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("enrichment_domain_checks")
+    op.drop_table("enrichment_gouv_cache")
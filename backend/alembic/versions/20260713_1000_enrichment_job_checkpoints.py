@@ -0,0 +1,72 @@
+"""enrichment_job_checkpoints
+
+Checkpoints des jobs d'enrichissement inline (reprise apres crash worker) :
+- kind=company : sourced (domaine + personnes) -> done | failed, key = siren
+  (ou nom) de la societe ; done est committe avec les contacts de la societe.
+- kind=person : resultat du lookup email/verif, key = clef de fraicheur.
+credits = depense de l'unite (re-imputee au ledger a la reprise).
+Unicite (job_id, kind, key).
+
+Additif (table neuve) -> prod-safe.
+
+Revision ID: enrichment_job_checkpoints_001
+Revises: enrichment_gouv_cache_001
+Create Date: 2026-07-13
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+# revision identifiers, used by Alembic.
+revision = "enrichment_job_checkpoints_001"
+down_revision = "enrichment_gouv_cache_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "enrichment_job_checkpoints",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "job_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("enrichment_jobs.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("kind", sa.Text(), nullable=False),
+        sa.Column("key", sa.Text(), nullable=False),
+        sa.Column("status", sa.Text(), nullable=False, server_default=sa.text("'done'")),
+        sa.Column("payload_json", JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("credits", sa.Numeric(12, 3), nullable=False, server_default=sa.text("0")),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.UniqueConstraint(
+            "job_id", "kind", "key", name="uq_enrichment_job_checkpoints_job_kind_key"
+        ),
+    )
+    op.create_index(
+        "ix_enrichment_job_checkpoints_organization_id",
+        "enrichment_job_checkpoints",
+        ["organization_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("enrichment_job_checkpoints")
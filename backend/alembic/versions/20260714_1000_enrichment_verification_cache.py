@@ -0,0 +1,91 @@
+"""enrichment_verification_cache
+
+Cache partage (toutes orgs) des verifications email :
+- enrichment_verification_cache : adresse -> statut / confiance / source du
+  verifier, expires_at par statut (valid long, incertains courts).
+- enrichment_mail_domains : comportement appris d'un domaine (catch_all,
+  accepts_mail, compteur de verifications). Un domaine catch_all connu
+  court-circuite les verifications par adresse.
+expires_at indexe pour la purge.
+
+Additif (tables neuves) -> prod-safe.
+
+Revision ID: enrichment_verification_cache_001
+Revises: enrichment_job_checkpoints_001
+Create Date: 2026-07-14
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = "enrichment_verification_cache_001"
+down_revision = "enrichment_job_checkpoints_001"
+branch_labels = None
+depends_on = None
+
+
+def _timestamps() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "enrichment_verification_cache",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("email", sa.Text(), nullable=False, unique=True),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("confidence", sa.Numeric(4, 3), nullable=True),
+        sa.Column("source", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        *_timestamps(),
+    )
+    op.create_index(
+        "ix_enrichment_verification_cache_expires_at",
+        "enrichment_verification_cache",
+        ["expires_at"],
+    )
+
+    op.create_table(
+        "enrichment_mail_domains",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("domain", sa.Text(), nullable=False, unique=True),
+        sa.Column("catch_all", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("accepts_mail", sa.Boolean(), nullable=True),
+        sa.Column("confidence", sa.Numeric(4, 3), nullable=True),
+        sa.Column("source", sa.Text(), nullable=True),
+        sa.Column("checks", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        *_timestamps(),
+    )
+    op.create_index(
+        "ix_enrichment_mail_domains_expires_at", "enrichment_mail_domains", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("enrichment_mail_domains")
+    op.drop_table("enrichment_verification_cache")
@@ -0,0 +1,32 @@
+"""startup_radar_content_hash
+
+Sync Startup Radar en delta :
+- companies.startup_radar_hash / contacts.startup_radar_hash : empreinte
+  (blake2b 128 bits, hex) de la projection des champs SR mappes, posee a chaque
+  ecriture par la sync. Payload inchange -> entite ignoree (ni UPDATE ni WAL).
+
+Additif (colonnes nullable) -> prod-safe. Colonnes vides au deploiement : la
+premiere sync reecrit tout une fois puis passe en delta.
+
+Revision ID: startup_radar_content_hash_001
+Revises: enrichment_verification_cache_001
+Create Date: 2026-07-15
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "startup_radar_content_hash_001"
+down_revision = "enrichment_verification_cache_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("companies", sa.Column("startup_radar_hash", sa.String(32), nullable=True))
+    op.add_column("contacts", sa.Column("startup_radar_hash", sa.String(32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("contacts", "startup_radar_hash")
+    op.drop_column("companies", "startup_radar_hash")
@@ -0,0 +1,55 @@
+"""startup_radar_sync_checkpoints
+
+Full sync Startup Radar en flux, reprenable :
+- startup_radar_sync_checkpoints : une ligne par org (unique) — phase en cours,
+  prochaine page a lire, mode force, SyncResult cumule. Ecrite dans la meme
+  transaction que les entites de chaque page ; supprimee en fin de sync.
+
+Additif (table neuve) -> prod-safe.
+
+Revision ID: startup_radar_sync_checkpoints_001
+Revises: startup_radar_content_hash_001
+Create Date: 2026-07-16
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+# revision identifiers, used by Alembic.
+revision = "startup_radar_sync_checkpoints_001"
+down_revision = "startup_radar_content_hash_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "startup_radar_sync_checkpoints",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=False, unique=True),
+        sa.Column("phase", sa.String(20), nullable=False),
+        sa.Column("next_page", sa.Integer(), nullable=False, server_default=sa.text("1")),
+        sa.Column("force", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("result_json", JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("startup_radar_sync_checkpoints")
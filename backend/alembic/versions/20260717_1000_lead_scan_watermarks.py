@@ -0,0 +1,71 @@
+"""lead_scan_watermarks
+
+Scan Lead Engine incremental :
+- table lead_scan_watermarks : debut du dernier scan reussi par (org, detecteur)
+  — le scan horaire ne relit que les lignes modifiees depuis ;
+- index (organization_id, updated_at) sur companies, contacts, activities et
+  deals (lignes modifiees d'une org depuis le watermark).
+
+Additif (nouvelle table + index) -> prod-safe.
+
+Revision ID: lead_scan_watermarks_001
+Revises: startup_radar_sync_checkpoints_001
+Create Date: 2026-07-17
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = "lead_scan_watermarks_001"
+down_revision = "startup_radar_sync_checkpoints_001"
+branch_labels = None
+depends_on = None
+
+_UPDATED_AT_INDEXES = (
+    ("ix_companies_org_updated_at", "companies"),
+    ("ix_contacts_org_updated_at", "contacts"),
+    ("ix_activities_org_updated_at", "activities"),
+    ("ix_deals_org_updated_at", "deals"),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lead_scan_watermarks",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "organization_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="RESTRICT"),
+            nullable=False,
+        ),
+        sa.Column("detector", sa.String(20), nullable=False),
+        sa.Column("scanned_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.UniqueConstraint(
+            "organization_id", "detector", name="uq_lead_scan_watermarks_org_detector",
+        ),
+    )
+    op.create_index(
+        "ix_lead_scan_watermarks_organization_id", "lead_scan_watermarks", ["organization_id"],
+    )
+    for name, table in _UPDATED_AT_INDEXES:
+        op.create_index(name, table, ["organization_id", "updated_at"])
+
+
+def downgrade() -> None:
+    for name, table in _UPDATED_AT_INDEXES:
+        op.drop_index(name, table_name=table)
+    op.drop_table("lead_scan_watermarks")
@@ -0,0 +1,58 @@
+"""lead_events
+
+Detection Lead Engine sur ecriture : table lead_events (outbox transactionnelle)
+— evenement ecrit dans la transaction de la donnee declencheuse (funding,
+audit, contact entrant), consomme par la task lead_engine_process_events_task.
+
+Additif (nouvelle table) -> prod-safe.
+
+Revision ID: lead_events_001
+Revises: lead_scan_watermarks_001
+Create Date: 2026-07-18
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = "lead_events_001"
+down_revision = "lead_scan_watermarks_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lead_events",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "organization_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="RESTRICT"),
+            nullable=False,
+        ),
+        sa.Column("event_type", sa.String(30), nullable=False),
+        sa.Column("company_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("contact_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_lead_events_organization_id", "lead_events", ["organization_id"])
+    op.create_index("ix_lead_events_status_created", "lead_events", ["status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("lead_events")
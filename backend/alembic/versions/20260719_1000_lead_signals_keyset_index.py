@@ -0,0 +1,29 @@
+"""lead_signals_keyset_index
+
+Signal Inbox en pagination keyset : index (organization_id, created_at, id)
+sur lead_signals — la page suivante reprend apres (created_at, id) du dernier
+signal sans OFFSET.
+
+Additif (index) -> prod-safe.
+
+Revision ID: lead_signals_keyset_001
+Revises: lead_events_001
+Create Date: 2026-07-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "lead_signals_keyset_001"
+down_revision = "lead_events_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_lead_signals_org_created", "lead_signals", ["organization_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lead_signals_org_created", table_name="lead_signals")
@@ -0,0 +1,36 @@
+"""geo_batches_dispatch_claim
+
+File nocturne GEO : dispatched_at (claim commite avant l'envoi Celery) et
+attempts (nombre d'envois) sur geo_scheduled_batches — le reaper replanifie
+les batches bloques en queued/running, puis les passe failed apres N envois.
+
+Additif (colonnes nullable / avec defaut serveur) -> prod-safe.
+
+Revision ID: geo_batches_dispatch_001
+Revises: lead_signals_keyset_001
+Create Date: 2026-07-20
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "geo_batches_dispatch_001"
+down_revision = "lead_signals_keyset_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "geo_scheduled_batches",
+        sa.Column("dispatched_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "geo_scheduled_batches",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("geo_scheduled_batches", "attempts")
+    op.drop_column("geo_scheduled_batches", "dispatched_at")
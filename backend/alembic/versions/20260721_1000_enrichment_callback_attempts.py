@@ -0,0 +1,32 @@
+"""enrichment_callback_attempts
+
+Callbacks bulk Icypeas : attempts (traitements demarres) sur
+enrichment_bulk_callbacks — un callback toujours en echec passe `failed`
+apres enrichment_callback_max_attempts au lieu d'etre repris par le drain
+indefiniment.
+
+Additif (colonne avec defaut serveur) -> prod-safe.
+
+Revision ID: enrichment_callback_attempts_001
+Revises: geo_batches_dispatch_001
+Create Date: 2026-07-21
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "enrichment_callback_attempts_001"
+down_revision = "geo_batches_dispatch_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "enrichment_bulk_callbacks",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("enrichment_bulk_callbacks", "attempts")
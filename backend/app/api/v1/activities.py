@@ -3,6 +3,7 @@
 # =============================================================================
 
 import uuid
+from datetime import UTC, date, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func, select
@@ -55,6 +56,18 @@ def _parse_uuid(value: str, field_name: str) -> uuid.UUID:
         raise HTTPException(status_code=422, detail=f"{field_name} invalide")
 
 
+def _parse_iso_date(value: str, field_name: str) -> date:
+    """Convertir un string ISO YYYY-MM-DD en date avec erreur propre (DC2)."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"{field_name} doit etre une date ISO YYYY-MM-DD")
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time(), tzinfo=UTC)
+
+
 # Mapping FK metier → model, pour la garde cross-org (anti cross-org FK).
 _FK_MODELS: dict[str, type] = {
     "contact_id": Contact,
@@ -84,6 +97,8 @@ async def list_activities(
     contact_id: str | None = None,
     company_id: str | None = None,
     deal_id: str | None = None,
+    date_from: str | None = Query(None, max_length=10),
+    date_to: str | None = Query(None, max_length=10),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
@@ -103,6 +118,18 @@ async def list_activities(
     if deal_id:
         query = query.where(Activity.deal_id == _parse_uuid(deal_id, "deal_id"))
 
+    # Fenetre [date_from, date_to] inclusive, en plage sur created_at brut (colonne
+    # de partition) : le planner n'ouvre que les partitions mensuelles concernees.
+    if date_from:
+        query = query.where(
+            Activity.created_at >= _day_start(_parse_iso_date(date_from, "date_from"))
+        )
+    if date_to:
+        query = query.where(
+            Activity.created_at
+            < _day_start(_parse_iso_date(date_to, "date_to") + timedelta(days=1))
+        )
+
     # Comptage
     count_query = select(func.count()).select_from(query.subquery())
     total = (await db.execute(count_query)).scalar() or 0
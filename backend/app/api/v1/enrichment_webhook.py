@@ -2,7 +2,8 @@
 # FGA CRM - Enrichissement : endpoint webhook Icypeas (public, HMAC)
 # =============================================================================
 """Callback bulkDone d'Icypeas. Public (pas d'auth user) mais verifie par
-signature HMAC-SHA1 (secret Icypeas). Resout le bulk -> contacts CRM."""
+signature HMAC-SHA1 (secret Icypeas). Stage le payload et repond tout de suite ;
+la resolution du bulk -> contacts CRM se fait en tache Celery (par chunks)."""
 
 import hashlib
 import json
@@ -18,7 +19,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.db.session import get_db
 from app.services.enrichment.adapters.icypeas import verify_webhook_signature
-from app.services.enrichment.bulk_callback import process_bulk_callback
+from app.services.enrichment.bulk_callback import stage_bulk_callback
 
 logger = logging.getLogger(__name__)
 
@@ -102,6 +103,17 @@ async def _read_bounded_body(request: Request) -> bytes:
     return body
 
 
+def _enqueue_callback(callback_id: str) -> None:
+    """Planifie le traitement du callback stage. Broker KO : le drain beat
+    (enrichment_drain_callbacks_task) le reprendra — le payload est en base."""
+    from app.tasks.enrichment import enrichment_process_callback_task
+
+    try:
+        enrichment_process_callback_task.delay(callback_id)
+    except Exception:  # noqa: BLE001
+        logger.warning("[Icypeas webhook] envoi en file KO callback=%s (drain beat)", callback_id)
+
+
 @router.post("/webhook", status_code=200)
 async def icypeas_webhook(request: Request, db: AsyncSession = Depends(get_db)) -> dict:
     """Recoit le callback bulkDone Icypeas ({signature, timestamp, data})."""
@@ -140,5 +152,9 @@ async def icypeas_webhook(request: Request, db: AsyncSession = Depends(get_db))
             logger.warning("[Icypeas webhook] rejeu detecte (nonce deja vu)")
             raise HTTPException(status_code=401, detail="Rejeu détecté")
 
-    result = await process_bulk_callback(db, payload.get("data") or {})
+    # Accuse rapide : payload stage, traitement en tache de fond (un gros bulk ne
+    # fait plus expirer l'emetteur, qui re-livrait). Re-livraison = doublon no-op.
+    result = await stage_bulk_callback(db, payload.get("data") or {})
+    if result.get("callback_id") and not result.get("duplicate"):
+        _enqueue_callback(result["callback_id"])
     return {"received": True, **result}
@@ -4,19 +4,19 @@
 """Package du module GEO.
 
 RBAC :
-- Lecture (brands, prompts, runs, dashboard, competitors) : admin + manager
-- Ecriture (create/update/delete, trigger, health) : admin uniquement
+- Lecture (brands, prompts, runs, dashboard, competitors, file nocturne) : admin + manager
+- Ecriture (create/update/delete, trigger, health, cadences) : admin uniquement
 
 Le module GEO est cloisonne : les sales n'y ont pas acces du tout.
 
 Ce package agrege les sous-routers thematiques (brands, prompts, runs,
-dashboard, gaps, health) sans prefixe additionnel : les chemins declares
+dashboard, gaps, health, schedules) sans prefixe additionnel : les chemins declares
 dans chaque module sont les chemins finaux (montes sous /geo par router.py).
 """
 
 from fastapi import APIRouter
 
-from . import brands, dashboard, gaps, health, prompts, runs
+from . import brands, dashboard, gaps, health, prompts, runs, schedules
 
 router = APIRouter()
 
@@ -28,3 +28,4 @@ router.include_router(runs.router)
 router.include_router(dashboard.router)
 router.include_router(health.router)
 router.include_router(gaps.router)
+router.include_router(schedules.router)
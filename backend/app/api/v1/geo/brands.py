@@ -20,6 +20,7 @@ from app.schemas.geo import (
     GeoBrandUpdate,
     GeoEngine,
 )
+from app.services.geo.dashboard import bump_versions
 
 from ._common import (
     _get_brand_or_404,
@@ -173,6 +174,8 @@ async def update_brand(
         setattr(brand, key, value)
     await db.commit()
     await db.refresh(brand)
+    # Le dashboard embarque la fiche marque : invalider ses payloads en cache.
+    await bump_versions([brand.id])
     return GeoBrandResponse.model_validate(brand)
 
 
@@ -187,3 +190,4 @@ async def delete_brand(
     # Soft delete (active=False) — preserve l'historique des runs/metriques
     brand.active = False
     await db.commit()
+    await bump_versions([brand.id])
@@ -1,24 +1,33 @@
 # =============================================================================
 # FGA CRM - GEO Routes : Dashboard + competitors
 # =============================================================================
-"""Endpoints d'agregation : dashboard visibilite et concurrents d'une marque."""
+"""Endpoints d'agregation : dashboard visibilite et concurrents d'une marque.
 
-import uuid
-from collections import defaultdict
+Reponses servies depuis le cache materialise (services/geo/dashboard.py) avec
+ETag : un client qui renvoie If-None-Match recoit 304 sans recalcul ni lecture
+du payload (la version de la marque suffit a deriver l'ETag).
+"""
+
+from collections.abc import Awaitable, Callable
 from datetime import UTC, date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
-from app.models.geo import GeoMetricsDaily, GeoRun
 from app.models.user import User
-from app.schemas.geo import (
-    GeoBrandResponse,
-    GeoDashboardResponse,
-    GeoEngine,
-    GeoMetricsDailyResponse,
+from app.schemas.geo import GeoDashboardResponse, GeoEngine
+from app.services.geo.dashboard import (
+    DEFAULT_DASHBOARD_DAYS,
+    KIND_COMPETITORS,
+    KIND_DASHBOARD,
+    build_competitors,
+    build_dashboard,
+    cache_key,
+    cached_payload,
+    etag_for,
+    get_version,
 )
 
 from ._common import (
@@ -30,11 +39,8 @@ from ._common import (
 
 router = APIRouter()
 
-# Fenetre par defaut du dashboard si date_from non fourni
-DEFAULT_DASHBOARD_DAYS = 30
-
-# Top N pour competitors / sources
-TOP_N = 10
+# Donnees propres a l'org : pas de cache partage, revalidation a chaque vue.
+_CACHE_CONTROL = "private, no-cache"
 
 
 # ---------------------------------------------------------------------------
@@ -54,162 +60,77 @@ def _resolve_window(date_from: str | None, date_to: str | None) -> tuple[date, d
     return d_from, d_to
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {c.strip().removeprefix("W/") for c in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+async def _serve_cached(
+    request: Request,
+    key_args: tuple,
+    build: Callable[[], Awaitable[dict | list]],
+) -> Response:
+    """Servir un payload materialise (304 si l'ETag du client est a jour).
+
+    key_args = (brand_id, kind, engine, d_from, d_to). Redis indisponible ->
+    calcul direct sans ETag.
+    """
+    brand_id, kind, engine, d_from, d_to = key_args
+    version = await get_version(brand_id)
+    if version is None:
+        return JSONResponse(await build(), headers={"Cache-Control": _CACHE_CONTROL})
+
+    key = cache_key(brand_id, version, kind, engine, d_from, d_to)
+    headers = {"ETag": etag_for(key), "Cache-Control": _CACHE_CONTROL}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(await cached_payload(key, build), headers=headers)
+
+
 @router.get("/brands/{brand_id}/dashboard", response_model=GeoDashboardResponse)
 async def brand_dashboard(
+    request: Request,
     brand_id: str,
     engine: str = Query(...),
     date_from: str | None = Query(None),
     date_to: str | None = Query(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(_require_geo_access),
-) -> GeoDashboardResponse:
+) -> Response:
     bid = _parse_uuid(brand_id, "brand_id")
     if engine not in {e.value for e in GeoEngine}:
         raise HTTPException(status_code=422, detail="engine invalide")
     brand = await _get_brand_or_404(db, bid, user)
     d_from, d_to = _resolve_window(date_from, date_to)
 
-    # Metriques pre-calculees sur la fenetre
-    metrics = (
-        await db.execute(
-            select(GeoMetricsDaily)
-            .where(
-                and_(
-                    GeoMetricsDaily.brand_id == bid,
-                    GeoMetricsDaily.engine == engine,
-                    GeoMetricsDaily.day >= d_from,
-                    GeoMetricsDaily.day <= d_to,
-                )
-            )
-            .order_by(GeoMetricsDaily.day)
-            .limit(366)
-        )
-    ).scalars().all()
-
-    top_competitors, top_sources = await _aggregate_runs(
-        db, bid, engine, d_from, d_to
-    )
-
-    return GeoDashboardResponse(
-        brand=GeoBrandResponse.model_validate(brand),
-        engine=engine,
-        date_from=d_from,
-        date_to=d_to,
-        metrics=[GeoMetricsDailyResponse.model_validate(m) for m in metrics],
-        top_competitors=top_competitors,
-        top_sources=top_sources,
+    return await _serve_cached(
+        request,
+        (bid, KIND_DASHBOARD, engine, d_from, d_to),
+        lambda: build_dashboard(db, brand, engine, d_from, d_to),
     )
 
 
-async def _aggregate_runs(
-    db: AsyncSession,
-    brand_id: uuid.UUID,
-    engine: str,
-    d_from: date,
-    d_to: date,
-) -> tuple[list[dict], list[dict]]:
-    """Agreger concurrents + sources depuis les runs de la fenetre.
-
-    Volumes bornes (limite 5000 runs) — agregation Python portable PG/SQLite.
-    """
-    runs = (
-        await db.execute(
-            select(GeoRun.brands_found, GeoRun.citations)
-            .where(
-                and_(
-                    GeoRun.brand_id == brand_id,
-                    GeoRun.engine == engine,
-                    GeoRun.run_at
-                    >= datetime.combine(d_from, datetime.min.time(), tzinfo=UTC),
-                    GeoRun.run_at
-                    < datetime.combine(d_to + timedelta(days=1), datetime.min.time(), tzinfo=UTC),
-                )
-            )
-            .limit(5000)
-        )
-    ).all()
-
-    competitor_mentions: dict[str, int] = defaultdict(int)
-    source_counts: dict[str, int] = defaultdict(int)
-    total_mentions = 0
-
-    for brands_found, citations in runs:
-        for entry in brands_found or []:
-            nom = (entry.get("nom") if isinstance(entry, dict) else None) or ""
-            nom = nom.strip()
-            if nom:
-                competitor_mentions[nom] += 1
-                total_mentions += 1
-        for cit in citations or []:
-            domain = (cit.get("domain") if isinstance(cit, dict) else None) or ""
-            domain = domain.strip()
-            if domain:
-                source_counts[domain] += 1
-
-    top_competitors = [
-        {
-            "nom": nom,
-            "mentions": count,
-            "sov_share": round(count / total_mentions * 100, 2) if total_mentions else 0.0,
-        }
-        for nom, count in sorted(
-            competitor_mentions.items(), key=lambda kv: kv[1], reverse=True
-        )[:TOP_N]
-    ]
-    top_sources = [
-        {"domain": domain, "count": count}
-        for domain, count in sorted(
-            source_counts.items(), key=lambda kv: kv[1], reverse=True
-        )[:TOP_N]
-    ]
-    return top_competitors, top_sources
-
-
 @router.get("/brands/{brand_id}/competitors")
 async def brand_competitors(
+    request: Request,
     brand_id: str,
     engine: str | None = Query(None),
     date_from: str | None = Query(None),
     date_to: str | None = Query(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(_require_geo_access),
-) -> list[dict]:
+) -> Response:
     bid = _parse_uuid(brand_id, "brand_id")
     await _get_brand_or_404(db, bid, user)
     if engine is not None and engine not in {e.value for e in GeoEngine}:
         raise HTTPException(status_code=422, detail="engine invalide")
     d_from, d_to = _resolve_window(date_from, date_to)
 
-    # Si engine non fourni : agreger tous les moteurs (boucle sur les distincts)
-    engines: list[str]
-    if engine:
-        engines = [engine]
-    else:
-        engines = list(
-            (
-                await db.execute(
-                    select(GeoRun.engine)
-                    .where(GeoRun.brand_id == bid)
-                    .group_by(GeoRun.engine)
-                )
-            ).scalars().all()
-        )
-
-    merged: dict[str, int] = defaultdict(int)
-    total = 0
-    for eng in engines:
-        competitors, _ = await _aggregate_runs(db, bid, eng, d_from, d_to)
-        for c in competitors:
-            merged[c["nom"]] += c["mentions"]
-            total += c["mentions"]
-
-    return [
-        {
-            "nom": nom,
-            "mentions": count,
-            "sov_share": round(count / total * 100, 2) if total else 0.0,
-        }
-        for nom, count in sorted(merged.items(), key=lambda kv: kv[1], reverse=True)[
-            :TOP_N
-        ]
-    ]
+    return await _serve_cached(
+        request,
+        (bid, KIND_COMPETITORS, engine, d_from, d_to),
+        lambda: build_competitors(db, bid, engine, d_from, d_to),
+    )
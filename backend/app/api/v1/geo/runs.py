@@ -1,7 +1,7 @@
 # =============================================================================
-# FGA CRM - GEO Routes : Runs (trigger + list)
+# FGA CRM - GEO Routes : Runs (trigger + list + detail)
 # =============================================================================
-"""Endpoints de declenchement et de listing des runs GEO."""
+"""Endpoints de declenchement, de listing et de detail des runs GEO."""
 
 import logging
 import math
@@ -21,6 +21,7 @@ from app.schemas.geo import (
     GeoRunTriggerRequest,
     GeoRunTriggerResponse,
 )
+from app.services.geo.retention import load_raw_answer
 
 from ._common import (
     _engine_configured,
@@ -37,7 +38,7 @@ router = APIRouter()
 
 
 # ---------------------------------------------------------------------------
-# Runs — trigger + list
+# Runs — trigger + list + detail
 # ---------------------------------------------------------------------------
 
 @router.post("/runs/trigger", response_model=GeoRunTriggerResponse)
@@ -154,3 +155,23 @@ async def list_runs(
         size=size,
         pages=pages,
     )
+
+
+@router.get("/runs/{run_id}", response_model=GeoRunResponse)
+async def get_run(
+    run_id: str,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(_require_geo_access),
+) -> GeoRunResponse:
+    """Detail d'un run : raw_answer rehydrate depuis le stockage froid si archive."""
+    rid = _parse_uuid(run_id, "run_id")
+    run = await db.get(GeoRun, rid)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run GEO introuvable")
+    # Isolation via la marque parente (meme regle que list_runs)
+    await _get_brand_or_404(db, run.brand_id, user)
+
+    response = GeoRunResponse.model_validate(run)
+    if run.raw_answer_archived_at is not None:
+        response.raw_answer = await load_raw_answer(db, run)
+    return response
@@ -0,0 +1,129 @@
+# =============================================================================
+# FGA CRM - GEO Routes : Scheduler nocturne (cadences + file)
+# =============================================================================
+"""Cadences de mesure par marque x moteur et vue de la file nocturne.
+
+La planification et l'envoi sont faits par le beat (services/geo/scheduler.py) ;
+ces routes ne font que configurer les cadences et exposer la file.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.models.geo import GeoSchedule, GeoScheduledBatch
+from app.models.user import User
+from app.schemas.geo import (
+    GeoEngine,
+    GeoQueueResponse,
+    GeoScheduleResponse,
+    GeoScheduleUpsert,
+)
+from app.services.geo.scheduler import queue_overview
+
+from ._common import (
+    _engine_configured,
+    _get_brand_or_404,
+    _parse_uuid,
+    _require_geo_access,
+    _require_geo_admin,
+)
+
+router = APIRouter()
+
+
+@router.get("/brands/{brand_id}/schedules", response_model=list[GeoScheduleResponse])
+async def list_schedules(
+    brand_id: str,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(_require_geo_access),
+) -> list[GeoScheduleResponse]:
+    bid = _parse_uuid(brand_id, "brand_id")
+    await _get_brand_or_404(db, bid, user)
+    schedules = (
+        await db.execute(
+            select(GeoSchedule)
+            .where(GeoSchedule.brand_id == bid)
+            .order_by(GeoSchedule.engine)
+        )
+    ).scalars().all()
+    return [GeoScheduleResponse.model_validate(s) for s in schedules]
+
+
+@router.put("/brands/{brand_id}/schedules/{engine}", response_model=GeoScheduleResponse)
+async def upsert_schedule(
+    brand_id: str,
+    engine: str,
+    payload: GeoScheduleUpsert,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(_require_geo_admin),
+) -> GeoScheduleResponse:
+    bid = _parse_uuid(brand_id, "brand_id")
+    brand = await _get_brand_or_404(db, bid, user)
+    if engine not in {e.value for e in GeoEngine}:
+        raise HTTPException(status_code=422, detail="engine invalide")
+    if not _engine_configured(engine):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Moteur '{engine}' non configure (cle API absente cote serveur)",
+        )
+
+    schedule = (
+        await db.execute(
+            select(GeoSchedule).where(
+                and_(GeoSchedule.brand_id == bid, GeoSchedule.engine == engine)
+            )
+        )
+    ).scalar_one_or_none()
+    if schedule is None:
+        # L'org de la cadence est celle de la marque (isolation multi-tenant)
+        schedule = GeoSchedule(
+            organization_id=brand.organization_id, brand_id=bid, engine=engine
+        )
+        db.add(schedule)
+    schedule.every_days = payload.every_days
+    schedule.n_runs = payload.n_runs
+    schedule.active = payload.active
+    await db.commit()
+    await db.refresh(schedule)
+    return GeoScheduleResponse.model_validate(schedule)
+
+
+@router.delete("/brands/{brand_id}/schedules/{engine}", status_code=204)
+async def delete_schedule(
+    brand_id: str,
+    engine: str,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(_require_geo_admin),
+) -> None:
+    bid = _parse_uuid(brand_id, "brand_id")
+    await _get_brand_or_404(db, bid, user)
+    schedule = (
+        await db.execute(
+            select(GeoSchedule).where(
+                and_(GeoSchedule.brand_id == bid, GeoSchedule.engine == engine)
+            )
+        )
+    ).scalar_one_or_none()
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Cadence GEO introuvable")
+    # Les batches de la cadence partent avec elle (explicite : la cascade FK
+    # n'est pas active sous SQLite).
+    await db.execute(
+        delete(GeoScheduledBatch).where(GeoScheduledBatch.schedule_id == schedule.id)
+    )
+    await db.delete(schedule)
+    await db.commit()
+
+
+@router.get("/schedules/queue", response_model=GeoQueueResponse)
+async def schedule_queue(
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(_require_geo_access),
+) -> GeoQueueResponse:
+    """Profondeur de la file nocturne et eta de fin par moteur (org du user)."""
+    overview = await queue_overview(
+        db, organization_id=user.organization_id, all_orgs=user.is_superadmin
+    )
+    return GeoQueueResponse.model_validate(overview)
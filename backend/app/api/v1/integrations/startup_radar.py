@@ -36,6 +36,7 @@ router = APIRouter()
     status_code=202,
 )
 async def sync_startup_radar(
+    force: bool = False,
     current_user: User = Depends(get_current_manager),
 ):
     """Lancer une full sync Startup Radar → CRM en tache de fond.
@@ -48,6 +49,9 @@ async def sync_startup_radar(
 
     Single-flight : refuse (409) si une sync est deja en cours, pour ne pas
     marteler Startup Radar en double.
+
+    Sync delta : les entites dont le payload SR n'a pas change sont ignorees.
+    ?force=true reapplique tout (resync complete).
     """
     job_id = str(uuid.uuid4())
     started_at = datetime.now(UTC).isoformat()
@@ -72,7 +76,7 @@ async def sync_startup_radar(
     # Enqueue. Si la mise en file echoue, liberer le verrou + marquer failed
     # (DC2 — pas de blocage muet).
     try:
-        full_sync_task.delay(str(current_user.id), job_id, started_at)
+        full_sync_task.delay(str(current_user.id), job_id, started_at, force)
     except Exception as e:
         logger.error("[Integrations] Enqueue full sync echoue: %s", e)
         # Ecrire le statut 'failed' AVANT de liberer le verrou : si l'ecriture
@@ -140,10 +144,13 @@ async def sync_recent_funding(
     return SyncResultResponse(
         companies_created=result.companies_created,
         companies_updated=result.companies_updated,
+        companies_unchanged=result.companies_unchanged,
         contacts_created=result.contacts_created,
         contacts_updated=result.contacts_updated,
+        contacts_unchanged=result.contacts_unchanged,
         investors_created=result.investors_created,
         investors_updated=result.investors_updated,
+        investors_unchanged=result.investors_unchanged,
         audits_created=result.audits_created,
         funding_activities_created=result.funding_activities_created,
         qualification_tasks_created=result.qualification_tasks_created,
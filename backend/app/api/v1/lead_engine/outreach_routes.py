@@ -36,10 +36,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Volume borne par periode + org ; garde-fou dur contre un backfill anormal (DC1)
-_FUNNEL_SCAN_CAP = 5000
-
-
 async def _resolve_draft_contact(
     db: AsyncSession, signal: LeadSignal, user: User, contact_id: str | None
 ) -> Contact:
@@ -201,32 +197,40 @@ async def get_funnel(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_manager),
 ) -> LeadFunnelResponse:
-    """Compteurs du funnel par play sur la periode (detected/actioned/drafted/sent)."""
+    """Compteurs du funnel par play sur la periode (detected/actioned/drafted/sent).
+
+    Agrege en SQL (une requete groupee par type) : aucune ligne remontee,
+    aucun plafond de volume.
+    """
     since = datetime.now(UTC) - timedelta(days=period_days)
+    drafted = LeadSignal.payload_json["draft"].as_string().is_not(None)
+    sent = LeadSignal.payload_json[("action", "kind")].as_string() == "outreach"
     rows = (
         await db.execute(
-            select(LeadSignal.signal_type, LeadSignal.status, LeadSignal.payload_json)
+            select(
+                LeadSignal.signal_type,
+                func.count(),
+                func.sum(case((LeadSignal.status == "actioned", 1), else_=0)),
+                func.sum(case((drafted, 1), else_=0)),
+                func.sum(case((sent, 1), else_=0)),
+            )
             .where(
                 LeadSignal.organization_id == user.organization_id,
                 LeadSignal.created_at >= since,
             )
-            .limit(_FUNNEL_SCAN_CAP)
+            .group_by(LeadSignal.signal_type)
         )
     ).all()
 
     funnels = {t: {"detected": 0, "actioned": 0, "drafted": 0, "sent": 0} for t in SIGNAL_TYPES}
-    for signal_type, status, payload in rows:
-        f = funnels.get(signal_type)
-        if f is None:
-            continue
-        payload = payload or {}
-        f["detected"] += 1
-        if status == "actioned":
-            f["actioned"] += 1
-        if "draft" in payload:
-            f["drafted"] += 1
-        if (payload.get("action") or {}).get("kind") == "outreach":
-            f["sent"] += 1
+    for signal_type, detected, actioned, drafted_n, sent_n in rows:
+        if signal_type in funnels:
+            funnels[signal_type] = {
+                "detected": detected,
+                "actioned": actioned or 0,
+                "drafted": drafted_n or 0,
+                "sent": sent_n or 0,
+            }
 
     return LeadFunnelResponse(
         p1_mmf_gap=PlayFunnel(**funnels["mmf_gap"]),
@@ -5,11 +5,13 @@
 les endpoints existants — orchestrees cote client ; le PATCH ne fait que
 tracer la transition (payload_json.action, machine a etats DC5)."""
 
+import base64
 import logging
+import uuid
 from datetime import UTC, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select
+from sqlalchemy import case, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.lead_engine._common import get_signal_or_404
@@ -41,36 +43,53 @@ _STATUS_SET = set(SIGNAL_STATUSES)
 _TYPE_SET = set(SIGNAL_TYPES)
 
 
-async def _compute_stats(db: AsyncSession, org_id) -> LeadSignalStats:
-    """KPI de l'inbox : backlog `new` par type + actions des 7 derniers jours."""
-    since_7d = datetime.now(UTC) - timedelta(days=7)
+def _encode_cursor(signal: LeadSignal) -> str:
+    raw = f"{signal.created_at.isoformat()}|{signal.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
 
-    new_rows = (
-        await db.execute(
-            select(LeadSignal.signal_type, func.count())
-            .where(LeadSignal.organization_id == org_id, LeadSignal.status == "new")
-            .group_by(LeadSignal.signal_type)
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Curseur opaque (created_at, id) du dernier signal de la page precedente."""
+    try:
+        created_at, signal_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(signal_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Curseur invalide") from None
+
+
+async def _count_by_type_status(db: AsyncSession, org_id) -> list[tuple[str, str, int, int]]:
+    """Compteurs (type, statut) de l'org en UNE requete groupee : total, et
+    modifies dans les 7 derniers jours. Couvre les KPI de l'inbox ET le total
+    de la liste (les filtres de la liste sont exactement ces deux colonnes)."""
+    since_7d = datetime.now(UTC) - timedelta(days=7)
+    rows = await db.execute(
+        select(
+            LeadSignal.signal_type,
+            LeadSignal.status,
+            func.count(),
+            func.sum(case((LeadSignal.updated_at >= since_7d, 1), else_=0)),
         )
-    ).all()
-    new_by_type = {row[0]: row[1] for row in new_rows}
-
-    async def _count_since(status: str) -> int:
-        return (
-            await db.execute(
-                select(func.count()).where(
-                    LeadSignal.organization_id == org_id,
-                    LeadSignal.status == status,
-                    LeadSignal.updated_at >= since_7d,
-                )
-            )
-        ).scalar() or 0
+        .where(LeadSignal.organization_id == org_id)
+        .group_by(LeadSignal.signal_type, LeadSignal.status)
+    )
+    return [(t, st, n, recent or 0) for t, st, n, recent in rows.all()]
+
+
+def _compute_stats(counts: list[tuple[str, str, int, int]]) -> LeadSignalStats:
+    """KPI de l'inbox : backlog `new` par type + actions des 7 derniers jours."""
+    new_by_type: dict[str, int] = {}
+    recent_by_status: dict[str, int] = {}
+    for signal_type, status, n, recent in counts:
+        if status == "new":
+            new_by_type[signal_type] = new_by_type.get(signal_type, 0) + n
+        recent_by_status[status] = recent_by_status.get(status, 0) + recent
 
     return LeadSignalStats(
         new_total=sum(new_by_type.values()),
         new_funding=new_by_type.get("funding_detected", 0),
         new_mmf=new_by_type.get("mmf_gap", 0),
-        actioned_7d=await _count_since("actioned"),
-        ignored_7d=await _count_since("ignored"),
+        actioned_7d=recent_by_status.get("actioned", 0),
+        ignored_7d=recent_by_status.get("ignored", 0),
     )
 
 
@@ -80,31 +99,48 @@ async def list_signals(
     signal_type: str | None = Query(None),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=200),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_manager),
 ) -> LeadSignalListResponse:
-    """Signal Inbox : flux chronologique des signaux de l'org (filtrable)."""
+    """Signal Inbox : flux chronologique des signaux de l'org (filtrable).
+
+    Pagination keyset : `cursor` (renvoye en `next_cursor`) reprend apres le
+    dernier signal de la page precedente — cout constant quelle que soit la
+    profondeur. `page` (OFFSET) reste accepte pour la navigation numerotee.
+    """
+    status = status if status in _STATUS_SET else None
+    signal_type = signal_type if signal_type in _TYPE_SET else None
     base = select(LeadSignal).where(LeadSignal.organization_id == user.organization_id)
-    if status in _STATUS_SET:
+    if status:
         base = base.where(LeadSignal.status == status)
-    if signal_type in _TYPE_SET:
+    if signal_type:
         base = base.where(LeadSignal.signal_type == signal_type)
 
-    total = (await db.execute(select(func.count()).select_from(base.subquery()))).scalar() or 0
-    rows = (
-        await db.execute(
-            base.order_by(LeadSignal.created_at.desc())
-            .offset((page - 1) * size)
-            .limit(size)
-        )
-    ).scalars().all()
+    # Tri total (created_at, id) : deux signaux du meme instant ne sont ni
+    # sautes ni dupliques d'une page a l'autre
+    query = base.order_by(LeadSignal.created_at.desc(), LeadSignal.id.desc())
+    if cursor:
+        query = query.where(tuple_(LeadSignal.created_at, LeadSignal.id) < _decode_cursor(cursor))
+    else:
+        query = query.offset((page - 1) * size)
+    rows = (await db.execute(query.limit(size + 1))).scalars().all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    counts = await _count_by_type_status(db, user.organization_id)
+    total = sum(
+        n for t, st, n, _ in counts
+        if (status is None or st == status) and (signal_type is None or t == signal_type)
+    )
 
     return LeadSignalListResponse(
         items=[LeadSignalResponse.model_validate(s) for s in rows],
         total=total,
         page=page,
         size=size,
-        stats=await _compute_stats(db, user.organization_id),
+        next_cursor=_encode_cursor(rows[-1]) if has_more else None,
+        stats=_compute_stats(counts),
     )
 
 
@@ -145,10 +181,10 @@ async def run_scan(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_manager),
 ) -> LeadScanResponse:
-    """Scan manuel de l'org courante (sans attendre le beat horaire)."""
+    """Scan manuel complet de l'org courante (sans attendre le beat horaire)."""
     if not settings.lead_engine_enabled:
         raise HTTPException(status_code=503, detail="Lead Engine desactive")
-    created = await scan_org(db, user.organization_id)
+    created = await scan_org(db, user.organization_id, full=True)
     logger.info("[LeadEngine] Scan manuel org %s par %s : %s",
                 user.organization_id, user.id, created)
     return LeadScanResponse(created=created)
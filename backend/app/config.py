@@ -31,6 +31,8 @@ class Settings(BaseSettings):
     database_url: str = "postgresql+asyncpg://fga_crm:devpassword@db:5432/fga_crm"
     database_pool_size: int = 5
     database_pool_max_overflow: int = 10
+    # Partitions mensuelles (geo_runs, activities) creees a l'avance par le beat
+    partitions_months_ahead: int = 3
 
     # Redis
     redis_url: str = "redis://redis:6379/0"
@@ -72,6 +74,22 @@ class Settings(BaseSettings):
     startup_radar_api_key: str | None = None
     startup_radar_email: str | None = None
     startup_radar_password: str | None = None
+    # Listes paginees : pages lues en parallele (fenetre) sur un pool de connexions,
+    # plafond de debit vers SR (requetes/s, 0 = illimite), retries par requete GET.
+    startup_radar_page_concurrency: int = 4
+    startup_radar_max_rps: float = 20.0
+    startup_radar_max_retries: int = 3
+    # Phase audits de la full sync : startups dont les audits sont lus en parallele.
+    startup_radar_audit_concurrency: int = 8
+    # Full sync en flux : point de reprise (phase + page) plus vieux que ce delai
+    # ignore (sync reprise de zero).
+    startup_radar_checkpoint_max_age_hours: int = 24
+    # Token SR partage (Redis, cle = empreinte des credentials) entre syncs,
+    # tasks et workers. Duree de vie si SR ne la donne pas (expires_in / exp
+    # JWT) ; token considere expire `margin` secondes avant l'echeance.
+    startup_radar_token_cache_enabled: bool = True
+    startup_radar_token_ttl_seconds: int = 3600
+    startup_radar_token_refresh_margin_seconds: int = 60
 
     # Nomo-IA Integration (incoming webhook from Marketing Assistant)
     nomo_api_key: str | None = None
@@ -99,6 +117,30 @@ class Settings(BaseSettings):
     geo_runs_per_prompt: int = 3               # N runs par prompt par defaut
     geo_raw_answer_max_chars: int = 4000       # troncature avant stockage
     geo_extract_input_max_chars: int = 2000    # troncature avant envoi a l'extracteur
+    # Retention : raw_answer des runs plus vieux que N jours -> geo_run_archives
+    geo_raw_answer_hot_days: int = 90
+    geo_archive_batch_size: int = 500          # runs archives par transaction
+    # Cache materialise du dashboard (invalide par version de marque ; le TTL ne
+    # sert qu'a liberer les cles des versions caduques)
+    geo_dashboard_cache_ttl_seconds: int = 172800
+    # Scheduler nocturne : fenetre (heure locale Europe/Paris, HH:MM) sur laquelle
+    # les batches planifies sont etales, et budget de debit par moteur (runs/heure).
+    # Moteur absent du dict -> geo_schedule_default_runs_per_hour.
+    geo_schedule_window_start: str = "01:00"
+    geo_schedule_window_end: str = "06:00"
+    geo_engine_runs_per_hour: dict[str, int] = {
+        "perplexity": 120,
+        "openai": 300,
+        "gemini": 300,
+        "claude": 200,
+        "google_aio": 60,
+    }
+    geo_schedule_default_runs_per_hour: int = 60
+    # Reaper de la file : batch queued sans demarrage / running sans fin au-dela
+    # de ces delais (worker mort, message perdu) -> replanifie, failed apres N envois.
+    geo_schedule_stale_queued_minutes: int = 30
+    geo_schedule_stale_running_minutes: int = 240
+    geo_schedule_max_attempts: int = 3
     # Integration SR : plafond journalier de mesures audit-visibilite par cle service
     geo_audit_daily_quota: int = 100
 
@@ -133,6 +175,18 @@ class Settings(BaseSettings):
     lead_engine_funding_window_days: int = 30       # levee plus recente -> funding_detected
     lead_engine_inbound_window_days: int = 7        # contact entrant recent -> inbound_new
     lead_engine_dedup_days: int = 90                # anti re-declenchement par dedup_key
+    # Scan horaire incremental (lignes modifiees depuis le watermark, moins une
+    # marge : transactions committees apres le debut du scan precedent).
+    lead_engine_watermark_overlap_minutes: int = 5
+    # Scan de toutes les orgs : orgs scannees en parallele (une session chacune)
+    # et budget de temps par org (depasse -> scan annule, repris au run suivant).
+    lead_engine_scan_concurrency: int = 4
+    lead_engine_org_scan_timeout_seconds: int = 120
+    # Detection sur ecriture (outbox lead_events -> consumer Celery) : signaux
+    # en secondes, le scan horaire ne sert plus que de filet de rattrapage.
+    lead_engine_events_enabled: bool = True
+    lead_engine_event_batch_size: int = 500        # evenements par passe du consumer
+    lead_engine_event_max_attempts: int = 5        # au-dela : failed (rattrape par le scan)
 
     # Enrichissement emails B2B (feature Compass). Icypeas = moteur principal ;
     # si cle absente -> provider mock (deployable/testable sans cle).
@@ -151,6 +205,33 @@ class Settings(BaseSettings):
     enrichment_retention_days: int = 1095           # RGPD : retention 3 ans
     enrichment_second_pass_verify: float = 0.85     # seuil 2e passe (catch_all/risky)
     enrichment_catchall_accept: float = 0.90        # seuil acceptation catch_all
+    # Pipeline inline : societes traitees en parallele (1 session DB par worker)
+    # et personnes en vol par societe. Appels provider max = produit des deux.
+    enrichment_company_concurrency: int = 4
+    enrichment_person_concurrency: int = 3
+    # Callback bulk Icypeas : payload stage puis traite par chunks (1 transaction
+    # par chunk). Un callback "processing" sans progres depuis N min est repris ;
+    # failed (alerte) apres N traitements en echec.
+    enrichment_callback_chunk_size: int = 500
+    enrichment_callback_stale_minutes: int = 10
+    enrichment_callback_max_attempts: int = 5
+    # Cache partage des resolutions API gouv (siren, nom, candidats domaine).
+    # Negatif (introuvable / site muet) : TTL court. Pre-chauffage nocturne.
+    enrichment_gouv_cache_ttl_days: int = 30
+    enrichment_gouv_cache_negative_ttl_days: int = 3
+    enrichment_gouv_prewarm_limit: int = 500
+    # Job inline "running" sans progres depuis N min (worker mort) : repris par le
+    # beat depuis ses checkpoints (societes traitees sautees, credits reportes).
+    enrichment_job_stale_minutes: int = 20
+    # Heartbeat des phases longues hors workers societe (contacts inline, sourcing
+    # du bulk) : updated_at rafraichi au plus toutes les N s (<< stale_minutes).
+    enrichment_job_heartbeat_seconds: int = 60
+    # Cache partage des verifications email (par adresse) + comportement des
+    # domaines (catch_all : plus de verification par adresse). valid : TTL long ;
+    # statuts incertains (risky / invalid / catch_all par adresse) : TTL court.
+    enrichment_verify_cache_ttl_days: int = 30
+    enrichment_verify_cache_uncertain_ttl_days: int = 7
+    enrichment_mail_domain_ttl_days: int = 30
 
     # MinIO (S3-compatible)
     minio_endpoint: str = "minio:9000"
@@ -0,0 +1,129 @@
+# =============================================================================
+# FGA CRM - Partitionnement mensuel (geo_runs, activities)
+# =============================================================================
+"""Maintenance des partitions RANGE mensuelles (PostgreSQL uniquement).
+
+geo_runs (cle run_at) et activities (cle created_at) sont partitionnees par mois
+depuis la migration partition_monthly_001. Chaque table a aussi une partition
+DEFAULT (filet : une ligne hors plage n'est jamais rejetee), qui doit rester vide.
+
+La task beat `partitions_ensure_task` cree a l'avance les partitions des mois a
+venir (`partitions_months_ahead`). Idempotent (CREATE TABLE IF NOT EXISTS).
+
+Elagage (partition pruning) : les requetes doivent filtrer la colonne de
+partition BRUTE par une plage (>= debut, < fin) — jamais via cast/func.date(), que
+le planner ne sait pas elaguer. Cf. scorer.run_at_range.
+
+En SQLite (tests) les tables sont classiques : les fonctions ici sont des no-op.
+"""
+
+import logging
+from datetime import UTC, date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# table partitionnee -> colonne de partition (source unique — DC8)
+PARTITIONED_TABLES: dict[str, str] = {
+    "geo_runs": "run_at",
+    "activities": "created_at",
+}
+
+
+# Index UNIQUE locaux a chaque partition. Un index unique sur la table mere doit
+# contenir la cle de partition ; l'anti-doublon des runs porte sur le JOUR de
+# run_at (expression) -> pose partition par partition. Un jour tombant dans une
+# seule partition mensuelle, l'unicite locale equivaut a l'unicite globale.
+LOCAL_UNIQUE_INDEXES: dict[str, tuple[str, str]] = {
+    "geo_runs": (
+        "prompt_engine_idx_day",
+        "(prompt_id, engine, run_index, ((run_at AT TIME ZONE 'UTC')::date))",
+    ),
+}
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """Premier jour du mois `months` mois apres celui de `day`."""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Nom de la partition mensuelle : geo_runs_y2026m07."""
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_ddl(table: str, month: date) -> str:
+    """DDL idempotent d'une partition mensuelle [mois, mois+1) en UTC."""
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"Table non partitionnee : {table}")
+    start = month_start(month)
+    end = add_months(start, 1)
+    # table/nom issus de PARTITIONED_TABLES (constante) -> pas d'injection.
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, start)} "
+        f"PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') "
+        f"TO ('{end.isoformat()} 00:00:00+00')"
+    )
+
+
+def local_index_ddl(table: str, month: date) -> str | None:
+    """DDL de l'index unique local d'une partition (None si la table n'en a pas)."""
+    spec = LOCAL_UNIQUE_INDEXES.get(table)
+    if spec is None:
+        return None
+    suffix, columns = spec
+    name = partition_name(table, month_start(month))
+    return f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{name}_{suffix} ON {name} {columns}"
+
+
+def _is_postgres(db: AsyncSession) -> bool:
+    # Dialecte de la connexion reelle (pas settings.database_url : les tests
+    # SQLite gardent l'URL PostgreSQL par defaut).
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def ensure_future_partitions(
+    db: AsyncSession,
+    months_ahead: int | None = None,
+    today: date | None = None,
+) -> list[str]:
+    """Creer les partitions du mois courant + `months_ahead` mois suivants.
+
+    Retourne les noms de partitions garanties presentes. Une erreur sur une
+    partition (ex: lignes deja tombees dans DEFAULT pour ce mois) est loguee et
+    n'empeche pas les autres (DC2 — pas d'echec muet, pas de blocage global).
+    """
+    if not _is_postgres(db):
+        return []
+
+    ahead = months_ahead if months_ahead is not None else settings.partitions_months_ahead
+    current = month_start(today or datetime.now(UTC).date())
+    ensured: list[str] = []
+    for table in PARTITIONED_TABLES:
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            try:
+                await db.execute(text(partition_ddl(table, month)))
+                index_ddl = local_index_ddl(table, month)
+                if index_ddl is not None:
+                    await db.execute(text(index_ddl))
+                await db.commit()
+                ensured.append(partition_name(table, month))
+            except Exception as exc:  # noqa: BLE001 — on continue sur les autres mois
+                await db.rollback()
+                logger.error(
+                    "[Partitions] creation %s echouee : %s",
+                    partition_name(table, month), exc,
+                )
+    logger.info("[Partitions] %d partitions garanties", len(ensured))
+    return ensured
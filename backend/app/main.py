@@ -10,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
 from app.config import settings
 from app.db.session import close_db, init_db
+from app.services.lead_engine import events  # noqa: F401 — hooks outbox Lead Engine
 
 
 @asynccontextmanager
@@ -12,11 +12,17 @@ from app.models.deal import Deal
 from app.models.email_template import EmailTemplate
 from app.models.enrichment import (
     EnrichmentBulk,
+    EnrichmentBulkCallback,
     EnrichmentBulkItem,
+    EnrichmentDomainCheck,
     EnrichmentEmailVerification,
+    EnrichmentGouvCache,
     EnrichmentJob,
+    EnrichmentJobCheckpoint,
+    EnrichmentMailDomain,
     EnrichmentProvenance,
     EnrichmentSuppression,
+    EnrichmentVerificationCache,
 )
 from app.models.geo import (
     GeoAuditJob,
@@ -24,10 +30,14 @@ from app.models.geo import (
     GeoMetricsDaily,
     GeoPrompt,
     GeoRun,
+    GeoRunArchive,
+    GeoSchedule,
+    GeoScheduledBatch,
 )
-from app.models.lead_engine import LeadSignal
+from app.models.lead_engine import LeadEvent, LeadScanWatermark, LeadSignal
 from app.models.mcp_tool_usage import McpToolUsage
 from app.models.organization import Organization
+from app.models.startup_radar import StartupRadarSyncCheckpoint
 from app.models.tag import Tag, TagAssignment
 from app.models.task import Task
 from app.models.trends import (
@@ -58,6 +68,12 @@ __all__ = [
     "EnrichmentEmailVerification",
     "EnrichmentBulk",
     "EnrichmentBulkItem",
+    "EnrichmentBulkCallback",
+    "EnrichmentGouvCache",
+    "EnrichmentDomainCheck",
+    "EnrichmentJobCheckpoint",
+    "EnrichmentVerificationCache",
+    "EnrichmentMailDomain",
     "Activity",
     "Task",
     "Tag",
@@ -66,6 +82,9 @@ __all__ = [
     "GeoBrand",
     "GeoPrompt",
     "GeoRun",
+    "GeoRunArchive",
+    "GeoSchedule",
+    "GeoScheduledBatch",
     "GeoMetricsDaily",
     "GeoAuditJob",
     "McpToolUsage",
@@ -78,4 +97,7 @@ __all__ = [
     "AiWorkflowRun",
     "AiInsight",
     "LeadSignal",
+    "LeadEvent",
+    "LeadScanWatermark",
+    "StartupRadarSyncCheckpoint",
 ]
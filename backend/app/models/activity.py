@@ -5,7 +5,7 @@
 import uuid
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Index, String, Text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -22,6 +22,9 @@ ACTIVITY_TYPES = ["email", "call", "meeting", "note", "linkedin", "task", "audit
 
 
 class Activity(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
+    # PostgreSQL : partitionnee par mois sur created_at (migration
+    # partition_monthly_001). PK physique (id, created_at), mapper sur id seul.
+    # Les listes bornees dans le temps filtrent created_at par plage (elagage).
     __tablename__ = "activities"
 
     type: Mapped[str] = mapped_column(String(50), nullable=False, index=True)  # email, call, meeting, note, linkedin
@@ -49,5 +52,12 @@ class Activity(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
     deal: Mapped[Optional["Deal"]] = relationship(back_populates="activities")
     user: Mapped["User"] = relationship(back_populates="activities")
 
+    __table_args__ = (
+        # Tri "plus recentes d'abord" + fenetres de dates (listes, dashboard)
+        Index("ix_activities_created_at", "created_at"),
+        # Scan incremental Lead Engine : lignes modifiees depuis le watermark de l'org
+        Index("ix_activities_org_updated_at", "organization_id", "updated_at"),
+    )
+
     def __repr__(self) -> str:
         return f"<Activity {self.type}: {self.subject}>"
@@ -11,6 +11,7 @@ from sqlalchemy import (
     Boolean,
     Date,
     ForeignKey,
+    Index,
     String,
     Text,
     UniqueConstraint,
@@ -69,6 +70,9 @@ class Company(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
 
     # Startup Radar link — unicite SCOPEE par organisation (voir __table_args__).
     startup_radar_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Empreinte du dernier payload SR applique (projection des champs mappes) :
+    # payload inchange -> ligne ignoree par la sync (cf. startup_radar_sync._content_hash).
+    startup_radar_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
     # True si le domaine a ete trouve/valide par Icypeas (email pro resolu sur ce
     # domaine) — vs heuristique nom->domaine (non confirmee).
@@ -104,6 +108,8 @@ class Company(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
     __table_args__ = (
         UniqueConstraint("organization_id", "domain", name="uq_companies_org_domain"),
         UniqueConstraint("organization_id", "startup_radar_id", name="uq_companies_org_startup_radar_id"),
+        # Scan incremental Lead Engine : lignes modifiees depuis le watermark de l'org
+        Index("ix_companies_org_updated_at", "organization_id", "updated_at"),
     )
 
     def __repr__(self) -> str:
@@ -6,7 +6,15 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -80,6 +88,9 @@ class Contact(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
 
     # Integration — Startup Radar. Unicite SCOPEE par org (voir __table_args__).
     startup_radar_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Empreinte du dernier payload SR applique (projection des champs mappes) :
+    # payload inchange -> ligne ignoree par la sync (cf. startup_radar_sync._content_hash).
+    startup_radar_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
     # Enrichment metadata (synced from Startup Radar multi-source pipeline)
     # enrichment_source : sirene, scraping, scraped_founders, manual, etc.
@@ -105,6 +116,8 @@ class Contact(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
     # globale — sinon deux orgs ne peuvent pas importer le meme lead SR).
     __table_args__ = (
         UniqueConstraint("organization_id", "startup_radar_id", name="uq_contacts_org_startup_radar_id"),
+        # Scan incremental Lead Engine : lignes modifiees depuis le watermark de l'org
+        Index("ix_contacts_org_updated_at", "organization_id", "updated_at"),
     )
 
     def __repr__(self) -> str:
@@ -6,7 +6,7 @@ import uuid
 from datetime import date, datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -111,5 +111,10 @@ class Deal(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
     # Deal (reponses via champs explicites / selectinload cible). Evite l'eager-load.
     activities: Mapped[list["Activity"]] = relationship(back_populates="deal", lazy="select")
 
+    __table_args__ = (
+        # Scan incremental Lead Engine : deals modifies depuis le watermark de l'org
+        Index("ix_deals_org_updated_at", "organization_id", "updated_at"),
+    )
+
     def __repr__(self) -> str:
         return f"<Deal {self.title} ({self.stage})>"
@@ -22,6 +22,7 @@ from sqlalchemy import (
     Integer,
     Numeric,
     Text,
+    UniqueConstraint,
     func,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
@@ -44,6 +45,12 @@ LEGAL_BASIS_LEGITIMATE_INTEREST = "legitimate_interest"
 # Bulk Icypeas (webhook/async) : soumis -> en attente des callbacks -> termine.
 ENRICHMENT_BULK_STATUSES = ["submitted", "awaiting_results", "done", "failed"]
 ENRICHMENT_BULK_ITEM_STATUSES = ["pending", "found", "not_found", "error"]
+# Callback bulkDone stage : recu -> en traitement (par chunks) -> traite.
+ENRICHMENT_CALLBACK_STATUSES = ["received", "processing", "done"]
+# Checkpoints de job inline : societe (sourcee -> traitee | echouee) et personne
+# (lookup provider fait). Reprise apres crash worker sans re-depense.
+ENRICHMENT_CHECKPOINT_KINDS = ["company", "person"]
+ENRICHMENT_CHECKPOINT_STATUSES = ["sourced", "done", "failed"]
 
 
 class EnrichmentJob(Base, UUIDMixin, TimestampMixin):
@@ -172,6 +179,9 @@ class EnrichmentBulk(Base, UUIDMixin, TimestampMixin):
     total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     found: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Compteurs incrementes par chunk au callback (done/found/valid) : les stats
+    # du job s'agregent sur les bulks, sans recompter les items.
+    valid: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
@@ -207,3 +217,148 @@ class EnrichmentBulkItem(Base, UUIDMixin, TimestampMixin):
 
     def __repr__(self) -> str:
         return f"<EnrichmentBulkItem {self.external_id} {self.status}>"
+
+
+class EnrichmentBulkCallback(Base, UUIDMixin, TimestampMixin):
+    """Payload brut d'un callback bulkDone, stage a la reception (accuse rapide)
+    puis traite par chunks en tache de fond. Unicite (bulk, hash du payload) :
+    une re-livraison identique ne cree pas de second traitement."""
+
+    __tablename__ = "enrichment_bulk_callbacks"
+
+    organization_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True, index=True
+    )
+    bulk_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("enrichment_bulks.id", ondelete="CASCADE"), nullable=False
+    )
+    payload_hash: Mapped[str] = mapped_column(Text, nullable=False)
+    payload_json: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    # received | processing | done | failed (enrichment_callback_max_attempts atteint)
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="received", index=True)
+    # Traitements demarres (claim) : borne les reprises d'un callback toujours en echec
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    items_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Curseur de reprise : resultats deja traites (chunks commites)
+    items_processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("bulk_id", "payload_hash", name="uq_enrichment_bulk_callbacks_bulk_hash"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EnrichmentBulkCallback {self.bulk_id} {self.status} {self.items_processed}/{self.items_total}>"
+
+
+class EnrichmentGouvCache(Base, UUIDMixin, TimestampMixin):
+    """Cache partage (toutes orgs : donnees publiques) des resolutions de l'API
+    gouv recherche-entreprises. kind = siren | name ; key normalisee.
+    payload_json NULL = cache negatif (introuvable), TTL plus court."""
+
+    __tablename__ = "enrichment_gouv_cache"
+
+    kind: Mapped[str] = mapped_column(Text, nullable=False)
+    key: Mapped[str] = mapped_column(Text, nullable=False)
+    # Company serialisee (ports.Company) ; NULL = reponse vide de l'API
+    payload_json: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    __table_args__ = (
+        UniqueConstraint("kind", "key", name="uq_enrichment_gouv_cache_kind_key"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EnrichmentGouvCache {self.kind}:{self.key}>"
+
+
+class EnrichmentDomainCheck(Base, UUIDMixin, TimestampMixin):
+    """Cache partage des candidats domaine testes (gouv._domain_candidates) :
+    le site repond-il ? Un candidat mort est retente apres le TTL negatif."""
+
+    __tablename__ = "enrichment_domain_checks"
+
+    domain: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+    responds: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<EnrichmentDomainCheck {self.domain} {self.responds}>"
+
+
+class EnrichmentVerificationCache(Base, UUIDMixin, TimestampMixin):
+    """Cache partage (toutes orgs) des resultats de verification par adresse.
+    Pas de lien contact/org : adresse -> statut du verifier. TTL par statut
+    (valid long, statuts incertains courts)."""
+
+    __tablename__ = "enrichment_verification_cache"
+
+    email: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+    status: Mapped[str] = mapped_column(Text, nullable=False)  # VERIFICATION_STATUSES
+    confidence: Mapped[float | None] = mapped_column(Numeric(4, 3), nullable=True)
+    source: Mapped[str] = mapped_column(Text, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<EnrichmentVerificationCache {self.email} {self.status}>"
+
+
+class EnrichmentMailDomain(Base, UUIDMixin, TimestampMixin):
+    """Comportement SMTP d'un domaine appris des verifications : catch_all
+    (accepte toute adresse -> verifier une adresse n'apprend rien) et
+    accepts_mail (au moins une adresse deliverable : MX fonctionnel ; NULL =
+    inconnu). Un domaine catch_all court-circuite les verifications par adresse."""
+
+    __tablename__ = "enrichment_mail_domains"
+
+    domain: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+    catch_all: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    accepts_mail: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # Confiance du verifier sur le catch_all (seuil enrichment_catchall_accept)
+    confidence: Mapped[float | None] = mapped_column(Numeric(4, 3), nullable=True)
+    source: Mapped[str | None] = mapped_column(Text, nullable=True)
+    checks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<EnrichmentMailDomain {self.domain} catch_all={self.catch_all}>"
+
+
+class EnrichmentJobCheckpoint(Base, UUIDMixin, TimestampMixin):
+    """Avancement durable d'un job inline (reprise apres crash / retry).
+
+    kind=company : sourced (domaine + personnes, credits du sourcing) puis done
+    (committe AVEC les contacts de la societe) ou failed. kind=person : resultat
+    du lookup email/verif (credits factures). credits = depense de l'unite :
+    leur somme re-alimente le ledger a la reprise (jamais de double debit).
+    """
+
+    __tablename__ = "enrichment_job_checkpoints"
+
+    organization_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True, index=True
+    )
+    job_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("enrichment_jobs.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(Text, nullable=False)
+    key: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="done")
+    payload_json: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    credits: Mapped[float] = mapped_column(Numeric(12, 3), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "kind", "key", name="uq_enrichment_job_checkpoints_job_kind_key"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EnrichmentJobCheckpoint {self.job_id} {self.kind}:{self.key} {self.status}>"
@@ -8,6 +8,8 @@ generatifs (Perplexity, OpenAI, Gemini, etc.).
 - GeoPrompt : univers de prompts par marque
 - GeoRun : une ligne par execution (immutable — created_at seul, pas d'updated_at)
 - GeoMetricsDaily : agregats pre-calcules par jour/marque/moteur
+- GeoRunArchive : stockage froid (compresse) du raw_answer des runs anciens
+- GeoSchedule / GeoScheduledBatch : cadences de mesure par marque + file nocturne
 """
 
 import uuid
@@ -20,6 +22,7 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     Numeric,
     Text,
     UniqueConstraint,
@@ -107,6 +110,11 @@ class GeoRun(Base, UUIDMixin):
 
     On n'herite PAS de TimestampMixin (qui impose updated_at) — un run ne doit
     jamais etre modifie apres insertion.
+
+    PostgreSQL : table partitionnee par mois sur run_at (migration
+    partition_monthly_001, maintenance app/db/partitions.py). La PK physique y est
+    (id, run_at) — le partitionnement l'impose ; le mapper garde `id` seul, unique
+    de fait (uuid4). Filtrer run_at par plage via scorer.run_at_range.
     """
 
     __tablename__ = "geo_runs"
@@ -144,6 +152,13 @@ class GeoRun(Base, UUIDMixin):
     # Google AI Overviews uniquement (apparition dans l'AIO)
     appearance: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
 
+    # Retention (seule mutation admise apres insertion) : date a laquelle le
+    # raw_answer a ete deplace vers geo_run_archives. Non-null -> raw_answer est
+    # NULL en table chaude et se relit via services/geo/retention.load_raw_answer.
+    raw_answer_archived_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
     # created_at seul (run immutable). Defini explicitement car pas de TimestampMixin.
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -194,6 +209,35 @@ class GeoMetricsDaily(Base, UUIDMixin):
         return f"<GeoMetricsDaily {self.day} {self.engine}>"
 
 
+class GeoRunArchive(Base):
+    """Stockage froid du raw_answer d'un run (1 ligne par run archive).
+
+    Le texte est compresse (zlib) et sorti de geo_runs par le job de retention :
+    la table chaude reste etroite pour les scans du dashboard/scorer, le texte
+    n'est relu qu'a la demande (vue detail d'un run).
+    """
+
+    __tablename__ = "geo_run_archives"
+
+    # Pas de FK vers geo_runs : une table partitionnee n'expose pas d'unicite
+    # sur id seul. Les archives orphelines sont purgees par le job de retention.
+    run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    organization_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True, index=True
+    )
+    # Codec de compression (extensible sans migration si on change d'algo)
+    codec: Mapped[str] = mapped_column(Text, nullable=False, default="zlib")
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # Taille UTF-8 du texte d'origine (rapport d'espace recupere)
+    raw_size: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<GeoRunArchive {self.run_id} {self.codec}>"
+
+
 # Statuts d'un job d'audit de visibilite (state machine — DC5)
 GEO_AUDIT_STATUSES = ["queued", "running", "completed", "failed"]
 
@@ -239,3 +283,100 @@ class GeoAuditJob(Base, UUIDMixin, TimestampMixin):
 
     def __repr__(self) -> str:
         return f"<GeoAuditJob {self.domain} {self.status}>"
+
+
+# Statuts d'un batch planifie par le scheduler nocturne (state machine — DC5)
+GEO_SCHEDULED_BATCH_STATUSES = ["planned", "queued", "running", "done", "failed"]
+
+
+class GeoSchedule(Base, UUIDMixin, TimestampMixin):
+    """Cadence de mesure d'une marque sur un moteur (scheduler nocturne).
+
+    Toutes les `every_days` nuits, le planificateur cree un GeoScheduledBatch
+    couvrant les prompts actifs de la marque (cf. services/geo/scheduler.py).
+    """
+
+    __tablename__ = "geo_schedules"
+
+    organization_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True, index=True
+    )
+    brand_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("geo_brands.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    engine: Mapped[str] = mapped_column(Text, nullable=False)
+    # 1 = chaque nuit, 7 = hebdomadaire...
+    every_days: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    n_runs: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    # Derniere nuit planifiee (cadence calculee depuis cette date)
+    last_planned_on: Mapped[date | None] = mapped_column(Date, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("brand_id", "engine", name="uq_geo_schedules_brand_engine"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<GeoSchedule {self.brand_id} {self.engine} /{self.every_days}j>"
+
+
+class GeoScheduledBatch(Base, UUIDMixin, TimestampMixin):
+    """Un batch de la file nocturne : une marque x un moteur x une nuit.
+
+    `eta` = debut prevu, etale sur la fenetre nocturne au prorata du budget de
+    debit du moteur. Le dispatcher (beat, toutes les 5 min) envoie a Celery les
+    batches dont l'eta est passee. Unicite (schedule, nuit) -> planification
+    idempotente ; les runs eux-memes sont dedupliques par jour (_existing_run).
+    """
+
+    __tablename__ = "geo_scheduled_batches"
+
+    organization_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True, index=True
+    )
+    schedule_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("geo_schedules.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    brand_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("geo_brands.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    engine: Mapped[str] = mapped_column(Text, nullable=False)
+    night: Mapped[date] = mapped_column(Date, nullable=False)
+    eta: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    prompt_ids: Mapped[list] = mapped_column(JSONB, nullable=False, default=list)
+    n_runs: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    runs_planned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # planned | queued | running | done | failed
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="planned")
+    task_id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Claim du dispatcher (commite avant l'envoi Celery) et nombre d'envois :
+    # un batch bloque en queued/running est repris par le reaper, puis failed
+    # au-dela de geo_schedule_max_attempts
+    dispatched_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    runs_success: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    runs_failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    __table_args__ = (
+        UniqueConstraint("schedule_id", "night", name="uq_geo_scheduled_batches_schedule_night"),
+        Index("ix_geo_scheduled_batches_status_eta", "status", "eta"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<GeoScheduledBatch {self.engine} {self.night} {self.status}>"
@@ -14,8 +14,17 @@ statut du signal precedent (un signal ignore est memorise — pas de re-nag).
 """
 
 import uuid
+from datetime import datetime
 
-from sqlalchemy import ForeignKey, Index, String
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -36,6 +45,20 @@ SIGNAL_TRANSITIONS: dict[str, list[str]] = {
     "ignored": ["new"],           # re-ouverture possible (reconsidere)
 }
 
+# Detecteurs du scan (prefixe de dedup_key) — un watermark par org et detecteur
+SCAN_DETECTORS = ["funding", "mmf", "inbound"]
+
+# Evenements metier de l'outbox (detection sur ecriture) -> detecteur reevalue
+# sur la seule societe / le seul contact concerne
+LEAD_EVENT_DETECTORS: dict[str, str] = {
+    "funding_updated": "funding",   # champs funding_* d'une societe ecrits
+    "audit_recorded": "mmf",        # activite type=audit ecrite sur une societe
+    "inbound_contact": "inbound",   # contact entrant (nomo-ia / plein-phare) ecrit
+}
+LEAD_EVENT_TYPES = list(LEAD_EVENT_DETECTORS)
+# pending -> (traite = supprime) | failed (max tentatives, rattrape par le scan)
+LEAD_EVENT_STATUSES = ["pending", "failed"]
+
 
 class LeadSignal(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
     __tablename__ = "lead_signals"
@@ -62,7 +85,56 @@ class LeadSignal(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
     __table_args__ = (
         # Lookup de dedup du detecteur : WHERE org + dedup_key + created_at recent
         Index("ix_lead_signals_org_dedup", "organization_id", "dedup_key"),
+        # Liste de l'inbox : ORDER BY created_at DESC, id DESC + curseur keyset
+        Index("ix_lead_signals_org_created", "organization_id", "created_at", "id"),
     )
 
     def __repr__(self) -> str:
         return f"<LeadSignal {self.signal_type} {self.status}>"
+
+
+class LeadScanWatermark(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
+    """Avancement du scan incremental : debut du dernier scan reussi d'un
+    detecteur pour une org. Le scan horaire ne relit que les lignes modifiees
+    depuis (updated_at) ; le rescan complet (quotidien, manuel) relit tout."""
+
+    __tablename__ = "lead_scan_watermarks"
+
+    # funding | mmf | inbound (SCAN_DETECTORS)
+    detector: Mapped[str] = mapped_column(String(20), nullable=False)
+    scanned_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("organization_id", "detector", name="uq_lead_scan_watermarks_org_detector"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<LeadScanWatermark {self.detector} {self.scanned_at}>"
+
+
+class LeadEvent(Base, UUIDMixin, OrgScopedMixin, TimestampMixin):
+    """Outbox transactionnelle du Lead Engine : evenement metier ecrit dans la
+    MEME transaction que la donnee qui le declenche (aucun evenement perdu ni
+    fantome), consomme par une task Celery qui reevalue le detecteur concerne
+    sur la seule cible. Un evenement traite est supprime."""
+
+    __tablename__ = "lead_events"
+
+    # funding_updated | audit_recorded | inbound_contact (LEAD_EVENT_TYPES)
+    event_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    # Cible : societe (funding / audit) ou contact (inbound). Pas de FK : une
+    # cible supprimee entre-temps ne produit simplement aucun signal.
+    company_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    contact_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    # pending | failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        # File du consumer : WHERE status = 'pending' ORDER BY created_at
+        Index("ix_lead_events_status_created", "status", "created_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<LeadEvent {self.event_type} {self.status}>"
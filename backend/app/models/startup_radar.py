@@ -0,0 +1,37 @@
+# =============================================================================
+# FGA CRM - Modele StartupRadarSyncCheckpoint (reprise de la full sync SR)
+# =============================================================================
+"""Avancement durable de la full sync Startup Radar d'une organisation.
+
+Une ligne par org : phase en cours (startups, investors, contacts, audits) et
+prochaine page a lire, committee AVEC les ecritures de chaque page. Une sync
+interrompue (worker tue, SR indisponible) reprend a la derniere page committee ;
+la ligne est supprimee a la fin d'une sync complete.
+"""
+
+import uuid
+
+from sqlalchemy import Boolean, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin, UUIDMixin
+
+# Ordre des phases de la full sync (DC8 — source unique)
+SYNC_PHASES = ["startups", "investors", "contacts", "audits"]
+
+
+class StartupRadarSyncCheckpoint(Base, UUIDMixin, TimestampMixin):
+    __tablename__ = "startup_radar_sync_checkpoints"
+
+    organization_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), nullable=False, unique=True
+    )
+    phase: Mapped[str] = mapped_column(String(20), nullable=False)
+    next_page: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    force: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # SyncResult cumule (compteurs + erreurs) des pages deja committees
+    result_json: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+
+    def __repr__(self) -> str:
+        return f"<StartupRadarSyncCheckpoint {self.organization_id} {self.phase}:{self.next_page}>"
@@ -6,7 +6,7 @@
 - Enums : GeoEngine, GeoIntent, GeoSentiment
 - Create / Update / Response pour chaque modele
 - Schemas d'extraction (interne, non exposes en API)
-- Schemas API speciaux (trigger, dashboard, health)
+- Schemas API speciaux (trigger, dashboard, health, scheduler)
 """
 
 from datetime import date, datetime
@@ -159,6 +159,8 @@ class GeoRunResponse(BaseModel):
     brand_sentiment: str | None
     brand_recommended: bool | None
     appearance: bool | None
+    # Non-null : raw_answer archive (NULL en liste, rehydrate par GET /runs/{id})
+    raw_answer_archived_at: datetime | None = None
     created_at: datetime
 
 
@@ -191,6 +193,55 @@ class GeoMetricsDailyResponse(BaseModel):
     computed_at: datetime
 
 
+# ---------------------------------------------------------------------------
+# Scheduler nocturne (cadences + file)
+# ---------------------------------------------------------------------------
+
+class GeoScheduleUpsert(BaseModel):
+    every_days: int = Field(default=1, ge=1, le=31)
+    n_runs: int = Field(default=3, ge=1, le=5)
+    active: bool = True
+
+
+class GeoScheduleResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    brand_id: UUID
+    engine: str
+    every_days: int
+    n_runs: int
+    active: bool
+    last_planned_on: date | None
+    created_at: datetime
+    updated_at: datetime
+
+
+class GeoQueueEngineStats(BaseModel):
+    engine: str
+    runs_per_hour: int
+    batches: int
+    runs_pending: int
+    next_eta: datetime | None
+    estimated_completion: datetime | None
+
+
+class GeoQueueItem(BaseModel):
+    id: UUID
+    brand_id: UUID
+    engine: str
+    night: date
+    status: str
+    eta: datetime
+    runs_planned: int
+    estimated_completion: datetime
+
+
+class GeoQueueResponse(BaseModel):
+    engines: list[GeoQueueEngineStats]
+    items: list[GeoQueueItem]
+
+
 # ---------------------------------------------------------------------------
 # Extraction (interne — non expose en API)
 # ---------------------------------------------------------------------------
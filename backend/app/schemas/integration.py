@@ -12,10 +12,13 @@ class SyncResultResponse(BaseModel):
 
     companies_created: int = Field(0, description="Nombre de companies creees (startups)")
     companies_updated: int = Field(0, description="Nombre de companies mises a jour")
+    companies_unchanged: int = Field(0, description="Nombre de companies inchangees (payload SR identique, ignorees)")
     contacts_created: int = Field(0, description="Nombre de contacts crees")
     contacts_updated: int = Field(0, description="Nombre de contacts mis a jour")
+    contacts_unchanged: int = Field(0, description="Nombre de contacts inchanges (payload SR identique, ignores)")
     investors_created: int = Field(0, description="Nombre d'investisseurs crees")
     investors_updated: int = Field(0, description="Nombre d'investisseurs mis a jour")
+    investors_unchanged: int = Field(0, description="Nombre d'investisseurs inchanges (payload SR identique, ignores)")
     audits_created: int = Field(0, description="Nombre d'audits importes")
     # Funding multi-source (Phase B 2026-05)
     funding_activities_created: int = Field(
@@ -24,6 +27,8 @@ class SyncResultResponse(BaseModel):
     qualification_tasks_created: int = Field(
         0, description="Nombre de Task 'qualification' creees pour qualifier la levee"
     )
+    audits_api_calls: int = Field(0, description="Appels SR emis par la phase audits")
+    audits_duration_ms: int = Field(0, description="Duree de la phase audits (ms)")
     errors: list[str] = Field(default_factory=list, description="Erreurs rencontrees")
 
 
@@ -44,6 +44,8 @@ class LeadSignalListResponse(BaseModel):
     total: int
     page: int
     size: int
+    # Curseur keyset de la page suivante (None = derniere page)
+    next_cursor: str | None = None
     stats: LeadSignalStats
 
 
@@ -26,16 +26,17 @@ from app.models.enrichment import (
 )
 from app.services.enrichment import freshness
 from app.services.enrichment.adapters.icypeas import _domain_from_url
-from app.services.enrichment.credit_ledger import CreditLedger
+from app.services.enrichment.credit_ledger import CreditLedger, LedgerScope
 from app.services.enrichment.ports import (
     Company,
     IcpFilter,
     PersonCandidate,
     SourceFilter,
     TargetSpec,
+    VerificationResult,
 )
 from app.services.enrichment.roles import normalize_title
-from app.services.enrichment.suppression import is_suppressed
+from app.services.enrichment.suppression import SuppressionIndex, is_suppressed
 
 _TARGET_ROLES = ["CTO", "CPO", "CMO"]
 _KEEP_ROLES = frozenset({"CTO", "CPO", "CMO", "FOUNDER"})
@@ -74,6 +75,38 @@ def _parse_target(raw: dict) -> TargetSpec:
     )
 
 
+async def _prefetch(company_src, **keys) -> None:
+    """Prechargement du cache de resolution (une requete par kind) si la source
+    le supporte (sources duck-typees des tests : rien a faire)."""
+    prefetch = getattr(company_src, "prefetch", None)
+    if prefetch is not None:
+        await prefetch(**keys)
+
+
+async def _cached_verification(verifier, email: str) -> VerificationResult | None:
+    """Verification en cache (ni appel ni credit) si le verifier en a un
+    (verifiers duck-types des tests : aucun)."""
+    cached = getattr(verifier, "cached", None)
+    return await cached(email) if cached is not None else None
+
+
+async def _prefetch_verifications(verifiers, *, domains=(), emails=()) -> None:
+    """Prechargement du cache de verification (une requete par kind) si le
+    verifier en a un (verifiers duck-types des tests : aucun)."""
+    for verifier in verifiers:
+        prefetch = getattr(verifier, "prefetch", None)
+        if prefetch is not None:
+            await prefetch(domains=domains, emails=emails)
+
+
+async def _flush_verifications(verifiers) -> None:
+    """Ecrit en lot les resultats de verification appris (cache)."""
+    for verifier in verifiers:
+        flush = getattr(verifier, "flush", None)
+        if flush is not None:
+            await flush()
+
+
 async def _resolve_companies(company_src, target: TargetSpec) -> list[Company]:
     if target.kind == "company" and target.siren:
         c = await company_src.get_by_siren(target.siren)
@@ -82,6 +115,7 @@ async def _resolve_companies(company_src, target: TargetSpec) -> list[Company]:
         # Dedup des sirens (doublons CSV frequents) : evite de payer 2x le meme.
         seen: set[str] = set()
         sirens = [s for s in target.sirens if s and not (s in seen or seen.add(s))]
+        await _prefetch(company_src, sirens=sirens)
         # #10 : resolution concurrente bornee (au lieu de 500 GET gouv sequentiels).
         sem = asyncio.Semaphore(_GOUV_CONCURRENCY)
 
@@ -144,6 +178,7 @@ async def _resolve_source_companies(
         Company(siren=c.siren, name=c.name, domain=_domain_from_url(c.website))
         for c in with_siren
     )
+    await _prefetch(company_src, names=[c.name for c in without_siren])
     resolved = await asyncio.gather(*(_resolve_missing(c) for c in without_siren))
     skipped = sum(1 for r in resolved if r is None)
     if skipped:
@@ -188,17 +223,20 @@ async def _source_people(
     company: Company,
     company_src,
     people_srcs,
-    ledger: CreditLedger,
+    ledger: CreditLedger | LedgerScope,
     org_id,
     stats: dict,
+    suppressions: SuppressionIndex | None = None,
 ) -> tuple[str | None, list[PersonCandidate]]:
     """Resout le domaine + source les personnes (cascade cout-croissant, stop-on-cover).
 
     Retourne (domain, people). Societe supprimee -> (None, []) (rien a traiter).
-    Modifie `stats` en place.
+    Modifie `stats` en place. `suppressions` : index du job (sinon requete DB).
     """
     domain = company.domain or await company_src.resolve_domain(company)
-    if domain and await is_suppressed(db, organization_id=org_id, domain=domain):
+    if domain and await is_suppressed(
+        db, organization_id=org_id, domain=domain, index=suppressions,
+    ):
         stats["suppressed"] += 1
         return None, []
     stats["companies"] += 1
@@ -8,17 +8,31 @@
 - resolve_domain : heuristique nom->domaine best-effort (~40%). Icypeas acceptant
   `domainOrCompany`, le domaine est un BOOSTER optionnel (fallback = nom societe).
 
-L'API gouv ne retourne PAS de site web -> le domaine est resolu separement."""
+L'API gouv ne retourne PAS de site web -> le domaine est resolu separement.
+
+Cache optionnel (gouv_cache.GouvResolutionCache, partage entre orgs) : siren,
+nom normalise et candidats domaine ; le reseau n'est sollicite que sur un miss.
+Un echec reseau n'est jamais mis en cache (seules les reponses de l'API le sont) ;
+un candidat domaine n'est memorise que sur une reponse certaine (statut HTTP,
+ou nom inexistant au DNS), jamais sur un timeout / une erreur de transport."""
 
 from __future__ import annotations
 
 import asyncio
 import logging
 import re
+import socket
 import unicodedata
+from dataclasses import asdict
 
 import httpx
 
+from app.services.enrichment.gouv_cache import (
+    KIND_DOMAIN,
+    KIND_NAME,
+    KIND_SIREN,
+    GouvResolutionCache,
+)
 from app.services.enrichment.ports import Company, CompanySource, IcpFilter
 
 logger = logging.getLogger(__name__)
@@ -32,6 +46,10 @@ _INITIAL_BACKOFF_S = 2.0
 _PAGE_THROTTLE_S = 0.15         # ~7 req/s (limite douce de l'API)
 _DEFAULT_ICP_LIMIT = 100
 _DOMAIN_EXTENSIONS = (".fr", ".com")
+# getaddrinfo : nom inexistant (reponse DNS definitive, != echec temporaire EAI_AGAIN)
+_DNS_NOT_FOUND = frozenset(
+    code for code in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", None)) if code is not None
+)
 
 # Formes juridiques a retirer avant de deriver un domaine.
 _LEGAL_SUFFIXES = re.compile(
@@ -46,6 +64,18 @@ _EFFECTIF_BANDS = {
 }
 
 
+def _dns_not_found(exc: BaseException) -> bool:
+    """L'erreur de connexion vient-elle d'un nom inexistant au DNS ?"""
+    seen: set[int] = set()
+    cur: BaseException | None = exc
+    while cur is not None and id(cur) not in seen:
+        seen.add(id(cur))
+        if isinstance(cur, socket.gaierror) and cur.errno in _DNS_NOT_FOUND:
+            return True
+        cur = cur.__cause__ or cur.__context__
+    return False
+
+
 def _strip_accents(text: str) -> str:
     return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
 
@@ -57,6 +87,11 @@ def _normalize_for_domain(raison_sociale: str) -> str:
     return re.sub(r"\s+", " ", name).strip()
 
 
+def normalize_name(name: str) -> str:
+    """Cle de cache d'une recherche par nom (accents, casse et espaces neutralises)."""
+    return " ".join(_strip_accents(name or "").lower().split())
+
+
 def _domain_candidates(raison_sociale: str) -> list[str]:
     """Candidats domaine par priorite (slug colle -> tirets -> premier mot)."""
     normalized = _normalize_for_domain(raison_sociale)
@@ -118,11 +153,42 @@ class GouvCompanySource(CompanySource):
         timeout_s: float = _HTTP_TIMEOUT_S,
         domain_timeout_s: float = _DOMAIN_TIMEOUT_S,
         transport: httpx.AsyncBaseTransport | None = None,
+        cache: GouvResolutionCache | None = None,
     ) -> None:
         self._base = base_url.rstrip("/")
         self._timeout = timeout_s
         self._domain_timeout = domain_timeout_s
         self._transport = transport  # httpx.MockTransport en test
+        self._cache = cache
+
+    def cache_metrics(self) -> dict:
+        """Hit-rate du cache par kind (siren / name / domain) ; {} sans cache."""
+        return self._cache.metrics() if self._cache is not None else {}
+
+    async def prefetch(self, *, sirens: list[str] = (), names: list[str] = ()) -> None:
+        # Une requete IN par kind au lieu d'une lecture de cache par resolution.
+        if self._cache is None:
+            return
+        if sirens:
+            await self._cache.get_many(KIND_SIREN, list(sirens))
+        if names:
+            await self._cache.get_many(KIND_NAME, [normalize_name(n) for n in names])
+
+    async def _cached(self, kind: str, key: str) -> tuple[bool, Company | None]:
+        """(hit, societe) ; hit negatif = (True, None)."""
+        if self._cache is None:
+            return False, None
+        cached = await self._cache.get_many(kind, [key])
+        if key not in cached:
+            self._cache.record(kind, "miss")
+            return False, None
+        payload = cached[key]
+        self._cache.record(kind, "hit" if payload is not None else "negative_hit")
+        return True, Company(**payload) if payload is not None else None
+
+    async def _remember(self, kind: str, key: str, company: Company | None) -> None:
+        if self._cache is not None:
+            await self._cache.put_many(kind, {key: asdict(company) if company else None})
 
     def _client(self, timeout: float) -> httpx.AsyncClient:
         return httpx.AsyncClient(timeout=timeout, transport=self._transport, follow_redirects=True)
@@ -152,13 +218,19 @@ class GouvCompanySource(CompanySource):
     async def get_by_siren(self, siren: str) -> Company | None:
         if not siren or not siren.isdigit() or len(siren) != 9:
             return None
+        hit, company = await self._cached(KIND_SIREN, siren)
+        if hit:
+            return company
         data = await self._search({"q": siren, "page": 1, "per_page": 1})
-        results = (data or {}).get("results") or []
-        if not results:
-            return None
-        company = _map_result(results[0])
+        if data is None:
+            return None  # echec reseau : pas de cache negatif
+        results = data.get("results") or []
+        company = _map_result(results[0]) if results else None
         # Garde-fou : le resultat doit correspondre au siren demande.
-        return company if company and company.siren == siren else None
+        if company is not None and company.siren != siren:
+            company = None
+        await self._remember(KIND_SIREN, siren, company)
+        return company
 
     async def search_by_name(self, name: str) -> Company | None:
         """Recherche best-effort une societe FR par nom -> Company (avec SIREN).
@@ -168,11 +240,19 @@ class GouvCompanySource(CompanySource):
         q = (name or "").strip()
         if not q:
             return None
+        key = normalize_name(q)
+        hit, company = await self._cached(KIND_NAME, key)
+        if hit:
+            return company
         data = await self._search(
             {"q": q, "page": 1, "per_page": 1, "etat_administratif": "A"}
         )
-        results = (data or {}).get("results") or []
-        return _map_result(results[0]) if results else None
+        if data is None:
+            return None
+        results = data.get("results") or []
+        company = _map_result(results[0]) if results else None
+        await self._remember(KIND_NAME, key, company)
+        return company
 
     async def get_companies(self, icp: IcpFilter) -> list[Company]:
         limit = icp.limit or _DEFAULT_ICP_LIMIT
@@ -208,34 +288,53 @@ class GouvCompanySource(CompanySource):
             await asyncio.sleep(_PAGE_THROTTLE_S)  # respecte la limite douce (~7 req/s)
         return out
 
-    async def _domain_responds(self, client: httpx.AsyncClient, domain: str) -> bool:
+    async def _domain_responds(self, client: httpx.AsyncClient, domain: str) -> bool | None:
+        """True : repond ; False : reponse certaine (statut >= 400, nom inexistant
+        au DNS) ; None : indetermine (timeout, erreur de transport), non cacheable."""
         # #11 : https et http testes en CONCURRENCE (un https qui pend ne bloque
         # plus le fallback http jusqu'au timeout).
-        async def _try(scheme: str) -> bool:
+        async def _try(scheme: str) -> bool | None:
             try:
                 resp = await client.get(f"{scheme}://{domain}")
                 return resp.status_code < 400
-            except httpx.HTTPError:
-                return False
+            except httpx.HTTPError as exc:
+                return False if _dns_not_found(exc) else None
 
         results = await asyncio.gather(_try("https"), _try("http"))
-        return any(results)
+        if any(results):
+            return True
+        return False if all(r is False for r in results) else None
 
     async def resolve_domain(self, company: Company) -> str | None:
         """Heuristique nom->domaine (best-effort). Retourne le 1er candidat (par
         priorite) qui repond, ou None. Les candidats sont testes en concurrence
-        pour borner la latence a ~un timeout."""
+        pour borner la latence a ~un timeout.
+
+        Avec cache : seuls les candidats inconnus places AVANT le premier candidat
+        connu comme repondant sont testes sur le reseau."""
         if company.domain:
             return company.domain
         candidates = _domain_candidates(company.name)
         if not candidates:
             return None
+        known = await self._cache.get_domains(candidates) if self._cache is not None else {}
+        best = next((i for i, c in enumerate(candidates) if known.get(c)), len(candidates))
+        to_check = [c for c in candidates[:best] if c not in known]
+        if not to_check:
+            self._cache.record(KIND_DOMAIN, "hit" if best < len(candidates) else "negative_hit")
+            return candidates[best] if best < len(candidates) else None
+        if self._cache is not None:
+            self._cache.record(KIND_DOMAIN, "miss")
+
         async with self._client(self._domain_timeout) as client:
             checks = await asyncio.gather(
-                *(self._domain_responds(client, c) for c in candidates),
+                *(self._domain_responds(client, c) for c in to_check),
                 return_exceptions=True,
             )
-        for candidate, ok in zip(candidates, checks, strict=True):
-            if ok is True:
-                return candidate
-        return None
+        checked = {c: ok is True for c, ok in zip(to_check, checks, strict=True)}
+        if self._cache is not None:
+            # Reponses certaines seulement : un site lent / injoignable est reteste
+            definite = {c: ok for c, ok in zip(to_check, checks, strict=True) if isinstance(ok, bool)}
+            await self._cache.put_domains(definite)
+        responding = {**known, **checked}
+        return next((c for c in candidates if responding.get(c)), None)
@@ -5,16 +5,24 @@
 on POLL le resultat jusqu'a un statut terminal. Contrat capture en live :
 docs/compass/icypeas-api-reference.md.
 
+Polling multiplexe : toutes les recherches unitaires en vol d'un client passent
+par une seule boucle (IcypeasClient._poll_loop) sur un client HTTP poole ;
+cadence adaptee aux latences de completion observees (latency_stats()).
+
 Auth : header `Authorization: <cle>` (brute, pas de Bearer). Base app.icypeas.com/api.
 """
 
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import hashlib
 import hmac
 import logging
+import math
 import re
+from collections import deque
+from dataclasses import dataclass, field
 
 import httpx
 
@@ -32,8 +40,18 @@ logger = logging.getLogger(__name__)
 
 _BASE_URL = "https://app.icypeas.com/api"
 _HTTP_TIMEOUT_S = 15.0
-_POLL_INTERVAL_S = 2.0
+_POLL_INTERVAL_S = 2.0   # plafond de l'intervalle entre 2 polls d'une recherche
 _MAX_WAIT_S = 30.0
+# Polling adaptatif : 1er poll court, quantiles de latence vises, puis backoff.
+_FIRST_POLL_S = 0.5
+_MIN_POLL_S = 0.05
+_POLL_BACKOFF = 1.6
+_POLL_QUANTILES = (0.5, 0.75, 0.9, 0.99)
+_MIN_LATENCY_SAMPLES = 10   # en deca : pas assez d'historique, backoff seul
+_LATENCY_WINDOW = 500
+# Client partage : reads concurrents bornes (rate limit Icypeas ~30 req/min/cle).
+_MAX_CONNECTIONS = 10
+_MAX_CONCURRENT_READS = 5
 # find-people (leads DB) : la recherche par NOM de societe (a defaut de domaine)
 # est lente/variable cote Icypeas -> timeout dedie plus long + 1 retry sur timeout.
 _FIND_PEOPLE_TIMEOUT_S = 45.0
@@ -44,6 +62,10 @@ _TERMINAL_STATUSES = frozenset({
     "BAD_INPUT", "INSUFFICIENT_FUNDS", "ABORTED",
 })
 
+# Statuts d'item porteurs d'un verdict du provider. Les autres (BAD_INPUT,
+# INSUFFICIENT_FUNDS, ABORTED, non terminal au timeout) ne disent rien de l'adresse.
+_VERDICT_STATUSES = frozenset({"DEBITED", "FOUND", "NOT_FOUND", "DEBITED_NOT_FOUND"})
+
 # certainty Icypeas -> (status interne, confidence). Defaut prudent = risky.
 _CERTAINTY_MAP: dict[str, tuple[str, float]] = {
     "ultra_sure": ("valid", 0.99),
@@ -74,8 +96,81 @@ def _domain_from_url(url: str | None) -> str | None:
 _MAX_BULK_RESULTS = 5000
 
 
+@dataclass
+class _PendingSearch:
+    """Recherche unitaire en vol, suivie par la boucle de polling du client."""
+
+    search_id: str
+    kind: str
+    started: float
+    due: float
+    future: asyncio.Future
+    delay: float | None = None
+
+
+class _LatencyTracker:
+    """Latences de completion observees (fenetre glissante) d'un type de recherche.
+
+    Mesure = soumission -> premier read terminal (majorant a un poll pres).
+    """
+
+    def __init__(self, window: int = _LATENCY_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.reads = 0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def quantiles(self, qs: tuple[float, ...]) -> list[float]:
+        """Quantiles au rang le plus proche (liste vide sans echantillon)."""
+        ordered = sorted(self._samples)
+        if not ordered:
+            return []
+        return [ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)] for q in qs]
+
+    def snapshot(self) -> dict:
+        p50, p90, p99 = self.quantiles((0.5, 0.9, 0.99)) or (None, None, None)
+        return {
+            "count": self.count,
+            "reads": self.reads,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p90_ms": round(p90 * 1000) if p90 is not None else None,
+            "p99_ms": round(p99 * 1000) if p99 is not None else None,
+        }
+
+
+@dataclass
+class _LoopState:
+    """Ressources liees a UNE event loop : client HTTP poole + boucle de polling.
+
+    Celery ouvre une loop par tache (asyncio.run) : un client httpx ne survit pas
+    a sa loop, l'etat est donc recree a la volee quand la loop change ; la tache
+    le ferme en fin d'execution (aclose). `latency` : echantillons de CETTE loop
+    seulement (= le job de la tache), le polling s'appuie sur ceux du process.
+    """
+
+    loop: asyncio.AbstractEventLoop
+    http: httpx.AsyncClient
+    reads: asyncio.Semaphore
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    pending: dict[str, _PendingSearch] = field(default_factory=dict)
+    task: asyncio.Task | None = None
+    latency: dict[str, _LatencyTracker] = field(default_factory=dict)
+
+
 class IcypeasClient:
-    """Client bas niveau : soumission + polling du resultat. Fail-safe (None sur erreur)."""
+    """Client bas niveau : soumission + polling du resultat. Fail-safe (None sur erreur).
+
+    Un client HTTP poole par event loop (keep-alive, partage par toutes les
+    requetes) et UNE boucle de polling multiplexant les recherches en vol.
+    Polling adaptatif : 1er poll court, puis polls cales sur les quantiles des
+    latences observees (p50, p75, p90, p99), enfin backoff geometrique ; intervalle
+    plafonne a `poll_interval_s`, abandon apres `max_wait_s`.
+    """
 
     def __init__(
         self,
@@ -85,29 +180,86 @@ class IcypeasClient:
         timeout_s: float = _HTTP_TIMEOUT_S,
         poll_interval_s: float = _POLL_INTERVAL_S,
         max_wait_s: float = _MAX_WAIT_S,
+        first_poll_s: float = _FIRST_POLL_S,
         transport: httpx.AsyncBaseTransport | None = None,
     ) -> None:
         self._api_key = api_key
         self._base = base_url.rstrip("/")
         self._timeout = timeout_s
-        self._poll_interval = poll_interval_s
+        self._poll_interval = poll_interval_s  # plafond de l'intervalle entre 2 polls
         self._max_wait = max_wait_s
+        self._first_poll = min(first_poll_s, poll_interval_s)
         self._transport = transport  # injecte en test (httpx.MockTransport)
+        self._latency: dict[str, _LatencyTracker] = {}
+        self._state: _LoopState | None = None
 
     def _headers(self) -> dict[str, str]:
         # Icypeas attend la cle brute dans Authorization (pas de prefixe Bearer).
         return {"Authorization": self._api_key, "Content-Type": "application/json"}
 
-    def _client(self) -> httpx.AsyncClient:
-        return httpx.AsyncClient(timeout=self._timeout, transport=self._transport)
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        if self._state is None or self._state.loop is not loop:
+            # Loop precedente terminee sans aclose (hors tache Celery) : son client
+            # ne peut plus etre ferme depuis cette loop, il est abandonne.
+            self._state = _LoopState(
+                loop=loop,
+                http=httpx.AsyncClient(
+                    timeout=self._timeout, transport=self._transport,
+                    limits=httpx.Limits(
+                        max_connections=_MAX_CONNECTIONS,
+                        max_keepalive_connections=_MAX_CONNECTIONS,
+                    ),
+                ),
+                reads=asyncio.Semaphore(_MAX_CONCURRENT_READS),
+            )
+        return self._state
+
+    def _http(self) -> httpx.AsyncClient:
+        return self._loop_state().http
+
+    async def aclose(self) -> None:
+        """Ferme le client HTTP de la loop courante (les recherches en vol echouent)."""
+        state = self._state
+        if state is None or state.loop is not asyncio.get_running_loop():
+            return
+        self._state = None
+        if state.task is not None:
+            state.task.cancel()
+        for pending in state.pending.values():
+            if not pending.future.done():
+                pending.future.set_result(None)
+        await state.http.aclose()
+
+    def latency_stats(self) -> dict[str, dict]:
+        """Percentiles de latence par type de recherche (email-search, ...), en ms.
+
+        Fenetre glissante du process (toutes loops confondues).
+        """
+        return {kind: tracker.snapshot() for kind, tracker in self._latency.items()}
+
+    def loop_latency_stats(self) -> dict[str, dict]:
+        """Percentiles des seules recherches de la loop courante (la tache / le job)."""
+        state = self._state
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return {}
+        if state is None or state.loop is not loop:
+            return {}
+        return {kind: tracker.snapshot() for kind, tracker in state.latency.items()}
+
+    def _tracker(self, kind: str) -> _LatencyTracker:
+        return self._latency.setdefault(kind, _LatencyTracker())
 
     async def _submit(self, path: str, payload: dict) -> str | None:
         """Soumet une recherche, retourne l'_id de la tache (ou None sur echec)."""
         try:
-            async with self._client() as client:
-                resp = await client.post(f"{self._base}/{path}", headers=self._headers(), json=payload)
-                resp.raise_for_status()
-                data = resp.json()
+            resp = await self._http().post(
+                f"{self._base}/{path}", headers=self._headers(), json=payload,
+            )
+            resp.raise_for_status()
+            data = resp.json()
         except (httpx.HTTPError, ValueError) as exc:  # ValueError = JSON invalide
             logger.warning("[Icypeas] soumission %s KO : %s", path, exc)
             return None
@@ -116,42 +268,124 @@ class IcypeasClient:
             return None
         return (data.get("item") or {}).get("_id")
 
-    async def _await_result(self, search_id: str) -> dict | None:
-        """Poll le resultat jusqu'a statut terminal ou timeout. Retourne items[0]."""
-        waited = 0.0
+    def _next_delay(self, kind: str, elapsed: float, last_delay: float | None) -> float:
+        """Delai avant le prochain poll d'une recherche en cours depuis `elapsed` s.
+
+        Vise le prochain quantile observe encore devant nous (sur-echantillonne la
+        zone ou les recherches aboutissent), sinon backoff geometrique. Sans
+        historique : 1er poll court puis backoff.
+        """
+        tracker = self._tracker(kind)
+        if tracker.count >= _MIN_LATENCY_SAMPLES:
+            for target in tracker.quantiles(_POLL_QUANTILES):
+                if target - elapsed >= _MIN_POLL_S:
+                    return min(target - elapsed, self._poll_interval)
+        delay = self._first_poll if last_delay is None else last_delay * _POLL_BACKOFF
+        return min(max(delay, _MIN_POLL_S), self._poll_interval)
+
+    async def _await_result(self, search_id: str, kind: str = "search") -> dict | None:
+        """Attend le resultat (statut terminal, ou dernier etat au timeout). Retourne items[0].
+
+        La recherche est confiee a la boucle de polling partagee du client.
+        """
+        state = self._loop_state()
+        now = state.loop.time()
+        pending = _PendingSearch(
+            search_id=search_id, kind=kind, started=now,
+            due=now + self._next_delay(kind, 0.0, None),
+            future=state.loop.create_future(),
+        )
+        state.pending[search_id] = pending
+        if state.task is None or state.task.done():
+            state.task = state.loop.create_task(self._poll_loop(state))
+        state.wakeup.set()
+        # Filet : la boucle resout au plus tard a max_wait (+ dernier read en vol)
+        deadline = self._max_wait + self._poll_interval + self._timeout
         try:
-            async with self._client() as client:
-                while True:
-                    resp = await client.post(
-                        f"{self._base}/bulk-single-searchs/read",
-                        headers=self._headers(),
-                        json={"id": search_id},
-                    )
-                    resp.raise_for_status()
-                    items = (resp.json().get("items")) or []
-                    item = items[0] if items else None
-                    if item and item.get("status") in _TERMINAL_STATUSES:
-                        return item
-                    if waited >= self._max_wait:
-                        logger.warning("[Icypeas] timeout polling %s (status=%s)",
-                                       search_id, item.get("status") if item else None)
-                        return item
-                    await asyncio.sleep(self._poll_interval)
-                    waited += self._poll_interval
-        except (httpx.HTTPError, ValueError) as exc:
-            logger.warning("[Icypeas] lecture resultat %s KO : %s", search_id, exc)
+            return await asyncio.wait_for(pending.future, timeout=deadline)
+        except TimeoutError:
+            logger.warning("[Icypeas] recherche %s sans resultat apres %.0f s", search_id, deadline)
             return None
+        finally:
+            state.pending.pop(search_id, None)
+
+    async def _poll_loop(self, state: _LoopState) -> None:
+        """Boucle unique : poll des recherches echues, dort jusqu'a la prochaine.
+
+        Crash inattendu : toutes les recherches en vol sont resolues a None
+        (aucun appelant ne reste bloque) ; la prochaine recherche relance la boucle.
+        """
+        try:
+            while state.pending:
+                now = state.loop.time()
+                due = [p for p in state.pending.values() if p.due <= now and not p.future.done()]
+                if due:
+                    await asyncio.gather(*(self._poll_one(state, p) for p in due))
+                    continue
+                next_due = min(p.due for p in state.pending.values())
+                state.wakeup.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(state.wakeup.wait(), timeout=max(next_due - now, 0))
+        except Exception:  # noqa: BLE001 — echec de toutes les recherches, pas de blocage
+            logger.exception("[Icypeas] boucle de polling en echec")
+            for pending in state.pending.values():
+                self._resolve(pending, None)
+        finally:
+            state.task = None
+
+    async def _poll_one(self, state: _LoopState, pending: _PendingSearch) -> None:
+        # Process (pilote le polling) + loop courante (metriques du job)
+        trackers = (
+            self._tracker(pending.kind),
+            state.latency.setdefault(pending.kind, _LatencyTracker()),
+        )
+        try:
+            async with state.reads:
+                for tracker in trackers:
+                    tracker.reads += 1
+                resp = await state.http.post(
+                    f"{self._base}/bulk-single-searchs/read",
+                    headers=self._headers(),
+                    json={"id": pending.search_id},
+                )
+            resp.raise_for_status()
+            items = (resp.json().get("items")) or []
+            item = items[0] if items else None
+            status = item.get("status") if item else None
+            terminal = status in _TERMINAL_STATUSES
+        except Exception as exc:  # noqa: BLE001 — HTTP, JSON ou forme inattendue : cette recherche seule
+            logger.warning("[Icypeas] lecture resultat %s KO : %s", pending.search_id, exc)
+            self._resolve(pending, None)
+            return
+        elapsed = state.loop.time() - pending.started
+        if terminal:
+            for tracker in trackers:
+                tracker.observe(elapsed)
+            self._resolve(pending, item)
+            return
+        if elapsed >= self._max_wait:
+            logger.warning("[Icypeas] timeout polling %s (status=%s)", pending.search_id, status)
+            self._resolve(pending, item)
+            return
+        pending.delay = self._next_delay(pending.kind, elapsed, pending.delay)
+        # Dernier poll cale sur l'echeance max_wait (pas d'attente au-dela).
+        pending.due = state.loop.time() + min(pending.delay, self._max_wait - elapsed)
+
+    @staticmethod
+    def _resolve(pending: _PendingSearch, item: dict | None) -> None:
+        if not pending.future.done():  # appelant annule entre-temps
+            pending.future.set_result(item)
 
     async def find_email(self, firstname: str, lastname: str, domain: str) -> dict | None:
         sid = await self._submit(
             "email-search",
             {"firstname": firstname, "lastname": lastname, "domainOrCompany": domain},
         )
-        return await self._await_result(sid) if sid else None
+        return await self._await_result(sid, "email-search") if sid else None
 
     async def verify_email(self, email: str) -> dict | None:
         sid = await self._submit("email-verification", {"email": email})
-        return await self._await_result(sid) if sid else None
+        return await self._await_result(sid, "email-verification") if sid else None
 
     async def submit_bulk(
         self,
@@ -175,10 +409,11 @@ class IcypeasClient:
             },
         }
         try:
-            async with self._client() as client:
-                resp = await client.post(f"{self._base}/bulk-search", headers=self._headers(), json=payload)
-                resp.raise_for_status()
-                data = resp.json()
+            resp = await self._http().post(
+                f"{self._base}/bulk-search", headers=self._headers(), json=payload,
+            )
+            resp.raise_for_status()
+            data = resp.json()
         except (httpx.HTTPError, ValueError) as exc:
             logger.warning("[Icypeas] bulk-search KO : %s", exc)
             return None
@@ -212,14 +447,12 @@ class IcypeasClient:
         # "0 trouve" dus a un ReadTimeout transitoire sur la recherche par nom).
         for attempt in (1, 2):
             try:
-                async with httpx.AsyncClient(
-                    timeout=_FIND_PEOPLE_TIMEOUT_S, transport=self._transport
-                ) as client:
-                    resp = await client.post(
-                        f"{self._base}/find-people", headers=self._headers(), json=body,
-                    )
-                    resp.raise_for_status()
-                    data = resp.json()
+                resp = await self._http().post(
+                    f"{self._base}/find-people", headers=self._headers(), json=body,
+                    timeout=_FIND_PEOPLE_TIMEOUT_S,
+                )
+                resp.raise_for_status()
+                data = resp.json()
                 break
             except httpx.TimeoutException as exc:
                 logger.warning("[Icypeas] find-people timeout (essai %d/2) : %r", attempt, exc)
@@ -344,9 +577,12 @@ class IcypeasEmailVerifier(EmailVerifier):
 
     async def verify(self, email: str) -> VerificationResult:
         item = await self._client.verify_email(email)
+        if not item or item.get("status") not in _VERDICT_STATUSES:
+            # Pas de verdict (HTTP / JSON KO, timeout, item non abouti) : unknown,
+            # non deliverable (deny by default) et jamais mis en cache.
+            return VerificationResult(email=email, status="unknown", confidence=0.0, source="icypeas")
         entry = _first_email(item)
         if entry is None:
-            # Pas de resultat exploitable -> non deliverable (deny by default).
             return VerificationResult(email=email, status="invalid", confidence=0.0, source="icypeas")
         status, confidence = _map_certainty(entry.get("certainty"))
         return VerificationResult(email=email, status=status, confidence=confidence, source="icypeas")
@@ -3,37 +3,64 @@
 # =============================================================================
 """Resout un bulk Icypeas a reception du webhook bulkDone : pour chaque item
 (externalId -> EnrichmentBulkItem), applique les filtres RGPD puis cree le contact
-CRM (reutilise crm_writer/rgpd/suppression/provenance — DC8). Idempotent."""
+CRM (reutilise crm_writer/rgpd/suppression/provenance — DC8). Idempotent.
+
+Ingestion en deux temps : un callback de 5000 items ne tient plus le verrou du
+job pendant des minutes (l'emetteur expirait puis re-livrait).
+- stage_bulk_callback : payload brut -> enrichment_bulk_callbacks, accuse
+  immediat ; unicite (bulk, hash) -> une re-livraison identique est un no-op
+- process_staged_callback : traitement par chunks ensemblistes (contacts via
+  upsert_contacts, verifs + provenance en lot), une transaction par chunk et un
+  curseur de reprise ; compteurs du bulk incrementes (done/found/valid) ;
+  failed (alerte) apres enrichment_callback_max_attempts traitements en echec
+- drain_staged_callbacks : filet beat (envoi en file rate, worker mort)
+- process_bulk_callback : stage + traitement inline (chemin synchrone)
+"""
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import uuid
+from dataclasses import dataclass, replace
 from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import select
+from sqlalchemy import and_, case, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.enrichment import (
     EnrichmentBulk,
+    EnrichmentBulkCallback,
     EnrichmentBulkItem,
     EnrichmentEmailVerification,
     EnrichmentJob,
 )
 from app.services.enrichment import freshness
 from app.services.enrichment.adapters.icypeas import _map_certainty, parse_bulk_callback
-from app.services.enrichment.crm_writer import update_contact_email, upsert_contact
+from app.services.enrichment.crm_writer import (
+    ContactWrite,
+    _insert,
+    update_contact_email,
+    upsert_contacts,
+)
 from app.services.enrichment.ports import Company, PersonCandidate
-from app.services.enrichment.provenance import record_provenance
+from app.services.enrichment.provenance import record_provenance_many
 from app.services.enrichment.rgpd import classify_email
-from app.services.enrichment.suppression import is_suppressed
+from app.services.enrichment.suppression import (
+    SuppressionIndex,
+    is_suppressed,
+    load_suppression_index,
+)
 
 logger = logging.getLogger(__name__)
 
 _FOUND_STATUSES = frozenset({"DEBITED", "FOUND"})
 _STUCK_STATUSES = ("submitted", "awaiting_results")
+_TERMINAL_STATUSES = ("done", "error")
 _RECONCILE_BATCH = 100
+_DRAIN_BATCH = 20
 
 
 def _now() -> datetime:
@@ -47,175 +74,517 @@ def _to_uuid(val: object) -> uuid.UUID | None:
         return None
 
 
-async def _resolve_item(
-    db: AsyncSession, bulk: EnrichmentBulk, item: EnrichmentBulkItem, res: dict,
-    *, fresh_client=None,
-) -> None:
-    """Resout une ligne : RGPD -> contact CRM + verif + provenance. Modifie `item`."""
+@dataclass
+class _PendingItem:
+    """Ligne de bulk en attente, chargee pour resolution. Les resultats sont
+    ecrits en une seule requete par chunk (UPDATE par cle primaire, executemany)."""
+
+    id: uuid.UUID
+    external_id: str
+    context_json: dict | None
+    status: str = "pending"
+    email: str | None = None
+    certainty: str | None = None
+    contact_id: uuid.UUID | None = None
+
+
+@dataclass
+class _Found:
+    """Ligne retenue (email trouve, RGPD ok), en attente de son contact."""
+
+    item: _PendingItem
+    certainty: str | None
+    email: str
+    domain_type: str
+    status: str
+    confidence: float
+    fresh_key: str
+    contact_id: uuid.UUID | None = None
+
+
+async def _resolve_chunk(
+    db: AsyncSession, bulk: EnrichmentBulk,
+    pairs: list[tuple[_PendingItem, dict]],
+    *, suppressions: SuppressionIndex | None = None,
+) -> list[str]:
+    """Resout un lot de lignes : RGPD -> contacts CRM (en lot) + verifs +
+    provenance (en lot). Modifie les items.
+
+    Retourne les clefs de fraicheur des personnes enrichies (touch groupe par
+    l'appelant).
+    """
     org_id = bulk.organization_id
-    ctx = item.context_json or {}
-    comp = ctx.get("company") or {}
-    pers = ctx.get("person") or {}
-    existing_contact_id = _to_uuid(ctx.get("contact_id"))
     is_verify = bulk.task == "email-verification"
-    email = res.get("email")
-
-    if not email or res.get("status") not in _FOUND_STATUSES:
-        # Reverify d'un email injoignable (#7/#8) : mailbox morte -> contact 'invalid'
-        # (au lieu de garder son ancien statut). L'email d'origine est dans le contexte.
-        ctx_email = ctx.get("email")
-        if is_verify and existing_contact_id is not None and ctx_email:
-            cid = await update_contact_email(
-                db, contact_id=existing_contact_id, email=ctx_email, email_status="invalid",
-                organization_id=org_id, backfill_domain=False,
+    found: list[_Found] = []
+    writes: list[ContactWrite] = []
+
+    for item, res in pairs:
+        ctx = item.context_json or {}
+        comp = ctx.get("company") or {}
+        pers = ctx.get("person") or {}
+        existing_contact_id = _to_uuid(ctx.get("contact_id"))
+        email = res.get("email")
+
+        if not email or res.get("status") not in _FOUND_STATUSES:
+            # Reverify d'un email injoignable (#7/#8) : mailbox morte -> contact 'invalid'
+            # (au lieu de garder son ancien statut). L'email d'origine est dans le contexte.
+            ctx_email = ctx.get("email")
+            if is_verify and existing_contact_id is not None and ctx_email:
+                cid = await update_contact_email(
+                    db, contact_id=existing_contact_id, email=ctx_email, email_status="invalid",
+                    organization_id=org_id, backfill_domain=False,
+                )
+                if cid is not None:
+                    item.status = "found"
+                    item.email = ctx_email
+                    item.certainty = res.get("certainty")
+                    item.contact_id = cid
+                    continue
+            item.status = "not_found"
+            continue
+
+        domain_type = classify_email(email)
+        # Suppression RGPD : TOUJOURS verifiee, meme en reverify (#12 : ne pas re-marquer
+        # deliverable un contact opt-out/bounce). Seule la classification pro/perso est
+        # sautee pour un email deja en base (reverify).
+        if await is_suppressed(db, organization_id=org_id, email=email, index=suppressions):
+            item.status = "not_found"
+            continue
+        if not is_verify and domain_type != "pro":
+            item.status = "not_found"  # rejete RGPD (email nouvellement trouve non pro)
+            continue
+
+        status, confidence = _map_certainty(res.get("certainty"))
+        first = pers.get("first_name") or res.get("firstname") or ""
+        last = pers.get("last_name") or res.get("lastname") or ""
+        hit = _Found(
+            item=item, certainty=res.get("certainty"), email=email, domain_type=domain_type,
+            status=status, confidence=confidence,
+            # Fraicheur (#5) : meme clef que le pipeline inline -> un re-run du meme
+            # batch ne re-soumet/re-facture pas cette personne.
+            fresh_key=freshness.person_key(org_id, comp.get("siren"), first, last),
+        )
+        if existing_contact_id is not None:
+            # Feature B : met a jour un contact EXISTANT (pas de create) + backfill domaine.
+            hit.contact_id = await update_contact_email(
+                db, contact_id=existing_contact_id, email=email, email_status=status,
+                organization_id=org_id,
             )
-            if cid is not None:
-                item.status = "found"
-                item.email = ctx_email
-                item.certainty = res.get("certainty")
-                item.contact_id = cid
-                return
-        item.status = "not_found"
-        return
+            if hit.contact_id is None:  # contact disparu / hors org
+                item.status = "not_found"
+                continue
+        else:
+            writes.append(ContactWrite(
+                company=Company(
+                    siren=comp.get("siren") or "", name=comp.get("name") or "",
+                    domain=comp.get("domain"),
+                ),
+                person=PersonCandidate(
+                    first_name=first, last_name=last, title_raw=pers.get("title_raw") or "",
+                    source="icypeas", linkedin_url=pers.get("linkedin_url"),
+                    role=pers.get("role"),
+                ),
+                email=email, email_status=status,
+            ))
+        found.append(hit)
+
+    # Contacts crees/maj en lot, dans l'ordre des lignes (meme precedence qu'en serie)
+    created = iter(await upsert_contacts(db, writes, org_id))
+    verifications: list[EnrichmentEmailVerification] = []
+    events: list[dict] = []
+    for hit in found:
+        if hit.contact_id is None:
+            hit.contact_id = next(created)
+        verifications.append(EnrichmentEmailVerification(
+            organization_id=org_id, contact_id=hit.contact_id, email=hit.email,
+            domain_type=hit.domain_type, confidence=hit.confidence, status=hit.status,
+            deliverable=hit.status == "valid", source="icypeas",
+        ))
+        events.append({
+            "entity_type": "email", "field": "email", "source": "icypeas",
+            "contact_id": hit.contact_id, "organization_id": org_id,
+        })
+        hit.item.status = "found"
+        hit.item.email = hit.email
+        hit.item.certainty = hit.certainty
+        hit.item.contact_id = hit.contact_id
+    db.add_all(verifications)
+    await record_provenance_many(db, events)
+    return [hit.fresh_key for hit in found]
 
-    domain_type = classify_email(email)
-    # Suppression RGPD : TOUJOURS verifiee, meme en reverify (#12 : ne pas re-marquer
-    # deliverable un contact opt-out/bounce). Seule la classification pro/perso est
-    # sautee pour un email deja en base (reverify).
-    if await is_suppressed(db, organization_id=org_id, email=email):
-        item.status = "not_found"
-        return
-    if not is_verify and domain_type != "pro":
-        item.status = "not_found"  # rejete RGPD (email nouvellement trouve non pro)
-        return
 
-    status, confidence = _map_certainty(res.get("certainty"))
-    deliverable = status == "valid"
+async def _resolve_item(
+    db: AsyncSession, bulk: EnrichmentBulk, item: _PendingItem, res: dict,
+    *, suppressions: SuppressionIndex | None = None,
+) -> str | None:
+    """Resout une ligne seule (repli d'un chunk en echec : isole la ligne fautive).
+
+    Retourne la clef de fraicheur de la personne enrichie, None sinon.
+    """
+    keys = await _resolve_chunk(db, bulk, [(item, res)], suppressions=suppressions)
+    return keys[0] if keys else None
 
-    first = pers.get("first_name") or res.get("firstname") or ""
-    last = pers.get("last_name") or res.get("lastname") or ""
 
-    if existing_contact_id is not None:
-        # Feature B : met a jour un contact EXISTANT (pas de create) + backfill domaine.
-        contact_id = await update_contact_email(
-            db, contact_id=existing_contact_id, email=email, email_status=status,
-            organization_id=org_id,
-        )
-        if contact_id is None:  # contact disparu / hors org
-            item.status = "not_found"
-            return
-    else:
-        company = Company(
-            siren=comp.get("siren") or "", name=comp.get("name") or "", domain=comp.get("domain"),
+async def _process_chunk(
+    db: AsyncSession, bulk: EnrichmentBulk, chunk: list[dict],
+    *, suppressions: SuppressionIndex | None = None,
+) -> list[str]:
+    """Un chunk de resultats : items en attente (verrouilles), resolution en lot,
+    compteurs du bulk incrementes. Commit par l'appelant.
+
+    Retourne les clefs de fraicheur des personnes enrichies.
+    """
+    ext_ids = {res.get("external_id") for res in chunk if res.get("external_id")}
+    if not ext_ids:
+        return []
+    # SKIP LOCKED (PostgreSQL) : deux callbacks du meme bulk traites en parallele
+    # ne resolvent jamais la meme ligne. Ignore par SQLite (tests).
+    rows = (
+        await db.execute(
+            select(
+                EnrichmentBulkItem.id,
+                EnrichmentBulkItem.external_id,
+                EnrichmentBulkItem.context_json,
+            )
+            .where(
+                EnrichmentBulkItem.bulk_id == bulk.id,
+                EnrichmentBulkItem.external_id.in_(ext_ids),
+                EnrichmentBulkItem.status == "pending",
+            )
+            .with_for_update(skip_locked=True)
         )
-        person = PersonCandidate(
-            first_name=first, last_name=last, title_raw=pers.get("title_raw") or "",
-            source="icypeas", linkedin_url=pers.get("linkedin_url"), role=pers.get("role"),
+    ).all()
+    by_ext = {row.external_id: _PendingItem(*row) for row in rows}
+    pending: list[tuple[_PendingItem, dict]] = []
+    for res in chunk:
+        item = by_ext.pop(res.get("external_id"), None)
+        if item is not None:  # inconnu, deja resolu ou en double (idempotence)
+            pending.append((item, res))
+    if not pending:
+        return []
+
+    pairs = [(replace(item), res) for item, res in pending]
+    try:
+        async with db.begin_nested():
+            enriched = await _resolve_chunk(db, bulk, pairs, suppressions=suppressions)
+    except Exception:  # noqa: BLE001 — repli ligne par ligne ci-dessous
+        logger.warning(
+            "[Icypeas webhook] chunk de %d items en echec, repli item par item",
+            len(pending), exc_info=True,
         )
-        contact_id = await upsert_contact(
-            db, company=company, person=person, email=email, email_status=status,
-            organization_id=org_id,
+        pairs, enriched = [], []
+        for original, res in pending:
+            item = replace(original)
+            try:
+                # Savepoint par item (#1/DC4) : une erreur (collision, ecriture) sur une
+                # ligne n'annule pas le chunk (sinon perte des contacts Icypeas payes).
+                async with db.begin_nested():
+                    fresh_key = await _resolve_item(
+                        db, bulk, item, res, suppressions=suppressions,
+                    )
+                if fresh_key:
+                    enriched.append(fresh_key)
+            except Exception:  # noqa: BLE001 — echec isole a l'item, on continue
+                logger.exception(
+                    "[Icypeas webhook] item %s echoue, marque error", res.get("external_id")
+                )
+                item = replace(original, status="error")
+            pairs.append((item, res))
+
+    items = [item for item, _ in pairs]
+    await db.execute(update(EnrichmentBulkItem), [
+        {
+            "id": item.id, "status": item.status, "email": item.email,
+            "certainty": item.certainty, "contact_id": item.contact_id,
+        }
+        for item in items
+    ])
+    # Compteurs incrementaux (atomiques en SQL) : plus de recomptage des items.
+    found = [item for item in items if item.status == "found"]
+    await db.execute(
+        update(EnrichmentBulk)
+        .where(EnrichmentBulk.id == bulk.id)
+        .values(
+            done=EnrichmentBulk.done + sum(1 for item in items if item.status != "pending"),
+            found=EnrichmentBulk.found + len(found),
+            valid=EnrichmentBulk.valid + sum(
+                1 for item in found if _map_certainty(item.certainty)[0] == "valid"
+            ),
         )
-
-    db.add(EnrichmentEmailVerification(
-        organization_id=org_id, contact_id=contact_id, email=email, domain_type=domain_type,
-        confidence=confidence, status=status, deliverable=deliverable, source="icypeas",
-    ))
-    await record_provenance(
-        db, entity_type="email", field="email", source="icypeas",
-        contact_id=contact_id, organization_id=org_id,
-    )
-    item.status = "found"
-    item.email = email
-    item.certainty = res.get("certainty")
-    item.contact_id = contact_id
-    # Fraicheur (#5) : marque la personne enrichie (meme clef que le pipeline inline)
-    # -> un re-run du meme batch ne re-soumet/re-facture pas cette personne.
-    await freshness.touch(
-        freshness.person_key(org_id, comp.get("siren"), first, last),
-        settings.enrichment_refresh_days, client=fresh_client,
+        .execution_options(synchronize_session=False)
     )
+    return enriched
 
 
-async def process_bulk_callback(db: AsyncSession, data: dict) -> dict:
-    """Traite le payload `data` d'un webhook bulkDone. Idempotent (re-livraison sans effet)."""
+def _payload_hash(data: dict) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def stage_bulk_callback(db: AsyncSession, data: dict) -> dict:
+    """Stage le payload `data` d'un webhook bulkDone (accuse de reception rapide).
+
+    Pas de verrou ni de traitement ici. Retourne {matched, callback_id, duplicate}
+    (duplicate : payload identique deja stage -> rien a re-planifier).
+    """
     file_id = data.get("file")
     if not file_id:
         return {"matched": False}
 
-    # Verrou de ligne (#3) : serialise les livraisons concurrentes/dupliquees du
-    # meme callback (endpoint public, Icypeas peut re-livrer). Le 2e appel attend le
-    # commit du 1er puis voit status='done' -> no-op. Ignore par SQLite (no-op tests).
     bulk = (
-        await db.execute(
-            select(EnrichmentBulk).where(EnrichmentBulk.file == file_id).with_for_update()
-        )
+        await db.execute(select(EnrichmentBulk).where(EnrichmentBulk.file == file_id))
     ).scalars().first()
     if bulk is None:
         logger.warning("[Icypeas webhook] bulk inconnu file=%s", file_id)
         return {"matched": False}
-    if bulk.status in ("done", "error"):
+    if bulk.status in _TERMINAL_STATUSES:
         # #9 : etat terminal (error = timeout reconcile). Un callback tardif ne
         # doit pas re-traiter et recreer des contacts sur un job deja failed.
         return {"matched": True, "already_done": True}
 
-    items = (
-        await db.execute(select(EnrichmentBulkItem).where(EnrichmentBulkItem.bulk_id == bulk.id))
-    ).scalars().all()
-    by_ext = {i.external_id: i for i in items}
+    digest = _payload_hash(data)
+    table = EnrichmentBulkCallback.__table__
+    callback_id = (
+        await db.execute(
+            _insert(db, table)
+            .values(
+                id=uuid.uuid4(), organization_id=bulk.organization_id, bulk_id=bulk.id,
+                payload_hash=digest, payload_json=data, status="received",
+                items_total=len(data.get("results") or []), items_processed=0,
+            )
+            .on_conflict_do_nothing(index_elements=["bulk_id", "payload_hash"])
+            .returning(table.c.id)
+        )
+    ).scalar_one_or_none()
+    duplicate = callback_id is None
+    if duplicate:
+        callback_id = (
+            await db.execute(
+                select(EnrichmentBulkCallback.id).where(
+                    EnrichmentBulkCallback.bulk_id == bulk.id,
+                    EnrichmentBulkCallback.payload_hash == digest,
+                )
+            )
+        ).scalar_one()
+    await db.commit()
+    return {"matched": True, "callback_id": str(callback_id), "duplicate": duplicate}
 
-    # #6 : un seul client Redis pour toute la boucle (au lieu d'un par item via touch).
+
+async def process_staged_callback(db: AsyncSession, callback_id: uuid.UUID) -> dict:
+    """Traite un callback stage, par chunks de enrichment_callback_chunk_size.
+
+    Un seul worker a la fois (reclamation atomique received -> processing, ou
+    reprise d'un processing inactif depuis enrichment_callback_stale_minutes).
+    Chaque chunk est commite avec le curseur items_processed : une reprise
+    repart du chunk suivant. Sur erreur, le callback repasse `received` (drain),
+    ou `failed` apres enrichment_callback_max_attempts traitements.
+    """
+    stale = _now() - timedelta(minutes=settings.enrichment_callback_stale_minutes)
+    claimed = await db.execute(
+        update(EnrichmentBulkCallback)
+        .where(
+            EnrichmentBulkCallback.id == callback_id,
+            EnrichmentBulkCallback.attempts < settings.enrichment_callback_max_attempts,
+            or_(
+                EnrichmentBulkCallback.status == "received",
+                and_(
+                    EnrichmentBulkCallback.status == "processing",
+                    EnrichmentBulkCallback.updated_at < stale,
+                ),
+            ),
+        )
+        .values(
+            status="processing", attempts=EnrichmentBulkCallback.attempts + 1,
+            updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if claimed.rowcount == 0:
+        return {"matched": True, "skipped": True}  # deja traite ou en cours ailleurs
+
+    try:
+        return await _process_claimed(db, callback_id)
+    except Exception as exc:
+        await db.rollback()
+        await _record_failure(db, callback_id, exc)
+        raise
+
+
+async def _process_claimed(db: AsyncSession, callback_id: uuid.UUID) -> dict:
+    callback = await db.get(EnrichmentBulkCallback, callback_id, populate_existing=True)
+    bulk = await db.get(EnrichmentBulk, callback.bulk_id, populate_existing=True)
+    if bulk is None or bulk.status in _TERMINAL_STATUSES:
+        callback.status = "done"
+        callback.finished_at = _now()
+        await db.commit()
+        return {"matched": True, "already_done": True}
+
+    results = parse_bulk_callback(callback.payload_json)
+    callback.items_total = len(results)
+    # Liste d'exclusion chargee une fois pour tout le callback (pas une requete par item).
+    suppressions = await load_suppression_index(db, bulk.organization_id)
+    size = max(1, settings.enrichment_callback_chunk_size)
+    # #6 : un seul client Redis pour tout le callback ; fraicheur touchee par
+    # chunk, apres son commit (items resolus uniquement).
     async with freshness.client_scope() as fresh_client:
-        for res in parse_bulk_callback(data):
-            item = by_ext.get(res.get("external_id"))
-            if item is None or item.status != "pending":
-                continue  # inconnu ou deja resolu (idempotence)
-            try:
-                # Savepoint par item (#1/DC4) : une erreur (collision, ecriture) sur une
-                # ligne n'annule pas tout le bulk (sinon perte des contacts Icypeas payes).
-                async with db.begin_nested():
-                    await _resolve_item(db, bulk, item, res, fresh_client=fresh_client)
-            except Exception:  # noqa: BLE001 — echec isole a l'item, on continue
-                logger.exception(
-                    "[Icypeas webhook] item %s echoue, marque error", res.get("external_id")
-                )
-                item.status = "error"
+        for start in range(callback.items_processed, len(results), size):
+            chunk = results[start:start + size]
+            enriched = await _process_chunk(db, bulk, chunk, suppressions=suppressions)
+            callback.items_processed = start + len(chunk)
+            await db.commit()
+            await freshness.touch_many(
+                enriched, settings.enrichment_refresh_days, client=fresh_client,
+            )
 
-    bulk.done = sum(1 for i in items if i.status != "pending")
-    bulk.found = sum(1 for i in items if i.status == "found")
-    if bulk.done >= bulk.total:
-        bulk.status = "done"
-        bulk.finished_at = _now()
-        if bulk.job_id:
-            # Verrou sur la ligne job (#1/#3) : serialise les callbacks concurrents
-            # des differents bulks d'un meme job (reverify = 2 bulks). Sans ce verrou,
-            # chacun voit l'autre encore 'awaiting_results' -> job jamais finalise.
-            job = (
+    bulk = await _finalize_bulk(db, bulk.id)
+    callback.status = "done"
+    callback.finished_at = _now()
+    await db.commit()
+    logger.info(
+        "[Icypeas webhook] callback %s traite : %d resultats, bulk %s %d/%d",
+        callback_id, len(results), bulk.file, bulk.done, bulk.total,
+    )
+    return {"matched": True, "done": bulk.done, "found": bulk.found, "total": bulk.total}
+
+
+async def _record_failure(db: AsyncSession, callback_id: uuid.UUID, exc: Exception) -> None:
+    """Callback en echec : `received` (repris par le drain) ou `failed` au
+    dernier essai — alerte, plus jamais repris automatiquement."""
+    status, attempts = (
+        await db.execute(
+            update(EnrichmentBulkCallback)
+            .where(EnrichmentBulkCallback.id == callback_id)
+            .values(
+                status=case(
+                    (
+                        EnrichmentBulkCallback.attempts
+                        >= settings.enrichment_callback_max_attempts,
+                        "failed",
+                    ),
+                    else_="received",
+                ),
+                error=str(exc)[:500],
+            )
+            .returning(EnrichmentBulkCallback.status, EnrichmentBulkCallback.attempts)
+            .execution_options(synchronize_session=False)
+        )
+    ).one()
+    await db.commit()
+    if status == "failed":
+        logger.error(
+            "[Icypeas webhook] callback %s abandonne apres %d traitements en echec : %s",
+            callback_id, attempts, exc,
+        )
+
+
+async def _finalize_bulk(db: AsyncSession, bulk_id: uuid.UUID) -> EnrichmentBulk:
+    """Bulk complet (compteurs) -> done ; job done quand tous ses bulks le sont."""
+    # Verrou court sur le bulk (#3) : relit les compteurs commites par les chunks.
+    bulk = (
+        await db.execute(
+            select(EnrichmentBulk)
+            .where(EnrichmentBulk.id == bulk_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+    if bulk.done < bulk.total or bulk.status in _TERMINAL_STATUSES:
+        return bulk
+    bulk.status = "done"
+    bulk.finished_at = _now()
+    if bulk.job_id:
+        # Verrou sur la ligne job (#1/#3) : serialise les callbacks concurrents
+        # des differents bulks d'un meme job (reverify = 2 bulks). Sans ce verrou,
+        # chacun voit l'autre encore 'awaiting_results' -> job jamais finalise.
+        job = (
+            await db.execute(
+                select(EnrichmentJob).where(EnrichmentJob.id == bulk.job_id).with_for_update()
+            )
+        ).scalar_one_or_none()
+        if job is not None and job.status == "awaiting_results":
+            # Job done quand tous les AUTRES bulks sont done (le courant l'est
+            # deja). Le verrou job ci-dessus serialise les callbacks concurrents :
+            # le 2e voit le bulk du 1er committe -> finalisation correcte.
+            other_statuses = (
                 await db.execute(
-                    select(EnrichmentJob).where(EnrichmentJob.id == bulk.job_id).with_for_update()
-                )
-            ).scalar_one_or_none()
-            if job is not None and job.status == "awaiting_results":
-                # Job done quand tous les AUTRES bulks sont done (le courant l'est
-                # deja). Le verrou job ci-dessus serialise les callbacks concurrents :
-                # le 2e voit le bulk du 1er committe -> finalisation correcte.
-                other_statuses = (
-                    await db.execute(
-                        select(EnrichmentBulk.status).where(
-                            EnrichmentBulk.job_id == bulk.job_id,
-                            EnrichmentBulk.id != bulk.id,
-                        )
+                    select(EnrichmentBulk.status).where(
+                        EnrichmentBulk.job_id == bulk.job_id,
+                        EnrichmentBulk.id != bulk.id,
                     )
-                ).scalars().all()
-                if all(s == "done" for s in other_statuses):
-                    job.status = "done"
-                    job.finished_at = _now()
-                    # Les stats de soumission datent d'AVANT les resultats
-                    # (emails_found=0) : on les ecrase avec le reel des items.
-                    await _refresh_job_stats(db, job)
+                )
+            ).scalars().all()
+            if all(s == "done" for s in other_statuses):
+                job.status = "done"
+                job.finished_at = _now()
+                # Les stats de soumission datent d'AVANT les resultats
+                # (emails_found=0) : on les ecrase avec le reel des bulks.
+                await _refresh_job_stats(db, job)
+    return bulk
 
+
+async def process_bulk_callback(db: AsyncSession, data: dict) -> dict:
+    """Stage + traite inline le payload `data` d'un webhook bulkDone (chemin
+    synchrone : rejeu manuel, tests). Idempotent (re-livraison sans effet)."""
+    staged = await stage_bulk_callback(db, data)
+    if "callback_id" not in staged:
+        return staged
+    return await process_staged_callback(db, uuid.UUID(staged["callback_id"]))
+
+
+async def drain_staged_callbacks(db: AsyncSession, limit: int = _DRAIN_BATCH) -> int:
+    """Filet beat : traite les callbacks restes `received` (envoi en file rate,
+    echec precedent) ou `processing` sans progres (worker mort). Retourne le
+    nombre de callbacks traites. Un processing perdu a son dernier essai passe
+    `failed` (alerte)."""
+    stale = _now() - timedelta(minutes=settings.enrichment_callback_stale_minutes)
+    max_attempts = settings.enrichment_callback_max_attempts
+    exhausted = (
+        await db.execute(
+            update(EnrichmentBulkCallback)
+            .where(
+                EnrichmentBulkCallback.status == "processing",
+                EnrichmentBulkCallback.updated_at < stale,
+                EnrichmentBulkCallback.attempts >= max_attempts,
+            )
+            .values(status="failed", error="traitement interrompu (worker perdu)")
+            .returning(EnrichmentBulkCallback.id)
+            .execution_options(synchronize_session=False)
+        )
+    ).scalars().all()
     await db.commit()
-    return {"matched": True, "done": bulk.done, "found": bulk.found, "total": bulk.total}
+    for callback_id in exhausted:
+        logger.error(
+            "[Icypeas webhook] callback %s abandonne apres %d traitements interrompus",
+            callback_id, max_attempts,
+        )
+
+    ids = (
+        await db.execute(
+            select(EnrichmentBulkCallback.id)
+            .where(
+                EnrichmentBulkCallback.attempts < max_attempts,
+                or_(
+                    EnrichmentBulkCallback.status == "received",
+                    and_(
+                        EnrichmentBulkCallback.status == "processing",
+                        EnrichmentBulkCallback.updated_at < stale,
+                    ),
+                )
+            )
+            .order_by(EnrichmentBulkCallback.created_at)
+            .limit(limit)
+        )
+    ).scalars().all()
+    processed = 0
+    for callback_id in ids:
+        try:
+            result = await process_staged_callback(db, callback_id)
+        except Exception:  # noqa: BLE001 — un callback en echec n'arrete pas le drain
+            logger.exception("[Icypeas webhook] drain : callback %s en echec", callback_id)
+            continue
+        if not result.get("skipped"):
+            processed += 1
+    return processed
 
 
 async def _refresh_job_stats(db: AsyncSession, job: EnrichmentJob) -> None:
@@ -223,25 +592,26 @@ async def _refresh_job_stats(db: AsyncSession, job: EnrichmentJob) -> None:
 
     Sans ce refresh, le dashboard affiche les compteurs figes a la soumission
     (emails_found=0, valid=0) alors que le webhook a trouve des emails et cree
-    les contacts. Nouveau dict assigne (JSONB : mutation in place non trackee).
+    les contacts. Somme des compteurs incrementaux des bulks (pas de recomptage
+    des items). Nouveau dict assigne (JSONB : mutation in place non trackee).
     """
-    items = (
+    n_bulks, found, valid = (
         await db.execute(
-            select(EnrichmentBulkItem)
-            .join(EnrichmentBulk, EnrichmentBulkItem.bulk_id == EnrichmentBulk.id)
-            .where(
+            select(
+                func.count(EnrichmentBulk.id),
+                func.coalesce(func.sum(EnrichmentBulk.found), 0),
+                func.coalesce(func.sum(EnrichmentBulk.valid), 0),
+            ).where(
                 EnrichmentBulk.job_id == job.id,
                 EnrichmentBulk.task == "email-search",
             )
         )
-    ).scalars().all()
-    if not items:
+    ).one()
+    if not n_bulks:
         return
-    found = [i for i in items if i.status == "found"]
-    valid = sum(1 for i in found if _map_certainty(i.certainty)[0] == "valid")
     job.stats_json = {
         **(job.stats_json or {}),
-        "emails_found": len(found),
+        "emails_found": found,
         "valid": valid,
     }
 
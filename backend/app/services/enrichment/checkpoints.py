@@ -0,0 +1,218 @@
+# =============================================================================
+# FGA CRM - Enrichissement : checkpoints et reprise des jobs inline
+# =============================================================================
+"""Reprise d'un job inline apres crash worker ou retry Celery (acks_late).
+
+- claim_job : transition atomique queued -> running, ou running perime ->
+  running (reprise) ; False si un autre worker tient le job (heartbeat frais)
+- load_progress / JobProgress : etat durable du job (societes terminees,
+  sourcees, lookups personnes, credits deja factures, stats cumulees)
+- CompanyCheckpoint : unites durables d'une societe pour _process_company
+  (sourcing, lookup par personne, fin committee avec les contacts)
+- find_stalled_jobs : jobs running sans progres (beat -> re-enqueue)
+- JobHeartbeat : rafraichit updated_at pendant les phases longues qui ne
+  passent pas par les workers societe (contacts inline, sourcing du bulk)
+
+Chaque unite payante est committee juste apres l'appel provider avec ses
+credits : la reprise re-impute leur somme au ledger et rejoue les resultats au
+lieu de rappeler le provider (jamais de double debit, au crash pres entre
+l'appel et son commit).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.enrichment import EnrichmentJob, EnrichmentJobCheckpoint
+from app.services.enrichment.crm_writer import _insert
+from app.services.enrichment.ports import Company
+
+logger = logging.getLogger(__name__)
+
+KIND_COMPANY = "company"
+KIND_PERSON = "person"
+
+
+def company_key(company: Company) -> str:
+    """Cle stable d'une societe dans un job (siren, sinon nom)."""
+    return company.siren or f"name:{company.name.strip().lower()}"
+
+
+def merge_stats(into: dict, delta: dict) -> None:
+    """Ajoute les compteurs numeriques de `delta` a `into`."""
+    for k, v in delta.items():
+        if isinstance(v, int | float):
+            into[k] = into.get(k, 0) + v
+
+
+def _stale_cutoff() -> datetime:
+    return datetime.now(UTC) - timedelta(minutes=settings.enrichment_job_stale_minutes)
+
+
+async def claim_job(db: AsyncSession, job: EnrichmentJob) -> bool:
+    """Prend le job : queued, ou running sans heartbeat depuis le seuil (reprise).
+
+    Le heartbeat = updated_at, rafraichi a chaque societe terminee (workers) ou
+    par JobHeartbeat (contacts inline, soumission bulk).
+    """
+    result = await db.execute(
+        update(EnrichmentJob)
+        .where(
+            EnrichmentJob.id == job.id,
+            or_(
+                EnrichmentJob.status == "queued",
+                and_(EnrichmentJob.status == "running", EnrichmentJob.updated_at < _stale_cutoff()),
+            ),
+        )
+        .values(status="running", updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(job)
+    return result.rowcount == 1
+
+
+async def find_stalled_jobs(db: AsyncSession, limit: int = 50) -> list:
+    """Jobs running dont le worker ne donne plus signe de vie."""
+    return list((
+        await db.execute(
+            select(EnrichmentJob.id)
+            .where(EnrichmentJob.status == "running", EnrichmentJob.updated_at < _stale_cutoff())
+            .order_by(EnrichmentJob.updated_at)
+            .limit(limit)
+        )
+    ).scalars().all())
+
+
+class JobHeartbeat:
+    """Heartbeat d'un job running hors workers societe.
+
+    `beat` rafraichit updated_at au plus toutes les
+    enrichment_job_heartbeat_seconds, dans SA session (meme bind que `db`) :
+    la transaction en cours de l'appelant n'est ni committee ni rollbackee.
+    Sans heartbeat, le beat jugerait le job mort et un 2e worker le reprendrait.
+    """
+
+    def __init__(self, db: AsyncSession, job_id) -> None:
+        self._sessions = async_sessionmaker(db.bind, class_=AsyncSession, autoflush=False)
+        self._job_id = job_id
+        self._last = time.monotonic()  # claim_job vient de rafraichir updated_at
+
+    async def beat(self) -> None:
+        now = time.monotonic()
+        if now - self._last < settings.enrichment_job_heartbeat_seconds:
+            return
+        self._last = now
+        async with self._sessions() as hdb:
+            await hdb.execute(
+                update(EnrichmentJob)
+                .where(EnrichmentJob.id == self._job_id, EnrichmentJob.status == "running")
+                .values(updated_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+            await hdb.commit()
+
+
+@dataclass
+class JobProgress:
+    """Etat durable d'un job, charge une fois au (re)demarrage."""
+
+    finished: set[str] = field(default_factory=set)
+    sourced: dict[str, dict] = field(default_factory=dict)
+    lookups: dict[str, dict] = field(default_factory=dict)
+    credits: float = 0.0
+    stats: dict = field(default_factory=dict)
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.finished or self.sourced or self.lookups)
+
+
+async def load_progress(db: AsyncSession, job_id) -> JobProgress:
+    progress = JobProgress()
+    rows = (
+        await db.execute(
+            select(
+                EnrichmentJobCheckpoint.kind, EnrichmentJobCheckpoint.key,
+                EnrichmentJobCheckpoint.status, EnrichmentJobCheckpoint.payload_json,
+                EnrichmentJobCheckpoint.credits,
+            ).where(EnrichmentJobCheckpoint.job_id == job_id)
+        )
+    ).all()
+    for kind, key, status, payload, credits in rows:
+        progress.credits += float(credits or 0)
+        if kind == KIND_PERSON:
+            progress.lookups[key] = payload
+        elif status == "sourced":
+            progress.sourced[key] = payload
+        else:
+            progress.finished.add(key)
+            merge_stats(progress.stats, payload.get("stats") or {})
+    return progress
+
+
+class CompanyCheckpoint:
+    """Unites durables d'UNE societe d'un job (utilise par _process_company)."""
+
+    def __init__(self, *, job_id, org_id, key: str, progress: JobProgress) -> None:
+        self.job_id = job_id
+        self.org_id = org_id
+        self.key = key
+        self._progress = progress
+
+    def sourced(self) -> dict | None:
+        """Sourcing deja fait et paye : {domain, people, stats} ou None."""
+        return self._progress.sourced.get(self.key)
+
+    def lookup(self, person_key: str) -> dict | None:
+        return self._progress.lookups.get(person_key)
+
+    async def _upsert(
+        self, db: AsyncSession, *, kind: str, key: str, status: str, payload: dict,
+        credits: float = 0.0,
+    ) -> None:
+        # credits jamais ecrases : la fin d'une societe conserve ceux du sourcing.
+        stmt = _insert(db, EnrichmentJobCheckpoint).values(
+            organization_id=self.org_id, job_id=self.job_id, kind=kind, key=key,
+            status=status, payload_json=payload, credits=credits,
+        )
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["job_id", "kind", "key"],
+            set_={
+                "status": stmt.excluded.status,
+                "payload_json": stmt.excluded.payload_json,
+                "updated_at": func.now(),
+            },
+        ))
+
+    async def save_sourced(self, db: AsyncSession, payload: dict, credits: float) -> None:
+        """Commit du sourcing (avant tout lookup) : les credits leads sont acquis."""
+        await self._upsert(
+            db, kind=KIND_COMPANY, key=self.key, status="sourced", payload=payload,
+            credits=credits,
+        )
+        await db.commit()
+
+    async def save_lookup(
+        self, db: AsyncSession, person_key: str, payload: dict, credits: float,
+    ) -> None:
+        """Commit du lookup d'une personne (l'appelant serialise l'acces a `db`)."""
+        await self._upsert(
+            db, kind=KIND_PERSON, key=person_key, status="done", payload=payload,
+            credits=credits,
+        )
+        await db.commit()
+
+    async def finish(self, db: AsyncSession, status: str, stats: dict) -> None:
+        """Societe terminee (done | failed). Pas de commit : committe avec les
+        contacts de la societe par l'appelant (atomique)."""
+        await self._upsert(
+            db, kind=KIND_COMPANY, key=self.key, status=status, payload={"stats": stats},
+        )
@@ -3,6 +3,10 @@
 # =============================================================================
 """Garde-fous de cout (spec §12) :
 - CreditLedger : budget PAR RUN (en memoire, dans l'orchestrateur/waterfall).
+  reserve/settle/release : depense concurrente sans depassement (un appel
+  provider en vol a deja "pris" son cout dans le budget).
+- LedgerScope : vue d'un ledger partage totalisant la depense d'une unite de
+  travail (sourcing d'une societe, lookup d'une personne) -> checkpoints de job.
 - reserve_daily_credits : quota journalier PAR ORGANISATION (Redis, multi-tenant),
   fail-open si Redis KO (ne bloque jamais sur une panne cache).
 """
@@ -40,24 +44,76 @@ return 1
 
 
 class CreditLedger:
-    """Suivi du budget d'un run. can_spend() = garde-fou avant chaque depense."""
+    """Suivi du budget d'un run. can_spend() = garde-fou avant chaque depense.
+
+    Partage entre les workers d'un job (une seule event loop) : les methodes sont
+    synchrones, donc atomiques entre deux `await`. Un appel provider concurrent
+    passe par reserve() AVANT l'await puis settle()/release() : le check-then-
+    record separe par un await laisserait N workers depasser le plafond ensemble.
+    """
 
     def __init__(self, *, max_per_run: int) -> None:
         self.max_per_run = max_per_run
         self._spent = 0.0
+        self._reserved = 0.0
         self.operations: list[tuple[str, float]] = []
 
     def can_spend(self, credits: float) -> bool:
-        return (self._spent + credits) <= self.max_per_run
+        return (self._spent + self._reserved + credits) <= self.max_per_run
 
     def record(self, op: str, credits: float) -> None:
         self._spent += credits
         self.operations.append((op, credits))
 
+    def reserve(self, credits: float) -> bool:
+        """Bloque `credits` pour un appel en vol. False si le plafond serait depasse."""
+        if not self.can_spend(credits):
+            return False
+        self._reserved += credits
+        return True
+
+    def settle(self, op: str, credits: float) -> None:
+        """Convertit une reservation en depense (appel facture)."""
+        self._reserved -= credits
+        self.record(op, credits)
+
+    def release(self, credits: float) -> None:
+        """Libere une reservation (appel non facture : miss, erreur)."""
+        self._reserved -= credits
+
     def spent_this_run(self) -> float:
         return round(self._spent, 3)
 
 
+class LedgerScope:
+    """Vue d'un CreditLedger (ou d'un autre scope) : memes garde-fous, et `spent`
+    = credits factures via CETTE vue (depense attribuable a une unite de travail)."""
+
+    def __init__(self, ledger: CreditLedger | LedgerScope) -> None:
+        self._ledger = ledger
+        self.spent = 0.0
+
+    def can_spend(self, credits: float) -> bool:
+        return self._ledger.can_spend(credits)
+
+    def record(self, op: str, credits: float) -> None:
+        self._ledger.record(op, credits)
+        self.spent += credits
+
+    def reserve(self, credits: float) -> bool:
+        return self._ledger.reserve(credits)
+
+    def settle(self, op: str, credits: float) -> None:
+        self._ledger.settle(op, credits)
+        self.spent += credits
+
+    def release(self, credits: float) -> None:
+        self._ledger.release(credits)
+
+    def spent_this_run(self) -> float:
+        return self._ledger.spent_this_run()
+
+
 def _redis_url() -> str:
     return os.getenv("REDIS_URL", settings.redis_url)
 
@@ -2,13 +2,24 @@
 # FGA CRM - Enrichissement : promotion en contact CRM (ecriture interne)
 # =============================================================================
 """Upsert societe + contact dans les tables CRM (source de verite). La sortie du
-pipeline EST un contact CRM natif (spec §6). Ecriture interne (plus un appel MCP)."""
+pipeline EST un contact CRM natif (spec §6). Ecriture interne (plus un appel MCP).
+
+- upsert_contact : une personne (SELECT par email puis LinkedIn, puis INSERT/UPDATE)
+- upsert_contacts : un lot (une societe, un chunk bulk) en ensembliste — une
+  requete IN par cle (siren, domaine, email, LinkedIn), INSERT multi-lignes
+  ON CONFLICT. Meme precedence de fusion que des upsert_contact successifs.
+- update_contact_email : maj email d'un contact existant (Feature B)
+"""
 
 from __future__ import annotations
 
+import bisect
 import uuid
+from dataclasses import dataclass
 
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.company import Company as CrmCompany
@@ -102,6 +113,236 @@ async def upsert_contact(
     return contact.id
 
 
+@dataclass
+class ContactWrite:
+    """Une personne a ecrire (memes arguments qu'upsert_contact)."""
+
+    company: Company
+    person: PersonCandidate
+    email: str | None
+    email_status: str
+
+
+# Lignes par INSERT multi-lignes (~20 parametres/ligne : sous les limites PG/SQLite)
+_UPSERT_CHUNK = 500
+
+# Champs ecrits par l'enrichissement (ecrases a chaque passage, comme upsert_contact)
+_CONTACT_FIELDS = (
+    "first_name", "last_name", "email", "email_status", "title", "is_decision_maker",
+    "linkedin_url", "source", "enrichment_source", "company_id",
+)
+
+
+def _insert(db: AsyncSession, table):
+    """INSERT du dialecte courant (ON CONFLICT : PostgreSQL en prod, SQLite en tests)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return pg_insert(table)
+    return sqlite_insert(table)
+
+
+def _chunks(rows: list[dict]):
+    for start in range(0, len(rows), _UPSERT_CHUNK):
+        yield rows[start:start + _UPSERT_CHUNK]
+
+
+async def _first_by_key(db: AsyncSession, column, keys: set[str], organization_id) -> dict:
+    """{cle: id} de la ligne la plus ancienne (created_at, id) par cle — une requete IN."""
+    if not keys:
+        return {}
+    model = column.class_
+    rows = (
+        await db.execute(
+            select(column, model.id)
+            .where(column.in_(keys), model.organization_id == organization_id)
+            .order_by(model.created_at, model.id)
+        )
+    ).all()
+    found: dict = {}
+    for key, row_id in rows:
+        found.setdefault(key, row_id)
+    return found
+
+
+async def _resolve_companies(
+    db: AsyncSession, companies: list[Company], organization_id: uuid.UUID
+) -> list[uuid.UUID]:
+    """Id CRM de chaque societe (ordre conserve), comme _find_or_create_company en
+    serie : siren puis domaine dans l'org, sinon creation (visible des suivantes)."""
+    by_siren = await _first_by_key(
+        db, CrmCompany.siren, {c.siren for c in companies if c.siren}, organization_id,
+    )
+    by_domain = await _first_by_key(
+        db, CrmCompany.domain, {c.domain for c in companies if c.domain}, organization_id,
+    )
+
+    ids: list[uuid.UUID] = []
+    new_rows: list[dict] = []
+    for company in companies:
+        found = by_siren.get(company.siren) if company.siren else None
+        if found is None and company.domain:
+            found = by_domain.get(company.domain)
+        if found is None:
+            found = uuid.uuid4()
+            new_rows.append({
+                "id": found, "organization_id": organization_id, "name": company.name,
+                "siren": company.siren, "domain": company.domain, "custom_fields": {},
+                "domain_verified_by_icypeas": False,
+            })
+            if company.siren:
+                by_siren[company.siren] = found
+            if company.domain:
+                by_domain[company.domain] = found
+        ids.append(found)
+    if not new_rows:
+        return ids
+
+    # Course avec un autre worker sur (org, domaine) : la ligne existante gagne.
+    inserted: set[uuid.UUID] = set()
+    for chunk in _chunks(new_rows):
+        stmt = (
+            _insert(db, CrmCompany.__table__).values(chunk)
+            .on_conflict_do_nothing(index_elements=["organization_id", "domain"])
+            .returning(CrmCompany.__table__.c.id)
+        )
+        inserted.update((await db.execute(stmt)).scalars().all())
+    lost = {row["domain"]: row["id"] for row in new_rows if row["id"] not in inserted}
+    if lost:
+        winners = await _first_by_key(db, CrmCompany.domain, set(lost), organization_id)
+        remap = {lost[domain]: winner for domain, winner in winners.items()}
+        ids = [remap.get(company_id, company_id) for company_id in ids]
+    return ids
+
+
+class _ContactIndex:
+    """Contacts candidats d'un lot, dans l'ordre (created_at, id) puis crees.
+
+    Rejoue en memoire les `.first()` d'upsert_contact : une cle designe le
+    premier contact (par rang) dont la valeur COURANTE vaut encore cette cle.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[uuid.UUID, dict] = {}
+        self._rank: dict[uuid.UUID, int] = {}
+        self._keys: dict[str, dict[str, list[tuple[int, uuid.UUID]]]] = {
+            "email": {}, "linkedin_url": {},
+        }
+
+    def add(self, contact_id: uuid.UUID, email: str | None, linkedin_url: str | None) -> None:
+        self._rank[contact_id] = len(self._rank)
+        self.values[contact_id] = {"email": None, "linkedin_url": None}
+        self.set(contact_id, {"email": email, "linkedin_url": linkedin_url})
+
+    def set(self, contact_id: uuid.UUID, row: dict) -> None:
+        current = self.values[contact_id]
+        for field in ("email", "linkedin_url"):
+            value = row[field]
+            if value and value != current[field]:
+                bisect.insort(
+                    self._keys[field].setdefault(value, []),
+                    (self._rank[contact_id], contact_id),
+                )
+        self.values[contact_id] = row
+
+    def first(self, field: str, value: str | None) -> uuid.UUID | None:
+        if not value:
+            return None
+        for _, contact_id in self._keys[field].get(value, ()):
+            if self.values[contact_id][field] == value:
+                return contact_id
+        return None
+
+
+async def _load_contacts(
+    db: AsyncSession, writes: list[ContactWrite], organization_id: uuid.UUID
+) -> _ContactIndex:
+    """Contacts existants matchables par le lot : une requete IN par cle."""
+    rows: dict[uuid.UUID, tuple] = {}
+    for column, keys in (
+        (Contact.email, {w.email for w in writes if w.email}),
+        (Contact.linkedin_url, {w.person.linkedin_url for w in writes if w.person.linkedin_url}),
+    ):
+        if not keys:
+            continue
+        result = await db.execute(
+            select(Contact.id, Contact.created_at, Contact.email, Contact.linkedin_url)
+            .where(column.in_(keys), Contact.organization_id == organization_id)
+        )
+        for row in result.all():
+            rows[row.id] = row
+    index = _ContactIndex()
+    for row in sorted(rows.values(), key=lambda r: (r.created_at, r.id)):
+        index.add(row.id, row.email, row.linkedin_url)
+    return index
+
+
+async def upsert_contacts(
+    db: AsyncSession, writes: list[ContactWrite], organization_id: uuid.UUID
+) -> list[uuid.UUID]:
+    """Version ensembliste d'upsert_contact pour un lot. Retourne les contact_id
+    dans l'ordre des `writes`.
+
+    Meme precedence que des appels successifs : societe par siren puis domaine,
+    contact par email puis LinkedIn (le plus ancien d'abord), les ecritures
+    precedentes du lot etant visibles des suivantes ; la derniere ecriture d'un
+    contact gagne. Pas de cle unique email/LinkedIn sur contacts : le match est
+    resolu par les requetes IN, puis l'upsert vise la cle primaire (ON CONFLICT
+    (id) DO UPDATE). Ne commit PAS.
+    """
+    if not writes:
+        return []
+    company_ids = await _resolve_companies(db, [w.company for w in writes], organization_id)
+    index = await _load_contacts(db, writes, organization_id)
+
+    ids: list[uuid.UUID] = []
+    final: dict[uuid.UUID, dict] = {}
+    for write, company_id in zip(writes, company_ids, strict=True):
+        person = write.person
+        contact_id = index.first("email", write.email)
+        # Dedup par LinkedIn (cf. upsert_contact) : decideur deja ecrit sans email.
+        if contact_id is None:
+            contact_id = index.first("linkedin_url", person.linkedin_url)
+        if contact_id is None:
+            contact_id = uuid.uuid4()
+            index.add(contact_id, None, None)
+        row = {
+            "first_name": person.first_name,
+            "last_name": person.last_name,
+            "email": write.email,
+            "email_status": write.email_status,
+            "title": person.title_raw,
+            "is_decision_maker": person.role in _DECISION_ROLES,
+            "linkedin_url": person.linkedin_url,
+            "source": "enrichment",
+            "enrichment_source": person.source,
+            "company_id": company_id,
+        }
+        index.set(contact_id, row)
+        final[contact_id] = row
+        ids.append(contact_id)
+
+    # Valeurs d'insertion des nouveaux contacts (ignorees en cas de conflit)
+    rows = [
+        {
+            "id": contact_id, "organization_id": organization_id, "status": "new",
+            "lead_score": 0, "custom_fields": {}, "tags": [],
+            "email_verified_by_icypeas": False, **row,
+        }
+        for contact_id, row in final.items()
+    ]
+    for chunk in _chunks(rows):
+        stmt = _insert(db, Contact.__table__).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                **{field: stmt.excluded[field] for field in _CONTACT_FIELDS},
+                # onupdate n'est pas joue par ON CONFLICT DO UPDATE
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+    return ids
+
+
 def _domain_from_email(email: str) -> str | None:
     if not email or email.count("@") != 1:
         return None
@@ -21,16 +21,48 @@ from app.services.enrichment.adapters.mock import (
     MockEmailVerifier,
     MockPeopleSource,
 )
+from app.services.enrichment.gouv_cache import GouvResolutionCache
 from app.services.enrichment.ports import (
     CompanySource,
     EmailFinder,
     EmailVerifier,
     PeopleSource,
 )
+from app.services.enrichment.verification_cache import (
+    CachedEmailVerifier,
+    VerificationCache,
+)
+
+# Client Icypeas partage par le process : un seul pool HTTP et une seule boucle
+# de polling pour tous les adapters (finder, verifier, people, bulk).
+_shared_icypeas: IcypeasClient | None = None
+_shared_icypeas_key: str | None = None
 
 
 def _icypeas_client() -> IcypeasClient:
-    return IcypeasClient(settings.icypeas_api_key)
+    global _shared_icypeas, _shared_icypeas_key
+    if _shared_icypeas is None or _shared_icypeas_key != settings.icypeas_api_key:
+        _shared_icypeas = IcypeasClient(settings.icypeas_api_key)
+        _shared_icypeas_key = settings.icypeas_api_key
+    return _shared_icypeas
+
+
+def provider_latency_stats() -> dict:
+    """Percentiles de latence des recherches Icypeas unitaires de la loop courante
+    (une loop par tache Celery = le job en cours) ; {} si inutilise."""
+    if _shared_icypeas is None or not settings.icypeas_api_key:
+        return {}
+    return _shared_icypeas.loop_latency_stats()
+
+
+async def close_provider_clients() -> None:
+    """Ferme le pool HTTP Icypeas de la loop courante (fin de tache Celery).
+
+    Chaque tache a sa loop (asyncio.run) et donc son client : sans fermeture,
+    connexions et descripteurs fuient a chaque tache.
+    """
+    if _shared_icypeas is not None:
+        await _shared_icypeas.aclose()
 
 
 def get_bulk_client() -> IcypeasClient | None:
@@ -40,8 +72,9 @@ def get_bulk_client() -> IcypeasClient | None:
 
 def get_company_source() -> CompanySource:
     # "gouv" -> API recherche-entreprises (gratuite, sans cle). Sinon mock (dev/tests).
+    # Cache de resolution partage (table) : le reseau n'est sollicite que sur un miss.
     if settings.enrichment_company_source == "gouv":
-        return GouvCompanySource()
+        return GouvCompanySource(cache=GouvResolutionCache())
     return MockCompanySource()
 
 
@@ -61,6 +94,8 @@ def get_email_finders() -> list[EmailFinder]:
 
 
 def get_email_verifiers() -> list[EmailVerifier]:
+    # Verifier payant derriere le cache partage (adresse + domaine catch_all) :
+    # un resultat connu n'est ni rappele ni refacture. Un cache par appel = par job.
     if settings.icypeas_api_key:
-        return [IcypeasEmailVerifier(_icypeas_client())]
+        return [CachedEmailVerifier(IcypeasEmailVerifier(_icypeas_client()), VerificationCache())]
     return [MockEmailVerifier()]
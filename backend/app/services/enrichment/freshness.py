@@ -7,7 +7,10 @@ ete enrichie recemment. Clefs : person:{org}:{siren}:{name}.
 Redis. Par defaut client par appel (safe across-loops Celery : chaque task tourne
 dans sa propre event loop via asyncio.run). Pour la boucle chaude d'un job, passer
 un `client` reutilisable ouvert via `client_scope()` DANS la meme loop (fix #13 :
-evite d'ouvrir/fermer une connexion par personne)."""
+evite d'ouvrir/fermer une connexion par personne).
+
+API par lot : fresh_keys (un MGET) et touch_many (SET EX pipelines) resolvent
+toutes les personnes d'une societe ou d'un callback bulk en un aller-retour."""
 
 from __future__ import annotations
 
@@ -39,7 +42,7 @@ def person_key(org_id: object, siren: str | None, first_name: str, last_name: st
 @asynccontextmanager
 async def client_scope() -> AsyncIterator[redis_async.Redis]:
     """Client Redis reutilisable le temps d'un job (a utiliser dans UNE event loop).
-    Evite le churn de connexions dans la boucle chaude (is_fresh/touch par personne)."""
+    Evite le churn de connexions dans la boucle chaude (fresh_keys/touch_many)."""
     client = redis_async.from_url(_redis_url(), decode_responses=True)
     try:
         yield client
@@ -47,26 +50,43 @@ async def client_scope() -> AsyncIterator[redis_async.Redis]:
         await client.aclose()
 
 
-async def is_fresh(key: str, *, client: redis_async.Redis | None = None) -> bool:
-    """True si la clef existe encore (donnee fraiche). Fail-open -> False (re-enrichit)."""
+async def fresh_keys(
+    keys: list[str], *, client: redis_async.Redis | None = None
+) -> set[str]:
+    """Sous-ensemble des clefs encore fraiches, en UN aller-retour (MGET).
+
+    Fail-open -> set() (tout est re-enrichi).
+    """
+    if not keys:
+        return set()
     own = client is None
     c = client or redis_async.from_url(_redis_url(), decode_responses=True)
     try:
-        return bool(await c.exists(f"{_PREFIX}{key}"))
+        values = await c.mget([f"{_PREFIX}{k}" for k in keys])
+        return {k for k, v in zip(keys, values, strict=True) if v is not None}
     except Exception as exc:  # noqa: BLE001
         logger.warning("[Enrichment] freshness lecture KO : %s", exc)
-        return False
+        return set()
     finally:
         if own:
             await c.aclose()
 
 
-async def touch(key: str, ttl_days: int, *, client: redis_async.Redis | None = None) -> None:
-    """Marque la clef fraiche pour ttl_days. Best-effort."""
+async def touch_many(
+    keys: list[str], ttl_days: int, *, client: redis_async.Redis | None = None
+) -> None:
+    """Marque les clefs fraiches pour ttl_days : SET EX pipelines, UN aller-retour.
+    Best-effort."""
+    if not keys:
+        return
     own = client is None
     c = client or redis_async.from_url(_redis_url(), decode_responses=True)
+    ttl = max(1, ttl_days) * 86400
     try:
-        await c.set(f"{_PREFIX}{key}", "1", ex=max(1, ttl_days) * 86400)
+        async with c.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(f"{_PREFIX}{key}", "1", ex=ttl)
+            await pipe.execute()
     except Exception as exc:  # noqa: BLE001
         logger.warning("[Enrichment] freshness ecriture KO : %s", exc)
     finally:
@@ -0,0 +1,228 @@
+# =============================================================================
+# FGA CRM - Enrichissement : cache partage des resolutions API gouv
+# =============================================================================
+"""Cache persistant des resolutions recherche-entreprises (adapters/gouv.py).
+
+- GouvResolutionCache : lecture en lot (memo du job + table), ecriture upsert,
+  TTL positif / negatif, compteurs hits / negatifs / misses par kind (metrics)
+- prewarm_gouv_cache : pre-chauffage en lot des SIREN du CRM sans entree valide
+  + purge des entrees expirees (beat nocturne)
+
+Kinds : siren | name (table enrichment_gouv_cache) et domain (candidats de
+_domain_candidates, table enrichment_domain_checks). Partage entre orgs :
+donnees publiques (annuaire, sites web). Fail-open : une erreur DB vaut miss, la
+resolution repasse par le reseau (jamais d'echec du job a cause du cache).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.db.session import task_session_maker
+from app.models.company import Company as CrmCompany
+from app.models.enrichment import EnrichmentDomainCheck, EnrichmentGouvCache
+from app.services.enrichment.crm_writer import _insert
+
+logger = logging.getLogger(__name__)
+
+KIND_SIREN = "siren"
+KIND_NAME = "name"
+KIND_DOMAIN = "domain"
+
+# Cles par requete IN (sous les limites de parametres PG/SQLite)
+_LOOKUP_CHUNK = 500
+_PREWARM_CONCURRENCY = 5  # meme borne que _pipeline._GOUV_CONCURRENCY
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+def _expires_at(found: bool) -> datetime:
+    days = (
+        settings.enrichment_gouv_cache_ttl_days
+        if found else settings.enrichment_gouv_cache_negative_ttl_days
+    )
+    return _now() + timedelta(days=days)
+
+
+def _chunks(keys: list[str]):
+    for start in range(0, len(keys), _LOOKUP_CHUNK):
+        yield keys[start:start + _LOOKUP_CHUNK]
+
+
+class GouvResolutionCache:
+    """Cache des resolutions gouv pour la duree d'un job (memo) adosse a la table.
+
+    Les lectures d'un job ne touchent la table qu'une fois par cle (prefetch en
+    lot possible) ; chaque ecriture est un upsert court dans sa propre session.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker | None = None) -> None:
+        self._session_factory = session_factory or task_session_maker
+        # (kind, key) -> payload (None = negatif) ; _absent = cles sans entree valide
+        self._memo: dict[tuple[str, str], dict | None] = {}
+        self._absent: set[tuple[str, str]] = set()
+        self._domains: dict[str, bool] = {}
+        self._metrics: dict[str, dict[str, int]] = {}
+
+    def record(self, kind: str, outcome: str) -> None:
+        """Compte une consultation : hit | negative_hit | miss."""
+        counters = self._metrics.setdefault(kind, {"hit": 0, "negative_hit": 0, "miss": 0})
+        counters[outcome] += 1
+
+    def metrics(self) -> dict[str, dict]:
+        """Compteurs par kind + hit_rate (hits positifs et negatifs / consultations)."""
+        out = {}
+        for kind, c in self._metrics.items():
+            total = c["hit"] + c["negative_hit"] + c["miss"]
+            out[kind] = {
+                "hits": c["hit"], "negative_hits": c["negative_hit"], "misses": c["miss"],
+                "hit_rate": round((c["hit"] + c["negative_hit"]) / total, 3) if total else 0.0,
+            }
+        return out
+
+    async def get_many(self, kind: str, keys: list[str]) -> dict[str, dict | None]:
+        """Entrees valides pour `keys` : {key: payload | None si negatif}. Cles absentes = miss."""
+        wanted = list(dict.fromkeys(k for k in keys if k))
+        unknown = [
+            k for k in wanted if (kind, k) not in self._memo and (kind, k) not in self._absent
+        ]
+        if unknown:
+            try:
+                async with self._session_factory() as db:
+                    for chunk in _chunks(unknown):
+                        rows = (
+                            await db.execute(
+                                select(EnrichmentGouvCache.key, EnrichmentGouvCache.payload_json)
+                                .where(
+                                    EnrichmentGouvCache.kind == kind,
+                                    EnrichmentGouvCache.key.in_(chunk),
+                                    EnrichmentGouvCache.expires_at > _now(),
+                                )
+                            )
+                        ).all()
+                        for key, payload in rows:
+                            self._memo[(kind, key)] = payload
+            except Exception as exc:  # noqa: BLE001 — fail-open : miss
+                logger.warning("[Enrichment] cache gouv %s indisponible : %s", kind, exc)
+                return {k: self._memo[(kind, k)] for k in wanted if (kind, k) in self._memo}
+            self._absent.update((kind, k) for k in unknown if (kind, k) not in self._memo)
+        return {k: self._memo[(kind, k)] for k in wanted if (kind, k) in self._memo}
+
+    async def put_many(self, kind: str, values: dict[str, dict | None]) -> None:
+        """Upsert des resolutions (payload None = introuvable -> TTL negatif)."""
+        if not values:
+            return
+        for key, payload in values.items():
+            self._memo[(kind, key)] = payload
+            self._absent.discard((kind, key))
+        rows = [
+            {"kind": kind, "key": key, "payload_json": payload,
+             "expires_at": _expires_at(payload is not None)}
+            for key, payload in values.items()
+        ]
+        try:
+            async with self._session_factory() as db:
+                stmt = _insert(db, EnrichmentGouvCache).values(rows)
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=["kind", "key"],
+                    set_={
+                        "payload_json": stmt.excluded.payload_json,
+                        "expires_at": stmt.excluded.expires_at,
+                        "updated_at": func.now(),
+                    },
+                ))
+                await db.commit()
+        except Exception as exc:  # noqa: BLE001 — best-effort
+            logger.warning("[Enrichment] ecriture cache gouv %s KO : %s", kind, exc)
+
+    async def get_domains(self, domains: list[str]) -> dict[str, bool]:
+        """Resultats valides des candidats domaine deja testes ({domaine: repond})."""
+        unknown = [d for d in dict.fromkeys(domains) if d not in self._domains]
+        if unknown:
+            try:
+                async with self._session_factory() as db:
+                    rows = (
+                        await db.execute(
+                            select(EnrichmentDomainCheck.domain, EnrichmentDomainCheck.responds)
+                            .where(
+                                EnrichmentDomainCheck.domain.in_(unknown),
+                                EnrichmentDomainCheck.expires_at > _now(),
+                            )
+                        )
+                    ).all()
+                self._domains.update(dict(rows))
+            except Exception as exc:  # noqa: BLE001 — fail-open : miss
+                logger.warning("[Enrichment] cache domaines indisponible : %s", exc)
+        return {d: self._domains[d] for d in domains if d in self._domains}
+
+    async def put_domains(self, results: dict[str, bool]) -> None:
+        if not results:
+            return
+        self._domains.update(results)
+        rows = [
+            {"domain": domain, "responds": responds, "expires_at": _expires_at(responds)}
+            for domain, responds in results.items()
+        ]
+        try:
+            async with self._session_factory() as db:
+                stmt = _insert(db, EnrichmentDomainCheck).values(rows)
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=["domain"],
+                    set_={
+                        "responds": stmt.excluded.responds,
+                        "expires_at": stmt.excluded.expires_at,
+                        "updated_at": func.now(),
+                    },
+                ))
+                await db.commit()
+        except Exception as exc:  # noqa: BLE001 — best-effort
+            logger.warning("[Enrichment] ecriture cache domaines KO : %s", exc)
+
+
+async def prewarm_gouv_cache(db: AsyncSession, source, *, limit: int) -> dict:
+    """Purge les entrees expirees puis resout (reseau) jusqu'a `limit` SIREN du
+    CRM sans entree valide. `source` = GouvCompanySource branchee sur le cache."""
+    now = _now()
+    purged = (
+        await db.execute(delete(EnrichmentGouvCache).where(EnrichmentGouvCache.expires_at <= now))
+    ).rowcount or 0
+    purged += (
+        await db.execute(
+            delete(EnrichmentDomainCheck).where(EnrichmentDomainCheck.expires_at <= now)
+        )
+    ).rowcount or 0
+    await db.commit()
+
+    cached = select(EnrichmentGouvCache.key).where(EnrichmentGouvCache.kind == KIND_SIREN)
+    sirens = [
+        s for s in (
+            await db.execute(
+                select(CrmCompany.siren)
+                .where(CrmCompany.siren.is_not(None), CrmCompany.siren.not_in(cached))
+                .distinct()
+                .order_by(CrmCompany.siren)
+                .limit(limit)
+            )
+        ).scalars().all()
+        if s.isdigit() and len(s) == 9
+    ]
+    sem = asyncio.Semaphore(_PREWARM_CONCURRENCY)
+
+    async def _fetch(siren: str):
+        async with sem:
+            return await source.get_by_siren(siren)
+
+    results = await asyncio.gather(*(_fetch(s) for s in sirens))
+    return {
+        "candidates": len(sirens),
+        "resolved": sum(1 for c in results if c is not None),
+        "purged": purged,
+    }
@@ -2,148 +2,345 @@
 # FGA CRM - Enrichissement : mode company/batch/icp
 # =============================================================================
 """Traitement d'une societe : sourcing decideurs -> email -> verif -> RGPD ->
-contact CRM (pipeline inline), et soumission bulk (W3) via Icypeas + webhook."""
+contact CRM (pipeline inline), et soumission bulk (W3) via Icypeas + webhook.
+
+Pipeline inline : _lookup_person (reseau, concurrent borne) puis _persist_people
+(ecritures DB ensemblistes de la societe, sur la session du worker).
+
+Avec un CompanyCheckpoint (jobs inline de l'orchestrateur) : sourcing et lookups
+sont committes des qu'ils sont payes, et rejoues a la reprise du job."""
 
 from __future__ import annotations
 
+import asyncio
+from dataclasses import asdict, dataclass
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.enrichment import EnrichmentEmailVerification, EnrichmentJob
 from app.services.enrichment import freshness
-from app.services.enrichment.credit_ledger import CreditLedger
-from app.services.enrichment.crm_writer import _DECISION_ROLES, upsert_contact
+from app.services.enrichment.checkpoints import CompanyCheckpoint, JobHeartbeat
+from app.services.enrichment.credit_ledger import CreditLedger, LedgerScope
+from app.services.enrichment.crm_writer import (
+    _DECISION_ROLES,
+    ContactWrite,
+    upsert_contacts,
+)
 from app.services.enrichment.factory import get_bulk_client
-from app.services.enrichment.ports import Company, TargetSpec
-from app.services.enrichment.provenance import record_provenance
+from app.services.enrichment.ports import (
+    Company,
+    PersonCandidate,
+    TargetSpec,
+    VerificationResult,
+)
+from app.services.enrichment.provenance import record_provenance_many
 from app.services.enrichment.rgpd import classify_email
-from app.services.enrichment.suppression import is_suppressed
+from app.services.enrichment.suppression import SuppressionIndex, is_suppressed
 
 from .._pipeline import (
     _BULK_CREDIT,
     _BULK_TASK,
+    _cached_verification,
     _finalize_bulk_job,
+    _flush_verifications,
     _freshness_key,
     _persist_bulk,
+    _prefetch_verifications,
     _source_people,
 )
 
 
-async def _process_company(
+@dataclass
+class _PersonLookup:
+    """Resultat reseau d'une personne (phase concurrente), persiste ensuite."""
+
+    fresh_key: str
+    email: str | None = None
+    domain_type: str | None = None
+    verification: VerificationResult | None = None
+
+
+def _dump_lookup(lookup: _PersonLookup | None) -> dict:
+    """Resultat de lookup serialise (checkpoint). None = email trouve mais ecarte
+    (non pro ou supprime)."""
+    if lookup is None:
+        return {"skipped": True}
+    return {
+        "email": lookup.email, "domain_type": lookup.domain_type,
+        "verification": asdict(lookup.verification) if lookup.verification else None,
+    }
+
+
+def _load_lookup(payload: dict, fresh_key: str, stats: dict) -> _PersonLookup | None:
+    """Rejoue un lookup checkpointe (memes effets sur `stats`, sans appel provider)."""
+    if payload.get("skipped") or payload.get("email"):
+        stats["emails_found"] += 1
+    if payload.get("skipped"):
+        return None
+    verification = payload.get("verification")
+    return _PersonLookup(
+        fresh_key=fresh_key, email=payload.get("email"),
+        domain_type=payload.get("domain_type"),
+        verification=VerificationResult(**verification) if verification else None,
+    )
+
+
+async def _lookup_person(
     db: AsyncSession,
+    db_lock: asyncio.Lock,
     *,
     company: Company,
-    company_src,
-    people_srcs,
+    person: PersonCandidate,
+    fresh_key: str,
+    domain: str | None,
     finders,
     verifiers,
-    ledger: CreditLedger,
+    ledger: CreditLedger | LedgerScope,
     org_id,
     stats: dict,
-    fresh_client=None,
-) -> None:
-    """Traite UNE societe : sourcing -> email -> verif -> RGPD -> contact CRM.
+    suppressions: SuppressionIndex | None = None,
+) -> _PersonLookup | None:
+    """Phase reseau d'une personne (non fraiche) : email -> RGPD -> verif.
 
-    Modifie `stats` en place. Ne commit PAS : l'appelant gere le checkpoint par
-    societe (resilience) et la transaction. `fresh_client` : client Redis reutilise
-    sur la boucle chaude (fix #13, evite le churn de connexions).
+    None = rien a persister (email non pro ou supprime). Les credits passent par
+    reserve/settle : plusieurs personnes sont en vol en meme temps.
     """
-    domain, people = await _source_people(
-        db, company=company, company_src=company_src, people_srcs=people_srcs,
-        ledger=ledger, org_id=org_id, stats=stats,
+    email = person.email
+    # Domaine prioritaire : celui vu par la source (LinkedIn via Icypeas), sinon
+    # le domaine resolu de la societe, sinon le nom (Icypeas accepte
+    # `domainOrCompany`). Le domaine du lead permet de trouver l'email meme
+    # quand la societe CRM n'a pas de domaine renseigne (ex: SHERWOOD).
+    dom_or_company = person.company_domain or domain or company.name
+    if not email and dom_or_company:
+        for finder in finders:
+            if not ledger.reserve(finder.cost_per_hit):
+                break
+            try:
+                cand = await finder.find(person, dom_or_company)
+            except BaseException:
+                ledger.release(finder.cost_per_hit)
+                raise
+            if cand:
+                ledger.settle(finder.name, finder.cost_per_hit)
+                email = cand.email
+                break
+            ledger.release(finder.cost_per_hit)
+    if not email:
+        return _PersonLookup(fresh_key=fresh_key)
+    stats["emails_found"] += 1
+
+    # Filtres RGPD bloquants (pro nominatif uniquement). Index en memoire ; la
+    # session du worker (confirmation Bloom, ou pas d'index) est partagee par les
+    # personnes en vol : acces serialise.
+    domain_type = classify_email(email)
+    if domain_type != "pro":
+        return None
+    async with db_lock:
+        if await is_suppressed(db, organization_id=org_id, email=email, index=suppressions):
+            return None
+
+    # Verification (cache adresse / domaine catch_all : ni appel ni credit)
+    verification = None
+    for v in verifiers:
+        verification = await _cached_verification(v, email)
+        if verification is not None:
+            break
+        if not ledger.reserve(v.cost_per_check):
+            break
+        try:
+            verification = await v.verify(email)
+        except BaseException:
+            ledger.release(v.cost_per_check)
+            raise
+        ledger.settle(v.name, v.cost_per_check)
+        break
+    return _PersonLookup(
+        fresh_key=fresh_key, email=email, domain_type=domain_type,
+        verification=verification,
     )
 
-    # Etapes 4-6 : email -> verif -> RGPD -> contact
-    for person in people:
-        # Fraicheur (spec §13) : skip si deja enrichie recemment -> pas de re-depense.
-        fresh_key = _freshness_key(org_id, company.siren, person)
-        if await freshness.is_fresh(fresh_key, client=fresh_client):
-            stats["skipped_fresh"] += 1
-            continue
 
-        email = person.email
-        # Domaine prioritaire : celui vu par la source (LinkedIn via Icypeas), sinon
-        # le domaine resolu de la societe, sinon le nom (Icypeas accepte
-        # `domainOrCompany`). Le domaine du lead permet de trouver l'email meme
-        # quand la societe CRM n'a pas de domaine renseigne (ex: SHERWOOD).
-        dom_or_company = person.company_domain or domain or company.name
-        if not email and dom_or_company:
-            for finder in finders:
-                if not ledger.can_spend(finder.cost_per_hit):
-                    break
-                cand = await finder.find(person, dom_or_company)
-                if cand:
-                    ledger.record(finder.name, finder.cost_per_hit)
-                    email = cand.email
-                    break
-        if not email:
-            # Aucun email trouve (typiquement : domaine manquant). On enregistre
-            # quand meme le DECIDEUR (nom + role + LinkedIn) pour ne pas perdre
-            # l'info -> l'email pourra etre complete plus tard. Restreint aux roles
-            # cibles (CTO/CPO/CMO/FOUNDER) pour eviter le bruit.
-            if person.role in _DECISION_ROLES:
-                contact_id = await upsert_contact(
-                    db, company=company, person=person, email=None,
-                    email_status="not_found", organization_id=org_id,
-                )
-                await record_provenance(
-                    db, entity_type="person", field="name", source=person.source,
-                    contact_id=contact_id, organization_id=org_id,
-                )
-                stats["contacts_no_email"] = stats.get("contacts_no_email", 0) + 1
-                # On ne marque PAS la personne "fraiche" ici : un decideur SANS email
-                # n'est pas "enrichi", il doit rester retentable pour qu'un run
-                # ulterieur complete son email (ex: via le domaine du lead, #31).
-                # Marquer frais le gelerait enrichment_refresh_days (60j) et
-                # contredirait l'intention "l'email pourra etre complete plus tard".
-            continue
-        stats["emails_found"] += 1
+async def _persist_people(
+    db: AsyncSession,
+    *,
+    company: Company,
+    found: list[tuple[PersonCandidate, _PersonLookup]],
+    org_id,
+    stats: dict,
+) -> list[str]:
+    """Phase DB de la societe, ensembliste : contacts CRM (upsert_contacts) +
+    verifs + provenance, en quelques requetes quel que soit le nombre de personnes.
+
+    Retourne les cles de fraicheur des personnes enrichies (a marquer fraiches).
+    """
+    # Aucun email trouve (typiquement : domaine manquant). On enregistre quand
+    # meme le DECIDEUR (nom + role + LinkedIn) pour ne pas perdre l'info ->
+    # l'email pourra etre complete plus tard. Restreint aux roles cibles
+    # (CTO/CPO/CMO/FOUNDER) pour eviter le bruit.
+    found = [
+        (person, lookup) for person, lookup in found
+        if lookup.email is not None or person.role in _DECISION_ROLES
+    ]
+    if not found:
+        return []
+
+    writes = []
+    for person, lookup in found:
+        verification = lookup.verification
+        writes.append(ContactWrite(
+            company=company, person=person, email=lookup.email,
+            email_status=(
+                "not_found" if lookup.email is None
+                else verification.status if verification else "unknown"
+            ),
+        ))
+    contact_ids = await upsert_contacts(db, writes, org_id)
 
-        # Filtres RGPD bloquants (pro nominatif uniquement)
-        domain_type = classify_email(email)
-        if domain_type != "pro" or await is_suppressed(db, organization_id=org_id, email=email):
+    enriched: list[str] = []
+    verifications: list[EnrichmentEmailVerification] = []
+    events: list[dict] = []
+    for (person, lookup), write, contact_id in zip(found, writes, contact_ids, strict=True):
+        events.append({
+            "entity_type": "person", "field": "name", "source": person.source,
+            "contact_id": contact_id, "organization_id": org_id,
+        })
+        if lookup.email is None:
+            stats["contacts_no_email"] = stats.get("contacts_no_email", 0) + 1
+            # On ne marque PAS la personne "fraiche" ici : un decideur SANS email
+            # n'est pas "enrichi", il doit rester retentable pour qu'un run
+            # ulterieur complete son email (ex: via le domaine du lead, #31).
+            # Marquer frais le gelerait enrichment_refresh_days (60j) et
+            # contredirait l'intention "l'email pourra etre complete plus tard".
             continue
 
-        # Verification
-        verification = None
-        for v in verifiers:
-            if not ledger.can_spend(v.cost_per_check):
-                break
-            verification = await v.verify(email)
-            ledger.record(v.name, v.cost_per_check)
-            break
-        status = verification.status if verification else "unknown"
+        verification = lookup.verification
         confidence = verification.confidence if verification else None
-        deliverable = status == "valid" or (
-            status == "catch_all"
+        source = verification.source if verification else "unknown"
+        deliverable = write.email_status == "valid" or (
+            write.email_status == "catch_all"
             and confidence is not None
             and confidence >= settings.enrichment_catchall_accept
         )
-
-        # Persistance : contact CRM + verif + provenance
-        contact_id = await upsert_contact(
-            db, company=company, person=person, email=email, email_status=status,
-            organization_id=org_id,
-        )
-        db.add(EnrichmentEmailVerification(
+        verifications.append(EnrichmentEmailVerification(
             organization_id=org_id, contact_id=contact_id,
-            email=email, domain_type=domain_type, confidence=confidence,
-            status=status, deliverable=deliverable,
-            source=verification.source if verification else "unknown",
+            email=lookup.email, domain_type=lookup.domain_type, confidence=confidence,
+            status=write.email_status, deliverable=deliverable, source=source,
         ))
-        await record_provenance(
-            db, entity_type="person", field="name", source=person.source,
-            contact_id=contact_id, organization_id=org_id,
-        )
-        await record_provenance(
-            db, entity_type="email", field="email",
-            source=verification.source if verification else "unknown",
-            contact_id=contact_id, organization_id=org_id,
-        )
+        events.append({
+            "entity_type": "email", "field": "email", "source": source,
+            "contact_id": contact_id, "organization_id": org_id,
+        })
         if deliverable:
             stats["valid"] += 1
-        # Fraicheur : marque la personne enrichie pour eviter la re-depense avant TTL
-        await freshness.touch(fresh_key, settings.enrichment_refresh_days, client=fresh_client)
+        enriched.append(lookup.fresh_key)
+
+    db.add_all(verifications)
+    await record_provenance_many(db, events)
+    return enriched
+
+
+async def _process_company(
+    db: AsyncSession,
+    *,
+    company: Company,
+    company_src,
+    people_srcs,
+    finders,
+    verifiers,
+    ledger: CreditLedger,
+    org_id,
+    stats: dict,
+    fresh_client=None,
+    suppressions: SuppressionIndex | None = None,
+    checkpoint: CompanyCheckpoint | None = None,
+) -> None:
+    """Traite UNE societe : sourcing -> email -> verif -> RGPD -> contact CRM.
+
+    Modifie `stats` en place. Ne commit PAS les contacts : l'appelant gere la fin
+    de societe (resilience) et la transaction. `fresh_client` : client Redis
+    reutilise sur la boucle chaude (fix #13, evite le churn de connexions).
+    `checkpoint` : commits du sourcing et des lookups payes, rejoues a la reprise
+    (`stats` doit alors etre propre a la societe : il est checkpointe tel quel).
+
+    Etapes 4-6 en deux phases : appels provider concurrents (au plus
+    enrichment_person_concurrency personnes en vol), puis ecritures DB en lot
+    dans l'ordre des personnes (une AsyncSession ne supporte pas l'usage concurrent).
+    """
+    sourced = checkpoint.sourced() if checkpoint is not None else None
+    if sourced is not None:
+        # Reprise : domaine + personnes deja payes, stats du sourcing rejouees.
+        domain = sourced["domain"]
+        people = [PersonCandidate(**p) for p in sourced["people"]]
+        for k, v in sourced["stats"].items():
+            stats[k] = stats.get(k, 0) + v
+    else:
+        scope = LedgerScope(ledger)
+        before = dict(stats)
+        domain, people = await _source_people(
+            db, company=company, company_src=company_src, people_srcs=people_srcs,
+            ledger=scope, org_id=org_id, stats=stats, suppressions=suppressions,
+        )
+        if checkpoint is not None:
+            await checkpoint.save_sourced(db, {
+                "domain": domain,
+                "people": [asdict(p) for p in people],
+                "stats": {k: v - before.get(k, 0) for k, v in stats.items() if v != before.get(k)},
+            }, scope.spent)
+    if not people:
+        return
+
+    # Fraicheur (spec §13) : personnes enrichies recemment -> skip, pas de re-depense.
+    # Un seul MGET pour toute la societe.
+    keys = [_freshness_key(org_id, company.siren, person) for person in people]
+    fresh = await freshness.fresh_keys(keys, client=fresh_client)
+    todo = [(p, k) for p, k in zip(people, keys, strict=True) if k not in fresh]
+    stats["skipped_fresh"] += len(people) - len(todo)
+
+    sem = asyncio.Semaphore(max(1, settings.enrichment_person_concurrency))
+    db_lock = asyncio.Lock()
+
+    async def _bounded(person: PersonCandidate, key: str) -> _PersonLookup | None:
+        cached = checkpoint.lookup(key) if checkpoint is not None else None
+        if cached is not None:
+            return _load_lookup(cached, key, stats)
+        async with sem:
+            scope = LedgerScope(ledger)
+            lookup = await _lookup_person(
+                db, db_lock, company=company, person=person, fresh_key=key,
+                domain=domain, finders=finders, verifiers=verifiers, ledger=scope,
+                org_id=org_id, stats=stats, suppressions=suppressions,
+            )
+            if checkpoint is not None:
+                async with db_lock:
+                    await checkpoint.save_lookup(db, key, _dump_lookup(lookup), scope.spent)
+            return lookup
+
+    # Cache de verification : domaines et adresses connus de la societe en une
+    # lecture ; resultats appris ecrits en lot a la fin de ses lookups.
+    await _prefetch_verifications(
+        verifiers,
+        domains=[d for d in (domain, *(p.company_domain for p, _ in todo)) if d],
+        emails=[p.email for p, _ in todo if p.email],
+    )
+    # TaskGroup : une personne en erreur annule les autres (echec isole a la
+    # societe par l'orchestrateur, sans appel orphelin sur la session).
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_bounded(person, key)) for person, key in todo]
+    finally:
+        await _flush_verifications(verifiers)
+
+    found = [
+        (person, task.result())
+        for (person, _), task in zip(todo, tasks, strict=True)
+        if task.result() is not None
+    ]
+    enriched = await _persist_people(
+        db, company=company, found=found, org_id=org_id, stats=stats,
+    )
+    # Fraicheur : marque les personnes enrichies (SET EX pipelines, un aller-retour)
+    await freshness.touch_many(enriched, settings.enrichment_refresh_days, client=fresh_client)
 
 
 def _should_use_bulk(target: TargetSpec) -> bool:
@@ -169,6 +366,7 @@ async def _submit_bulk_job(
     org_id,
     stats: dict,
     fresh_client=None,
+    suppressions: SuppressionIndex | None = None,
 ) -> None:
     """Mode bulk : source les personnes (inline) puis soumet UN bulk email-search
     a Icypeas avec callback webhook. Les contacts sont crees au callback (W2), pas ici.
@@ -180,20 +378,28 @@ async def _submit_bulk_job(
     rows: list[list[str]] = []
     ext_ids: list[str] = []
     contexts: list[dict] = []
+    # Sourcing long (find-people par societe) sans commit : heartbeat du job pour
+    # que le beat ne le juge pas mort (sinon 2e worker -> double bulk et debit).
+    heartbeat = JobHeartbeat(db, job.id)
 
     for company in companies:
+        await heartbeat.beat()
         domain, people = await _source_people(
             db, company=company, company_src=company_src, people_srcs=people_srcs,
-            ledger=ledger, org_id=org_id, stats=stats,
+            ledger=ledger, org_id=org_id, stats=stats, suppressions=suppressions,
+        )
+        # Icypeas accepte `domainOrCompany` : domaine resolu si dispo, sinon nom.
+        dom_or_company = domain or company.name
+        if not dom_or_company:
+            stats["skipped_no_domain"] += len(people)
+            continue
+        # Fraicheur de toute la societe en un MGET.
+        fresh = await freshness.fresh_keys(
+            [_freshness_key(org_id, company.siren, person) for person in people],
+            client=fresh_client,
         )
         for person in people:
-            # Icypeas accepte `domainOrCompany` : domaine resolu si dispo, sinon nom.
-            dom_or_company = domain or company.name
-            if not dom_or_company:
-                stats["skipped_no_domain"] += 1
-                continue
-            fresh_key = _freshness_key(org_id, company.siren, person)
-            if await freshness.is_fresh(fresh_key, client=fresh_client):
+            if _freshness_key(org_id, company.siren, person) in fresh:
                 stats["skipped_fresh"] += 1
                 continue
             if person.email:
@@ -15,20 +15,24 @@ from app.config import settings
 from app.models.company import Company as CrmCompany
 from app.models.contact import Contact
 from app.models.enrichment import EnrichmentEmailVerification, EnrichmentJob
+from app.services.enrichment.checkpoints import JobHeartbeat
 from app.services.enrichment.credit_ledger import CreditLedger
 from app.services.enrichment.crm_writer import update_contact_email
 from app.services.enrichment.factory import get_bulk_client
 from app.services.enrichment.ports import PersonCandidate, TargetSpec
 from app.services.enrichment.provenance import record_provenance
 from app.services.enrichment.rgpd import classify_email
-from app.services.enrichment.suppression import is_suppressed
+from app.services.enrichment.suppression import SuppressionIndex, is_suppressed
 
 from .._pipeline import (
     _BULK_CREDIT,
     _BULK_TASK,
     _VERIFY_TASK,
+    _cached_verification,
     _finalize_bulk_job,
+    _flush_verifications,
     _persist_bulk,
+    _prefetch_verifications,
     _to_uuid,
 )
 
@@ -153,6 +157,7 @@ async def _process_contact(
     stats: dict,
     reverify: bool,
     companies: dict,
+    suppressions: SuppressionIndex | None = None,
 ) -> None:
     """Enrichit UN contact existant (Feature B) : trouve l'email manquant (ou
     re-verifie l'existant si reverify), met a jour le contact + provenance."""
@@ -187,19 +192,27 @@ async def _process_contact(
         stats["emails_found"] += 1
         # Filtres RGPD bloquants (uniquement sur un email nouvellement trouve).
         domain_type = classify_email(email)
-        if domain_type != "pro" or await is_suppressed(db, organization_id=org_id, email=email):
+        if domain_type != "pro" or await is_suppressed(
+            db, organization_id=org_id, email=email, index=suppressions,
+        ):
             return
 
     # Reverify sur email EXISTANT : respecter la liste de suppression RGPD
     # (opt-out/bounce), comme pour un email nouvellement trouve. Sans ce garde,
     # un contact en liste de suppression serait re-marque deliverable/valid. (FIX #8)
-    if has_email and reverify and await is_suppressed(db, organization_id=org_id, email=email):
+    if has_email and reverify and await is_suppressed(
+        db, organization_id=org_id, email=email, index=suppressions,
+    ):
         stats["skipped_suppressed"] = stats.get("skipped_suppressed", 0) + 1
         return
 
-    # Verification (email trouve OU existant a re-verifier)
+    # Verification (email trouve OU existant a re-verifier). Cache adresse /
+    # domaine catch_all : ni appel ni credit.
     verification = None
     for v in verifiers:
+        verification = await _cached_verification(v, email)
+        if verification is not None:
+            break
         if not ledger.can_spend(v.cost_per_check):
             break
         verification = await v.verify(email)
@@ -231,18 +244,39 @@ async def _process_contact(
 async def _run_contacts_inline(
     db: AsyncSession, target: TargetSpec, *,
     finders, verifiers, ledger: CreditLedger, org_id, stats: dict,
+    suppressions: SuppressionIndex | None = None, job_id=None,
 ) -> None:
-    """Mode contacts (inline) : enrichit chaque contact, checkpoint par contact."""
+    """Mode contacts (inline) : enrichit chaque contact, checkpoint par contact.
+
+    `job_id` : heartbeat du job entre les contacts (appels Icypeas longs).
+    """
     contacts = await _resolve_contacts(db, target, org_id)
     companies = await _load_companies(db, contacts, org_id)  # #4/#5 : evite le N+1
-    for contact in contacts:
-        try:
-            await _process_contact(
-                db, contact, finders=finders, verifiers=verifiers, ledger=ledger,
-                org_id=org_id, stats=stats, reverify=target.reverify, companies=companies,
-            )
-            await db.commit()
-        except Exception:  # noqa: BLE001 — echec isole au contact
-            logger.exception("[Enrichment] job contacts : contact %s echoue, skip", contact.id)
-            await db.rollback()
-            stats["errors"] += 1
+    # Cache de verification : adresses existantes et domaines en une lecture
+    emails = [c.email for c in contacts if c.email]
+    await _prefetch_verifications(
+        verifiers,
+        domains=[
+            *(e.rsplit("@", 1)[-1].lower() for e in emails if "@" in e),
+            *(c.domain for c in companies.values() if c.domain),
+        ],
+        emails=emails,
+    )
+    heartbeat = JobHeartbeat(db, job_id) if job_id is not None else None
+    try:
+        for contact in contacts:
+            if heartbeat is not None:
+                await heartbeat.beat()
+            try:
+                await _process_contact(
+                    db, contact, finders=finders, verifiers=verifiers, ledger=ledger,
+                    org_id=org_id, stats=stats, reverify=target.reverify, companies=companies,
+                    suppressions=suppressions,
+                )
+                await db.commit()
+            except Exception:  # noqa: BLE001 — echec isole au contact
+                logger.exception("[Enrichment] job contacts : contact %s echoue, skip", contact.id)
+                await db.rollback()
+                stats["errors"] += 1
+    finally:
+        await _flush_verifications(verifiers)
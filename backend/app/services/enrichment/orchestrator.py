@@ -6,24 +6,40 @@ emails -> verif + filtres RGPD -> contact CRM + provenance. Idempotent (DC5),
 echec -> failed borne (DC2). Providers via factory (mock-first).
 
 Dispatch pur : les helpers partages vivent dans `_pipeline`, les handlers de mode
-dans `modes/` (company / contacts). Graphe acyclique orchestrator -> {_pipeline, modes}."""
+dans `modes/` (company / contacts). Graphe acyclique orchestrator -> {_pipeline, modes}.
+
+Pipeline inline : pool de workers (une session DB chacun), cf. _run_company_workers.
+Reprise : le job est pris par claim_job (queued, ou running perime) et les
+societes deja terminees sont sautees depuis leurs checkpoints (checkpoints.py)."""
 
 from __future__ import annotations
 
+import asyncio
 import logging
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.config import settings
 from app.models.enrichment import EnrichmentJob
 from app.services.enrichment import freshness
+from app.services.enrichment.checkpoints import (
+    CompanyCheckpoint,
+    claim_job,
+    company_key,
+    load_progress,
+    merge_stats,
+)
 from app.services.enrichment.credit_ledger import CreditLedger
 from app.services.enrichment.factory import (
     get_company_source,
     get_email_finders,
     get_email_verifiers,
     get_people_sources,
+    provider_latency_stats,
 )
+from app.services.enrichment.ports import Company
+from app.services.enrichment.suppression import SuppressionIndex, load_suppression_index
 
 from ._pipeline import (
     _now,
@@ -47,6 +63,122 @@ logger = logging.getLogger(__name__)
 
 _MAX_ERROR_LEN = 2000
 
+# Compteurs modifies par _process_company : stats propres a chaque societe
+# (checkpointees a sa fin), fusionnees ensuite dans les stats du job.
+_COMPANY_STATS = (
+    "companies", "people_found", "emails_found", "valid", "suppressed", "skipped_fresh",
+)
+
+
+async def _run_company_workers(
+    db: AsyncSession,
+    job: EnrichmentJob,
+    companies: list[Company],
+    *,
+    company_src,
+    people_srcs,
+    finders,
+    verifiers,
+    ledger: CreditLedger,
+    org_id,
+    stats: dict,
+    fresh_client=None,
+    suppressions: SuppressionIndex | None = None,
+) -> None:
+    """Pool de workers : enrichment_company_concurrency societes en parallele.
+
+    Chaque worker a SA session (meme bind que `db`) et commit par societe : ses
+    contacts + le checkpoint `done` de la societe (atomique) + instantane de
+    progression dans job.stats_json (heartbeat). Les stats et le ledger sont
+    partages ; mutations synchrones -> atomiques dans la boucle asyncio. Une
+    erreur isole la societe (rollback du seul worker, checkpoint `failed`).
+
+    Reprise : les societes terminees sont sautees, leurs stats et les credits
+    deja factures (sourcing, lookups) reportes dans `stats` et le ledger.
+    """
+    progress = await load_progress(db, job.id)
+    if progress.resumed:
+        ledger.record("resume", progress.credits)
+        merge_stats(stats, progress.stats)
+        logger.info(
+            "[Enrichment] job %s repris : %d societe(s) deja traitee(s), %.1f credit(s) reporte(s)",
+            job.id, len(progress.finished), progress.credits,
+        )
+    remaining = [c for c in companies if company_key(c) not in progress.finished]
+    stats["companies_total"] = len(companies)
+    stats["companies_processed"] = len(companies) - len(remaining)
+    if not remaining:
+        return
+    session_factory = async_sessionmaker(
+        db.bind, class_=AsyncSession, expire_on_commit=False, autoflush=False,
+    )
+    job_id = job.id
+    # Iterateur partage : chaque worker tire la societe suivante (next() ne
+    # rend pas la main a la boucle -> aucune societe traitee deux fois).
+    pending = iter(remaining)
+
+    async def _worker() -> None:
+        async with session_factory() as wdb:
+            for company in pending:
+                checkpoint = CompanyCheckpoint(
+                    job_id=job_id, org_id=org_id, key=company_key(company), progress=progress,
+                )
+                company_stats = dict.fromkeys(_COMPANY_STATS, 0)
+                # Resilience par societe : une erreur (provider reel KO, etc.) isole la
+                # societe et preserve le travail deja committe des autres (checkpoint).
+                try:
+                    await _process_company(
+                        wdb, company=company, company_src=company_src,
+                        people_srcs=people_srcs, finders=finders, verifiers=verifiers,
+                        ledger=ledger, org_id=org_id, stats=company_stats,
+                        fresh_client=fresh_client, suppressions=suppressions,
+                        checkpoint=checkpoint,
+                    )
+                    await checkpoint.finish(wdb, "done", company_stats)
+                except Exception:  # noqa: BLE001 — echec isole a la societe, on continue
+                    logger.exception(
+                        "[Enrichment] job %s : societe %s echouee, skip",
+                        job_id, getattr(company, "siren", "?"),
+                    )
+                    await wdb.rollback()
+                    company_stats = {"errors": 1}
+                    await checkpoint.finish(wdb, "failed", company_stats)
+                merge_stats(stats, company_stats)
+                stats["companies_processed"] += 1
+                stats["credits_spent"] = ledger.spent_this_run()
+                await wdb.execute(
+                    update(EnrichmentJob)
+                    .where(EnrichmentJob.id == job_id)
+                    .values(stats_json=dict(stats))
+                )
+                await wdb.commit()
+
+    n_workers = min(max(1, settings.enrichment_company_concurrency), len(remaining))
+    await asyncio.gather(*(_worker() for _ in range(n_workers)))
+
+
+def _record_provider_metrics(
+    job: EnrichmentJob, stats: dict, company_src, verifiers=(),
+) -> None:
+    """Exporte les percentiles de latence Icypeas des recherches du job,
+    le hit-rate du cache de resolution gouv du job et les verifications evitees
+    par le cache de verification (appels, latence estimee)."""
+    latency = provider_latency_stats()
+    if latency:
+        stats["icypeas_latency"] = latency
+        logger.info("[Enrichment] job %s : latences Icypeas %s", job.id, latency)
+    cache_metrics = getattr(company_src, "cache_metrics", None)
+    gouv_cache = cache_metrics() if cache_metrics is not None else {}
+    if gouv_cache:
+        stats["gouv_cache"] = gouv_cache
+        logger.info("[Enrichment] job %s : cache gouv %s", job.id, gouv_cache)
+    for verifier in verifiers:
+        cache_metrics = getattr(verifier, "cache_metrics", None)
+        if cache_metrics is not None:
+            stats["verify_cache"] = cache_metrics()
+            logger.info("[Enrichment] job %s : cache verifications %s", job.id, stats["verify_cache"])
+            break
+
 
 async def run_enrichment_job(db: AsyncSession, job: EnrichmentJob) -> None:
     """Execute le pipeline. Ne leve pas : echec -> statut failed (DC2)."""
@@ -54,8 +186,11 @@ async def run_enrichment_job(db: AsyncSession, job: EnrichmentJob) -> None:
         logger.info("[Enrichment] job %s deja terminal (%s), skip", job.id, job.status)
         return
 
-    job.status = "running"
-    await db.commit()
+    # Prise atomique : queued, ou running dont le worker est mort (reprise depuis
+    # les checkpoints). Un job tenu par un worker vivant n'est pas relance.
+    if not await claim_job(db, job):
+        logger.info("[Enrichment] job %s deja pris par un autre worker, skip", job.id)
+        return
     # Capture locale : org_id reste accessible apres les commits par societe.
     org_id = job.organization_id
 
@@ -77,6 +212,8 @@ async def run_enrichment_job(db: AsyncSession, job: EnrichmentJob) -> None:
         verifiers = get_email_verifiers()
 
         target = _parse_target(job.target_json or {})
+        # Liste d'exclusion de l'org : chargee une fois pour tout le job.
+        suppressions = await load_suppression_index(db, org_id)
 
         # Mode contacts (Feature B) : enrichir des contacts existants.
         if target.kind == "contacts":
@@ -88,9 +225,11 @@ async def run_enrichment_job(db: AsyncSession, job: EnrichmentJob) -> None:
                 return  # awaiting_results : le webhook (W2) met a jour les contacts
             await _run_contacts_inline(
                 db, target, finders=finders, verifiers=verifiers,
-                ledger=ledger, org_id=org_id, stats=stats,
+                ledger=ledger, org_id=org_id, stats=stats, suppressions=suppressions,
+                job_id=job.id,
             )
             stats["credits_spent"] = ledger.spent_this_run()
+            _record_provider_metrics(job, stats, company_src, verifiers)
             job.stats_json = stats
             job.status = "done"
             job.finished_at = _now()
@@ -114,28 +253,18 @@ async def run_enrichment_job(db: AsyncSession, job: EnrichmentJob) -> None:
                 await _submit_bulk_job(
                     db, job, companies, company_src=company_src, people_srcs=people_srcs,
                     ledger=ledger, org_id=org_id, stats=stats, fresh_client=fresh_client,
+                    suppressions=suppressions,
                 )
                 return
 
-            for company in companies:
-                # Resilience par societe : une erreur (provider reel KO, etc.) isole la
-                # societe et preserve le travail deja committe des precedentes (checkpoint).
-                try:
-                    await _process_company(
-                        db, company=company, company_src=company_src,
-                        people_srcs=people_srcs, finders=finders, verifiers=verifiers,
-                        ledger=ledger, org_id=org_id, stats=stats, fresh_client=fresh_client,
-                    )
-                    await db.commit()
-                except Exception:  # noqa: BLE001 — echec isole a la societe, on continue
-                    logger.exception(
-                        "[Enrichment] job %s : societe %s echouee, skip",
-                        job.id, getattr(company, "siren", "?"),
-                    )
-                    await db.rollback()
-                    stats["errors"] += 1
+            await _run_company_workers(
+                db, job, companies, company_src=company_src, people_srcs=people_srcs,
+                finders=finders, verifiers=verifiers, ledger=ledger, org_id=org_id,
+                stats=stats, fresh_client=fresh_client, suppressions=suppressions,
+            )
 
         stats["credits_spent"] = ledger.spent_this_run()
+        _record_provider_metrics(job, stats, company_src, verifiers)
         job.stats_json = stats
         job.status = "done"
         job.finished_at = _now()
@@ -106,6 +106,10 @@ class CompanySource(ABC):
         faire (ex: GouvCompanySource via recherche-entreprises.api.gouv.fr)."""
         return None
 
+    async def prefetch(self, *, sirens: list[str] = (), names: list[str] = ()) -> None:
+        """Prechargement en lot (cache) avant des resolutions unitaires. Defaut : rien."""
+        return None
+
 
 class PeopleSource(ABC):
     name: str = ""
@@ -129,3 +133,7 @@ class EmailVerifier(ABC):
 
     @abstractmethod
     async def verify(self, email: str) -> VerificationResult: ...
+
+    async def cached(self, email: str) -> VerificationResult | None:
+        """Resultat deja connu (cache), sans appel ni credit. Defaut : aucun."""
+        return None
@@ -3,12 +3,17 @@
 # =============================================================================
 """ProvenanceService (spec §11.4) : enregistre l'origine de chaque donnee
 (nom/email/titre/linkedin) avec base legale + horodatage. Reponse immediate a
-« d'ou vient ma donnee ? ». N'commit PAS (l'orchestrateur gere la transaction)."""
+« d'ou vient ma donnee ? ». N'commit PAS (l'orchestrateur gere la transaction).
+
+- record_provenance : un evenement (add)
+- record_provenance_many : un lot d'evenements en un INSERT multi-lignes
+"""
 
 from __future__ import annotations
 
 import uuid
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.enrichment import (
@@ -38,3 +43,16 @@ async def record_provenance(
         source_detail=source_detail,
         legal_basis=legal_basis,
     ))
+
+
+async def record_provenance_many(db: AsyncSession, events: list[dict]) -> None:
+    """Ajoute un lot d'evenements (memes cles que record_provenance) en un INSERT.
+
+    Commit par l'appelant. Les contacts references doivent deja etre ecrits.
+    """
+    if not events:
+        return
+    await db.execute(
+        insert(EnrichmentProvenance),
+        [{"legal_basis": LEGAL_BASIS_LEGITIMATE_INTEREST, **event} for event in events],
+    )
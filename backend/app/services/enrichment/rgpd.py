@@ -10,6 +10,8 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
+
 # Domaines personnels exacts (extensible via config plus tard).
 _PERSONAL_EXACT: frozenset[str] = frozenset({
     "gmail.com", "googlemail.com", "icloud.com", "me.com", "mac.com",
@@ -60,6 +62,7 @@ def is_generic_local(local: str) -> bool:
     return (local or "").strip().lower() in _GENERIC_LOCALS
 
 
+@lru_cache(maxsize=8192)  # pure : memes candidats re-classes par lookup et par callback
 def classify_email(email: str) -> str:
     """Retourne le domain_type : 'personal' | 'generic' | 'pro'.
 
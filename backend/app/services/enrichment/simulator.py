@@ -0,0 +1,337 @@
+# =============================================================================
+# FGA CRM - Enrichissement : simulateur hors ligne de la cascade (benchmark)
+# =============================================================================
+"""Simulateur de la cascade d'enrichissement, sans fournisseur ni base.
+
+- ProviderProfile : fournisseur synthetique (cout, taux de succes, latence
+  lognormale, taux d'erreur, plafond de concurrence)
+- SimCompanySource / SimPeopleSource / SimEmailFinder / SimEmailVerifier :
+  adapters des ports pilotes par un profil, DETERMINISTES (hash de la cle, pas
+  de l'ordre d'appel) -> deux configurations voient les memes donnees
+- synthetic_companies : societes synthetiques (part sans domaine configurable)
+- SimulationConfig / run_simulation -> SimulationReport : debit (personnes/s),
+  credits par email trouve, p50/p95 de latence par societe, appels et credits
+  par fournisseur
+
+La boucle reprend la phase reseau de modes/company._process_company
+(_source_people puis _lookup_person, memes bornes de concurrence et meme
+CreditLedger) ; la phase DB (contacts, provenance, fraicheur) n'est pas simulee.
+Usage : scripts/bench_enrichment_waterfall.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import statistics
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+
+from app.config import settings
+from app.services.enrichment.credit_ledger import CreditLedger
+from app.services.enrichment.ports import (
+    Company,
+    CompanySource,
+    EmailCandidate,
+    EmailFinder,
+    EmailVerifier,
+    IcpFilter,
+    PeopleSource,
+    PersonCandidate,
+    VerificationResult,
+)
+from app.services.enrichment.suppression import SuppressionIndex
+
+from ._pipeline import _source_people
+from .modes.company import _lookup_person
+
+_SIM_ORG = uuid.UUID(int=0)
+
+# Intitules reconnus par normalize_title (un par role cible)
+_ROLE_TITLES = {"CTO": "CTO", "CPO": "Chief Product Officer", "CMO": "CMO"}
+
+
+class SimulatedProviderError(RuntimeError):
+    """Erreur injectee par un fournisseur simule (error_rate)."""
+
+
+def _unit(*parts: str) -> float:
+    """Tirage uniforme deterministe dans [0, 1) a partir d'une cle."""
+    digest = hashlib.sha256("|".join(parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+@dataclass
+class ProviderProfile:
+    """Comportement d'un fournisseur simule. Latence : lognormale de mediane
+    `latency_ms` et d'ecart-type log `latency_sigma` (0 = constante)."""
+
+    name: str
+    cost: float = 0.0
+    hit_rate: float = 1.0
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.0
+    error_rate: float = 0.0
+    max_concurrency: int | None = None  # limite de debit cote fournisseur
+
+
+class _SimProvider:
+    """Tirages et latence communs aux adapters simules."""
+
+    def __init__(self, profile: ProviderProfile, *, seed: str, time_scale: float) -> None:
+        self.profile = profile
+        self.name = profile.name
+        self._seed = seed
+        self._time_scale = time_scale
+        self._sem = (
+            asyncio.Semaphore(profile.max_concurrency) if profile.max_concurrency else None
+        )
+        self.calls = 0
+        self.errors = 0
+
+    def _draw(self, kind: str, key: str) -> float:
+        return _unit(self._seed, self.name, kind, key)
+
+    async def _call(self, key: str) -> bool:
+        """Simule un appel : attend la latence, leve l'erreur injectee, renvoie le succes."""
+        if self._sem is None:
+            return await self._respond(key)
+        async with self._sem:
+            return await self._respond(key)
+
+    async def _respond(self, key: str) -> bool:
+        self.calls += 1
+        p = self.profile
+        if p.latency_ms:
+            # Tirage deterministe -> quantile de la loi normale -> latence lognormale
+            u = min(max(self._draw("latency", key), 1e-9), 1 - 1e-9)
+            z = statistics.NormalDist().inv_cdf(u)
+            latency_ms = p.latency_ms * math.exp(p.latency_sigma * z)
+            await asyncio.sleep(latency_ms / 1000 * self._time_scale)
+        if self._draw("error", key) < p.error_rate:
+            self.errors += 1
+            raise SimulatedProviderError(f"{self.name}: erreur simulee ({key})")
+        return self._draw("hit", key) < p.hit_rate
+
+
+class SimCompanySource(_SimProvider, CompanySource):
+    """Resolution de domaine simulee (hit_rate = part des domaines resolus)."""
+
+    async def get_companies(self, icp: IcpFilter) -> list[Company]:
+        return []
+
+    async def get_by_siren(self, siren: str) -> Company | None:
+        return None
+
+    async def resolve_domain(self, company: Company) -> str | None:
+        if company.domain:
+            return company.domain
+        if await self._call(company.siren):
+            return f"sim-{company.siren}.fr"
+        return None
+
+
+class SimPeopleSource(_SimProvider, PeopleSource):
+    """hit_rate = probabilite qu'un role cible soit trouve (cout par lead)."""
+
+    def __init__(self, profile: ProviderProfile, **kw) -> None:
+        super().__init__(profile, **kw)
+        self.cost_per_result = profile.cost
+
+    async def find_people(self, company: Company, roles: list[str]) -> list[PersonCandidate]:
+        await self._call(company.siren)  # latence + erreur : un appel par societe
+        return [
+            PersonCandidate(
+                first_name=role.title(), last_name=f"Sim{company.siren}",
+                title_raw=_ROLE_TITLES.get(role, role), source=self.name,
+            )
+            for role in roles
+            if self._draw("role", f"{company.siren}|{role}") < self.profile.hit_rate
+        ]
+
+
+class SimEmailFinder(_SimProvider, EmailFinder):
+    """hit_rate = probabilite de trouver l'email (factures au resultat)."""
+
+    def __init__(self, profile: ProviderProfile, **kw) -> None:
+        super().__init__(profile, **kw)
+        self.cost_per_hit = profile.cost
+
+    async def find(self, person: PersonCandidate, domain: str) -> EmailCandidate | None:
+        email = f"{person.first_name.lower()}.{person.last_name.lower()}@{domain}"
+        if not await self._call(email):
+            return None
+        return EmailCandidate(email=email, confidence=0.9, status="valid", source=self.name)
+
+
+class SimEmailVerifier(_SimProvider, EmailVerifier):
+    """hit_rate = part d'emails valides ; le reste se partage catch_all / invalid."""
+
+    def __init__(self, profile: ProviderProfile, **kw) -> None:
+        super().__init__(profile, **kw)
+        self.cost_per_check = profile.cost
+
+    async def verify(self, email: str) -> VerificationResult:
+        if await self._call(email):
+            status = "valid"
+        else:
+            status = "catch_all" if self._draw("status", email) < 0.5 else "invalid"
+        confidence = round(0.5 + self._draw("confidence", email) / 2, 2)
+        return VerificationResult(
+            email=email, status=status, confidence=confidence, source=self.name,
+        )
+
+
+def synthetic_companies(n: int, *, domain_rate: float = 1.0, seed: str = "sim") -> list[Company]:
+    """`n` societes synthetiques ; une part `1 - domain_rate` sans domaine connu."""
+    out = []
+    for i in range(n):
+        siren = str(900000000 + i)
+        known = _unit(seed, "domain", siren) < domain_rate
+        out.append(Company(
+            siren=siren, name=f"Simulee {i + 1}",
+            domain=f"simulee-{i + 1}.fr" if known else None, naf="5829C",
+        ))
+    return out
+
+
+@dataclass
+class SimulationConfig:
+    """Une configuration de cascade a mesurer (ordre des listes = ordre d'appel)."""
+
+    people_sources: list[ProviderProfile]
+    finders: list[ProviderProfile]
+    verifiers: list[ProviderProfile] = field(default_factory=list)
+    domain_resolver: ProviderProfile = field(
+        default_factory=lambda: ProviderProfile(name="domain", hit_rate=0.7)
+    )
+    companies: int = 100
+    domain_rate: float = 0.8
+    company_concurrency: int = field(default_factory=lambda: settings.enrichment_company_concurrency)
+    person_concurrency: int = field(default_factory=lambda: settings.enrichment_person_concurrency)
+    max_credits: int = field(default_factory=lambda: settings.enrichment_max_credits_per_run)
+    # Facteur applique aux latences simulees (0.01 = 100x plus vite) ; les
+    # metriques de temps du rapport restent en temps simule.
+    time_scale: float = 1.0
+    seed: str = "sim"
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> SimulationConfig:
+        data = dict(raw)
+        for key in ("people_sources", "finders", "verifiers"):
+            data[key] = [ProviderProfile(**p) for p in data.get(key, [])]
+        if "domain_resolver" in data:
+            data["domain_resolver"] = ProviderProfile(**data["domain_resolver"])
+        return cls(**data)
+
+
+@dataclass
+class SimulationReport:
+    companies: int
+    people: int
+    emails_found: int
+    valid: int
+    errors: int
+    credits: float
+    elapsed_s: float
+    people_per_s: float
+    credits_per_email: float | None
+    company_p50_ms: float
+    company_p95_ms: float
+    providers: dict[str, dict] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _quantile(samples: list[float], q: int) -> float:
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+async def run_simulation(config: SimulationConfig) -> SimulationReport:
+    """Fait passer les societes synthetiques dans la cascade et mesure le run."""
+    kw = {"seed": config.seed, "time_scale": config.time_scale}
+    company_src = SimCompanySource(config.domain_resolver, **kw)
+    people_srcs = [SimPeopleSource(p, **kw) for p in config.people_sources]
+    finders = [SimEmailFinder(p, **kw) for p in config.finders]
+    verifiers = [SimEmailVerifier(p, **kw) for p in config.verifiers]
+    companies = synthetic_companies(
+        config.companies, domain_rate=config.domain_rate, seed=config.seed,
+    )
+
+    ledger = CreditLedger(max_per_run=config.max_credits)
+    suppressions = SuppressionIndex(organization_id=_SIM_ORG)  # vide : aucune requete DB
+    stats = {"companies": 0, "people_found": 0, "emails_found": 0, "suppressed": 0,
+             "valid": 0, "errors": 0}
+    latencies: list[float] = []
+    company_sem = asyncio.Semaphore(max(1, config.company_concurrency))
+
+    async def _company(company: Company) -> None:
+        async with company_sem:
+            started = time.perf_counter()
+            try:
+                domain, people = await _source_people(
+                    None, company=company, company_src=company_src,
+                    people_srcs=people_srcs, ledger=ledger, org_id=_SIM_ORG,
+                    stats=stats, suppressions=suppressions,
+                )
+                person_sem = asyncio.Semaphore(max(1, config.person_concurrency))
+                db_lock = asyncio.Lock()
+
+                async def _bounded(person: PersonCandidate):
+                    async with person_sem:
+                        return await _lookup_person(
+                            None, db_lock, company=company, person=person,
+                            fresh_key=f"{company.siren}|{person.last_name}|{person.role}",
+                            domain=domain, finders=finders, verifiers=verifiers,
+                            ledger=ledger, org_id=_SIM_ORG, stats=stats,
+                            suppressions=suppressions,
+                        )
+
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [tg.create_task(_bounded(p)) for p in people]
+                for task in tasks:
+                    v = task.result().verification if task.result() else None
+                    if v and (v.status == "valid" or (
+                        v.status == "catch_all"
+                        and v.confidence >= settings.enrichment_catchall_accept
+                    )):
+                        stats["valid"] += 1
+            except Exception:
+                stats["errors"] += 1  # comme l'orchestrateur : echec isole a la societe
+            latencies.append((time.perf_counter() - started) / config.time_scale)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_company(c) for c in companies))
+    elapsed = (time.perf_counter() - started) / config.time_scale
+
+    spent = Counter()
+    for op, credits in ledger.operations:
+        spent[op] += credits
+    providers = {
+        p.name: {"calls": p.calls, "errors": p.errors, "credits": round(spent[p.name], 3)}
+        for p in [company_src, *people_srcs, *finders, *verifiers]
+    }
+    return SimulationReport(
+        companies=len(companies),
+        people=stats["people_found"],
+        emails_found=stats["emails_found"],
+        valid=stats["valid"],
+        errors=stats["errors"],
+        credits=round(ledger.spent_this_run(), 3),
+        elapsed_s=round(elapsed, 3),
+        people_per_s=round(stats["people_found"] / elapsed, 2) if elapsed else 0.0,
+        credits_per_email=(
+            round(ledger.spent_this_run() / stats["emails_found"], 3) if stats["emails_found"] else None
+        ),
+        company_p50_ms=round(_quantile(latencies, 50) * 1000, 1),
+        company_p95_ms=round(_quantile(latencies, 95) * 1000, 1),
+        providers=providers,
+    )
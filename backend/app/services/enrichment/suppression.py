@@ -2,35 +2,164 @@
 # FGA CRM - Enrichissement : liste d'exclusion (opt-out / bounce)
 # =============================================================================
 """SuppressionService (spec §11.5) : consulte avant enrichissement ET avant
-safe_to_send. Bloque toute donnee opt-out/bounce."""
+safe_to_send. Bloque toute donnee opt-out/bounce.
+
+- is_suppressed : verification unitaire (requete DB), ou via un index si fourni
+- SuppressionIndex / load_suppression_index : liste de l'org chargee UNE fois
+  par job (hash sets ; filtre de Bloom au-dela de BLOOM_THRESHOLD entrees, les
+  positifs etant confirmes en DB -> semantique exacte, memoire bornee)
+- add_suppression : ajout + bump de la version (invalide les index en cache)
+
+Version par org dans Redis (enrichment:suppression:version:{org}) : un index en
+cache n'est reutilise que si la version n'a pas bouge (et au plus
+_INDEX_MAX_AGE_S, filet pour les insertions hors add_suppression). Redis KO ->
+rechargement systematique (jamais d'index perime).
+"""
 
 from __future__ import annotations
 
-from sqlalchemy import or_, select
+import hashlib
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, field
+
+import redis.asyncio as redis_async
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.enrichment import EnrichmentSuppression
 
+logger = logging.getLogger(__name__)
 
-async def is_suppressed(
+# Au-dela : filtre de Bloom (+ confirmation DB des positifs) au lieu des sets.
+BLOOM_THRESHOLD = 200_000
+BLOOM_ERROR_RATE = 0.001
+
+_VERSION_PREFIX = "enrichment:suppression:version:"
+_INDEX_MAX_AGE_S = 600
+
+# Index en cache par org (process worker) : {org: SuppressionIndex}
+_INDEX_CACHE: dict[str, SuppressionIndex] = {}
+
+
+def _redis_url() -> str:
+    return os.getenv("REDIS_URL", settings.redis_url)
+
+
+def _client() -> redis_async.Redis:
+    return redis_async.from_url(_redis_url(), decode_responses=True)
+
+
+def _org_key(organization_id) -> str:
+    return str(organization_id) if organization_id else "default"
+
+
+def _norm_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def _norm_domain(domain: str) -> str:
+    return domain.strip().lower()
+
+
+def _norm_linkedin(url: str) -> str:
+    return url.strip()
+
+
+class BloomFilter:
+    """Filtre de Bloom (double hachage blake2b) : faux positifs ~error_rate, aucun
+    faux negatif."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE) -> None:
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+@dataclass
+class SuppressionIndex:
+    """Liste d'exclusion d'UNE org en memoire (meme semantique qu'is_suppressed).
+
+    Les valeurs sont indexees telles que stockees ; la recherche normalise comme
+    la requete DB (email/domaine en minuscules, LinkedIn trime).
+    """
+
+    organization_id: object
+    version: str | None = None
+    emails: set[str] = field(default_factory=set)
+    domains: set[str] = field(default_factory=set)
+    linkedin_urls: set[str] = field(default_factory=set)
+    bloom: BloomFilter | None = None
+    size: int = 0
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def _keys(self, email, domain, linkedin_url) -> list[tuple[str, str]]:
+        keys = []
+        if email:
+            keys.append(("e", _norm_email(email)))
+        if domain:
+            keys.append(("d", _norm_domain(domain)))
+        if linkedin_url:
+            keys.append(("l", _norm_linkedin(linkedin_url)))
+        return keys
+
+    def may_contain(
+        self, *, email: str | None = None, domain: str | None = None,
+        linkedin_url: str | None = None,
+    ) -> bool:
+        """Reponse exacte (sets) ; en mode Bloom, False = certain, True = a confirmer."""
+        keys = self._keys(email, domain, linkedin_url)
+        if self.bloom is not None:
+            return any(f"{kind}:{value}" in self.bloom for kind, value in keys)
+        sets = {"e": self.emails, "d": self.domains, "l": self.linkedin_urls}
+        return any(value in sets[kind] for kind, value in keys)
+
+    async def contains(
+        self, db: AsyncSession, *, email: str | None = None, domain: str | None = None,
+        linkedin_url: str | None = None,
+    ) -> bool:
+        if not self.may_contain(email=email, domain=domain, linkedin_url=linkedin_url):
+            return False
+        if self.bloom is None:
+            return True
+        # Positif Bloom : confirmation DB (rare — seuls les vrais/faux positifs).
+        return await _query_suppressed(
+            db, self.organization_id, email=email, domain=domain, linkedin_url=linkedin_url,
+        )
+
+
+async def _query_suppressed(
     db: AsyncSession,
-    *,
     organization_id,
+    *,
     email: str | None = None,
     domain: str | None = None,
     linkedin_url: str | None = None,
 ) -> bool:
-    """True si l'un des identifiants figure dans la liste d'exclusion DE L'ORG.
-
-    Scope par org : l'opt-out/bounce d'une organisation ne contamine pas une autre.
-    """
     conds = []
     if email:
-        conds.append(EnrichmentSuppression.email == email.strip().lower())
+        conds.append(EnrichmentSuppression.email == _norm_email(email))
     if domain:
-        conds.append(EnrichmentSuppression.domain == domain.strip().lower())
+        conds.append(EnrichmentSuppression.domain == _norm_domain(domain))
     if linkedin_url:
-        conds.append(EnrichmentSuppression.linkedin_url == linkedin_url.strip())
+        conds.append(EnrichmentSuppression.linkedin_url == _norm_linkedin(linkedin_url))
     if not conds:
         return False
     row = (
@@ -44,6 +173,113 @@ async def is_suppressed(
     return row is not None
 
 
+async def is_suppressed(
+    db: AsyncSession,
+    *,
+    organization_id,
+    email: str | None = None,
+    domain: str | None = None,
+    linkedin_url: str | None = None,
+    index: SuppressionIndex | None = None,
+) -> bool:
+    """True si l'un des identifiants figure dans la liste d'exclusion DE L'ORG.
+
+    Scope par org : l'opt-out/bounce d'une organisation ne contamine pas une autre.
+    `index` (charge par job) : reponse en memoire, sans requete.
+    """
+    if index is not None and _org_key(index.organization_id) == _org_key(organization_id):
+        return await index.contains(db, email=email, domain=domain, linkedin_url=linkedin_url)
+    return await _query_suppressed(
+        db, organization_id, email=email, domain=domain, linkedin_url=linkedin_url,
+    )
+
+
+async def get_version(organization_id) -> str | None:
+    """Version courante de la liste de l'org (None si Redis indisponible).
+
+    Initialisee a un horodatage ms si absente : un compteur evince ne peut pas
+    retomber sur la version d'un index deja en cache.
+    """
+    key = f"{_VERSION_PREFIX}{_org_key(organization_id)}"
+    client = _client()
+    try:
+        await client.set(key, str(int(time.time() * 1000)), nx=True)
+        return await client.get(key)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("[Enrichment] version suppression indisponible : %s", exc)
+        return None
+    finally:
+        await client.aclose()
+
+
+async def bump_version(organization_id) -> None:
+    """Invalide les index en cache de l'org (tous workers). Best-effort."""
+    _INDEX_CACHE.pop(_org_key(organization_id), None)
+    client = _client()
+    try:
+        await client.incr(f"{_VERSION_PREFIX}{_org_key(organization_id)}")
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("[Enrichment] bump version suppression KO : %s", exc)
+    finally:
+        await client.aclose()
+
+
+async def _build_index(db: AsyncSession, organization_id, version: str | None) -> SuppressionIndex:
+    scope = EnrichmentSuppression.organization_id == organization_id
+    total = (
+        await db.execute(select(func.count()).select_from(EnrichmentSuppression).where(scope))
+    ).scalar_one()
+    index = SuppressionIndex(organization_id=organization_id, version=version, size=total)
+    if total > BLOOM_THRESHOLD:
+        index.bloom = BloomFilter(total * 3)  # email + domaine + LinkedIn par ligne au pire
+
+    stmt = select(
+        EnrichmentSuppression.email,
+        EnrichmentSuppression.domain,
+        EnrichmentSuppression.linkedin_url,
+    ).where(scope).execution_options(yield_per=5000)
+    result = await db.stream(stmt)
+    async for email, domain, linkedin_url in result:
+        for kind, value, target in (
+            ("e", email, index.emails),
+            ("d", domain, index.domains),
+            ("l", linkedin_url, index.linkedin_urls),
+        ):
+            if not value:
+                continue
+            if index.bloom is not None:
+                index.bloom.add(f"{kind}:{value}")
+            else:
+                target.add(value)
+    return index
+
+
+async def load_suppression_index(db: AsyncSession, organization_id) -> SuppressionIndex:
+    """Index de la liste d'exclusion de l'org, a charger une fois par job.
+
+    Reutilise l'index en cache du process si la version Redis n'a pas change.
+    """
+    org = _org_key(organization_id)
+    version = await get_version(organization_id)
+    cached = _INDEX_CACHE.get(org)
+    if (
+        cached is not None
+        and version is not None
+        and cached.version == version
+        and time.monotonic() - cached.loaded_at < _INDEX_MAX_AGE_S
+    ):
+        return cached
+
+    index = await _build_index(db, organization_id, version)
+    if version is not None:
+        _INDEX_CACHE[org] = index
+    logger.info(
+        "[Enrichment] index suppression org=%s : %d entrees (%s)",
+        org, index.size, "bloom" if index.bloom is not None else "sets",
+    )
+    return index
+
+
 async def add_suppression(
     db: AsyncSession,
     *,
@@ -62,3 +298,4 @@ async def add_suppression(
         reason=reason,
     ))
     await db.commit()
+    await bump_version(organization_id)
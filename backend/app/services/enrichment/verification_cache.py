@@ -0,0 +1,327 @@
+# =============================================================================
+# FGA CRM - Enrichissement : cache des verifications email + memoire domaine
+# =============================================================================
+"""Cache persistant des verifications email, partage entre jobs et orgs.
+
+- VerificationCache : resultat par adresse (TTL par statut) + comportement du
+  domaine (catch_all, accepts_mail) ; memo du job, fail-open, compteurs
+  (hits adresse / domaine, misses, appels verifier et leur latence)
+- CachedEmailVerifier : decore un EmailVerifier ; `prefetch()` precharge les
+  domaines / adresses d'une societe, `cached()` sert le cache (ni appel ni
+  credit, cf. _pipeline._cached_verification), `verify()` appelle le verifier
+  puis apprend adresse + domaine, `flush()` ecrit les resultats appris en lot
+- purge_verification_cache : suppression des entrees expirees (beat nocturne)
+
+Domaine catch_all connu : toute adresse y est acceptee, la verifier n'apprend
+rien -> resultat catch_all du domaine sans appel. accepts_mail est appris en
+positif seulement (une adresse deliverable = MX fonctionnel) : une adresse
+invalide ne dit rien du domaine, jamais de court-circuit negatif. Seuls les
+verdicts du provider sont appris : un resultat `unknown` (provider KO, timeout)
+n'est ni mis en cache ni retenu pour le domaine.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.db.session import task_session_maker
+from app.models.enrichment import EnrichmentMailDomain, EnrichmentVerificationCache
+from app.services.enrichment.crm_writer import _insert
+from app.services.enrichment.ports import EmailVerifier, VerificationResult
+
+logger = logging.getLogger(__name__)
+
+_DELIVERABLE = frozenset({"valid", "catch_all"})
+# Statuts issus d'un verdict du provider (les seuls mis en cache)
+_VERDICTS = frozenset({"valid", "catch_all", "risky", "invalid"})
+# Bornes des listes IN (...) des prefetch et du tampon d'ecriture
+_LOOKUP_CHUNK = 500
+_WRITE_BATCH = 100
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+def _norm(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def _domain_of(email: str) -> str:
+    return email.rsplit("@", 1)[-1] if "@" in email else ""
+
+
+def _ttl(status: str) -> timedelta:
+    days = (
+        settings.enrichment_verify_cache_ttl_days
+        if status == "valid" else settings.enrichment_verify_cache_uncertain_ttl_days
+    )
+    return timedelta(days=days)
+
+
+def _chunks(keys: list[str]):
+    for start in range(0, len(keys), _LOOKUP_CHUNK):
+        yield keys[start:start + _LOOKUP_CHUNK]
+
+
+def _float(value) -> float | None:
+    return float(value) if value is not None else None
+
+
+@dataclass
+class _MailDomain:
+    catch_all: bool
+    accepts_mail: bool | None
+    confidence: float | None
+    source: str | None
+
+
+class VerificationCache:
+    """Cache des verifications pour la duree d'un job (memo) adosse aux tables.
+
+    Lectures en lot : `prefetch` charge les domaines / adresses d'une societe en
+    une requete IN par kind ; une adresse inconnue du memo (trouvee par le
+    finder) est lue avec son domaine dans UNE session. Ecritures tamponnees :
+    `flush` (fin de societe, ou tampon plein) upsert le lot dans une session.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker | None = None) -> None:
+        self._session_factory = session_factory or task_session_maker
+        # None = pas d'entree valide en base (deja consulte)
+        self._emails: dict[str, VerificationResult | None] = {}
+        self._domains: dict[str, _MailDomain | None] = {}
+        # Resultats du verifier pas encore ecrits : derniere observation par adresse,
+        # observations agregees par domaine
+        self._pending_emails: dict[str, dict] = {}
+        self._pending_domains: dict[str, dict] = {}
+        self._counters = {"email_hit": 0, "domain_hit": 0, "miss": 0}
+        self._verify_calls = 0
+        self._verify_ms = 0.0
+
+    async def prefetch(self, *, domains: Iterable[str] = (), emails: Iterable[str] = ()) -> None:
+        """Charge dans le memo les domaines / adresses pas encore consultes (fail-open)."""
+        domains = [d for d in dict.fromkeys(domains) if d and d not in self._domains]
+        emails = [e for e in dict.fromkeys(_norm(e) for e in emails) if e and e not in self._emails]
+        if not domains and not emails:
+            return
+        now = _now()
+        try:
+            async with self._session_factory() as db:
+                domain_rows = [
+                    row
+                    for chunk in _chunks(domains)
+                    for row in (
+                        await db.execute(
+                            select(EnrichmentMailDomain).where(
+                                EnrichmentMailDomain.domain.in_(chunk),
+                                EnrichmentMailDomain.expires_at > now,
+                            )
+                        )
+                    ).scalars()
+                ]
+                email_rows = [
+                    row
+                    for chunk in _chunks(emails)
+                    for row in (
+                        await db.execute(
+                            select(EnrichmentVerificationCache).where(
+                                EnrichmentVerificationCache.email.in_(chunk),
+                                EnrichmentVerificationCache.expires_at > now,
+                            )
+                        )
+                    ).scalars()
+                ]
+        except Exception as exc:  # noqa: BLE001 — fail-open : miss
+            logger.warning("[Enrichment] cache verifications indisponible : %s", exc)
+            return
+        self._domains.update(dict.fromkeys(domains))
+        self._domains.update({
+            row.domain: _MailDomain(
+                catch_all=row.catch_all, accepts_mail=row.accepts_mail,
+                confidence=_float(row.confidence), source=row.source,
+            )
+            for row in domain_rows
+        })
+        self._emails.update(dict.fromkeys(emails))
+        self._emails.update({
+            row.email: VerificationResult(
+                email=row.email, status=row.status, confidence=_float(row.confidence) or 0.0,
+                source=row.source,
+            )
+            for row in email_rows
+        })
+
+    async def get(self, email: str) -> VerificationResult | None:
+        """Resultat connu pour `email` (domaine catch_all, sinon adresse), ou None."""
+        email = _norm(email)
+        domain_name = _domain_of(email)
+        domain = self._domains.get(domain_name)
+        if domain is None or not domain.catch_all:
+            # Adresse (et domaine s'il n'est pas au memo) lus dans une session
+            await self.prefetch(domains=[domain_name], emails=[email])
+            domain = self._domains.get(domain_name)
+        if domain is not None and domain.catch_all:
+            self._counters["domain_hit"] += 1
+            return VerificationResult(
+                email=email, status="catch_all", confidence=domain.confidence or 0.0,
+                source=domain.source or "cache",
+            )
+        cached = self._emails.get(email)
+        self._counters["email_hit" if cached is not None else "miss"] += 1
+        return cached
+
+    async def put(self, result: VerificationResult, *, elapsed_ms: float = 0.0) -> None:
+        """Apprend un resultat du verifier : adresse + comportement du domaine.
+
+        Memo mis a jour aussitot ; ecriture en base au prochain flush. Un
+        resultat sans verdict (unknown) n'est pas appris : re-verifiable ensuite.
+        """
+        self._verify_calls += 1
+        self._verify_ms += elapsed_ms
+        if result.status not in _VERDICTS:
+            return
+        email = _norm(result.email)
+        domain = _domain_of(email)
+        catch_all = result.status == "catch_all"
+        accepts_mail = True if result.status in _DELIVERABLE else None
+        self._emails[email] = VerificationResult(
+            email=email, status=result.status, confidence=result.confidence,
+            source=result.source,
+        )
+        known = self._domains.get(domain)
+        self._domains[domain] = _MailDomain(
+            catch_all=catch_all,
+            accepts_mail=accepts_mail or (known.accepts_mail if known else None),
+            confidence=result.confidence if catch_all else None,
+            source=result.source if catch_all else None,
+        )
+        now = _now()
+        self._pending_emails[email] = {
+            "email": email, "status": result.status, "confidence": result.confidence,
+            "source": result.source, "expires_at": now + _ttl(result.status),
+        }
+        if domain:
+            previous = self._pending_domains.get(domain)
+            self._pending_domains[domain] = {
+                "domain": domain, "catch_all": catch_all,
+                "accepts_mail": accepts_mail or (previous["accepts_mail"] if previous else None),
+                "confidence": result.confidence if catch_all else None,
+                "source": result.source if catch_all else None,
+                "checks": (previous["checks"] if previous else 0) + 1,
+                "expires_at": now + timedelta(days=settings.enrichment_mail_domain_ttl_days),
+            }
+        if len(self._pending_emails) >= _WRITE_BATCH:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Upsert des resultats en attente, en une session (best-effort)."""
+        emails = list(self._pending_emails.values())
+        domains = list(self._pending_domains.values())
+        if not emails and not domains:
+            return
+        self._pending_emails = {}
+        self._pending_domains = {}
+        try:
+            async with self._session_factory() as db:
+                if emails:
+                    stmt = _insert(db, EnrichmentVerificationCache).values(emails)
+                    await db.execute(stmt.on_conflict_do_update(
+                        index_elements=["email"],
+                        set_={
+                            "status": stmt.excluded.status,
+                            "confidence": stmt.excluded.confidence,
+                            "source": stmt.excluded.source,
+                            "expires_at": stmt.excluded.expires_at,
+                            "updated_at": func.now(),
+                        },
+                    ))
+                if domains:
+                    stmt = _insert(db, EnrichmentMailDomain).values(domains)
+                    # Derniere observation pour catch_all (une adresse distinguee =
+                    # plus catch_all) ; accepts_mail ne redescend jamais a inconnu.
+                    await db.execute(stmt.on_conflict_do_update(
+                        index_elements=["domain"],
+                        set_={
+                            "catch_all": stmt.excluded.catch_all,
+                            "accepts_mail": func.coalesce(
+                                stmt.excluded.accepts_mail, EnrichmentMailDomain.accepts_mail,
+                            ),
+                            "confidence": stmt.excluded.confidence,
+                            "source": stmt.excluded.source,
+                            "checks": EnrichmentMailDomain.checks + stmt.excluded.checks,
+                            "expires_at": stmt.excluded.expires_at,
+                            "updated_at": func.now(),
+                        },
+                    ))
+                await db.commit()
+        except Exception as exc:  # noqa: BLE001 — best-effort
+            logger.warning("[Enrichment] ecriture cache verifications KO : %s", exc)
+
+    def metrics(self) -> dict:
+        """Consultations, appels verifier evites et latence estimee economisee."""
+        hits = self._counters["email_hit"] + self._counters["domain_hit"]
+        total = hits + self._counters["miss"]
+        avg_ms = self._verify_ms / self._verify_calls if self._verify_calls else 0.0
+        return {
+            "email_hits": self._counters["email_hit"],
+            "domain_hits": self._counters["domain_hit"],
+            "misses": self._counters["miss"],
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "calls_saved": hits,
+            "verify_calls": self._verify_calls,
+            "avg_verify_ms": round(avg_ms, 1),
+            "est_ms_saved": round(hits * avg_ms),
+        }
+
+
+class CachedEmailVerifier(EmailVerifier):
+    """EmailVerifier adosse au VerificationCache (memes nom et cout que `inner`)."""
+
+    def __init__(self, inner: EmailVerifier, cache: VerificationCache) -> None:
+        self._inner = inner
+        self._cache = cache
+        self.name = inner.name
+        self.cost_per_check = inner.cost_per_check
+
+    async def prefetch(self, *, domains: Iterable[str] = (), emails: Iterable[str] = ()) -> None:
+        await self._cache.prefetch(domains=domains, emails=emails)
+
+    async def cached(self, email: str) -> VerificationResult | None:
+        return await self._cache.get(email)
+
+    async def flush(self) -> None:
+        await self._cache.flush()
+
+    async def verify(self, email: str) -> VerificationResult:
+        started = time.perf_counter()
+        result = await self._inner.verify(email)
+        await self._cache.put(result, elapsed_ms=(time.perf_counter() - started) * 1000)
+        return result
+
+    def cache_metrics(self) -> dict:
+        return self._cache.metrics()
+
+
+async def purge_verification_cache(db: AsyncSession) -> dict:
+    """Supprime les verifications et domaines mail expires."""
+    now = _now()
+    emails = (
+        await db.execute(
+            delete(EnrichmentVerificationCache).where(EnrichmentVerificationCache.expires_at <= now)
+        )
+    ).rowcount or 0
+    domains = (
+        await db.execute(
+            delete(EnrichmentMailDomain).where(EnrichmentMailDomain.expires_at <= now)
+        )
+    ).rowcount or 0
+    await db.commit()
+    return {"emails": emails, "domains": domains}
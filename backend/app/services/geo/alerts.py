@@ -22,7 +22,7 @@ from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.geo import GeoBrand, GeoMetricsDaily, GeoPrompt, GeoRun
-from app.services.geo.scorer import _day_bounds
+from app.services.geo.scorer import _day_bounds, run_at_range
 
 logger = logging.getLogger(__name__)
 
@@ -209,21 +209,18 @@ async def _find_priority_zero_visibility(
     day_start, _ = _day_bounds(start)
     _, day_end = _day_bounds(end - timedelta(days=1))
 
-    gaps = []
-    for prompt in priority_prompts:
-        runs_with_mention = (await db.execute(
-            select(GeoRun.id).where(
-                and_(
-                    GeoRun.prompt_id == prompt.id,
-                    GeoRun.engine == engine,
-                    GeoRun.run_at >= day_start,
-                    GeoRun.run_at < day_end,
-                    GeoRun.brand_mentioned.is_(True),
-                )
-            ).limit(1)
-        )).scalar_one_or_none()
-
-        if runs_with_mention is None:
-            gaps.append(prompt.text)
+    # Une seule requete pour tous les prompts (au lieu d'une par prompt), bornee
+    # par brand + moteur + fenetre run_at (index composite + elagage partitions).
+    mentioned = set((await db.execute(
+        select(GeoRun.prompt_id).where(
+            and_(
+                GeoRun.brand_id == brand_id,
+                GeoRun.engine == engine,
+                run_at_range(day_start, day_end),
+                GeoRun.prompt_id.in_([p.id for p in priority_prompts]),
+                GeoRun.brand_mentioned.is_(True),
+            )
+        ).distinct()
+    )).scalars().all())
 
-    return gaps
+    return [p.text for p in priority_prompts if p.id not in mentioned]
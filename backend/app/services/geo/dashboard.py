@@ -0,0 +1,395 @@
+# =============================================================================
+# FGA CRM - GEO Dashboard (calcul + cache materialise par marque)
+# =============================================================================
+"""Payloads du dashboard GEO et leur cache Redis versionne.
+
+Les donnees d'un dashboard ne changent qu'a deux moments : fin d'un batch de runs
+(geo_run_batch_task) et calcul des metriques (geo_compute_metrics_task, 07:00).
+On materialise donc les reponses par (marque, periode, filtre moteur) :
+
+- build_dashboard / build_competitors : calcul depuis la base (payload JSON)
+- compteur de version PAR MARQUE (geo:dashboard:version:{brand}) : incremente a
+  chaque changement -> toutes les cles de la marque deviennent caduques d'un coup
+  (les anciennes expirent par TTL, jamais relues)
+- cached_payload : lecture cache, calcul + ecriture sur miss
+- refresh_brand_dashboards : bump de version + pre-calcul de la fenetre par
+  defaut (30 jours) pour chaque moteur actif et la vue concurrents tous moteurs
+- etag_for : ETag derive de la cle versionnee -> un 304 ne lit que la version
+
+Cache best-effort : Redis indisponible -> calcul direct, sans ETag (DC2 : la
+lecture du dashboard ne casse jamais). Client Redis cree a la volee (boucles
+asyncio FastAPI et Celery distinctes — cf. trends/cache.py).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import UTC, date, datetime, timedelta
+
+import redis.asyncio as redis_async
+from sqlalchemy import ColumnElement, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.geo import GeoBrand, GeoMetricsDaily, GeoRun
+from app.schemas.geo import (
+    GeoBrandResponse,
+    GeoDashboardResponse,
+    GeoMetricsDailyResponse,
+)
+from app.services.geo.scorer import run_at_range
+
+logger = logging.getLogger(__name__)
+
+_VERSION_PREFIX = "geo:dashboard:version:"
+_PAYLOAD_PREFIX = "geo:dashboard:payload:"
+
+# Fenetre par defaut du dashboard si date_from non fourni
+DEFAULT_DASHBOARD_DAYS = 30
+
+# Top N pour competitors / sources
+TOP_N = 10
+
+# Runs agreges au plus par moteur, les plus recents (borne memoire de
+# l'agregation Python)
+MAX_RUNS_PER_ENGINE = 5000
+
+KIND_DASHBOARD = "dashboard"
+KIND_COMPETITORS = "competitors"
+
+
+def _redis_url() -> str:
+    return os.getenv("REDIS_URL", settings.redis_url)
+
+
+def _client() -> redis_async.Redis:
+    return redis_async.from_url(_redis_url(), decode_responses=True)
+
+
+# ---------------------------------------------------------------------------
+# Calcul
+# ---------------------------------------------------------------------------
+
+def default_window(today: date | None = None) -> tuple[date, date]:
+    d_to = today or datetime.now(UTC).date()
+    return d_to - timedelta(days=DEFAULT_DASHBOARD_DAYS), d_to
+
+
+def window_predicate(d_from: date, d_to: date) -> ColumnElement[bool]:
+    """Fenetre [d_from, d_to] inclusive en predicat run_at elaguable (partitions)."""
+    return run_at_range(
+        datetime.combine(d_from, datetime.min.time(), tzinfo=UTC),
+        datetime.combine(d_to + timedelta(days=1), datetime.min.time(), tzinfo=UTC),
+    )
+
+
+def _tally_competitors(brands_found_rows: Iterable[list | None]) -> list[dict]:
+    mentions: dict[str, int] = defaultdict(int)
+    total = 0
+    for brands_found in brands_found_rows:
+        for entry in brands_found or []:
+            nom = (entry.get("nom") if isinstance(entry, dict) else None) or ""
+            nom = nom.strip()
+            if nom:
+                mentions[nom] += 1
+                total += 1
+    return [
+        {
+            "nom": nom,
+            "mentions": count,
+            "sov_share": round(count / total * 100, 2) if total else 0.0,
+        }
+        for nom, count in sorted(mentions.items(), key=lambda kv: kv[1], reverse=True)[
+            :TOP_N
+        ]
+    ]
+
+
+def _tally_sources(citations_rows: Iterable[list | None]) -> list[dict]:
+    counts: dict[str, int] = defaultdict(int)
+    for citations in citations_rows:
+        for cit in citations or []:
+            domain = (cit.get("domain") if isinstance(cit, dict) else None) or ""
+            domain = domain.strip()
+            if domain:
+                counts[domain] += 1
+    return [
+        {"domain": domain, "count": count}
+        for domain, count in sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[
+            :TOP_N
+        ]
+    ]
+
+
+async def build_dashboard(
+    db: AsyncSession,
+    brand: GeoBrand,
+    engine: str,
+    d_from: date,
+    d_to: date,
+) -> dict:
+    """Payload JSON du dashboard d'une marque pour un moteur et une fenetre."""
+    metrics = (
+        await db.execute(
+            select(GeoMetricsDaily)
+            .where(
+                and_(
+                    GeoMetricsDaily.brand_id == brand.id,
+                    GeoMetricsDaily.engine == engine,
+                    GeoMetricsDaily.day >= d_from,
+                    GeoMetricsDaily.day <= d_to,
+                )
+            )
+            .order_by(GeoMetricsDaily.day)
+            .limit(366)
+        )
+    ).scalars().all()
+
+    runs = (
+        await db.execute(
+            select(GeoRun.brands_found, GeoRun.citations)
+            .where(
+                and_(
+                    GeoRun.brand_id == brand.id,
+                    GeoRun.engine == engine,
+                    window_predicate(d_from, d_to),
+                )
+            )
+            .order_by(GeoRun.run_at.desc(), GeoRun.id.desc())
+            .limit(MAX_RUNS_PER_ENGINE)
+        )
+    ).all()
+
+    response = GeoDashboardResponse(
+        brand=GeoBrandResponse.model_validate(brand),
+        engine=engine,
+        date_from=d_from,
+        date_to=d_to,
+        metrics=[GeoMetricsDailyResponse.model_validate(m) for m in metrics],
+        top_competitors=_tally_competitors(r[0] for r in runs),
+        top_sources=_tally_sources(r[1] for r in runs),
+    )
+    return response.model_dump(mode="json")
+
+
+async def build_competitors(
+    db: AsyncSession,
+    brand_id: uuid.UUID,
+    engine: str | None,
+    d_from: date,
+    d_to: date,
+) -> list[dict]:
+    """Top concurrents d'une marque, un moteur ou tous (une seule requete).
+
+    Tous moteurs : top N par moteur puis fusion (meme semantique que la vue par
+    moteur cumulee), les runs etant lus en un seul passage au lieu d'un par moteur.
+    Borne par moteur en SQL (ROW_NUMBER par moteur, runs les plus recents) : un
+    moteur a fort volume n'evince pas les autres.
+    """
+    conditions = [GeoRun.brand_id == brand_id, window_predicate(d_from, d_to)]
+    if engine is not None:
+        conditions.append(GeoRun.engine == engine)
+    ranked = (
+        select(
+            GeoRun.engine,
+            GeoRun.brands_found,
+            func.row_number()
+            .over(partition_by=GeoRun.engine, order_by=(GeoRun.run_at.desc(), GeoRun.id.desc()))
+            .label("rank"),
+        )
+        .where(and_(*conditions))
+        .subquery()
+    )
+    rows = (
+        await db.execute(
+            select(ranked.c.engine, ranked.c.brands_found)
+            .where(ranked.c.rank <= MAX_RUNS_PER_ENGINE)
+        )
+    ).all()
+
+    by_engine: dict[str, list] = defaultdict(list)
+    for eng, brands_found in rows:
+        by_engine[eng].append(brands_found)
+
+    merged: dict[str, int] = defaultdict(int)
+    total = 0
+    for bucket in by_engine.values():
+        for c in _tally_competitors(bucket):
+            merged[c["nom"]] += c["mentions"]
+            total += c["mentions"]
+
+    return [
+        {
+            "nom": nom,
+            "mentions": count,
+            "sov_share": round(count / total * 100, 2) if total else 0.0,
+        }
+        for nom, count in sorted(merged.items(), key=lambda kv: kv[1], reverse=True)[
+            :TOP_N
+        ]
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Cache versionne
+# ---------------------------------------------------------------------------
+
+def cache_key(
+    brand_id: uuid.UUID,
+    version: int,
+    kind: str,
+    engine: str | None,
+    d_from: date,
+    d_to: date,
+) -> str:
+    return (
+        f"{_PAYLOAD_PREFIX}{brand_id}:{version}:{kind}:"
+        f"{engine or '*'}:{d_from.isoformat()}:{d_to.isoformat()}"
+    )
+
+
+def etag_for(key: str) -> str:
+    """ETag fort derive de la cle (version incluse) — pas besoin du payload."""
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+async def get_version(
+    brand_id: uuid.UUID, *, client: redis_async.Redis | None = None
+) -> int | None:
+    """Version courante du cache d'une marque. None si Redis indisponible.
+
+    Cle absente (jamais bumpee ou evincee) : amorcee a l'horodatage ms (SET NX),
+    jamais a 0 — une version reinitialisee ne doit pas retomber sur d'anciennes cles.
+    """
+    own = client is None
+    c = client or _client()
+    key = f"{_VERSION_PREFIX}{brand_id}"
+    try:
+        raw = await c.get(key)
+        if raw is None:
+            await c.set(key, int(time.time() * 1000), nx=True)
+            raw = await c.get(key)
+        return int(raw) if raw is not None else None
+    except Exception as exc:  # noqa: BLE001 — cache best-effort
+        logger.warning("[GEO dashboard] lecture version echouee : %s", exc)
+        return None
+    finally:
+        if own:
+            await c.aclose()
+
+
+async def bump_versions(
+    brand_ids: Iterable[uuid.UUID], *, client: redis_async.Redis | None = None
+) -> None:
+    """Invalider le cache des marques (INCR de version). Best-effort."""
+    ids = list(brand_ids)
+    if not ids:
+        return
+    own = client is None
+    c = client or _client()
+    try:
+        for brand_id in ids:
+            key = f"{_VERSION_PREFIX}{brand_id}"
+            # Amorcage identique a get_version si la cle n'existe pas encore.
+            await c.set(key, int(time.time() * 1000), nx=True)
+            await c.incr(key)
+    except Exception as exc:  # noqa: BLE001 — cache best-effort
+        logger.warning("[GEO dashboard] bump version echoue : %s", exc)
+    finally:
+        if own:
+            await c.aclose()
+
+
+async def cached_payload(
+    key: str,
+    build: Callable[[], Awaitable[dict | list]],
+    *,
+    client: redis_async.Redis | None = None,
+) -> dict | list:
+    """Payload en cache pour `key`, calcule et stocke sur miss."""
+    own = client is None
+    c = client or _client()
+    try:
+        try:
+            raw = await c.get(key)
+        except Exception as exc:  # noqa: BLE001 — cache best-effort
+            logger.warning("[GEO dashboard] lecture cache echouee : %s", exc)
+            raw = None
+        if raw is not None:
+            try:
+                return json.loads(raw)
+            except json.JSONDecodeError:
+                logger.warning("[GEO dashboard] payload illisible, recalcul")
+
+        payload = await build()
+        try:
+            await c.set(key, json.dumps(payload), ex=settings.geo_dashboard_cache_ttl_seconds)
+        except Exception as exc:  # noqa: BLE001 — cache best-effort
+            logger.warning("[GEO dashboard] ecriture cache echouee : %s", exc)
+        return payload
+    finally:
+        if own:
+            await c.aclose()
+
+
+async def refresh_brand_dashboards(
+    db: AsyncSession,
+    brand_ids: Iterable[uuid.UUID],
+    today: date | None = None,
+) -> int:
+    """Invalider puis materialiser la fenetre par defaut des marques.
+
+    Pre-calcule, pour chaque marque : le dashboard de chaque moteur ayant des runs
+    dans la fenetre, les concurrents par moteur et tous moteurs confondus.
+    Retourne le nombre de payloads ecrits. N'echoue jamais l'appelant.
+    """
+    ids = list(dict.fromkeys(brand_ids))
+    if not ids:
+        return 0
+    d_from, d_to = default_window(today)
+    written = 0
+    client = _client()
+    try:
+        await bump_versions(ids, client=client)
+        for brand_id in ids:
+            try:
+                brand = await db.get(GeoBrand, brand_id)
+                version = await get_version(brand_id, client=client)
+                if brand is None or version is None:
+                    continue
+                engines = (
+                    await db.execute(
+                        select(GeoRun.engine)
+                        .where(
+                            and_(GeoRun.brand_id == brand_id, window_predicate(d_from, d_to))
+                        )
+                        .group_by(GeoRun.engine)
+                    )
+                ).scalars().all()
+                for engine in engines:
+                    await client.set(
+                        cache_key(brand_id, version, KIND_DASHBOARD, engine, d_from, d_to),
+                        json.dumps(await build_dashboard(db, brand, engine, d_from, d_to)),
+                        ex=settings.geo_dashboard_cache_ttl_seconds,
+                    )
+                    written += 1
+                for engine in [None, *engines]:
+                    await client.set(
+                        cache_key(brand_id, version, KIND_COMPETITORS, engine, d_from, d_to),
+                        json.dumps(await build_competitors(db, brand_id, engine, d_from, d_to)),
+                        ex=settings.geo_dashboard_cache_ttl_seconds,
+                    )
+                    written += 1
+            except Exception as exc:  # noqa: BLE001 — on continue sur les autres marques
+                logger.error("[GEO dashboard] materialisation brand=%s echouee : %s", brand_id, exc)
+    finally:
+        await client.aclose()
+    logger.info("[GEO dashboard] %d marques, %d payloads materialises", len(ids), written)
+    return written
@@ -0,0 +1,284 @@
+# =============================================================================
+# FGA CRM - GEO Gaps (detection en une requete SQL)
+# =============================================================================
+"""Detection des gaps de visibilite d'une marque sur un moteur.
+
+Un gap = prompt actif teste sur la fenetre dont les RUNS_PER_PROMPT runs les plus
+recents mentionnent la marque dans moins de 50 % des cas :
+- gap total (0 mention) : accompagne des sources et concurrents dominants
+- gap partiel (< 50 %) : opportunite, sans detail concurrentiel
+
+Tout le calcul tient dans UNE requete (CTE + fonctions de fenetre) :
+recent (ROW_NUMBER par prompt) -> stats (presence, nb de runs, dernier run) ->
+page (tri + pagination) -> top N sources/concurrents des gaps totaux de la page
+(expansion JSON + ROW_NUMBER par prompt et type). Le total est joint en tete
+pour rester connu meme sur une page vide. Pas de plafond de prompts ni de runs :
+seule la page demandee est materialisee cote Python.
+
+Seule l'expansion des tableaux JSON depend du dialecte (jsonb_array_elements en
+PostgreSQL, json_each en SQLite pour les tests).
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    and_,
+    case,
+    cast,
+    func,
+    literal,
+    select,
+    true,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.geo import GeoPrompt, GeoRun
+from app.services.geo.scorer import run_at_range
+
+# Runs les plus recents consideres par prompt
+RUNS_PER_PROMPT = 10
+
+# Top N sources / concurrents par gap total
+TOP_N = 5
+
+# Ordre de premiere apparition d'un element JSON : rang du run, puis position
+# dans le tableau (departage les ex-aequo comme le parcours Python historique).
+_POSITION_STRIDE = 100_000
+
+KIND_SOURCE = "source"
+KIND_COMPETITOR = "competitor"
+
+
+def _json_elements(column, dialect: str):
+    """Elements d'un tableau JSON : (from-clause, extracteur de champ, position)."""
+    if dialect == "postgresql":
+        elems = (
+            func.jsonb_array_elements(column)
+            .table_valued("value", with_ordinality="idx")
+            .render_derived()
+        )
+        return elems, lambda field: func.jsonb_extract_path_text(elems.c.value, field), elems.c.idx
+    elems = func.json_each(column).table_valued("value", "key")
+    return elems, lambda field: func.json_extract(elems.c.value, f"$.{field}"), elems.c.key
+
+
+def _build_query(
+    brand_id: uuid.UUID,
+    engine: str,
+    start: datetime,
+    end: datetime,
+    offset: int,
+    limit: int,
+    dialect: str,
+):
+    rn = func.row_number().over(
+        partition_by=GeoRun.prompt_id,
+        order_by=(GeoRun.run_at.desc(), GeoRun.id),
+    )
+    ranked = (
+        select(
+            GeoRun.prompt_id,
+            GeoRun.run_at,
+            GeoRun.brand_mentioned,
+            GeoRun.citations,
+            GeoRun.brands_found,
+            rn.label("rn"),
+        )
+        .join(GeoPrompt, GeoPrompt.id == GeoRun.prompt_id)
+        .where(
+            and_(
+                GeoPrompt.brand_id == brand_id,
+                GeoPrompt.active.is_(True),
+                GeoRun.brand_id == brand_id,
+                GeoRun.engine == engine,
+                run_at_range(start, end),
+            )
+        )
+        .subquery("ranked")
+    )
+    recent = select(ranked).where(ranked.c.rn <= RUNS_PER_PROMPT).cte("recent")
+
+    stats = (
+        select(
+            recent.c.prompt_id,
+            func.count().label("runs_checked"),
+            func.sum(case((recent.c.brand_mentioned.is_(True), 1), else_=0)).label("mentions"),
+            func.max(recent.c.run_at).label("last_run_at"),
+        )
+        .group_by(recent.c.prompt_id)
+        .subquery("stats")
+    )
+
+    # Prioritaires d'abord, puis visibilite croissante (departage stable).
+    gap_rank = func.row_number().over(
+        order_by=(
+            GeoPrompt.priority.desc(),
+            cast(stats.c.mentions, Float) / cast(stats.c.runs_checked, Float),
+            GeoPrompt.created_at,
+            GeoPrompt.id,
+        )
+    )
+    gaps = (
+        select(
+            GeoPrompt.id.label("prompt_id"),
+            GeoPrompt.text,
+            GeoPrompt.intent,
+            GeoPrompt.priority,
+            stats.c.runs_checked,
+            stats.c.mentions,
+            stats.c.last_run_at,
+            gap_rank.label("gap_rank"),
+        )
+        .join(stats, stats.c.prompt_id == GeoPrompt.id)
+        .where(stats.c.mentions * 2 < stats.c.runs_checked)
+        .cte("gaps")
+    )
+    totals = select(func.count().label("total")).select_from(gaps).cte("totals")
+    page = (
+        select(gaps)
+        .where(and_(gaps.c.gap_rank > offset, gaps.c.gap_rank <= offset + limit))
+        .cte("page")
+    )
+
+    def _tally(kind: str, column: ColumnElement, field: str):
+        elems, extract, idx = _json_elements(column, dialect)
+        label = extract(field)
+        return (
+            select(
+                recent.c.prompt_id,
+                literal(kind).label("kind"),
+                label.label("label"),
+                func.count().label("cnt"),
+                func.min(recent.c.rn * _POSITION_STRIDE + idx).label("first_seen"),
+            )
+            .select_from(
+                recent.join(page, page.c.prompt_id == recent.c.prompt_id).join(elems, true())
+            )
+            .where(and_(page.c.mentions == 0, label.is_not(None), label != ""))
+            .group_by(recent.c.prompt_id, label)
+        )
+
+    entries = union_all(
+        _tally(KIND_SOURCE, recent.c.citations, "domain"),
+        _tally(KIND_COMPETITOR, recent.c.brands_found, "nom"),
+    ).subquery("entries")
+    ranked_entries = select(
+        entries,
+        func.row_number()
+        .over(
+            partition_by=(entries.c.prompt_id, entries.c.kind),
+            order_by=(entries.c.cnt.desc(), entries.c.first_seen),
+        )
+        .label("pos"),
+    ).subquery("ranked_entries")
+    top = select(ranked_entries).where(ranked_entries.c.pos <= TOP_N).subquery("top")
+
+    return (
+        select(
+            totals.c.total,
+            page.c.prompt_id,
+            page.c.text,
+            page.c.intent,
+            page.c.priority,
+            page.c.runs_checked,
+            page.c.mentions,
+            page.c.last_run_at,
+            top.c.kind,
+            top.c.label,
+            top.c.cnt,
+        )
+        .select_from(
+            totals.outerjoin(page, true()).outerjoin(top, top.c.prompt_id == page.c.prompt_id)
+        )
+        .order_by(page.c.gap_rank, top.c.kind, top.c.pos)
+    )
+
+
+async def find_gaps(
+    db: AsyncSession,
+    brand_id: uuid.UUID,
+    engine: str,
+    start: datetime,
+    end: datetime,
+    offset: int = 0,
+    limit: int = 50,
+) -> tuple[list[dict], int]:
+    """Gaps d'une marque sur [start, end) : (page de gaps, nombre total de gaps).
+
+    Chaque gap : prompt, runs_checked, mentions, visibility_rate, top sources et
+    concurrents (gaps totaux uniquement), last_run_at, action_suggestion.
+    """
+    dialect = db.get_bind().dialect.name
+    rows = (
+        await db.execute(_build_query(brand_id, engine, start, end, offset, limit, dialect))
+    ).all()
+
+    total = rows[0].total if rows else 0
+    gaps: dict[uuid.UUID, dict] = {}
+    sources: dict[uuid.UUID, list[tuple[str, int]]] = {}
+    for row in rows:
+        if row.prompt_id is None:
+            continue  # page vide : seule la ligne du total
+        gap = gaps.get(row.prompt_id)
+        if gap is None:
+            mentions = int(row.mentions)
+            runs_checked = int(row.runs_checked)
+            gap = gaps[row.prompt_id] = {
+                "prompt_id": str(row.prompt_id),
+                "prompt_text": row.text,
+                "intent": row.intent,
+                "priority": row.priority,
+                "runs_checked": runs_checked,
+                "mentions": mentions,
+                "visibility_rate": (
+                    round(mentions / runs_checked * 100, 1) if mentions else 0.0
+                ),
+                "top_competitor_sources": [],
+                "top_competitors": [],
+                "last_run_at": row.last_run_at.isoformat() if row.last_run_at else None,
+            }
+            sources[row.prompt_id] = []
+        if row.kind == KIND_SOURCE:
+            gap["top_competitor_sources"].append({"domain": row.label, "count": row.cnt})
+            sources[row.prompt_id].append((row.label, row.cnt))
+        elif row.kind == KIND_COMPETITOR:
+            gap["top_competitors"].append({"nom": row.label, "count": row.cnt})
+
+    for prompt_id, gap in gaps.items():
+        gap["action_suggestion"] = suggest_action(gap["intent"], sources[prompt_id])
+    return list(gaps.values()), total
+
+
+def suggest_action(intent: str, top_sources: list[tuple]) -> str:
+    """Suggestion d'action content basee sur l'intention et les sources dominantes.
+
+    P4 — logique heuristique (pas d'appel LLM — rapide et deterministe).
+    """
+    source_names = [d for d, _ in top_sources]
+
+    # Detecter la nature des sources dominantes
+    has_reddit = any("reddit" in s for s in source_names)
+    has_wiki = any("wikipedia" in s for s in source_names)
+    has_comparator = any(
+        s in ("g2.com", "capterra.com", "producthunt.com", "trustpilot.com")
+        for s in source_names
+    )
+
+    if intent == "comparatif":
+        if has_comparator:
+            return "Creer/optimiser fiche G2, Capterra ou Product Hunt avec donnees chiffrees"
+        return "Publier une comparaison structuree (Q&A, tableau) sur le site"
+
+    if intent == "transactionnel":
+        if has_reddit:
+            return "Animer la presence Reddit/communaute : repondre aux threads pertinents"
+        return "Creer une page FAQ dense avec donnees chiffrees et cas clients"
+
+    # informationnel (defaut)
+    if has_wiki:
+        return "Renforcer les pages Wikipedia / Wikidata liees a la marque"
+    return "Publier des contenus definitionnels (guides, glossaires, Q&A) avec schema.org FAQ"
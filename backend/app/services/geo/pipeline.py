@@ -31,6 +31,7 @@ from app.models.geo import GeoBrand, GeoPrompt, GeoRun
 from app.schemas.geo import ExtractionResult, MarqueTrouvee
 from app.services.geo.collector import get_collector
 from app.services.geo.extractor import extraire_marques
+from app.services.geo.scorer import run_at_range
 
 logger = logging.getLogger(__name__)
 
@@ -104,8 +105,7 @@ async def _existing_run(
                 GeoRun.prompt_id == prompt_id,
                 GeoRun.engine == engine,
                 GeoRun.run_index == run_index,
-                GeoRun.run_at >= day_start,
-                GeoRun.run_at < day_end,
+                run_at_range(day_start, day_end),
             )
         )
     )
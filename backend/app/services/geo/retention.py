@@ -0,0 +1,158 @@
+# =============================================================================
+# FGA CRM - GEO Retention (stockage froid des reponses brutes)
+# =============================================================================
+"""Tiering du raw_answer des runs GEO.
+
+Les runs sont immuables mais leur texte brut (jusqu'a geo_raw_answer_max_chars)
+n'est plus lu apres quelques jours : les agregats (scorer, dashboard, gaps) ne
+consomment que brands_found / citations / colonnes derivees. Le job de retention
+deplace donc le raw_answer des runs plus vieux que `geo_raw_answer_hot_days`
+vers geo_run_archives (compresse zlib) et le met a NULL en table chaude.
+
+- archive_raw_answers : job de retention (par lots, 1 transaction par lot) +
+  purge des archives orphelines (pas de FK : geo_runs est partitionnee)
+- load_raw_answer : lecture paresseuse (vue detail d'un run)
+
+Espace recupere : le rapport donne les octets logiques sortis de geo_runs
+(taille UTF-8 du texte) et leur taille compressee en archive. En PostgreSQL, les
+pages TOAST liberees sont reutilisees apres le prochain (auto)VACUUM.
+"""
+
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, delete, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.geo import GeoRun, GeoRunArchive
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZLIB = "zlib"
+
+
+@dataclass
+class ArchiveReport:
+    runs_archived: int = 0
+    archives_purged: int = 0    # archives orphelines (run supprime) effacees
+    bytes_raw: int = 0          # octets UTF-8 sortis de la table chaude
+    bytes_compressed: int = 0   # octets ecrits dans geo_run_archives
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return max(0, self.bytes_raw - self.bytes_compressed)
+
+    def as_dict(self) -> dict:
+        return {
+            "runs_archived": self.runs_archived,
+            "archives_purged": self.archives_purged,
+            "bytes_raw": self.bytes_raw,
+            "bytes_compressed": self.bytes_compressed,
+            "bytes_reclaimed": self.bytes_reclaimed,
+        }
+
+
+def compress_raw_answer(text: str) -> bytes:
+    """Compresser un raw_answer (zlib niveau 9 — ecrit une fois, lu rarement)."""
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def decompress_raw_answer(payload: bytes, codec: str = CODEC_ZLIB) -> str:
+    if codec != CODEC_ZLIB:
+        raise ValueError(f"Codec d'archive inconnu : {codec}")
+    return zlib.decompress(payload).decode("utf-8")
+
+
+async def archive_raw_answers(
+    db: AsyncSession,
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+) -> ArchiveReport:
+    """Deplacer les raw_answer des runs anciens vers geo_run_archives.
+
+    Idempotent : seuls les runs non encore archives (raw_answer_archived_at NULL)
+    sont selectionnes, et l'INSERT archive + l'UPDATE du run partagent la meme
+    transaction (un lot interrompu est rejoue entierement au prochain passage).
+    """
+    days = older_than_days if older_than_days is not None else settings.geo_raw_answer_hot_days
+    size = batch_size or settings.geo_archive_batch_size
+    archived_at = now or datetime.now(UTC)
+    cutoff = archived_at - timedelta(days=days)
+
+    report = ArchiveReport()
+    while True:
+        rows = (
+            await db.execute(
+                select(GeoRun.id, GeoRun.organization_id, GeoRun.raw_answer)
+                .where(
+                    and_(
+                        GeoRun.run_at < cutoff,
+                        GeoRun.raw_answer.is_not(None),
+                        GeoRun.raw_answer_archived_at.is_(None),
+                    )
+                )
+                .order_by(GeoRun.run_at)
+                .limit(size)
+            )
+        ).all()
+        if not rows:
+            break
+
+        for run_id, org_id, raw_answer in rows:
+            payload = compress_raw_answer(raw_answer)
+            raw_size = len(raw_answer.encode("utf-8"))
+            db.add(
+                GeoRunArchive(
+                    run_id=run_id,
+                    organization_id=org_id,
+                    codec=CODEC_ZLIB,
+                    payload=payload,
+                    raw_size=raw_size,
+                    archived_at=archived_at,
+                )
+            )
+            report.bytes_raw += raw_size
+            report.bytes_compressed += len(payload)
+
+        await db.execute(
+            update(GeoRun)
+            .where(GeoRun.id.in_([r[0] for r in rows]))
+            .values(raw_answer=None, raw_answer_archived_at=archived_at)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        report.runs_archived += len(rows)
+
+        if len(rows) < size:
+            break
+
+    # Orphelins : runs supprimes en cascade (prompt/marque) depuis l'archivage.
+    purged = await db.execute(
+        delete(GeoRunArchive).where(
+            ~exists().where(GeoRun.id == GeoRunArchive.run_id)
+        )
+    )
+    await db.commit()
+    report.archives_purged = purged.rowcount or 0
+
+    logger.info(
+        "[GEO retention] cutoff=%s archives=%d raw=%dB compresse=%dB recupere=%dB",
+        cutoff.date(), report.runs_archived, report.bytes_raw,
+        report.bytes_compressed, report.bytes_reclaimed,
+    )
+    return report
+
+
+async def load_raw_answer(db: AsyncSession, run: GeoRun) -> str | None:
+    """raw_answer d'un run, relu depuis l'archive s'il a quitte la table chaude."""
+    if run.raw_answer_archived_at is None:
+        return run.raw_answer
+    archive = await db.get(GeoRunArchive, run.id)
+    if archive is None:
+        logger.warning("[GEO retention] archive manquante pour run=%s", run.id)
+        return None
+    return decompress_raw_answer(archive.payload, archive.codec)
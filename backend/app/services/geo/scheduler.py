@@ -0,0 +1,447 @@
+# =============================================================================
+# FGA CRM - GEO Scheduler (mesures nocturnes etalees)
+# =============================================================================
+"""Planification des mesures GEO sur une fenetre nocturne.
+
+- GeoSchedule : cadence par marque x moteur (toutes les `every_days` nuits)
+- plan_night : cree un GeoScheduledBatch par cadence due (prompts actifs de la
+  marque) et lui attribue une eta dans la fenetre geo_schedule_window_start/end
+- claim_due_batches : batches dont l'eta est passee -> statut queued avec leur
+  task_id (le dispatcher beat commite le claim PUIS les envoie a
+  geo_run_batch_task sous ce task_id)
+- reap_stale_batches : batches bloques en queued / running (worker mort,
+  message perdu) -> replanifies, failed apres geo_schedule_max_attempts envois
+- claim_batch_run / mark_batch_finished : suivi d'execution (task Celery) ;
+  seul le message du dernier envoi (task_id) demarre et clot le batch
+- queue_overview : profondeur de file et eta de fin par moteur
+
+Etalement pondere par le budget de debit du moteur (geo_engine_runs_per_hour) :
+pour R runs planifies sur un moteur de budget B runs/h et une fenetre de W h, les
+batches sont places a la suite sur une duree D = max(W, R / B), au prorata de
+leurs runs. Le debit moyen R / D ne depasse donc jamais le budget ; si la charge
+deborde la fenetre, la fin estimee le montre (queue_overview).
+
+Idempotence : unicite (schedule, nuit) a la planification ; a l'execution, un
+batch rejoue ne recree pas les runs deja faits ce jour (pipeline._existing_run),
+et un message perime (batch repris par le reaper puis renvoye, redelivery
+acks_late d'un batch termine) ne demarre pas : claim_batch_run le rejette.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import UTC, date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.geo import GeoBrand, GeoPrompt, GeoRun, GeoSchedule, GeoScheduledBatch
+from app.services.geo.scorer import run_at_range
+
+logger = logging.getLogger(__name__)
+
+# Fuseau des horaires de fenetre (aligne sur celery_app.conf.timezone)
+SCHEDULER_TZ = ZoneInfo("Europe/Paris")
+
+# Statuts encore dans la file (pas termines)
+PENDING_STATUSES = ("planned", "queued", "running")
+
+
+def _parse_hhmm(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+
+def night_window(night: date) -> tuple[datetime, datetime]:
+    """Fenetre [debut, fin) de la nuit `night` (fin le lendemain si elle passe minuit)."""
+    start = datetime.combine(night, _parse_hhmm(settings.geo_schedule_window_start), SCHEDULER_TZ)
+    end = datetime.combine(night, _parse_hhmm(settings.geo_schedule_window_end), SCHEDULER_TZ)
+    if end <= start:
+        end += timedelta(days=1)
+    return start.astimezone(UTC), end.astimezone(UTC)
+
+
+def engine_runs_per_hour(engine: str) -> int:
+    """Budget de debit d'un moteur (runs/heure, >= 1)."""
+    rate = settings.geo_engine_runs_per_hour.get(
+        engine, settings.geo_schedule_default_runs_per_hour
+    )
+    return max(1, rate)
+
+
+def is_due(schedule: GeoSchedule, night: date) -> bool:
+    if schedule.last_planned_on is None:
+        return True
+    return (night - schedule.last_planned_on).days >= schedule.every_days
+
+
+def spread_etas(
+    batches: list[tuple[str, int]],
+    engine: str,
+    start: datetime,
+    end: datetime,
+) -> list[datetime]:
+    """Eta de chaque batch (cle, runs) d'un moteur, dans l'ordre donne."""
+    total_runs = sum(runs for _, runs in batches)
+    if total_runs == 0:
+        return [start for _ in batches]
+    window_hours = (end - start).total_seconds() / 3600
+    duration_hours = max(window_hours, total_runs / engine_runs_per_hour(engine))
+    etas: list[datetime] = []
+    done = 0
+    for _, runs in batches:
+        etas.append(start + timedelta(hours=duration_hours * done / total_runs))
+        done += runs
+    return etas
+
+
+def current_night(now: datetime | None = None) -> date:
+    """Nuit a planifier : celle du jour local, ou du lendemain si sa fenetre est passee."""
+    now = now or datetime.now(UTC)
+    night = now.astimezone(SCHEDULER_TZ).date()
+    _, end = night_window(night)
+    return night + timedelta(days=1) if now >= end else night
+
+
+async def plan_night(
+    db: AsyncSession,
+    night: date | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Planifier les batches des cadences dues pour une nuit. Idempotent.
+
+    Retourne {night, planned, runs, skipped} (skipped = cadences dues sans prompt
+    actif ou deja planifiees pour cette nuit).
+    """
+    night = night or current_night(now)
+    start, end = night_window(night)
+
+    schedules = (
+        await db.execute(
+            select(GeoSchedule)
+            .join(GeoBrand, GeoBrand.id == GeoSchedule.brand_id)
+            .where(and_(GeoSchedule.active.is_(True), GeoBrand.active.is_(True)))
+            .order_by(GeoSchedule.engine, GeoSchedule.created_at, GeoSchedule.id)
+        )
+    ).scalars().all()
+    due = [s for s in schedules if is_due(s, night)]
+    if not due:
+        return {"night": night.isoformat(), "planned": 0, "runs": 0, "skipped": 0}
+
+    already = set(
+        (
+            await db.execute(
+                select(GeoScheduledBatch.schedule_id).where(
+                    and_(
+                        GeoScheduledBatch.night == night,
+                        GeoScheduledBatch.schedule_id.in_([s.id for s in due]),
+                    )
+                )
+            )
+        ).scalars().all()
+    )
+
+    # Prompts actifs des marques concernees — une requete (prioritaires d'abord).
+    prompts_by_brand: dict[uuid.UUID, list[str]] = defaultdict(list)
+    rows = (
+        await db.execute(
+            select(GeoPrompt.brand_id, GeoPrompt.id)
+            .where(
+                and_(
+                    GeoPrompt.brand_id.in_({s.brand_id for s in due}),
+                    GeoPrompt.active.is_(True),
+                )
+            )
+            .order_by(GeoPrompt.priority.desc(), GeoPrompt.created_at, GeoPrompt.id)
+        )
+    ).all()
+    for brand_id, prompt_id in rows:
+        prompts_by_brand[brand_id].append(str(prompt_id))
+
+    by_engine: dict[str, list[GeoSchedule]] = defaultdict(list)
+    skipped = 0
+    for schedule in due:
+        if schedule.id in already or not prompts_by_brand.get(schedule.brand_id):
+            skipped += 1
+            continue
+        by_engine[schedule.engine].append(schedule)
+
+    planned = 0
+    runs_total = 0
+    for engine, engine_schedules in by_engine.items():
+        sized = [
+            (str(s.id), len(prompts_by_brand[s.brand_id]) * s.n_runs)
+            for s in engine_schedules
+        ]
+        etas = spread_etas(sized, engine, start, end)
+        for schedule, (_, runs), eta in zip(engine_schedules, sized, etas, strict=True):
+            db.add(
+                GeoScheduledBatch(
+                    organization_id=schedule.organization_id,
+                    schedule_id=schedule.id,
+                    brand_id=schedule.brand_id,
+                    engine=engine,
+                    night=night,
+                    eta=eta,
+                    prompt_ids=prompts_by_brand[schedule.brand_id],
+                    n_runs=schedule.n_runs,
+                    runs_planned=runs,
+                    status="planned",
+                )
+            )
+            schedule.last_planned_on = night
+            planned += 1
+            runs_total += runs
+    await db.commit()
+
+    logger.info(
+        "[GEO scheduler] nuit=%s batches=%d runs=%d ignores=%d",
+        night, planned, runs_total, skipped,
+    )
+    return {
+        "night": night.isoformat(),
+        "planned": planned,
+        "runs": runs_total,
+        "skipped": skipped,
+    }
+
+
+async def claim_due_batches(
+    db: AsyncSession,
+    now: datetime | None = None,
+    limit: int = 100,
+) -> list[GeoScheduledBatch]:
+    """Passer en `queued` les batches planifies dont l'eta est atteinte.
+
+    FOR UPDATE SKIP LOCKED (PostgreSQL) : deux dispatchers concurrents ne
+    reclament jamais le meme batch. L'appelant commit le claim AVANT l'envoi
+    Celery : un echec d'envoi ou de commit ulterieur ne renvoie jamais un batch
+    deja parti (un claim sans envoi est repris par reap_stale_batches). Le
+    task_id est attribue ici : le message envoye sous cet id est le seul a
+    pouvoir demarrer le batch (claim_batch_run).
+    """
+    now = now or datetime.now(UTC)
+    batches = (
+        await db.execute(
+            select(GeoScheduledBatch)
+            .where(
+                and_(GeoScheduledBatch.status == "planned", GeoScheduledBatch.eta <= now)
+            )
+            .order_by(GeoScheduledBatch.eta)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    ).scalars().all()
+    for batch in batches:
+        batch.status = "queued"
+        batch.task_id = str(uuid.uuid4())
+        batch.dispatched_at = now
+        batch.attempts += 1
+    return list(batches)
+
+
+async def reap_stale_batches(db: AsyncSession, now: datetime | None = None) -> dict:
+    """Reprendre les batches bloques (commit inclus).
+
+    queued sans demarrage depuis geo_schedule_stale_queued_minutes, ou running
+    sans fin depuis geo_schedule_stale_running_minutes : replanifies (eta deja
+    passee -> renvoyes au prochain dispatch), ou failed apres
+    geo_schedule_max_attempts envois. Rejouer un batch est sans doublon : les
+    runs deja faits ce jour sont ignores (pipeline._existing_run).
+    """
+    now = now or datetime.now(UTC)
+    stale = (
+        await db.execute(
+            select(GeoScheduledBatch)
+            .where(
+                or_(
+                    and_(
+                        GeoScheduledBatch.status == "queued",
+                        GeoScheduledBatch.dispatched_at
+                        < now - timedelta(minutes=settings.geo_schedule_stale_queued_minutes),
+                    ),
+                    and_(
+                        GeoScheduledBatch.status == "running",
+                        GeoScheduledBatch.started_at
+                        < now - timedelta(minutes=settings.geo_schedule_stale_running_minutes),
+                    ),
+                )
+            )
+            .with_for_update(skip_locked=True)
+        )
+    ).scalars().all()
+
+    report = {"requeued": 0, "failed": 0}
+    for batch in stale:
+        logger.warning(
+            "[GEO scheduler] batch %s bloque en %s (envoi %d/%d)",
+            batch.id, batch.status, batch.attempts, settings.geo_schedule_max_attempts,
+        )
+        if batch.attempts >= settings.geo_schedule_max_attempts:
+            batch.status = "failed"
+            batch.finished_at = now
+            report["failed"] += 1
+        else:
+            batch.status = "planned"
+            batch.task_id = None
+            report["requeued"] += 1
+    if stale:
+        await db.commit()
+    return report
+
+
+async def claim_batch_run(db: AsyncSession, batch_id: uuid.UUID, task_id: str) -> bool:
+    """queued -> running, atomique, pour le seul message du dernier envoi.
+
+    False : batch deja demarre, repris par le reaper (task_id remplace ou efface)
+    ou termine -> le message est perime, la task ne fait rien.
+    """
+    result = await db.execute(
+        update(GeoScheduledBatch)
+        .where(
+            GeoScheduledBatch.id == batch_id,
+            GeoScheduledBatch.status == "queued",
+            GeoScheduledBatch.task_id == task_id,
+        )
+        .values(status="running", started_at=datetime.now(UTC))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def mark_batch_finished(
+    db: AsyncSession,
+    batch_id: uuid.UUID,
+    task_id: str,
+    success: int,
+    failed: int,
+    error: bool = False,
+) -> None:
+    """running -> done | failed, si le batch est toujours tenu par `task_id`."""
+    await db.execute(
+        update(GeoScheduledBatch)
+        .where(
+            GeoScheduledBatch.id == batch_id,
+            GeoScheduledBatch.status == "running",
+            GeoScheduledBatch.task_id == task_id,
+        )
+        .values(
+            status="failed" if error else "done",
+            runs_success=success,
+            runs_failed=failed,
+            finished_at=datetime.now(UTC),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite (tests) relit des datetimes naifs : ils sont stockes en UTC.
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+async def _batch_runs_done(db: AsyncSession, batch: GeoScheduledBatch, now: datetime) -> int:
+    """Runs deja stockes d'un batch en cours (runs_success/failed ne sont poses
+    qu'en fin de batch). Compte les runs du jour de ses prompts sur son moteur,
+    comme la dedup du pipeline (un run deja fait ce jour n'est pas refait)."""
+    day_start = datetime.combine(
+        _as_utc(batch.started_at or now).date(), datetime.min.time(), tzinfo=UTC,
+    )
+    prompt_ids = [uuid.UUID(p) for p in batch.prompt_ids]
+    if not prompt_ids:
+        return 0
+    return (
+        await db.execute(
+            select(func.count()).select_from(GeoRun).where(
+                and_(
+                    GeoRun.brand_id == batch.brand_id,
+                    GeoRun.engine == batch.engine,
+                    GeoRun.prompt_id.in_(prompt_ids),
+                    run_at_range(day_start, now + timedelta(minutes=1)),
+                )
+            )
+        )
+    ).scalar_one()
+
+
+async def queue_overview(
+    db: AsyncSession,
+    organization_id: uuid.UUID | None = None,
+    all_orgs: bool = False,
+    now: datetime | None = None,
+) -> dict:
+    """Profondeur de file et eta de fin, par moteur.
+
+    La simulation porte sur la file GLOBALE (les moteurs sont partages entre
+    organisations) : chaque batch demarre a max(eta, fin du precedent) et dure
+    runs restants / budget (batch en cours : runs planifies moins runs deja
+    stockes). Seuls les batches de l'organisation sont exposes
+    (tous si all_orgs — super-admin).
+    """
+    now = now or datetime.now(UTC)
+    pending = (
+        await db.execute(
+            select(GeoScheduledBatch)
+            .where(GeoScheduledBatch.status.in_(PENDING_STATUSES))
+            .order_by(GeoScheduledBatch.engine, GeoScheduledBatch.eta, GeoScheduledBatch.id)
+        )
+    ).scalars().all()
+    runs_done = {
+        batch.id: await _batch_runs_done(db, batch, now)
+        for batch in pending
+        if batch.status == "running"
+    }
+
+    engines: dict[str, dict] = {}
+    items: list[dict] = []
+    cursor: dict[str, datetime] = {}
+    for batch in pending:
+        rate = engine_runs_per_hour(batch.engine)
+        eta = _as_utc(batch.eta)
+        started = max(eta, cursor.get(batch.engine, now))
+        remaining = batch.runs_planned
+        if batch.status == "running":
+            started = now
+            remaining = max(0, batch.runs_planned - runs_done[batch.id])
+        finish = started + timedelta(hours=remaining / rate)
+        cursor[batch.engine] = finish
+
+        if not all_orgs and batch.organization_id != organization_id:
+            continue
+        stats = engines.setdefault(
+            batch.engine,
+            {
+                "engine": batch.engine,
+                "runs_per_hour": rate,
+                "batches": 0,
+                "runs_pending": 0,
+                "next_eta": None,
+                "estimated_completion": None,
+            },
+        )
+        stats["batches"] += 1
+        stats["runs_pending"] += remaining
+        if stats["next_eta"] is None:
+            stats["next_eta"] = eta
+        stats["estimated_completion"] = finish
+        items.append(
+            {
+                "id": batch.id,
+                "brand_id": batch.brand_id,
+                "engine": batch.engine,
+                "night": batch.night,
+                "status": batch.status,
+                "eta": eta,
+                "runs_planned": batch.runs_planned,
+                "estimated_completion": finish,
+            }
+        )
+
+    return {
+        "engines": sorted(engines.values(), key=lambda e: e["engine"]),
+        "items": items,
+    }
@@ -21,7 +21,7 @@ import logging
 from datetime import UTC, date, datetime, timedelta
 from uuid import UUID
 
-from sqlalchemy import and_, select
+from sqlalchemy import ColumnElement, and_, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -45,6 +45,17 @@ def _day_bounds(day: date) -> tuple[datetime, datetime]:
     return start, start + timedelta(days=1)
 
 
+def run_at_range(start: datetime, end: datetime) -> ColumnElement[bool]:
+    """Predicat [start, end) sur geo_runs.run_at, colonne de partition brute.
+
+    geo_runs est partitionnee par mois sur run_at (cf. app/db/partitions.py) :
+    une plage explicite sur la colonne nue permet au planner d'elaguer les
+    partitions hors fenetre. Toute requete geo_runs bornee dans le temps passe
+    par ce helper (DC8 — forme elaguable unique).
+    """
+    return and_(GeoRun.run_at >= start, GeoRun.run_at < end)
+
+
 def _round2(value: float) -> float:
     """Arrondi a 2 decimales (aligne sur NUMERIC(_, 2))."""
     return round(value, 2)
@@ -72,8 +83,7 @@ async def compute_daily_metrics(
             and_(
                 GeoRun.brand_id == brand_id,
                 GeoRun.engine == engine,
-                GeoRun.run_at >= day_start,
-                GeoRun.run_at < day_end,
+                run_at_range(day_start, day_end),
             )
         )
     )
@@ -197,7 +207,8 @@ async def compute_all_metrics(
     """Calculer les metriques pour toutes les combinaisons brand x engine du jour.
 
     target_date par defaut = hier (les runs du jour courant sont encore partiels).
-    Retourne {computed: int, errors: list[str]}.
+    Retourne {computed: int, errors: list[str], brands: list[str]} — brands :
+    marques dont une metrique a ete ecrite (cache dashboard a rafraichir).
     """
     day = target_date or (datetime.now(UTC).date() - timedelta(days=1))
 
@@ -206,18 +217,20 @@ async def compute_all_metrics(
     combos = (
         await db.execute(
             select(GeoRun.brand_id, GeoRun.engine)
-            .where(and_(GeoRun.run_at >= day_start, GeoRun.run_at < day_end))
+            .where(run_at_range(day_start, day_end))
             .group_by(GeoRun.brand_id, GeoRun.engine)
         )
     ).all()
 
     computed = 0
     errors: list[str] = []
+    brands: set[str] = set()
     for brand_id, engine in combos:
         try:
             metrics = await compute_daily_metrics(db, brand_id, day, engine)
             if metrics is not None:
                 computed += 1
+                brands.add(str(brand_id))
         except Exception as exc:  # noqa: BLE001 — on continue sur les autres combos
             msg = f"brand={brand_id} engine={engine}: {exc}"
             logger.error("[GEO scorer] echec compute : %s", msg)
@@ -227,4 +240,4 @@ async def compute_all_metrics(
     logger.info(
         "[GEO scorer] jour=%s computed=%d errors=%d", day, computed, len(errors)
     )
-    return {"computed": computed, "errors": errors}
+    return {"computed": computed, "errors": errors, "brands": sorted(brands)}
@@ -15,22 +15,42 @@ Garde-fous :
 - dedup temporelle par ``dedup_key`` (fenetre ``lead_engine_dedup_days``),
   quel que soit le statut du signal precedent (un signal ignore est memorise) ;
 - une societe avec un deal OUVERT (stage hors won/lost) n'est pas re-signalee
-  (§2.4 : un lead deja en pipeline n'est pas re-cible).
+  (§2.4 : un lead deja en pipeline n'est pas re-cible) ;
+- detection serialisee par org (verrou advisory de transaction) : scan et
+  consumers d'evenements concurrents ne creent pas deux fois le meme signal
+  (lecture de dedup puis insert, sans contrainte unique sur dedup_key).
+
+Detection sur ecriture (events.py) : les ecritures funding / audit / contact
+entrant emettent un evenement outbox, le consumer appelle les detecteurs sur
+les seules cibles (``targets``). Le scan ci-dessous est le filet de rattrapage.
+
+Scan incremental (beat horaire) : chaque detecteur garde un watermark par org
+(LeadScanWatermark : debut de son dernier scan reussi) et ne relit que les
+lignes modifiees depuis (updated_at, moins lead_engine_watermark_overlap_minutes)
+— plus les societes dont un deal a change (sortie de pipeline). Les lookups de
+dedup / pipeline sont bornes aux candidats : le cout suit le volume de
+changements, pas le volume de donnees. Ce que seul le temps change (cle de
+dedup expiree, seuil modifie) est rattrape par le rescan complet (full=True :
+beat quotidien, scan manuel).
 """
 
+import asyncio
 import logging
+import time
 import uuid
+from collections.abc import Collection, Iterable
 from datetime import UTC, date, datetime, timedelta
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.config import settings
+from app.db.session import task_session_maker
 from app.models.activity import Activity
 from app.models.company import Company
 from app.models.contact import Contact
 from app.models.deal import Deal
-from app.models.lead_engine import LeadSignal
+from app.models.lead_engine import SCAN_DETECTORS, LeadScanWatermark, LeadSignal
 from app.models.organization import Organization
 
 logger = logging.getLogger(__name__)
@@ -47,30 +67,90 @@ def _dedup_key(kind: str, company_id: uuid.UUID) -> str:
     return f"{kind}:{company_id}"
 
 
-async def _recent_dedup_keys(db: AsyncSession, org_id: uuid.UUID) -> set[str]:
-    """Cles de dedup deja emises dans la fenetre glissante (tous statuts)."""
+# Borne des listes IN (...) des lookups scopes aux candidats
+_LOOKUP_CHUNK = 500
+
+
+def _chunked(values: Iterable) -> Iterable[list]:
+    values = list(values)
+    for start in range(0, len(values), _LOOKUP_CHUNK):
+        yield values[start:start + _LOOKUP_CHUNK]
+
+
+# Espace de cles advisory du Lead Engine (1er argument de pg_advisory_xact_lock) ;
+# 2e argument = 32 bits de l'uuid d'org (collision rare = simple attente)
+_DETECTION_LOCK_NAMESPACE = 0x4C45
+
+
+async def _lock_org_detection(db: AsyncSession, org_id: uuid.UUID) -> None:
+    """Verrou de detection de l'org, libere au commit / rollback de la transaction.
+
+    PostgreSQL uniquement (SQLite des tests : ecritures deja serialisees).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:ns, :key)"),
+        {"ns": _DETECTION_LOCK_NAMESPACE, "key": int.from_bytes(org_id.bytes[:4], "big", signed=True)},
+    )
+
+
+async def _recent_dedup_keys(
+    db: AsyncSession, org_id: uuid.UUID, keys: Iterable[str],
+) -> set[str]:
+    """Cles candidates deja emises dans la fenetre glissante (tous statuts)."""
     cutoff = datetime.now(UTC) - timedelta(days=settings.lead_engine_dedup_days)
-    rows = await db.execute(
-        select(LeadSignal.dedup_key).where(
-            LeadSignal.organization_id == org_id,
-            LeadSignal.created_at >= cutoff,
+    known: set[str] = set()
+    for chunk in _chunked(keys):
+        rows = await db.execute(
+            select(LeadSignal.dedup_key).where(
+                LeadSignal.organization_id == org_id,
+                LeadSignal.dedup_key.in_(chunk),
+                LeadSignal.created_at >= cutoff,
+            )
         )
-    )
-    return {r[0] for r in rows.all()}
+        known.update(r[0] for r in rows.all())
+    return known
+
+
+async def _companies_with_open_deal(
+    db: AsyncSession, org_id: uuid.UUID, company_ids: Iterable[uuid.UUID],
+) -> set[uuid.UUID]:
+    """Societes candidates ayant au moins un deal ouvert (deja en pipeline)."""
+    in_pipeline: set[uuid.UUID] = set()
+    for chunk in _chunked(company_ids):
+        rows = await db.execute(
+            select(Deal.company_id).distinct().where(
+                Deal.organization_id == org_id,
+                Deal.company_id.in_(chunk),
+                Deal.stage.not_in(CLOSED_DEAL_STAGES),
+            )
+        )
+        in_pipeline.update(r[0] for r in rows.all())
+    return in_pipeline
 
 
-async def _companies_with_open_deal(db: AsyncSession, org_id: uuid.UUID) -> set[uuid.UUID]:
-    """Societes de l'org ayant au moins un deal ouvert (deja en pipeline)."""
+async def _companies_with_deal_changes(
+    db: AsyncSession, org_id: uuid.UUID, since: datetime,
+) -> set[uuid.UUID]:
+    """Societes dont un deal a change depuis `since` (ex : deal perdu -> re-ciblable)."""
     rows = await db.execute(
         select(Deal.company_id).distinct().where(
             Deal.organization_id == org_id,
             Deal.company_id.is_not(None),
-            Deal.stage.not_in(CLOSED_DEAL_STAGES),
+            Deal.updated_at > since,
         )
     )
     return {r[0] for r in rows.all()}
 
 
+async def _load_watermarks(db: AsyncSession, org_id: uuid.UUID) -> dict[str, LeadScanWatermark]:
+    rows = await db.execute(
+        select(LeadScanWatermark).where(LeadScanWatermark.organization_id == org_id)
+    )
+    return {w.detector: w for w in rows.scalars().all()}
+
+
 def _company_payload(company: Company) -> dict:
     """Contexte commun du signal (le qualificateur solvabilite est toujours joint)."""
     return {
@@ -85,25 +165,38 @@ def _company_payload(company: Company) -> dict:
 async def _detect_funding(
     db: AsyncSession,
     org_id: uuid.UUID,
-    known_keys: set[str],
-    in_pipeline: set[uuid.UUID],
+    since: datetime | None = None,
+    targets: Collection[uuid.UUID] | None = None,
 ) -> int:
     """P2 — levee recente sur une societe auditable -> signal funding_detected.
 
     Ne cible que les societes liees a Startup Radar (hors investisseurs) :
     l'action du signal est l'audit du message, impossible sans lien SR.
+
+    since : societes modifiees (ou dont un deal a change) depuis ; None = toutes.
+    targets : societes a reevaluer (evenement funding_updated) ; None = toutes.
     """
     window_start = date.today() - timedelta(days=settings.lead_engine_funding_window_days)
-    rows = await db.execute(
-        select(Company).where(
-            Company.organization_id == org_id,
-            Company.funding_date >= window_start,
-            Company.startup_radar_id.is_not(None),
-            ~Company.startup_radar_id.startswith("inv:"),
-        )
+    query = select(Company).where(
+        Company.organization_id == org_id,
+        Company.funding_date >= window_start,
+        Company.startup_radar_id.is_not(None),
+        ~Company.startup_radar_id.startswith("inv:"),
     )
+    if since is not None:
+        changed = Company.updated_at > since
+        deal_changes = await _companies_with_deal_changes(db, org_id, since)
+        query = query.where(or_(changed, Company.id.in_(deal_changes)) if deal_changes else changed)
+    if targets is not None:
+        query = query.where(Company.id.in_(targets))
+    companies = (await db.execute(query)).scalars().all()
+    if not companies:
+        return 0
+
+    known_keys = await _recent_dedup_keys(db, org_id, (_dedup_key("funding", c.id) for c in companies))
+    in_pipeline = await _companies_with_open_deal(db, org_id, (c.id for c in companies))
     created = 0
-    for company in rows.scalars().all():
+    for company in companies:
         key = _dedup_key("funding", company.id)
         if key in known_keys or company.id in in_pipeline:
             continue
@@ -125,31 +218,38 @@ async def _detect_funding(
 async def _detect_mmf_gap(
     db: AsyncSession,
     org_id: uuid.UUID,
-    known_keys: set[str],
-    in_pipeline: set[uuid.UUID],
+    since: datetime | None = None,
+    targets: Collection[uuid.UUID] | None = None,
 ) -> int:
-    """P1 — audit du message < seuil -> signal mmf_gap (declencheur d'outreach)."""
+    """P1 — audit du message < seuil -> signal mmf_gap (declencheur d'outreach).
+
+    since : societes dont un audit (ou un deal) a change depuis ; None = toutes.
+    targets : societes a reevaluer (evenement audit_recorded) ; None = toutes.
+    """
     # Import tardif : reutilise la derivation des scores d'audit des routes
     # companies (DC8) sans creer d'import circulaire api <-> services.
     from app.api.v1.companies import _fetch_audit_flags
 
     # Societes de l'org ayant au moins une activite d'audit (le score /75 est
     # derive des activities type "audit" — pas une colonne Company).
-    audited_ids = list(
-        (
-            await db.execute(
-                select(Activity.company_id).distinct().where(
-                    Activity.organization_id == org_id,
-                    Activity.type == "audit",
-                    Activity.company_id.is_not(None),
-                )
-            )
-        ).scalars().all()
+    audited = select(Activity.company_id).distinct().where(
+        Activity.organization_id == org_id,
+        Activity.type == "audit",
+        Activity.company_id.is_not(None),
     )
+    if since is not None:
+        audited = audited.where(Activity.updated_at > since)
+    if targets is not None:
+        audited = audited.where(Activity.company_id.in_(targets))
+    audited_ids = set((await db.execute(audited)).scalars().all())
+    if since is not None:
+        # Score inchange mais societe sortie du pipeline : les scores sont
+        # relus ci-dessous (une societe non auditee n'a pas de score)
+        audited_ids |= await _companies_with_deal_changes(db, org_id, since)
     if not audited_ids:
         return 0
 
-    _, score_map = await _fetch_audit_flags(db, audited_ids)
+    _, score_map = await _fetch_audit_flags(db, list(audited_ids))
     gap_ids = [
         cid for cid, score in score_map.items()
         if score < settings.lead_engine_mmf_threshold
@@ -157,6 +257,8 @@ async def _detect_mmf_gap(
     if not gap_ids:
         return 0
 
+    known_keys = await _recent_dedup_keys(db, org_id, (_dedup_key("mmf", cid) for cid in gap_ids))
+    in_pipeline = await _companies_with_open_deal(db, org_id, gap_ids)
     rows = await db.execute(select(Company).where(Company.id.in_(gap_ids)))
     created = 0
     for company in rows.scalars().all():
@@ -183,16 +285,20 @@ async def _detect_mmf_gap(
 async def _detect_inbound(
     db: AsyncSession,
     org_id: uuid.UUID,
-    known_keys: set[str],
+    since: datetime | None = None,
+    targets: Collection[uuid.UUID] | None = None,
 ) -> int:
     """P3 — contact entrant (nomo-ia / plein-phare) non qualifie -> inbound_new.
 
     L'action du signal est la qualification SPICED (workflow existant), pas un
     outreach : un inbound se repond, il ne se prospecte pas.
+
+    since : contacts modifies depuis ; None = tous.
+    targets : contacts a reevaluer (evenement inbound_contact) ; None = tous.
     """
     cutoff = datetime.now(UTC) - timedelta(days=settings.lead_engine_inbound_window_days)
     # Outerjoin explicite : pas de lazy-load de la relation en contexte async.
-    rows = await db.execute(
+    query = (
         select(Contact, Company.name)
         .outerjoin(Company, Contact.company_id == Company.id)
         .where(
@@ -202,8 +308,19 @@ async def _detect_inbound(
             Contact.created_at >= cutoff,
         )
     )
+    if since is not None:
+        query = query.where(Contact.updated_at > since)
+    if targets is not None:
+        query = query.where(Contact.id.in_(targets))
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return 0
+
+    known_keys = await _recent_dedup_keys(
+        db, org_id, (_dedup_key("inbound", contact.id) for contact, _ in rows),
+    )
     created = 0
-    for contact, company_name in rows.all():
+    for contact, company_name in rows:
         key = _dedup_key("inbound", contact.id)
         if key in known_keys:
             continue
@@ -228,39 +345,117 @@ async def _detect_inbound(
     return created
 
 
-async def scan_org(db: AsyncSession, org_id: uuid.UUID) -> dict[str, int]:
-    """Scanner une organisation et creer les signaux manquants (commit inclus)."""
-    known_keys = await _recent_dedup_keys(db, org_id)
-    in_pipeline = await _companies_with_open_deal(db, org_id)
+_DETECTORS = {
+    "funding": _detect_funding,
+    "mmf": _detect_mmf_gap,
+    "inbound": _detect_inbound,
+}
+_SIGNAL_TYPES = {"funding": "funding_detected", "mmf": "mmf_gap", "inbound": "inbound_new"}
+
+
+async def scan_org(db: AsyncSession, org_id: uuid.UUID, full: bool = False) -> dict[str, int]:
+    """Scanner une organisation et creer les signaux manquants (commit inclus).
 
-    funding = await _detect_funding(db, org_id, known_keys, in_pipeline)
-    mmf = await _detect_mmf_gap(db, org_id, known_keys, in_pipeline)
-    inbound = await _detect_inbound(db, org_id, known_keys)
+    full=False : chaque detecteur ne relit que les lignes modifiees depuis son
+    watermark (absent = premier scan, complet). full=True : rescan complet.
+    Les watermarks avancent au debut du scan, dans la meme transaction que les
+    signaux (scan en echec = rien a rattraper de perdu).
+    """
+    await _lock_org_detection(db, org_id)
+    started_at = datetime.now(UTC)
+    overlap = timedelta(minutes=settings.lead_engine_watermark_overlap_minutes)
+    watermarks = await _load_watermarks(db, org_id)
+
+    created: dict[str, int] = {}
+    for detector in SCAN_DETECTORS:
+        watermark = watermarks.get(detector)
+        since = None if full or watermark is None else watermark.scanned_at - overlap
+        created[_SIGNAL_TYPES[detector]] = await _DETECTORS[detector](db, org_id, since)
+        if watermark is None:
+            db.add(LeadScanWatermark(organization_id=org_id, detector=detector, scanned_at=started_at))
+        else:
+            watermark.scanned_at = started_at
     await db.commit()
 
-    if funding or mmf or inbound:
+    if any(created.values()):
         logger.info(
-            "[LeadEngine] Scan org %s : %d funding_detected, %d mmf_gap, %d inbound_new",
-            org_id, funding, mmf, inbound,
+            "[LeadEngine] Scan org %s%s : %d funding_detected, %d mmf_gap, %d inbound_new",
+            org_id, " (complet)" if full else "",
+            created["funding_detected"], created["mmf_gap"], created["inbound_new"],
         )
-    return {"funding_detected": funding, "mmf_gap": mmf, "inbound_new": inbound}
+    return created
 
 
-async def scan_all_orgs(db: AsyncSession) -> dict[str, int]:
-    """Scanner toutes les organisations actives (beat horaire)."""
-    org_ids = (
-        await db.execute(select(Organization.id).where(Organization.is_active.is_(True)))
-    ).scalars().all()
+async def _scan_org_isolated(
+    session_factory: async_sessionmaker,
+    semaphore: asyncio.Semaphore,
+    org_id: uuid.UUID,
+    full: bool,
+) -> dict:
+    """Scan d'une org dans sa propre session, sous budget de temps.
 
-    totals = {"funding_detected": 0, "mmf_gap": 0, "inbound_new": 0, "orgs": len(org_ids)}
-    for org_id in org_ids:
+    Echec ou budget depasse : la transaction de l'org est abandonnee (ni
+    signaux ni watermarks), les autres orgs ne sont pas affectees.
+    """
+    async with semaphore:
+        report: dict = {"org_id": str(org_id), "status": "ok"}
+        started = time.perf_counter()
         try:
-            result = await scan_org(db, org_id)
+            async with session_factory() as db, asyncio.timeout(
+                settings.lead_engine_org_scan_timeout_seconds
+            ):
+                report.update(await scan_org(db, org_id, full=full))
+        except TimeoutError:
+            report["status"] = "timeout"
+            logger.warning(
+                "[LeadEngine] Scan org %s interrompu : budget de %ds depasse",
+                org_id, settings.lead_engine_org_scan_timeout_seconds,
+            )
         except Exception:  # noqa: BLE001 — un org en echec ne bloque pas les autres
+            report["status"] = "error"
             logger.exception("[LeadEngine] Scan org %s en echec", org_id)
-            await db.rollback()
-            continue
-        totals["funding_detected"] += result["funding_detected"]
-        totals["mmf_gap"] += result["mmf_gap"]
-        totals["inbound_new"] += result["inbound_new"]
+        report["duration_ms"] = int((time.perf_counter() - started) * 1000)
+        return report
+
+
+async def scan_all_orgs(
+    full: bool = False,
+    session_factory: async_sessionmaker | None = None,
+) -> dict:
+    """Scanner toutes les organisations actives (beat horaire incremental,
+    rescan complet quotidien avec full=True).
+
+    Orgs scannees en parallele (fenetre lead_engine_scan_concurrency), chacune
+    dans sa session et sous budget lead_engine_org_scan_timeout_seconds : un
+    gros tenant ne retarde plus les autres, un echec reste local a son org.
+
+    Retourne les totaux + `per_org` (duree, statut, signaux crees par org,
+    plus lentes d'abord).
+    """
+    session_factory = session_factory or task_session_maker
+    async with session_factory() as db:
+        org_ids = (
+            await db.execute(select(Organization.id).where(Organization.is_active.is_(True)))
+        ).scalars().all()
+
+    semaphore = asyncio.Semaphore(max(1, settings.lead_engine_scan_concurrency))
+    started = time.perf_counter()
+    reports = await asyncio.gather(
+        *(_scan_org_isolated(session_factory, semaphore, org_id, full) for org_id in org_ids)
+    )
+    reports.sort(key=lambda r: r["duration_ms"], reverse=True)
+
+    totals: dict = {
+        "funding_detected": 0, "mmf_gap": 0, "inbound_new": 0,
+        "orgs": len(org_ids), "orgs_failed": 0, "orgs_timed_out": 0,
+    }
+    for report in reports:
+        if report["status"] == "error":
+            totals["orgs_failed"] += 1
+        elif report["status"] == "timeout":
+            totals["orgs_timed_out"] += 1
+        for signal_type in ("funding_detected", "mmf_gap", "inbound_new"):
+            totals[signal_type] += report.get(signal_type, 0)
+    totals["duration_ms"] = int((time.perf_counter() - started) * 1000)
+    totals["per_org"] = reports
     return totals
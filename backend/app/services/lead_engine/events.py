@@ -0,0 +1,195 @@
+# =============================================================================
+# FGA CRM - Lead Engine : evenements metier (outbox) et detection sur ecriture
+# =============================================================================
+"""Detection des signaux Lead Engine sur ecriture (outbox transactionnelle).
+
+Emission : un hook ``before_flush`` de session ecrit un LeadEvent dans la MEME
+transaction que la donnee qui le declenche :
+- ``funding_updated`` : societe creee avec une levee, ou champs funding_* /
+  lien SR modifies (detecteur funding) ;
+- ``audit_recorded`` : activite type=audit ecrite sur une societe (mmf) ;
+- ``inbound_contact`` : contact entrant nomo-ia / plein-phare ecrit (inbound).
+
+Transaction annulee = evenement annule ; commit = evenement garanti. Apres le
+commit, la task lead_engine_process_events_task est publiee hors event loop
+(thread, sans retry) ; broker KO : le drain beat (minute) la reprend —
+l'evenement est en base.
+
+Consommation (process_lead_events) : evenements pending regroupes par org et
+detecteur, detecteurs reevalues sur les SEULES cibles concernees (memes
+garde-fous : dedup temporelle, societe en pipeline). Un signal chaud apparait
+en secondes ; le scan horaire devient un filet de rattrapage.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.config import settings
+from app.models.activity import Activity
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.lead_engine import LEAD_EVENT_DETECTORS, LeadEvent
+from app.services.lead_engine.detector import (
+    _DETECTORS,
+    _SIGNAL_TYPES,
+    INBOUND_CONTACT_SOURCES,
+    _lock_org_detection,
+)
+
+logger = logging.getLogger(__name__)
+
+# Drapeau de session : evenements emis dans la transaction courante
+_PENDING_KEY = "lead_events_pending"
+
+# Champs de Company qui conditionnent le detecteur funding
+_FUNDING_FIELDS = ("funding_date", "funding_amount", "funding_series", "startup_radar_id")
+
+
+def _changed(obj, fields: tuple[str, ...]) -> bool:
+    return any(get_history(obj, field).has_changes() for field in fields)
+
+
+def _collect(session: Session) -> set[tuple[uuid.UUID, str, uuid.UUID]]:
+    """(org, type, cible) des evenements declenches par les ecritures a flusher."""
+    found: set[tuple[uuid.UUID, str, uuid.UUID]] = set()
+    for obj in (*session.new, *session.dirty):
+        is_new = obj in session.new
+        if isinstance(obj, Company):
+            if obj.funding_date is not None and (is_new or _changed(obj, _FUNDING_FIELDS)):
+                found.add((obj.organization_id, "funding_updated", obj))
+        elif isinstance(obj, Activity):
+            if obj.type == "audit" and obj.company_id is not None and (
+                is_new or _changed(obj, ("metadata_", "company_id"))
+            ):
+                found.add((obj.organization_id, "audit_recorded", obj.company_id))
+        elif isinstance(obj, Contact) and obj.source in INBOUND_CONTACT_SOURCES and (
+            is_new or _changed(obj, ("source",))
+        ):
+            found.add((obj.organization_id, "inbound_contact", obj))
+    return found
+
+
+@event.listens_for(Session, "before_flush")
+def _record_lead_events(session: Session, _flush_context, _instances) -> None:
+    """Ecrire les LeadEvent dans la transaction du flush (outbox)."""
+    if not (settings.lead_engine_enabled and settings.lead_engine_events_enabled):
+        return
+    for org_id, event_type, target in _collect(session):
+        if org_id is None:
+            continue
+        if isinstance(target, Company | Contact):
+            # Cible creee dans ce flush : id pose ici (meme defaut que UUIDMixin)
+            if target.id is None:
+                target.id = uuid.uuid4()
+            target = target.id
+        is_company = event_type != "inbound_contact"
+        session.add(LeadEvent(
+            organization_id=org_id,
+            event_type=event_type,
+            company_id=target if is_company else None,
+            contact_id=None if is_company else target,
+        ))
+        session.info[_PENDING_KEY] = True
+
+
+def _publish_consumer() -> None:
+    """Publication du consumer, sans retry : broker KO -> le drain beat reprendra."""
+    from app.tasks.lead_engine import lead_engine_process_events_task
+
+    try:
+        lead_engine_process_events_task.apply_async(retry=False)
+    except Exception:  # noqa: BLE001
+        logger.warning("[LeadEngine] Envoi en file du consumer d'evenements KO (drain beat)")
+
+
+def _enqueue_consumer() -> None:
+    """Planifie le consumer sans bloquer l'event loop (publication dans un thread)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # session synchrone hors event loop
+        _publish_consumer()
+        return
+    loop.run_in_executor(None, _publish_consumer)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        _enqueue_consumer()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    # Transaction racine annulee : ses evenements aussi, rien a planifier
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+async def process_lead_events(db: AsyncSession, limit: int | None = None) -> dict[str, int]:
+    """Consommer les evenements pending (commit inclus).
+
+    Les evenements sont reserves (FOR UPDATE SKIP LOCKED : deux consumers ne
+    traitent jamais le meme), regroupes par org et detecteur puis evalues une
+    fois par cible, sous le verrou de detection de l'org (tenu jusqu'au commit :
+    pas de doublon avec le scan ou un autre consumer). Org en echec : ses
+    evenements restent pending (tentative +1) puis passent failed — le scan
+    horaire les rattrape. Evenements traites supprimes.
+    """
+    events = (
+        await db.execute(
+            select(LeadEvent)
+            .where(LeadEvent.status == "pending")
+            .order_by(LeadEvent.created_at)
+            .limit(limit or settings.lead_engine_event_batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    ).scalars().all()
+    created = dict.fromkeys(_SIGNAL_TYPES.values(), 0)
+    created["events"] = len(events)
+    if not events:
+        return created
+
+    targets: dict[uuid.UUID, dict[str, set[uuid.UUID]]] = defaultdict(lambda: defaultdict(set))
+    for ev in events:
+        target = ev.contact_id if ev.event_type == "inbound_contact" else ev.company_id
+        if ev.event_type in LEAD_EVENT_DETECTORS and target is not None:
+            targets[ev.organization_id][LEAD_EVENT_DETECTORS[ev.event_type]].add(target)
+
+    failed: dict[uuid.UUID, str] = {}
+    # Orgs verrouillees dans un ordre stable (pas d'interblocage entre consumers)
+    for org_id, by_detector in sorted(targets.items()):
+        try:
+            async with db.begin_nested():
+                await _lock_org_detection(db, org_id)
+                for detector, ids in by_detector.items():
+                    created[_SIGNAL_TYPES[detector]] += await _DETECTORS[detector](
+                        db, org_id, targets=ids,
+                    )
+        except Exception as e:  # noqa: BLE001 — une org en echec ne bloque pas les autres
+            logger.exception("[LeadEngine] Evenements org %s en echec", org_id)
+            failed[org_id] = str(e)[:500]
+
+    done = [ev.id for ev in events if ev.organization_id not in failed]
+    for ev in events:
+        if ev.organization_id in failed:
+            ev.attempts += 1
+            ev.error = failed[ev.organization_id]
+            if ev.attempts >= settings.lead_engine_event_max_attempts:
+                ev.status = "failed"
+    if done:
+        await db.execute(delete(LeadEvent).where(LeadEvent.id.in_(done)))
+    await db.commit()
+
+    if any(v for k, v in created.items() if k != "events"):
+        logger.info(
+            "[LeadEngine] %d evenement(s) : %d funding_detected, %d mmf_gap, %d inbound_new",
+            len(events), created["funding_detected"], created["mmf_gap"], created["inbound_new"],
+        )
+    return created
@@ -3,11 +3,16 @@
 # Client async pour l'API Startup Radar (veille startups)
 # =============================================================================
 
+import asyncio
 import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
 
 import httpx
 
 from app.config import settings
+from app.services import startup_radar_token as token_store
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +20,9 @@ logger = logging.getLogger(__name__)
 SR_TIMEOUT = 30.0
 # Taille de page max pour les listes SR
 SR_PAGE_SIZE = 200
+# Retry par requete GET (reseau, 429, 5xx) : backoff exponentiel
+SR_RETRY_BACKOFF = 0.5
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 
 class StartupRadarError(Exception):
@@ -25,26 +33,95 @@ class StartupRadarConflict(StartupRadarError):
     """Un audit/operation est deja en cours cote SR (HTTP 409)."""
 
 
+class _RateLimiter:
+    """Plafond de debit : espace les departs de requetes d'au moins 1/rate s."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
 class StartupRadarClient:
-    """Client HTTP async pour l'API Startup Radar."""
+    """Client HTTP async pour l'API Startup Radar.
+
+    Utilise en `async with` (syncs), toutes les requetes partagent un pool de
+    connexions ; hors contexte, chaque requete ouvre son client (appels
+    ponctuels des endpoints). Les listes paginees sont lues par fenetre
+    concurrente bornee (startup_radar_page_concurrency), sous plafond de debit
+    (startup_radar_max_rps).
+
+    Token partage (startup_radar_token) : authenticate() reprend le token en
+    cache Redis s'il est valide (pas de login) ; un 401 retire le token rejete
+    et se re-authentifie une fois avant de rejouer la requete.
+    """
 
     def __init__(
         self,
         base_url: str | None = None,
         email: str | None = None,
         password: str | None = None,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+        page_concurrency: int | None = None,
+        max_rps: float | None = None,
     ):
         self.base_url = (base_url or settings.startup_radar_api_url).rstrip("/")
         self.email = email or settings.startup_radar_email
         self.password = password or settings.startup_radar_password
         self._token: str | None = None
+        # Un seul refresh a la fois sur ce client (pages paralleles en 401)
+        self._auth_lock = asyncio.Lock()
+        self._transport = transport
+        self.page_concurrency = max(1, page_concurrency or settings.startup_radar_page_concurrency)
+        self._limiter = _RateLimiter(
+            settings.startup_radar_max_rps if max_rps is None else max_rps
+        )
+        self._http: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> "StartupRadarClient":
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=SR_TIMEOUT,
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=self.page_concurrency,
+                    max_keepalive_connections=self.page_concurrency,
+                ),
+            )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
     # ------------------------------------------------------------------
     # Auth
     # ------------------------------------------------------------------
 
+    @property
+    def _token_key(self) -> str:
+        return token_store.credentials_key(self.base_url, self.email, self.password)
+
     async def authenticate(self) -> str | None:
-        """Authentification via POST /auth/login (form-urlencoded) → JWT.
+        """Token SR : cache partage (Redis) s'il est valide, sinon POST /auth/login.
+
+        Single-flight : si un autre process se re-authentifie deja (verrou),
+        on attend le token qu'il publie plutot que de refaire le login.
 
         Si les credentials ne sont pas configures ou si l'auth echoue (ex: AUTH_DISABLED
         cote SR), on continue sans token — les requetes passent en mode anonyme.
@@ -52,13 +129,32 @@ class StartupRadarClient:
         if not self.email or not self.password:
             logger.info("[StartupRadar] Pas de credentials — mode anonyme")
             return None
-
+        if not settings.startup_radar_token_cache_enabled:
+            return await self._login()
+
+        key = self._token_key
+        cached = await token_store.get_token(key)
+        if cached:
+            self._token = cached
+            return cached
+        if await token_store.acquire_refresh_lock(key):
+            try:
+                return await self._login()
+            finally:
+                await token_store.release_refresh_lock(key)
+        shared = await token_store.wait_for_token(key)
+        if shared:
+            self._token = shared
+            return shared
+        return await self._login()
+
+    async def _login(self) -> str | None:
+        """POST /auth/login (form-urlencoded) → JWT, publie dans le cache partage."""
         try:
-            async with httpx.AsyncClient(timeout=SR_TIMEOUT) as client:
-                resp = await client.post(
-                    f"{self.base_url}/auth/login",
-                    data={"username": self.email, "password": self.password},
-                )
+            resp = await self._request(
+                "POST", "/auth/login",
+                data={"username": self.email, "password": self.password},
+            )
 
             if resp.status_code != 200:
                 logger.warning(
@@ -70,12 +166,32 @@ class StartupRadarClient:
             data = resp.json()
             self._token = data["access_token"]
             logger.info("[StartupRadar] Authentification reussie")
+            if settings.startup_radar_token_cache_enabled:
+                await token_store.store_token(
+                    self._token_key, self._token, token_store.token_expiry(data, self._token),
+                )
             return self._token
 
         except httpx.HTTPError as e:
             logger.warning("[StartupRadar] Auth erreur réseau (%s) — fallback mode anonyme", e)
             return None
 
+    async def _reauthenticate(self, stale: str | None) -> bool:
+        """Apres un 401 : retirer le token rejete et en obtenir un nouveau.
+
+        Plusieurs requetes concurrentes en 401 : la premiere renouvelle, les
+        suivantes reutilisent son token. False si pas de nouveau token.
+        """
+        if not self.email or not self.password:
+            return False
+        async with self._auth_lock:
+            if self._token and self._token != stale:
+                return True
+            if stale and settings.startup_radar_token_cache_enabled:
+                await token_store.invalidate_token(self._token_key, stale)
+            self._token = None
+            return await self.authenticate() is not None
+
     def _headers(self) -> dict[str, str]:
         """Headers avec le token JWT (vide si mode anonyme)."""
         if not self._token:
@@ -86,14 +202,23 @@ class StartupRadarClient:
     # Requetes generiques
     # ------------------------------------------------------------------
 
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Une requete SR (pool si ouvert, sinon client ponctuel), sous plafond de debit."""
+        await self._limiter.wait()
+        url = f"{self.base_url}{path}"
+        if self._http is not None:
+            return await self._http.request(method, url, **kwargs)
+        async with httpx.AsyncClient(timeout=SR_TIMEOUT, transport=self._transport) as client:
+            return await client.request(method, url, **kwargs)
+
     async def _get(self, path: str, params: dict | None = None) -> dict | list | None:
-        """GET generique avec gestion d'erreur."""
-        async with httpx.AsyncClient(timeout=SR_TIMEOUT) as client:
-            resp = await client.get(
-                f"{self.base_url}{path}",
-                headers=self._headers(),
-                params=params,
-            )
+        """GET generique avec gestion d'erreur. Retry (reseau, 429, 5xx) avec
+        backoff exponentiel : une page en echec est retentee seule. 401 : token
+        renouvele puis requete rejouee une fois."""
+        stale = self._token
+        resp = await self._get_with_retries(path, params)
+        if resp.status_code == 401 and await self._reauthenticate(stale):
+            resp = await self._get_with_retries(path, params)
 
         if resp.status_code == 404:
             return None
@@ -105,24 +230,65 @@ class StartupRadarClient:
 
         return resp.json()
 
-    async def _get_all_pages(self, path: str, size: int = SR_PAGE_SIZE) -> list[dict]:
-        """Recuperer toutes les pages d'un endpoint pagine."""
-        all_items: list[dict] = []
-        page = 1
+    async def _get_with_retries(self, path: str, params: dict | None) -> httpx.Response:
+        retries = max(0, settings.startup_radar_max_retries)
+        for attempt in range(retries + 1):
+            try:
+                resp = await self._request(
+                    "GET", path, headers=self._headers(), params=params,
+                )
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise StartupRadarError(f"Erreur SR GET {path}: {e}") from e
+            else:
+                if resp.status_code not in _RETRY_STATUSES or attempt == retries:
+                    break
+            await asyncio.sleep(SR_RETRY_BACKOFF * 2**attempt)
+        return resp
+
+    async def iter_pages(
+        self, path: str, size: int = SR_PAGE_SIZE, start_page: int = 1,
+    ) -> AsyncIterator[tuple[int, int, list[dict]]]:
+        """Flux ordonne des pages d'un endpoint pagine : (page, total_pages, items).
+
+        La page `start_page` donne le nombre de pages ; les suivantes sont lues
+        en avance par fenetre glissante (page_concurrency requetes en vol) : la
+        memoire est bornee a page_concurrency + 1 pages quel que soit le
+        catalogue, le consommateur traite une page pendant que les suivantes
+        arrivent. Une page absente (404) termine le flux, une page en echec
+        (retries epuises) leve StartupRadarError et abandonne les autres.
+        """
+        first = await self._get(path, params={"page": start_page, "size": size})
+        if first is None:
+            return
+        total_pages = first.get("pages", 1) or 1
+        yield start_page, total_pages, first.get("items", [])
 
-        while True:
+        async def _page(page: int) -> list[dict] | None:
             data = await self._get(path, params={"page": page, "size": size})
-            if data is None:
-                break
-
-            items = data.get("items", [])
-            all_items.extend(items)
+            return None if data is None else data.get("items", [])
 
-            total_pages = data.get("pages", 1)
-            if page >= total_pages:
-                break
-            page += 1
+        window: deque[tuple[int, asyncio.Task]] = deque()
+        next_page = start_page + 1
+        try:
+            while window or next_page <= total_pages:
+                while next_page <= total_pages and len(window) < self.page_concurrency:
+                    window.append((next_page, asyncio.create_task(_page(next_page))))
+                    next_page += 1
+                page, task = window.popleft()
+                items = await task
+                if items is None:
+                    break
+                yield page, total_pages, items
+        finally:
+            for _, task in window:
+                task.cancel()
 
+    async def _get_all_pages(self, path: str, size: int = SR_PAGE_SIZE) -> list[dict]:
+        """Recuperer toutes les pages d'un endpoint pagine (cf. iter_pages)."""
+        all_items: list[dict] = []
+        async for _, _, items in self.iter_pages(path, size):
+            all_items.extend(items)
         return all_items
 
     # ------------------------------------------------------------------
@@ -160,10 +326,13 @@ class StartupRadarClient:
         Leve StartupRadarConflict si un audit tourne deja (SR 409),
         StartupRadarError sinon.
         """
-        async with httpx.AsyncClient(timeout=SR_TIMEOUT) as client:
-            resp = await client.post(
-                f"{self.base_url}/analysis/diagnostic/{startup_id}",
-                headers=self._headers(),
+        stale = self._token
+        resp = await self._request(
+            "POST", f"/analysis/diagnostic/{startup_id}", headers=self._headers(),
+        )
+        if resp.status_code == 401 and await self._reauthenticate(stale):
+            resp = await self._request(
+                "POST", f"/analysis/diagnostic/{startup_id}", headers=self._headers(),
             )
 
         if resp.status_code == 409:
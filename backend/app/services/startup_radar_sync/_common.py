@@ -1,8 +1,10 @@
 # =============================================================================
 # FGA CRM - Startup Radar Sync : helpers communs
-# SyncResult + parsing/formatage + fusion des resultats partiels
+# SyncResult + parsing/formatage + fusion des resultats partiels + empreintes
 # =============================================================================
 
+import hashlib
+import json
 from dataclasses import dataclass, field
 from datetime import date
 
@@ -13,17 +15,54 @@ class SyncResult:
 
     companies_created: int = 0
     companies_updated: int = 0
+    companies_unchanged: int = 0
     contacts_created: int = 0
     contacts_updated: int = 0
+    contacts_unchanged: int = 0
     investors_created: int = 0
     investors_updated: int = 0
+    investors_unchanged: int = 0
     audits_created: int = 0
     # Funding multi-source (Phase B 2026-05)
     funding_activities_created: int = 0
     qualification_tasks_created: int = 0
+    # Phase audits : appels SR emis et duree (ms)
+    audits_api_calls: int = 0
+    audits_duration_ms: int = 0
     errors: list[str] = field(default_factory=list)
 
 
+# ---------------------------------------------------------------------------
+# Empreintes de contenu (sync delta)
+# ---------------------------------------------------------------------------
+
+# Champs SR lus par la sync, par entite : un changement hors de ces champs ne
+# change rien cote CRM. A incrementer si le mapping change (reecriture complete).
+_HASH_VERSION = 1
+STARTUP_HASH_FIELDS = (
+    "id", "name", "website", "sector", "description", "strategy", "amount", "series",
+    "status", "siren", "funding_date", "source_names", "source_urls", "investors",
+)
+INVESTOR_HASH_FIELDS = ("id", "name", "website", "startups_count", "total_funding_amount")
+CONTACT_HASH_FIELDS = (
+    "id", "first_name", "last_name", "email", "email_status", "title", "linkedin_url",
+    "is_decision_maker", "startup_id", "enrichment_source", "email_pattern_used",
+    "linkedin_url_status",
+)
+
+
+def _content_hash(payload: dict, fields: tuple[str, ...], **extra) -> str:
+    """Empreinte (blake2b 128 bits, hex) de la projection `fields` du payload SR.
+
+    `extra` : valeurs resolues cote CRM qui conditionnent aussi l'ecriture (ex :
+    company_id d'un contact, None tant que sa startup n'est pas synchronisee).
+    """
+    projection = {name: payload.get(name) for name in fields}
+    projection.update(extra)
+    raw = json.dumps([_HASH_VERSION, projection], sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
 # ---------------------------------------------------------------------------
 # Helpers funding (Phase B 2026-05)
 # ---------------------------------------------------------------------------
@@ -58,11 +97,16 @@ def _merge_results(total: SyncResult, partial: SyncResult) -> None:
     """Fusionner un resultat partiel dans le total."""
     total.companies_created += partial.companies_created
     total.companies_updated += partial.companies_updated
+    total.companies_unchanged += partial.companies_unchanged
     total.contacts_created += partial.contacts_created
     total.contacts_updated += partial.contacts_updated
+    total.contacts_unchanged += partial.contacts_unchanged
     total.investors_created += partial.investors_created
     total.investors_updated += partial.investors_updated
+    total.investors_unchanged += partial.investors_unchanged
     total.audits_created += partial.audits_created
     total.funding_activities_created += partial.funding_activities_created
     total.qualification_tasks_created += partial.qualification_tasks_created
+    total.audits_api_calls += partial.audits_api_calls
+    total.audits_duration_ms += partial.audits_duration_ms
     total.errors.extend(partial.errors)
@@ -3,12 +3,16 @@
 # sync_audits (messaging + detaille + GEO → Activities type=audit)
 # =============================================================================
 
+import asyncio
 import logging
+import time
 import uuid
+from dataclasses import dataclass, field
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.activity import Activity
 from app.models.user import User
 from app.services.startup_radar import StartupRadarClient
@@ -18,6 +22,96 @@ from ._common import SyncResult
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _StartupAudits:
+    """Reponses SR d'une startup (None = absent, deja importe ou en erreur)."""
+
+    analysis: dict | None = None
+    audit: dict | None = None
+    presentation: dict | None = None
+    geo: dict | None = None
+    api_calls: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def _subjects(startup_name: str) -> tuple[str, str, str]:
+    return (
+        f"Audit messaging: {startup_name}",
+        f"Audit detaille: {startup_name}",
+        f"Audit GEO: {startup_name}",
+    )
+
+
+async def _fetch_startup_audits(
+    client: StartupRadarClient, sr_id: str, startup_name: str, wanted: tuple[bool, bool, bool],
+) -> _StartupAudits:
+    """Lit les audits SR d'une startup, uniquement ceux pas encore importes."""
+    want_analysis, want_audit, want_geo = wanted
+    fetched = _StartupAudits()
+
+    if want_analysis:
+        try:
+            fetched.api_calls += 1
+            fetched.analysis = await client.get_analysis(sr_id)
+        except Exception as e:
+            fetched.errors.append(f"Analysis {startup_name}: {e}")
+
+    if want_audit:
+        try:
+            fetched.api_calls += 1
+            fetched.audit = await client.get_detailed_audit(sr_id)
+        except Exception as e:
+            fetched.errors.append(f"DetailedAudit {startup_name}: {e}")
+        audit = fetched.audit
+        if audit and audit.get("status") == "completed" and audit.get("result"):
+            # Recuperer le lien de presentation commerciale
+            try:
+                fetched.api_calls += 1
+                fetched.presentation = await client.get_presentation(sr_id)
+            except Exception as e:
+                logger.debug("Echec recuperation presentation %s: %s", sr_id, e)
+
+    if want_geo:
+        try:
+            fetched.api_calls += 1
+            fetched.geo = await client.get_geo_audit(sr_id)
+        except Exception as e:
+            fetched.errors.append(f"GeoAudit {startup_name}: {e}")
+
+    return fetched
+
+
+async def _write_audits(db: AsyncSession, rows: list[tuple[str, dict]], errors: list[str]) -> int:
+    """Ecrit les Activities d'audit, retourne le nombre ecrit.
+
+    Un flush pour le lot ; lot en echec (valeur invalide, NUL dans un texte
+    SR...) : rejoue ligne a ligne dans un savepoint chacune, l'erreur est
+    rattachee a l'audit sans interrompre la sync.
+    """
+    if not rows:
+        return 0
+    try:
+        async with db.begin_nested():
+            db.add_all(Activity(**values) for _, values in rows)
+            await db.flush()
+    except Exception as e:
+        logger.warning("[SRSync] Lot de %d audits en echec (%s), rejeu ligne a ligne", len(rows), e)
+    else:
+        return len(rows)
+
+    written = 0
+    for label, values in rows:
+        try:
+            async with db.begin_nested():
+                db.add(Activity(**values))
+                await db.flush()
+        except Exception as e:
+            errors.append(f"{label}: {e}")
+        else:
+            written += 1
+    return written
+
+
 async def sync_audits(
     db: AsyncSession,
     client: StartupRadarClient,
@@ -28,181 +122,182 @@ async def sync_audits(
 ) -> SyncResult:
     """Synchroniser les analyses/audits SR en Activities CRM (type=audit).
 
-    startups : liste des startups SR (pour le nom + id).
+    startups : liste des startups SR (pour le nom + id) — celle de la phase
+    startups, pas de nouvel appel.
 
     Toutes les Activities creees sont taggees `organization_id` et les recherches
     d'idempotence sont scopees a cette org (isolation multi-tenant).
+
+    Perf : les subjects d'audit deja importes sont pre-charges en UNE requete
+    (plus de SELECT par audit, et pas d'appel SR pour un audit deja importe) ;
+    les audits sont lus en parallele (fenetre startup_radar_audit_concurrency
+    startups), les ecritures restent sequentielles (session unique).
     """
     result = SyncResult()
+    started = time.perf_counter()
 
-    for s in startups:
-        sr_id = str(s.get("id", ""))
-        company_id = sr_to_crm.get(sr_id)
-        if not company_id:
-            continue
+    targets = [
+        (str(s.get("id", "")), s.get("name", "Startup"))
+        for s in startups
+        if sr_to_crm.get(str(s.get("id", "")))
+    ]
 
-        startup_name = s.get("name", "Startup")
-
-        # --- Analyse messaging ---
-        try:
-            analysis = await client.get_analysis(sr_id)
-            if analysis and analysis.get("positioning"):
-                subject = f"Audit messaging: {startup_name}"
-                async with db.begin_nested():
-                    # Verifier si deja importe (par subject unique, scopee org)
-                    stmt = select(Activity).where(
-                        Activity.company_id == company_id,
+    # --- Pre-fetch : (company_id, subject) des audits deja importes (scopee org) ---
+    company_ids = {sr_to_crm[sr_id] for sr_id, _ in targets}
+    seen: set[tuple[uuid.UUID, str]] = set()
+    if company_ids:
+        seen = set(
+            (
+                await db.execute(
+                    select(Activity.company_id, Activity.subject).where(
                         Activity.type == "audit",
-                        Activity.subject == subject,
                         Activity.organization_id == organization_id,
+                        Activity.company_id.in_(company_ids),
                     )
-                    existing = (await db.execute(stmt)).scalar_one_or_none()
-
-                    if not existing:
-                        metadata = {
-                            "audit_type": "messaging",
-                            "source": "startup_radar",
-                            "positioning": analysis.get("positioning"),
-                            "value_proposition": analysis.get("value_proposition"),
-                            "messaging_score": analysis.get("messaging_score"),
-                            "differentiators": analysis.get("differentiators"),
-                            "target_audience": analysis.get("target_audience"),
-                            "strengths": analysis.get("strengths"),
-                            "weaknesses": analysis.get("weaknesses"),
-                            "recommendations": analysis.get("recommendations"),
-                        }
-                        activity = Activity(
-                            id=uuid.uuid4(),
-                            type="audit",
-                            subject=subject,
-                            content=analysis.get("value_proposition"),
-                            metadata_=metadata,
-                            company_id=company_id,
-                            user_id=user.id,
-                            organization_id=organization_id,
-                        )
-                        db.add(activity)
-                        result.audits_created += 1
+                )
+            ).tuples().all()
+        )
+
+    semaphore = asyncio.Semaphore(max(1, settings.startup_radar_audit_concurrency))
+
+    async def _fetch(sr_id: str, startup_name: str) -> _StartupAudits:
+        company_id = sr_to_crm[sr_id]
+        wanted = tuple((company_id, subject) not in seen for subject in _subjects(startup_name))
+        if not any(wanted):
+            return _StartupAudits()
+        async with semaphore:
+            return await _fetch_startup_audits(client, sr_id, startup_name, wanted)
 
+    fetched_all = await asyncio.gather(*(_fetch(sr_id, name) for sr_id, name in targets))
+
+    # (libelle d'erreur, valeurs) des Activities a ecrire
+    rows: list[tuple[str, dict]] = []
+
+    def _add(
+        label: str, company_id: uuid.UUID, subject: str, content: str | None, metadata: dict,
+    ) -> None:
+        # Dedup intra-batch : deux startups SR liees a la meme company CRM
+        if (company_id, subject) in seen:
+            return
+        seen.add((company_id, subject))
+        rows.append((label, {
+            "id": uuid.uuid4(),
+            "type": "audit",
+            "subject": subject,
+            "content": content,
+            "metadata_": metadata,
+            "company_id": company_id,
+            "user_id": user.id,
+            "organization_id": organization_id,
+        }))
+
+    for (sr_id, startup_name), fetched in zip(targets, fetched_all, strict=True):
+        company_id = sr_to_crm[sr_id]
+        result.audits_api_calls += fetched.api_calls
+        result.errors.extend(fetched.errors)
+        messaging_subject, detailed_subject, geo_subject = _subjects(startup_name)
+
+        # --- Analyse messaging ---
+        try:
+            analysis = fetched.analysis
+            if analysis and analysis.get("positioning"):
+                metadata = {
+                    "audit_type": "messaging",
+                    "source": "startup_radar",
+                    "positioning": analysis.get("positioning"),
+                    "value_proposition": analysis.get("value_proposition"),
+                    "messaging_score": analysis.get("messaging_score"),
+                    "differentiators": analysis.get("differentiators"),
+                    "target_audience": analysis.get("target_audience"),
+                    "strengths": analysis.get("strengths"),
+                    "weaknesses": analysis.get("weaknesses"),
+                    "recommendations": analysis.get("recommendations"),
+                }
+                _add(
+                    f"Analysis {startup_name}", company_id, messaging_subject,
+                    analysis.get("value_proposition"), metadata,
+                )
         except Exception as e:
             result.errors.append(f"Analysis {startup_name}: {e}")
 
         # --- Audit detaille ---
         try:
-            audit = await client.get_detailed_audit(sr_id)
+            audit = fetched.audit
             if audit and audit.get("status") == "completed" and audit.get("result"):
-                subject = f"Audit detaille: {startup_name}"
-                async with db.begin_nested():
-                    stmt = select(Activity).where(
-                        Activity.company_id == company_id,
-                        Activity.type == "audit",
-                        Activity.subject == subject,
-                        Activity.organization_id == organization_id,
-                    )
-                    existing = (await db.execute(stmt)).scalar_one_or_none()
-
-                    if not existing:
-                        audit_result = audit["result"]
-                        exec_summary = audit_result.get("executive_summary", {})
-                        scoring = audit_result.get("scoring", {})
-
-                        metadata = {
-                            "audit_type": "detailed",
-                            "source": "startup_radar",
-                            "total_score": exec_summary.get("total_score"),
-                            "score_interpretation": exec_summary.get("score_interpretation"),
-                            "key_findings": exec_summary.get("key_findings"),
-                            "top_priority": exec_summary.get("top_priority"),
-                            "scoring": scoring,
-                            "gaps_count": exec_summary.get("gaps_count"),
-                            "recommendations_count": exec_summary.get("recommendations_count"),
-                        }
-
-                        # Stocker le rapport markdown complet dans content
-                        full_report = audit_result.get("full_report", "")
-
-                        # URLs de telechargement (MD/DOCX) — toujours disponibles si audit existe
-                        try:
-                            md_url, docx_url = client.get_detailed_audit_file_urls(sr_id)
-                            metadata["file_md_url"] = md_url
-                            metadata["file_docx_url"] = docx_url
-                        except Exception as e:
-                            logger.debug("Echec recuperation fichiers audit %s: %s", sr_id, e)
-
-                        # Recuperer le lien de presentation commerciale
-                        try:
-                            pres = await client.get_presentation(sr_id)
-                            if pres:
-                                metadata["presentation_slug"] = pres.get("slug")
-                                metadata["presentation_url"] = pres.get("public_url")
-                                metadata["radar_axes"] = pres.get("radar_axes")
-                        except Exception as e:
-                            logger.debug("Echec recuperation presentation %s: %s", sr_id, e)
-
-                        activity = Activity(
-                            id=uuid.uuid4(),
-                            type="audit",
-                            subject=subject,
-                            content=full_report or exec_summary.get("score_interpretation"),
-                            metadata_=metadata,
-                            company_id=company_id,
-                            user_id=user.id,
-                            organization_id=organization_id,
-                        )
-                        db.add(activity)
-                        result.audits_created += 1
+                audit_result = audit["result"]
+                exec_summary = audit_result.get("executive_summary", {})
+                scoring = audit_result.get("scoring", {})
+
+                metadata = {
+                    "audit_type": "detailed",
+                    "source": "startup_radar",
+                    "total_score": exec_summary.get("total_score"),
+                    "score_interpretation": exec_summary.get("score_interpretation"),
+                    "key_findings": exec_summary.get("key_findings"),
+                    "top_priority": exec_summary.get("top_priority"),
+                    "scoring": scoring,
+                    "gaps_count": exec_summary.get("gaps_count"),
+                    "recommendations_count": exec_summary.get("recommendations_count"),
+                }
+
+                # Stocker le rapport markdown complet dans content
+                full_report = audit_result.get("full_report", "")
 
+                # URLs de telechargement (MD/DOCX) — toujours disponibles si audit existe
+                try:
+                    md_url, docx_url = client.get_detailed_audit_file_urls(sr_id)
+                    metadata["file_md_url"] = md_url
+                    metadata["file_docx_url"] = docx_url
+                except Exception as e:
+                    logger.debug("Echec recuperation fichiers audit %s: %s", sr_id, e)
+
+                pres = fetched.presentation
+                if pres:
+                    metadata["presentation_slug"] = pres.get("slug")
+                    metadata["presentation_url"] = pres.get("public_url")
+                    metadata["radar_axes"] = pres.get("radar_axes")
+
+                _add(
+                    f"DetailedAudit {startup_name}", company_id, detailed_subject,
+                    full_report or exec_summary.get("score_interpretation"), metadata,
+                )
         except Exception as e:
             result.errors.append(f"DetailedAudit {startup_name}: {e}")
 
         # --- Audit GEO ---
         try:
-            geo = await client.get_geo_audit(sr_id)
+            geo = fetched.geo
             if geo and geo.get("status") == "completed" and geo.get("result"):
-                subject = f"Audit GEO: {startup_name}"
-                async with db.begin_nested():
-                    stmt = select(Activity).where(
-                        Activity.company_id == company_id,
-                        Activity.type == "audit",
-                        Activity.subject == subject,
-                        Activity.organization_id == organization_id,
-                    )
-                    existing = (await db.execute(stmt)).scalar_one_or_none()
-
-                    if not existing:
-                        geo_result = geo["result"]
-                        metadata = {
-                            "audit_type": "geo",
-                            "source": "startup_radar",
-                            "total_score": geo_result.get("total_score"),
-                            "grade": geo_result.get("grade"),
-                            "summary": geo_result.get("summary"),
-                            "content_clarity": geo_result.get("content_clarity"),
-                            "semantic_html": geo_result.get("semantic_html"),
-                            "schema_org": geo_result.get("schema_org"),
-                            "crawl_directives": geo_result.get("crawl_directives"),
-                            "agent_comprehension": geo_result.get("agent_comprehension"),
-                            "priority_actions": geo_result.get("priority_actions"),
-                        }
-                        # Rapport markdown complet dans content
-                        full_report = geo_result.get("full_report", "")
-
-                        activity = Activity(
-                            id=uuid.uuid4(),
-                            type="audit",
-                            subject=subject,
-                            content=full_report or geo_result.get("summary"),
-                            metadata_=metadata,
-                            company_id=company_id,
-                            user_id=user.id,
-                            organization_id=organization_id,
-                        )
-                        db.add(activity)
-                        result.audits_created += 1
-
+                geo_result = geo["result"]
+                metadata = {
+                    "audit_type": "geo",
+                    "source": "startup_radar",
+                    "total_score": geo_result.get("total_score"),
+                    "grade": geo_result.get("grade"),
+                    "summary": geo_result.get("summary"),
+                    "content_clarity": geo_result.get("content_clarity"),
+                    "semantic_html": geo_result.get("semantic_html"),
+                    "schema_org": geo_result.get("schema_org"),
+                    "crawl_directives": geo_result.get("crawl_directives"),
+                    "agent_comprehension": geo_result.get("agent_comprehension"),
+                    "priority_actions": geo_result.get("priority_actions"),
+                }
+                # Rapport markdown complet dans content
+                full_report = geo_result.get("full_report", "")
+                _add(
+                    f"GeoAudit {startup_name}", company_id, geo_subject,
+                    full_report or geo_result.get("summary"), metadata,
+                )
         except Exception as e:
             result.errors.append(f"GeoAudit {startup_name}: {e}")
 
-    await db.flush()
-    logger.info("[SRSync] Audits: %d crees", result.audits_created)
+    result.audits_created = await _write_audits(db, rows, result.errors)
+    result.audits_duration_ms = round((time.perf_counter() - started) * 1000)
+    logger.info(
+        "[SRSync] Audits: %d crees — %d startups, %d appels SR en %d ms",
+        result.audits_created,
+        len(targets),
+        result.audits_api_calls,
+        result.audits_duration_ms,
+    )
     return result
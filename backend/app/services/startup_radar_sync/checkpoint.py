@@ -0,0 +1,90 @@
+# =============================================================================
+# FGA CRM - Startup Radar Sync : point de reprise de la full sync
+# load_checkpoint / save_checkpoint / clear_checkpoint
+# =============================================================================
+"""Point de reprise (phase + prochaine page + SyncResult cumule) de la full sync
+en flux. Ecrit dans la transaction de chaque page : il n'avance que si les
+ecritures de la page sont committees. Aucun commit ici (l'orchestrateur commit).
+"""
+
+import dataclasses
+import logging
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.startup_radar import StartupRadarSyncCheckpoint
+
+from ._common import SyncResult
+
+logger = logging.getLogger(__name__)
+
+
+def result_from_json(data: dict) -> SyncResult:
+    """SyncResult cumule d'un point de reprise (champs inconnus ignores)."""
+    names = {f.name for f in dataclasses.fields(SyncResult)}
+    return SyncResult(**{k: v for k, v in (data or {}).items() if k in names})
+
+
+async def load_checkpoint(
+    db: AsyncSession, organization_id: uuid.UUID,
+) -> StartupRadarSyncCheckpoint | None:
+    """Point de reprise de l'org, None si absent ou perime (supprime alors)."""
+    checkpoint = (
+        await db.execute(
+            select(StartupRadarSyncCheckpoint)
+            .where(StartupRadarSyncCheckpoint.organization_id == organization_id)
+        )
+    ).scalar_one_or_none()
+    if checkpoint is None:
+        return None
+
+    updated_at = checkpoint.updated_at
+    if updated_at is not None and updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=UTC)
+    max_age = timedelta(hours=settings.startup_radar_checkpoint_max_age_hours)
+    if updated_at is not None and datetime.now(UTC) - updated_at > max_age:
+        logger.info(
+            "[SRSync] Point de reprise perime (%s page %d) — sync reprise de zero",
+            checkpoint.phase, checkpoint.next_page,
+        )
+        await db.delete(checkpoint)
+        await db.flush()
+        return None
+    return checkpoint
+
+
+async def save_checkpoint(
+    db: AsyncSession,
+    organization_id: uuid.UUID,
+    phase: str,
+    next_page: int,
+    force: bool,
+    result: SyncResult,
+) -> None:
+    """Avancer le point de reprise (flush, commit a la charge de l'appelant)."""
+    checkpoint = (
+        await db.execute(
+            select(StartupRadarSyncCheckpoint)
+            .where(StartupRadarSyncCheckpoint.organization_id == organization_id)
+        )
+    ).scalar_one_or_none()
+    if checkpoint is None:
+        checkpoint = StartupRadarSyncCheckpoint(organization_id=organization_id)
+        db.add(checkpoint)
+    checkpoint.phase = phase
+    checkpoint.next_page = next_page
+    checkpoint.force = force
+    checkpoint.result_json = dataclasses.asdict(result)
+    await db.flush()
+
+
+async def clear_checkpoint(db: AsyncSession, organization_id: uuid.UUID) -> None:
+    """Sync terminee : plus rien a reprendre."""
+    await db.execute(
+        delete(StartupRadarSyncCheckpoint)
+        .where(StartupRadarSyncCheckpoint.organization_id == organization_id)
+    )
@@ -2,9 +2,29 @@
 # FGA CRM - Startup Radar Sync : Investors + Contacts
 # sync_investors (→ Companies) + sync_contacts (→ Contacts)
 # =============================================================================
+"""Investisseurs et contacts SR en ensembliste :
+
+- index d'idempotence compacts charges en UNE requete (PeopleIndex, scopee
+  org) ; seules les lignes candidates d'une page sont relues (colonnes du sync)
+- etat final de chaque ligne calcule en memoire (dedup intra-batch : un meme
+  item SR vu deux fois = une seule ligne), lignes inchangees non reecrites
+- sync delta : item deja lie dont l'empreinte du payload (startup_radar_hash)
+  n'a pas change -> ignore, compte `*_unchanged` (force=True reapplique tout)
+- ecriture par chunks : INSERT multi-lignes ON CONFLICT (id) DO UPDATE
+  (cf. crm_writer.upsert_contacts) ; un chunk en echec est rejoue ligne a ligne
+  (un savepoint par ligne) pour isoler l'item fautif comme avant
+
+sync_investor_page / sync_contact_page ecrivent une page SR (full sync en flux) ;
+sync_investors / sync_contacts traitent une liste complete sur ces briques.
+
+Les lignes sont ecrites en Core : les entites ORM deja chargees dans la session
+(companies de sync_startups, flushees) ne sont pas rafraichies avant le commit.
+"""
 
 import logging
 import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
 
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,20 +32,446 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.company import Company
 from app.models.contact import Contact
 from app.models.user import User
+from app.services.enrichment.crm_writer import _chunks, _insert
 from app.services.startup_radar import StartupRadarClient, StartupRadarError
 
-from ._common import SyncResult
+from ._common import (
+    CONTACT_HASH_FIELDS,
+    INVESTOR_HASH_FIELDS,
+    SyncResult,
+    _content_hash,
+)
 
 logger = logging.getLogger(__name__)
 
+# Colonnes ecrites par le sync (set_ de l'upsert) — le reste n'est pose qu'a la creation
+_INVESTOR_FIELDS = (
+    "name", "website", "industry", "custom_fields", "startup_radar_id", "startup_radar_hash",
+)
+_CONTACT_FIELDS = (
+    "first_name", "last_name", "email", "email_status", "title", "linkedin_url",
+    "is_decision_maker", "company_id", "enrichment_source", "email_pattern_used",
+    "linkedin_url_status", "startup_radar_id", "startup_radar_hash",
+)
+
+
+def _norm_email(email: str | None) -> str | None:
+    return (email or "").strip().lower() or None
+
+
+def _norm_linkedin(url: str | None) -> str | None:
+    return (url or "").strip().rstrip("/").lower() or None
+
+
+@dataclass
+class PeopleIndex:
+    """Index d'idempotence compacts d'une org (cf. StartupIndex).
+
+    - by_sr_id : startup_radar_id -> (id, startup_radar_hash), toutes les lignes
+    - fallbacks : cle normalisee -> id parmi les lignes SANS startup_radar_id
+      (investors : nom ; contacts : email, LinkedIn), la plus ancienne
+    - unlinked_keys : id -> cles de ces lignes (une par index de fallback)
+    """
+
+    fallbacks: tuple[dict[str, uuid.UUID], ...]
+    by_sr_id: dict[str, tuple[uuid.UUID, str | None]] = field(default_factory=dict)
+    unlinked_keys: dict[uuid.UUID, tuple[str | None, ...]] = field(default_factory=dict)
+
+    def add_unlinked(self, row_id: uuid.UUID, keys: tuple[str | None, ...]) -> None:
+        for index, key in zip(self.fallbacks, keys, strict=True):
+            if key:
+                index.setdefault(key, row_id)
+        self.unlinked_keys[row_id] = keys
+
+    def lookup(self, keys: tuple[str | None, ...]) -> uuid.UUID | None:
+        """Premiere ligne non liee trouvee par cle de fallback (dans l'ordre)."""
+        for index, key in zip(self.fallbacks, keys, strict=True):
+            if key and key in index:
+                return index[key]
+        return None
+
+    def link(self, sr_id: str, row_id: uuid.UUID, content_hash: str | None) -> None:
+        """La ligne est (desormais) liee a sr_id : sort des index de fallback."""
+        keys = self.unlinked_keys.pop(row_id, None)
+        for index, key in zip(self.fallbacks, keys or (), strict=keys is not None):
+            if key and index.get(key) == row_id:
+                del index[key]
+        self.by_sr_id[sr_id] = (row_id, content_hash)
+
+    def forget(self, sr_id: str, row_id: uuid.UUID, created: bool) -> None:
+        """Ligne non ecrite (upsert en echec) : l'index ne doit plus la croire a jour."""
+        if self.by_sr_id.get(sr_id, (None,))[0] != row_id:
+            return
+        if created:
+            del self.by_sr_id[sr_id]
+        else:
+            # Empreinte inconnue : l'item sera reapplique a sa prochaine occurrence
+            self.by_sr_id[sr_id] = (row_id, None)
+
+
+async def _load_index(
+    db: AsyncSession, model, organization_id: uuid.UUID, keys: Callable[[tuple], tuple],
+    *columns,
+) -> PeopleIndex:
+    """Pre-fetch : colonnes d'idempotence de toutes les lignes de l'org (UNE requete)."""
+    rows = (
+        await db.execute(
+            select(model.id, model.startup_radar_id, model.startup_radar_hash, *columns)
+            .where(model.organization_id == organization_id)
+            .order_by(model.created_at, model.id)
+        )
+    ).all()
+    index = PeopleIndex(fallbacks=tuple({} for _ in columns))
+    for row in rows:
+        if row[1]:
+            index.by_sr_id[row[1]] = (row[0], row[2])
+        else:
+            index.add_unlinked(row[0], keys(row[3:]))
+    return index
+
+
+async def load_investor_index(db: AsyncSession, organization_id: uuid.UUID) -> PeopleIndex:
+    """Index des companies de l'org : sr_id (prefixe inv:) + fallback lower(name)."""
+    return await _load_index(
+        db, Company, organization_id, lambda row: ((row[0] or "").lower(),), Company.name,
+    )
+
+
+async def load_contact_index(db: AsyncSession, organization_id: uuid.UUID) -> PeopleIndex:
+    """Index des contacts de l'org : sr_id + fallback email puis LinkedIn."""
+    return await _load_index(
+        db, Contact, organization_id,
+        lambda row: (_norm_email(row[0]), _norm_linkedin(row[1])),
+        Contact.email, Contact.linkedin_url,
+    )
+
+
+async def _load_rows(
+    db: AsyncSession, model, fields: tuple[str, ...], ids: set[uuid.UUID],
+) -> dict[uuid.UUID, dict]:
+    """Colonnes du sync des lignes candidates d'une page (une requete par chunk d'id)."""
+    current: dict[uuid.UUID, dict] = {}
+    for chunk in _chunks(list(ids)):
+        rows = await db.execute(
+            select(model.id, *(getattr(model, name) for name in fields))
+            .where(model.id.in_(chunk))
+        )
+        for row in rows:
+            current[row.id] = {name: getattr(row, name) for name in fields}
+    return current
+
+
+async def _upsert_rows(
+    db: AsyncSession,
+    model,
+    rows: list[dict],
+    fields: tuple[str, ...],
+    label: Callable[[dict], str],
+    errors: list[str],
+) -> set[uuid.UUID]:
+    """Upsert par cle primaire, par chunks. Retourne les id des lignes non ecrites.
+
+    Chunk en echec (contrainte, valeur invalide) : rejoue ligne a ligne dans un
+    savepoint chacune, l'erreur est rattachee a l'item comme en ecriture unitaire.
+    """
+
+    def _stmt(chunk: list[dict]):
+        stmt = _insert(db, model.__table__).values(chunk)
+        return stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                **{name: stmt.excluded[name] for name in fields},
+                # onupdate n'est pas joue par ON CONFLICT DO UPDATE
+                "updated_at": func.now(),
+            },
+        )
+
+    failed: set[uuid.UUID] = set()
+    for chunk in _chunks(rows):
+        try:
+            async with db.begin_nested():
+                await db.execute(_stmt(chunk))
+        except Exception as e:
+            logger.warning(
+                "[SRSync] Chunk %s en echec (%s), rejeu ligne a ligne", model.__tablename__, e,
+            )
+        else:
+            continue
+        for row in chunk:
+            try:
+                async with db.begin_nested():
+                    await db.execute(_stmt([row]))
+            except Exception as e:
+                failed.add(row["id"])
+                errors.append(f"{label(row)}: {e}")
+    return failed
+
+
+async def _write_page(
+    db: AsyncSession,
+    model,
+    index: PeopleIndex,
+    current: dict[uuid.UUID, dict],
+    snapshot: dict[uuid.UUID, dict],
+    new_ids: set[uuid.UUID],
+    tallies: dict[uuid.UUID, list[int]],
+    defaults: dict,
+    fields: tuple[str, ...],
+    label: Callable[[dict], str],
+    errors: list[str],
+) -> tuple[int, int, int]:
+    """Upsert des lignes nouvelles ou modifiees d'une page, index corrige pour
+    les lignes non ecrites. Retourne (crees, mis a jour, lignes ecrites)."""
+    # Valeurs d'insertion des nouvelles lignes (ignorees en cas de conflit)
+    rows = [
+        {"id": row_id, **defaults, **current[row_id]}
+        for row_id in tallies
+        if row_id in new_ids or current[row_id] != snapshot[row_id]
+    ]
+    failed = await _upsert_rows(db, model, rows, fields, label, errors)
+
+    created = updated = 0
+    for row_id, (c, u) in tallies.items():
+        if row_id in failed:
+            index.forget(current[row_id]["startup_radar_id"], row_id, row_id in new_ids)
+        else:
+            created += c
+            updated += u
+    return created, updated, len(rows) - len(failed)
+
+
+async def sync_investor_page(
+    db: AsyncSession,
+    investors: list[dict],
+    user: User,
+    organization_id: uuid.UUID,
+    index: PeopleIndex,
+    result: SyncResult,
+    force: bool = False,
+) -> None:
+    """Ecrire une page d'investisseurs SR en Companies (industry=Capital-risque).
+
+    Idempotence par startup_radar_id (prefixe inv:), puis fallback nom
+    case-insensitive parmi les companies pas encore liees a SR (la plus ancienne).
+    """
+    # Prefixe inv: pour distinguer des startups
+    items = [
+        (f"inv:{inv_id}", inv, _content_hash(inv, INVESTOR_HASH_FIELDS))
+        for inv in investors
+        if (inv_id := str(inv.get("id", "")))
+    ]
+    candidates: set[uuid.UUID] = set()
+    for sr_id, inv, content_hash in items:
+        known = index.by_sr_id.get(sr_id)
+        if known is not None:
+            if force or known[1] != content_hash:
+                candidates.add(known[0])
+        elif inv.get("name") and (match := index.lookup((inv["name"].lower(),))):
+            candidates.add(match)
+    current = await _load_rows(db, Company, _INVESTOR_FIELDS, candidates)
+    snapshot = {row_id: dict(values) for row_id, values in current.items()}
+    new_ids: set[uuid.UUID] = set()
+    tallies: dict[uuid.UUID, list[int]] = {}
+
+    for sr_id, inv, content_hash in items:
+        known = index.by_sr_id.get(sr_id)
+        if not force and known is not None and known[1] == content_hash:
+            result.investors_unchanged += 1
+            continue
+
+        try:
+            custom = {}
+            if inv.get("startups_count"):
+                custom["portfolio_size"] = inv["startups_count"]
+            if inv.get("total_funding_amount"):
+                custom["total_invested"] = inv["total_funding_amount"]
+
+            # 1. startup_radar_id, 2. fallback nom (evite doublons si cree manuellement)
+            company_id = known[0] if known is not None else None
+            if company_id is None and inv.get("name"):
+                company_id = index.lookup((inv["name"].lower(),))
+
+            if company_id is not None:
+                existing = current[company_id]
+                row = {
+                    "name": inv.get("name") or existing["name"],
+                    "website": inv.get("website") or existing["website"],
+                    "industry": "Capital-risque",
+                    "custom_fields": {**(existing["custom_fields"] or {}), **custom},
+                    "startup_radar_id": sr_id,
+                    "startup_radar_hash": content_hash,
+                }
+            else:
+                company_id = uuid.uuid4()
+                row = {
+                    "name": inv.get("name", "Investisseur inconnu"),
+                    "website": inv.get("website"),
+                    "industry": "Capital-risque",
+                    "custom_fields": custom if custom else None,
+                    "startup_radar_id": sr_id,
+                    "startup_radar_hash": content_hash,
+                }
+                new_ids.add(company_id)
+        except Exception as e:
+            result.errors.append(f"Investor {inv.get('name', sr_id[4:])}: {e}")
+            continue
+
+        # Index maintenus APRES calcul complet de la ligne (item en erreur = aucun effet)
+        index.link(sr_id, company_id, content_hash)
+        # Premier passage sur une ligne neuve = creation, sinon mise a jour
+        tallies.setdefault(company_id, [0, 0])[0 if company_id not in current else 1] += 1
+        current[company_id] = row
+
+    created, updated, written = await _write_page(
+        db, Company, index, current, snapshot, new_ids, tallies,
+        {
+            "organization_id": organization_id, "owner_id": user.id,
+            "lead_source": "startup_radar", "domain_verified_by_icypeas": False,
+        },
+        _INVESTOR_FIELDS,
+        lambda row: f"Investor {row['name'] or row['startup_radar_id']}", result.errors,
+    )
+    result.investors_created += created
+    result.investors_updated += updated
+    logger.debug("[SRSync] Page investors : %d lignes ecrites", written)
+
+
+async def sync_contact_page(
+    db: AsyncSession,
+    contacts: list[dict],
+    user: User,
+    sr_to_crm: dict[str, uuid.UUID],
+    organization_id: uuid.UUID,
+    index: PeopleIndex,
+    result: SyncResult,
+    force: bool = False,
+) -> None:
+    """Ecrire une page de contacts SR en Contacts CRM.
+
+    sr_to_crm : mapping startup_radar_id → company_id CRM (pour lier contact → company).
+
+    Idempotence par startup_radar_id, puis fallback email puis LinkedIn parmi les
+    contacts pas encore lies a SR (le plus ancien) : un contact saisi a la main
+    est lie au lieu d'etre duplique.
+    """
+    items = []
+    candidates: set[uuid.UUID] = set()
+    for c in contacts:
+        sr_id = str(c.get("id", ""))
+        if not sr_id:
+            continue
+        # Trouver la company CRM via startup_id du contact SR
+        company_id = None
+        startup_id = c.get("startup_id")
+        if startup_id:
+            company_id = sr_to_crm.get(str(startup_id))
+        keys = (_norm_email(c.get("email")), _norm_linkedin(c.get("linkedin_url")))
+        content_hash = _content_hash(c, CONTACT_HASH_FIELDS, company_id=company_id)
+        items.append((sr_id, c, company_id, keys, content_hash))
+        known = index.by_sr_id.get(sr_id)
+        if known is None:
+            match = index.lookup(keys)
+        elif force or known[1] != content_hash:
+            match = known[0]
+        else:
+            match = None  # inchange : rien a relire
+        if match is not None:
+            candidates.add(match)
+    current = await _load_rows(db, Contact, _CONTACT_FIELDS, candidates)
+    snapshot = {row_id: dict(values) for row_id, values in current.items()}
+    new_ids: set[uuid.UUID] = set()
+    tallies: dict[uuid.UUID, list[int]] = {}
+
+    for sr_id, c, company_id, keys, content_hash in items:
+        known = index.by_sr_id.get(sr_id)
+        if not force and known is not None and known[1] == content_hash:
+            result.contacts_unchanged += 1
+            continue
+
+        try:
+            contact_id = known[0] if known is not None else index.lookup(keys)
+
+            if contact_id is not None:
+                existing = current[contact_id]
+                row = {
+                    "first_name": c.get("first_name") or existing["first_name"],
+                    "last_name": c.get("last_name") or existing["last_name"],
+                    "email": c.get("email") or existing["email"],
+                    "email_status": c.get("email_status") or existing["email_status"],
+                    "title": c.get("title") or existing["title"],
+                    "linkedin_url": c.get("linkedin_url") or existing["linkedin_url"],
+                    "is_decision_maker": c.get("is_decision_maker", existing["is_decision_maker"]),
+                    "company_id": company_id or existing["company_id"],
+                    # --- Enrichment fields (Phase B 2026-05) ---
+                    # enrichment_source : ecrasable (toujours mettre la derniere source)
+                    "enrichment_source": (
+                        c["enrichment_source"][:50]
+                        if c.get("enrichment_source") else existing["enrichment_source"]
+                    ),
+                    # email_pattern_used : conserve la premiere valeur (heuristique stable)
+                    "email_pattern_used": existing["email_pattern_used"] or (
+                        (c.get("email_pattern_used") or "")[:50] or None
+                    ),
+                    # linkedin_url_status : ecrasable (verified > candidate > invalid)
+                    "linkedin_url_status": (
+                        c["linkedin_url_status"][:20]
+                        if c.get("linkedin_url_status") else existing["linkedin_url_status"]
+                    ),
+                    "startup_radar_id": sr_id,
+                    "startup_radar_hash": content_hash,
+                }
+            else:
+                contact_id = uuid.uuid4()
+                row = {
+                    "first_name": c.get("first_name", ""),
+                    "last_name": c.get("last_name", ""),
+                    "email": c.get("email"),
+                    "email_status": c.get("email_status"),
+                    "title": c.get("title"),
+                    "linkedin_url": c.get("linkedin_url"),
+                    "is_decision_maker": c.get("is_decision_maker", False),
+                    "company_id": company_id,
+                    "enrichment_source": (c.get("enrichment_source") or "")[:50] or None,
+                    "email_pattern_used": (c.get("email_pattern_used") or "")[:50] or None,
+                    "linkedin_url_status": (c.get("linkedin_url_status") or "")[:20] or None,
+                    "startup_radar_id": sr_id,
+                    "startup_radar_hash": content_hash,
+                }
+                new_ids.add(contact_id)
+        except Exception as e:
+            result.errors.append(f"Contact {c.get('first_name', '')} {c.get('last_name', sr_id)}: {e}")
+            continue
+
+        # Index maintenus APRES calcul complet de la ligne (item en erreur = aucun effet)
+        index.link(sr_id, contact_id, content_hash)
+        # Premier passage sur une ligne neuve = creation, sinon mise a jour
+        tallies.setdefault(contact_id, [0, 0])[0 if contact_id not in current else 1] += 1
+        current[contact_id] = row
+
+    created, updated, written = await _write_page(
+        db, Contact, index, current, snapshot, new_ids, tallies,
+        {
+            "organization_id": organization_id, "owner_id": user.id,
+            "source": "startup_radar", "status": "new", "lead_score": 0,
+            "custom_fields": {}, "tags": [], "email_verified_by_icypeas": False,
+        },
+        _CONTACT_FIELDS,
+        lambda row: f"Contact {row['first_name'] or ''} {row['last_name'] or row['startup_radar_id']}",
+        result.errors,
+    )
+    result.contacts_created += created
+    result.contacts_updated += updated
+    logger.debug("[SRSync] Page contacts : %d lignes ecrites", written)
+
 
 async def sync_investors(
     db: AsyncSession,
     client: StartupRadarClient,
     user: User,
     organization_id: uuid.UUID,
+    force: bool = False,
 ) -> SyncResult:
-    """Synchroniser les investisseurs SR en Companies CRM (industry=Capital-risque).
+    """Synchroniser la liste des investisseurs SR (cf. sync_investor_page).
 
     Toutes les entites creees sont taggees `organization_id` et les recherches
     d'idempotence sont scopees a cette org (isolation multi-tenant).
@@ -38,70 +484,13 @@ async def sync_investors(
         result.errors.append(f"Fetch investors: {e}")
         return result
 
-    for inv in investors:
-        inv_id = str(inv.get("id", ""))
-        if not inv_id:
-            continue
-
-        # Prefixe inv: pour distinguer des startups
-        sr_id = f"inv:{inv_id}"
-
-        try:
-            async with db.begin_nested():
-                # 1. Chercher par startup_radar_id (scopee org)
-                stmt = select(Company).where(
-                    Company.startup_radar_id == sr_id,
-                    Company.organization_id == organization_id,
-                )
-                existing = (await db.execute(stmt)).scalar_one_or_none()
-
-                # 2. Fallback nom case-insensitive (evite doublons si cree manuellement)
-                if not existing and inv.get("name"):
-                    stmt2 = select(Company).where(
-                        func.lower(Company.name) == inv["name"].lower(),
-                        Company.startup_radar_id.is_(None),
-                        Company.organization_id == organization_id,
-                    )
-                    existing = (await db.execute(stmt2)).scalar_one_or_none()
-                    if existing:
-                        existing.startup_radar_id = sr_id
-
-                custom = {}
-                if inv.get("startups_count"):
-                    custom["portfolio_size"] = inv["startups_count"]
-                if inv.get("total_funding_amount"):
-                    custom["total_invested"] = inv["total_funding_amount"]
-
-                if existing:
-                    existing.name = inv.get("name") or existing.name
-                    existing.website = inv.get("website") or existing.website
-                    existing.industry = "Capital-risque"
-                    merged = {**(existing.custom_fields or {}), **custom}
-                    existing.custom_fields = merged
-                    result.investors_updated += 1
-                else:
-                    company = Company(
-                        id=uuid.uuid4(),
-                        name=inv.get("name", "Investisseur inconnu"),
-                        website=inv.get("website"),
-                        industry="Capital-risque",
-                        custom_fields=custom if custom else None,
-                        startup_radar_id=sr_id,
-                        lead_source="startup_radar",
-                        owner_id=user.id,
-                        organization_id=organization_id,
-                    )
-                    db.add(company)
-                    result.investors_created += 1
-
-        except Exception as e:
-            result.errors.append(f"Investor {inv.get('name', inv_id)}: {e}")
-
-    await db.flush()
+    index = await load_investor_index(db, organization_id)
+    await sync_investor_page(db, investors, user, organization_id, index, result, force)
     logger.info(
-        "[SRSync] Investors: %d crees, %d mis a jour",
+        "[SRSync] Investors: %d crees, %d mis a jour, %d inchanges",
         result.investors_created,
         result.investors_updated,
+        result.investors_unchanged,
     )
     return result
 
@@ -112,10 +501,9 @@ async def sync_contacts(
     user: User,
     sr_to_crm: dict[str, uuid.UUID],
     organization_id: uuid.UUID,
+    force: bool = False,
 ) -> SyncResult:
-    """Synchroniser les contacts SR en Contacts CRM.
-
-    sr_to_crm : mapping startup_radar_id → company_id CRM (pour lier contact → company).
+    """Synchroniser la liste des contacts SR (cf. sync_contact_page).
 
     Toutes les entites creees sont taggees `organization_id` et la recherche
     d'idempotence est scopee a cette org (isolation multi-tenant).
@@ -128,75 +516,12 @@ async def sync_contacts(
         result.errors.append(f"Fetch contacts: {e}")
         return result
 
-    for c in contacts:
-        sr_id = str(c.get("id", ""))
-        if not sr_id:
-            continue
-
-        try:
-            async with db.begin_nested():
-                stmt = select(Contact).where(
-                    Contact.startup_radar_id == sr_id,
-                    Contact.organization_id == organization_id,
-                )
-                existing = (await db.execute(stmt)).scalar_one_or_none()
-
-                # Trouver la company CRM via startup_id du contact SR
-                company_id = None
-                startup_id = c.get("startup_id")
-                if startup_id:
-                    company_id = sr_to_crm.get(str(startup_id))
-
-                if existing:
-                    existing.first_name = c.get("first_name") or existing.first_name
-                    existing.last_name = c.get("last_name") or existing.last_name
-                    existing.email = c.get("email") or existing.email
-                    existing.email_status = c.get("email_status") or existing.email_status
-                    existing.title = c.get("title") or existing.title
-                    existing.linkedin_url = c.get("linkedin_url") or existing.linkedin_url
-                    existing.is_decision_maker = c.get("is_decision_maker", existing.is_decision_maker)
-                    if company_id:
-                        existing.company_id = company_id
-                    # --- Enrichment fields (Phase B 2026-05) ---
-                    # enrichment_source : ecrasable (toujours mettre la derniere source)
-                    if c.get("enrichment_source"):
-                        existing.enrichment_source = c["enrichment_source"][:50]
-                    # email_pattern_used : conserve la premiere valeur (heuristique stable)
-                    if c.get("email_pattern_used") and not existing.email_pattern_used:
-                        existing.email_pattern_used = c["email_pattern_used"][:50]
-                    # linkedin_url_status : ecrasable (verified > candidate > invalid)
-                    if c.get("linkedin_url_status"):
-                        existing.linkedin_url_status = c["linkedin_url_status"][:20]
-                    result.contacts_updated += 1
-                else:
-                    contact = Contact(
-                        id=uuid.uuid4(),
-                        first_name=c.get("first_name", ""),
-                        last_name=c.get("last_name", ""),
-                        email=c.get("email"),
-                        email_status=c.get("email_status"),
-                        title=c.get("title"),
-                        linkedin_url=c.get("linkedin_url"),
-                        is_decision_maker=c.get("is_decision_maker", False),
-                        source="startup_radar",
-                        company_id=company_id,
-                        startup_radar_id=sr_id,
-                        owner_id=user.id,
-                        organization_id=organization_id,
-                        enrichment_source=(c.get("enrichment_source") or "")[:50] or None,
-                        email_pattern_used=(c.get("email_pattern_used") or "")[:50] or None,
-                        linkedin_url_status=(c.get("linkedin_url_status") or "")[:20] or None,
-                    )
-                    db.add(contact)
-                    result.contacts_created += 1
-
-        except Exception as e:
-            result.errors.append(f"Contact {c.get('first_name', '')} {c.get('last_name', sr_id)}: {e}")
-
-    await db.flush()
+    index = await load_contact_index(db, organization_id)
+    await sync_contact_page(db, contacts, user, sr_to_crm, organization_id, index, result, force)
     logger.info(
-        "[SRSync] Contacts: %d crees, %d mis a jour",
+        "[SRSync] Contacts: %d crees, %d mis a jour, %d inchanges",
         result.contacts_created,
         result.contacts_updated,
+        result.contacts_unchanged,
     )
     return result
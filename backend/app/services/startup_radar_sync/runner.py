@@ -1,21 +1,40 @@
 # =============================================================================
 # FGA CRM - Startup Radar Sync : orchestrateurs
-# full_sync (complete) + sync_recent_startups (incrementale Phase B)
+# full_sync (complete, en flux, reprenable) + sync_recent_startups (incrementale Phase B)
 # =============================================================================
 
 import logging
 import uuid
 from datetime import datetime, timedelta
 
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.company import Company
+from app.models.startup_radar import SYNC_PHASES
 from app.models.user import User
-from app.services.startup_radar import StartupRadarClient, StartupRadarError
+from app.services.startup_radar import (
+    SR_PAGE_SIZE,
+    StartupRadarClient,
+    StartupRadarError,
+)
 
 from ._common import SyncResult, _merge_results
 from .audits import sync_audits
-from .people import sync_contacts, sync_investors
-from .startups import sync_startups
+from .checkpoint import (
+    clear_checkpoint,
+    load_checkpoint,
+    result_from_json,
+    save_checkpoint,
+)
+from .people import (
+    load_contact_index,
+    load_investor_index,
+    sync_contact_page,
+    sync_contacts,
+    sync_investor_page,
+)
+from .startups import load_startup_index, sync_startup_page, sync_startups
 
 logger = logging.getLogger(__name__)
 
@@ -28,75 +47,156 @@ logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------------------------
-# Full Sync — Orchestrateur principal
+# Full Sync — Orchestrateur principal (en flux, reprenable)
 # ---------------------------------------------------------------------------
 
 
+async def _linked_startups(
+    db: AsyncSession, organization_id: uuid.UUID,
+) -> list[tuple[str, uuid.UUID, str]]:
+    """(sr_id, company_id, nom) des companies liees a une startup SR, par sr_id.
+
+    Relu en base (et non garde depuis la phase startups) : identique apres une
+    reprise, et borne a 3 valeurs par startup.
+    """
+    rows = await db.execute(
+        select(Company.startup_radar_id, Company.id, Company.name)
+        .where(
+            Company.organization_id == organization_id,
+            Company.startup_radar_id.is_not(None),
+            Company.startup_radar_id.not_like("inv:%"),
+        )
+        .order_by(Company.startup_radar_id)
+    )
+    return [tuple(row) for row in rows]
+
+
 async def full_sync(
     db: AsyncSession,
     user: User,
     organization_id: uuid.UUID,
+    force: bool = False,
 ) -> SyncResult:
-    """Synchronisation complete SR → CRM.
+    """Synchronisation complete SR → CRM, page par page.
+
+    Ordre : startups → investors → contacts → audits (SYNC_PHASES).
 
-    Ordre : startups → investors → contacts → audits.
+    Chaque page SR est ecrite puis committee AVEC le point de reprise (phase +
+    page suivante, cf. checkpoint.py) : la memoire est bornee par la fenetre de
+    lecture (iter_pages) et les index compacts, plus par le catalogue ; une sync
+    interrompue reprend a la derniere page committee au lancement suivant.
 
     organization_id : org a laquelle rattacher toutes les entites creees (tag +
     scope idempotence). Fournie par l'appelant (task Celery) qui la resout depuis
     le user declencheur.
-    """
-    sr_client = StartupRadarClient()
-    total = SyncResult()
-
-    # 1. Authentification — erreur fatale : on remonte pour que la task marque
-    # le job 'failed' (et non 'completed' avec 0 element, qui serait trompeur).
-    try:
-        await sr_client.authenticate()
-    except StartupRadarError:
-        logger.error("[SRSync] Authentification SR echouee — sync annulee")
-        raise
-
-    # 2. Sync startups → Companies
-    startups_result, sr_to_crm = await sync_startups(db, sr_client, user, organization_id)
-    _merge_results(total, startups_result)
-
-    # 3. Sync investors → Companies (industry=Capital-risque)
-    investors_result = await sync_investors(db, sr_client, user, organization_id)
-    _merge_results(total, investors_result)
-
-    # 4. Sync contacts → Contacts (avec mapping company)
-    contacts_result = await sync_contacts(db, sr_client, user, sr_to_crm, organization_id)
-    _merge_results(total, contacts_result)
-
-    # 5. Sync audits → Activities
-    # Recuperer les startups pour les noms
-    try:
-        startups = await sr_client.get_startups()
-    except StartupRadarError as e:
-        total.errors.append(f"Re-fetch startups pour audits: {e}")
-        startups = []
-
-    audits_result = await sync_audits(db, sr_client, user, sr_to_crm, startups, organization_id)
-    _merge_results(total, audits_result)
-
-    # 6. Commit final
-    try:
-        await db.commit()
-    except Exception as e:
-        await db.rollback()
-        total.errors.append(f"Commit final: {e}")
-
-    logger.info(
-        "[SRSync] Sync terminee — Companies: +%d/~%d, Contacts: +%d/~%d, "
-        "Investors: +%d/~%d, Audits: +%d, Erreurs: %d",
-        total.companies_created, total.companies_updated,
-        total.contacts_created, total.contacts_updated,
-        total.investors_created, total.investors_updated,
-        total.audits_created,
-        len(total.errors),
-    )
 
-    return total
+    force : reapplique toutes les entites, meme celles dont le payload SR n'a pas
+    change depuis la derniere sync (delta par empreinte sinon). Un point de
+    reprise n'est repris que pour le meme mode.
+    """
+    async with StartupRadarClient() as sr_client:
+        # 1. Authentification — erreur fatale : on remonte pour que la task marque
+        # le job 'failed' (et non 'completed' avec 0 element, qui serait trompeur).
+        try:
+            await sr_client.authenticate()
+        except StartupRadarError:
+            logger.error("[SRSync] Authentification SR echouee — sync annulee")
+            raise
+
+        checkpoint = await load_checkpoint(db, organization_id)
+        if checkpoint is not None and checkpoint.force == force:
+            total = result_from_json(checkpoint.result_json)
+            resume_phase, resume_page = checkpoint.phase, checkpoint.next_page
+            logger.info("[SRSync] Reprise de la sync : %s page %d", resume_phase, resume_page)
+        else:
+            total = SyncResult()
+            resume_phase, resume_page = SYNC_PHASES[0], 1
+
+        async def _commit(phase: str, next_page: int) -> None:
+            # Ecritures de la page + point de reprise : atomiques. Un echec de
+            # commit est fatal (la reprise repartira de la page precedente).
+            await save_checkpoint(db, organization_id, phase, next_page, force, total)
+            try:
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+        async def _stream(phase: str, path: str, write_page) -> None:
+            start = resume_page if phase == resume_phase else 1
+            try:
+                async for page, _, items in sr_client.iter_pages(path, start_page=start):
+                    await write_page(items)
+                    await _commit(phase, page + 1)
+            except StartupRadarError as e:
+                # SR indisponible en cours de phase : pages deja committees
+                # conservees, on passe a la phase suivante.
+                total.errors.append(f"Fetch {phase}: {e}")
+
+        phases = SYNC_PHASES[SYNC_PHASES.index(resume_phase):]
+
+        # 2. Startups → Companies
+        if "startups" in phases:
+            startup_index = await load_startup_index(db, organization_id)
+            await _stream("startups", "/startups", lambda items: sync_startup_page(
+                db, items, user, organization_id, startup_index, total, force=force,
+            ))
+            del startup_index
+
+        # 3. Investors → Companies (industry=Capital-risque)
+        if "investors" in phases:
+            investor_index = await load_investor_index(db, organization_id)
+            await _stream("investors", "/investors", lambda items: sync_investor_page(
+                db, items, user, organization_id, investor_index, total, force=force,
+            ))
+            del investor_index
+
+        # Startups liees (toutes pages, y compris avant une reprise)
+        linked = await _linked_startups(db, organization_id)
+        sr_to_crm = {sr_id: company_id for sr_id, company_id, _ in linked}
+
+        # 4. Contacts → Contacts (avec mapping company)
+        if "contacts" in phases:
+            contact_index = await load_contact_index(db, organization_id)
+            await _stream("contacts", "/contacts", lambda items: sync_contact_page(
+                db, items, user, sr_to_crm, organization_id, contact_index, total, force=force,
+            ))
+            del contact_index
+
+        # 5. Audits → Activities, par pages des startups liees
+        start = resume_page if resume_phase == "audits" else 1
+        for page, offset in enumerate(range(0, len(linked), SR_PAGE_SIZE), start=1):
+            if page < start:
+                continue
+            startups = [
+                {"id": sr_id, "name": name}
+                for sr_id, _, name in linked[offset:offset + SR_PAGE_SIZE]
+            ]
+            audits_result = await sync_audits(
+                db, sr_client, user, sr_to_crm, startups, organization_id,
+            )
+            _merge_results(total, audits_result)
+            await _commit("audits", page + 1)
+
+        # 6. Sync complete : plus de point de reprise
+        await clear_checkpoint(db, organization_id)
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        logger.info(
+            "[SRSync] Sync terminee — Companies: +%d/~%d, Contacts: +%d/~%d, "
+            "Investors: +%d/~%d, Audits: +%d (%d appels SR, %d ms), Erreurs: %d",
+            total.companies_created, total.companies_updated,
+            total.contacts_created, total.contacts_updated,
+            total.investors_created, total.investors_updated,
+            total.audits_created, total.audits_api_calls, total.audits_duration_ms,
+            len(total.errors),
+        )
+
+        return total
 
 
 # ---------------------------------------------------------------------------
@@ -128,99 +228,98 @@ async def sync_recent_startups(
     organization_id = user.organization_id
 
     result = SyncResult()
-    sr_client = StartupRadarClient()
-
-    # Auth (fallback anonyme si echec — l'API SR peut etre publique en lecture)
-    try:
-        await sr_client.authenticate()
-    except StartupRadarError as e:
-        logger.warning("[SRSync recent] Auth echec, mode anonyme: %s", e)
-
-    since = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
-
-    # 1. Fetch startups recentes
-    try:
-        # API SR : GET /startups?since=...&size=200 (cf. doc maitre 13.2)
-        data = await sr_client._get(f"/startups?since={since}&size=200")
-        # SR peut retourner soit {"items": [...]} (paginated) soit [...] (legacy)
-        if isinstance(data, dict):
-            items = data.get("items", [])
-        elif isinstance(data, list):
-            items = data
-        else:
-            items = []
-    except StartupRadarError as e:
-        result.errors.append(f"Fetch recent startups: {e}")
-        return result
-    except Exception as e:
-        result.errors.append(f"Fetch recent startups: {e}")
-        return result
-
-    logger.info("[SRSync recent] %d startups depuis %s", len(items), since)
-
-    # 2. Upsert chaque startup via la meme logique que sync_startups()
-    #    On reuse sync_startups en lui passant un client qui retourne `items`.
-    #    Comme sync_startups appelle client.get_startups(), on patche localement.
-    class _PartialClient:
-        """Mock partiel : fournit get_startups() qui retourne `items`,
-        delegue le reste au vrai client (pour audits/contacts notamment)."""
-
-        def __init__(self, real_client, startups):
-            self._real = real_client
-            self._startups = startups
-
-        async def get_startups(self):
-            return self._startups
-
-        def __getattr__(self, name):
-            return getattr(self._real, name)
-
-    partial_client = _PartialClient(sr_client, items)
-    startups_result, sr_to_crm = await sync_startups(db, partial_client, user, organization_id)  # type: ignore[arg-type]
-    _merge_results(result, startups_result)
-
-    # 3. Sync contacts uniquement pour les startups touchees (eviter full pull)
-    try:
-        contacts = await sr_client.get_contacts()
-    except StartupRadarError as e:
-        result.errors.append(f"Fetch contacts: {e}")
-        contacts = []
-
-    relevant_contacts = [
-        c for c in contacts
-        if str(c.get("startup_id", "")) in sr_to_crm
-    ]
-    if relevant_contacts:
-        # Reuse sync_contacts via partial client (memes contacts)
-        class _ContactsClient:
-            def __init__(self, real_client, contacts):
+    async with StartupRadarClient() as sr_client:
+        # Auth (fallback anonyme si echec — l'API SR peut etre publique en lecture)
+        try:
+            await sr_client.authenticate()
+        except StartupRadarError as e:
+            logger.warning("[SRSync recent] Auth echec, mode anonyme: %s", e)
+
+        since = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
+
+        # 1. Fetch startups recentes
+        try:
+            # API SR : GET /startups?since=...&size=200 (cf. doc maitre 13.2)
+            data = await sr_client._get(f"/startups?since={since}&size=200")
+            # SR peut retourner soit {"items": [...]} (paginated) soit [...] (legacy)
+            if isinstance(data, dict):
+                items = data.get("items", [])
+            elif isinstance(data, list):
+                items = data
+            else:
+                items = []
+        except StartupRadarError as e:
+            result.errors.append(f"Fetch recent startups: {e}")
+            return result
+        except Exception as e:
+            result.errors.append(f"Fetch recent startups: {e}")
+            return result
+
+        logger.info("[SRSync recent] %d startups depuis %s", len(items), since)
+
+        # 2. Upsert chaque startup via la meme logique que sync_startups()
+        #    On reuse sync_startups en lui passant un client qui retourne `items`.
+        #    Comme sync_startups appelle client.get_startups(), on patche localement.
+        class _PartialClient:
+            """Mock partiel : fournit get_startups() qui retourne `items`,
+            delegue le reste au vrai client (pour audits/contacts notamment)."""
+
+            def __init__(self, real_client, startups):
                 self._real = real_client
-                self._contacts = contacts
+                self._startups = startups
 
-            async def get_contacts(self):
-                return self._contacts
+            async def get_startups(self):
+                return self._startups
 
             def __getattr__(self, name):
                 return getattr(self._real, name)
 
-        contacts_client = _ContactsClient(sr_client, relevant_contacts)
-        contacts_result = await sync_contacts(db, contacts_client, user, sr_to_crm, organization_id)  # type: ignore[arg-type]
-        _merge_results(result, contacts_result)
-
-    # 4. Commit final
-    try:
-        await db.commit()
-    except Exception as e:
-        await db.rollback()
-        result.errors.append(f"Commit recent sync: {e}")
-
-    logger.info(
-        "[SRSync recent] Termine — Companies: +%d/~%d, Contacts: +%d/~%d, "
-        "Funding activities: +%d, Tasks: +%d, Erreurs: %d",
-        result.companies_created, result.companies_updated,
-        result.contacts_created, result.contacts_updated,
-        result.funding_activities_created, result.qualification_tasks_created,
-        len(result.errors),
-    )
+        partial_client = _PartialClient(sr_client, items)
+        startups_result, sr_to_crm = await sync_startups(db, partial_client, user, organization_id)  # type: ignore[arg-type]
+        _merge_results(result, startups_result)
+
+        # 3. Sync contacts uniquement pour les startups touchees (eviter full pull)
+        try:
+            contacts = await sr_client.get_contacts()
+        except StartupRadarError as e:
+            result.errors.append(f"Fetch contacts: {e}")
+            contacts = []
+
+        relevant_contacts = [
+            c for c in contacts
+            if str(c.get("startup_id", "")) in sr_to_crm
+        ]
+        if relevant_contacts:
+            # Reuse sync_contacts via partial client (memes contacts)
+            class _ContactsClient:
+                def __init__(self, real_client, contacts):
+                    self._real = real_client
+                    self._contacts = contacts
+
+                async def get_contacts(self):
+                    return self._contacts
+
+                def __getattr__(self, name):
+                    return getattr(self._real, name)
+
+            contacts_client = _ContactsClient(sr_client, relevant_contacts)
+            contacts_result = await sync_contacts(db, contacts_client, user, sr_to_crm, organization_id)  # type: ignore[arg-type]
+            _merge_results(result, contacts_result)
+
+        # 4. Commit final
+        try:
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            result.errors.append(f"Commit recent sync: {e}")
+
+        logger.info(
+            "[SRSync recent] Termine — Companies: +%d/~%d, Contacts: +%d/~%d, "
+            "Funding activities: +%d, Tasks: +%d, Erreurs: %d",
+            result.companies_created, result.companies_updated,
+            result.contacts_created, result.contacts_updated,
+            result.funding_activities_created, result.qualification_tasks_created,
+            len(result.errors),
+        )
 
-    return result
+        return result
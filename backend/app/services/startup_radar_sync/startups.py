@@ -2,80 +2,124 @@
 # FGA CRM - Startup Radar Sync : Startups → Companies
 # sync_startups (upsert companies + funding activities/tasks)
 # =============================================================================
+"""Startups SR -> Companies CRM.
+
+- StartupIndex / load_startup_index : index d'idempotence compacts de l'org
+  (tuples id / empreinte, pas d'entites ORM) charges en UNE requete
+- sync_startup_page : ecrit une page SR (entites candidates chargees par id)
+- sync_startups : liste complete (sync incrementale, tests) sur ces briques
+"""
 
 import logging
 import uuid
+from dataclasses import dataclass, field
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.company import Company
 from app.models.user import User
+from app.services.enrichment.crm_writer import _chunks
 from app.services.startup_radar import StartupRadarClient, StartupRadarError
 
-from ._common import SyncResult, _parse_iso_date
+from ._common import STARTUP_HASH_FIELDS, SyncResult, _content_hash, _parse_iso_date
 from .activities import create_funding_activity, create_qualification_task
 
 logger = logging.getLogger(__name__)
 
 
-async def sync_startups(
+@dataclass
+class StartupIndex:
+    """Index d'idempotence des companies d'une org (memes criteres que les
+    anciens SELECT), en valeurs compactes : la full sync en flux le garde pour
+    tout le catalogue sans retenir d'entite ORM.
+
+    - by_sr_id : startup_radar_id -> (id, startup_radar_hash)
+    - by_siren / by_name : siren / lower(name) -> id, companies SANS startup_radar_id
+    - unlinked_keys : id -> (siren, lower(name)) de ces companies (sortie des
+      index de fallback quand elles sont liees a SR)
+    """
+
+    by_sr_id: dict[str, tuple[uuid.UUID, str | None]] = field(default_factory=dict)
+    by_siren: dict[str, uuid.UUID] = field(default_factory=dict)
+    by_name: dict[str, uuid.UUID] = field(default_factory=dict)
+    unlinked_keys: dict[uuid.UUID, tuple[str | None, str]] = field(default_factory=dict)
+
+    def link(self, sr_id: str, company_id: uuid.UUID, content_hash: str | None) -> None:
+        """La company est (desormais) liee a sr_id : sort des index de fallback."""
+        siren, name = self.unlinked_keys.pop(company_id, (None, None))
+        if siren and self.by_siren.get(siren) == company_id:
+            del self.by_siren[siren]
+        if name is not None and self.by_name.get(name) == company_id:
+            del self.by_name[name]
+        self.by_sr_id[sr_id] = (company_id, content_hash)
+
+
+async def load_startup_index(db: AsyncSession, organization_id: uuid.UUID) -> StartupIndex:
+    """Pre-fetch : colonnes d'idempotence de toutes les companies de l'org (UNE requete)."""
+    index = StartupIndex()
+    rows = await db.execute(
+        select(
+            Company.id, Company.startup_radar_id, Company.startup_radar_hash,
+            Company.siren, Company.name,
+        ).where(Company.organization_id == organization_id)
+    )
+    for company_id, sr_id, content_hash, siren, name in rows:
+        if sr_id:
+            index.by_sr_id[sr_id] = (company_id, content_hash)
+            continue
+        # Les fallback siren/nom ne matchaient que des companies startup_radar_id
+        # IS NULL : on reproduit ce filtre a la construction des index.
+        if siren:
+            index.by_siren[siren] = company_id
+        index.by_name[name.lower()] = company_id
+        index.unlinked_keys[company_id] = (siren, name.lower())
+    return index
+
+
+async def sync_startup_page(
     db: AsyncSession,
-    client: StartupRadarClient,
+    startups: list[dict],
     user: User,
     organization_id: uuid.UUID,
-) -> tuple[SyncResult, dict[str, uuid.UUID]]:
-    """Synchroniser les startups SR en Companies CRM.
+    index: StartupIndex,
+    result: SyncResult,
+    sr_to_crm: dict[str, uuid.UUID] | None = None,
+    force: bool = False,
+) -> None:
+    """Ecrire une page de startups SR (compteurs et erreurs cumules dans result).
 
-    Toutes les entites creees sont taggees `organization_id` et les recherches
-    d'idempotence sont scopees a cette org (isolation multi-tenant).
+    Seules les companies candidates de la page (liees par sr_id, siren ou nom
+    dans l'index) sont chargees en entites, par chunks : la branche update les
+    mute directement (name, funding_*, custom_fields, etc.).
 
-    Perf (fix N+1) : au lieu de faire jusqu'a 3 SELECT d'idempotence par startup
-    (par startup_radar_id, par siren, par lower(name)), on pre-charge en UNE
-    requete toutes les companies de l'org et on construit 3 index en memoire.
-    Les index sont MAINTENUS a chaque creation/liaison dans la boucle pour
-    preserver la dedup intra-batch (deux startups pointant la meme company dans
-    le meme sync ne doivent pas creer / re-lier un doublon).
+    Les index sont MAINTENUS a chaque creation/liaison pour preserver la dedup
+    intra-batch (deux startups pointant la meme company dans la meme sync ne
+    doivent pas creer / re-lier un doublon), y compris d'une page a l'autre.
 
-    Retourne (result_partiel, sr_id_to_company_id_map).
+    Sync delta : une startup deja liee dont l'empreinte du payload
+    (startup_radar_hash) n'a pas change est ignoree (ni UPDATE, ni activite /
+    tache funding) et comptee `companies_unchanged`. force=True reapplique tout.
     """
-    result = SyncResult()
-    sr_to_crm: dict[str, uuid.UUID] = {}
-
-    try:
-        startups = await client.get_startups()
-    except StartupRadarError as e:
-        result.errors.append(f"Fetch startups: {e}")
-        return result, sr_to_crm
-
-    # --- Pre-fetch : toutes les companies de l'org en UNE requete (borne org) ---
-    # On charge les entites completes car la branche update mute directement les
-    # objets (name, funding_*, custom_fields, etc.).
-    existing_companies = (
-        await db.execute(
-            select(Company).where(Company.organization_id == organization_id)
+    # --- Entites candidates de la page (une requete par chunk d'id) ---
+    candidates: set[uuid.UUID] = set()
+    for s in startups:
+        known = index.by_sr_id.get(str(s.get("id", "")))
+        if known is not None:
+            if force or known[1] != _content_hash(s, STARTUP_HASH_FIELDS):
+                candidates.add(known[0])
+            continue
+        siren_clean = (s.get("siren") or "").strip()[:9]
+        if siren_clean and siren_clean in index.by_siren:
+            candidates.add(index.by_siren[siren_clean])
+        if s.get("name") and s["name"].lower() in index.by_name:
+            candidates.add(index.by_name[s["name"].lower()])
+    entities: dict[uuid.UUID, Company] = {}
+    for chunk in _chunks(list(candidates)):
+        entities.update(
+            (c.id, c)
+            for c in (await db.execute(select(Company).where(Company.id.in_(chunk)))).scalars()
         )
-    ).scalars().all()
-
-    # 3 index d'idempotence (memes criteres que les anciens SELECT) :
-    # - by_sr_id : startup_radar_id -> Company (companies deja liees a SR)
-    # - by_siren : siren -> Company parmi celles SANS startup_radar_id
-    # - by_name  : lower(name) -> Company parmi celles SANS startup_radar_id
-    # Les fallback siren/nom ne matchaient que des companies startup_radar_id IS
-    # NULL : on reproduit ce filtre a la construction des index.
-    by_sr_id: dict[str, Company] = {
-        c.startup_radar_id: c for c in existing_companies if c.startup_radar_id
-    }
-    by_siren: dict[str, Company] = {
-        c.siren: c
-        for c in existing_companies
-        if c.siren and c.startup_radar_id is None
-    }
-    by_name: dict[str, Company] = {
-        c.name.lower(): c
-        for c in existing_companies
-        if c.startup_radar_id is None
-    }
 
     for s in startups:
         sr_id = str(s.get("id", ""))
@@ -86,39 +130,36 @@ async def sync_startups(
         # commit du savepoint — jamais avant, pour ne pas polluer les lookups
         # suivants si le savepoint rollback).
         new_company: Company | None = None
-        linked_company: Company | None = None
-        linked_orig_siren: str | None = None
-        linked_orig_name: str | None = None
+
+        content_hash = _content_hash(s, STARTUP_HASH_FIELDS)
+        known = index.by_sr_id.get(sr_id)
+        if not force and known is not None and known[1] == content_hash:
+            if sr_to_crm is not None:
+                sr_to_crm[sr_id] = known[0]
+            result.companies_unchanged += 1
+            continue
 
         try:
             async with db.begin_nested():
                 # 1. Idempotence principale : startup_radar_id (scopee org)
-                existing = by_sr_id.get(sr_id)
+                existing = entities.get(known[0]) if known is not None else None
 
                 # 2. Fallback SIREN : company deja creee (manuellement) avec ce
                 #    siren, pas encore liee a SR. Evite les doublons.
                 if existing is None and s.get("siren"):
                     siren_clean = (s["siren"] or "").strip()[:9]
-                    if siren_clean:
-                        candidate = by_siren.get(siren_clean)
-                        if candidate is not None:
-                            existing = candidate
-                            linked_company = candidate
-                            linked_orig_siren = candidate.siren
-                            linked_orig_name = candidate.name.lower()
+                    if siren_clean and siren_clean in index.by_siren:
+                        existing = entities.get(index.by_siren[siren_clean])
+                        if existing is not None:
                             # Lier la company existante a SR
                             existing.startup_radar_id = sr_id
 
                 # 3. Fallback nom (case-insensitive) si pas encore lie a SR.
                 #    Evite les doublons quand la company existe deja (creee
                 #    manuellement sans SIREN renseigne).
-                if existing is None and s.get("name"):
-                    candidate = by_name.get(s["name"].lower())
-                    if candidate is not None:
-                        existing = candidate
-                        linked_company = candidate
-                        linked_orig_siren = candidate.siren
-                        linked_orig_name = candidate.name.lower()
+                if existing is None and s.get("name") and s["name"].lower() in index.by_name:
+                    existing = entities.get(index.by_name[s["name"].lower()])
+                    if existing is not None:
                         # Lier la company existante a SR (pas de creation)
                         existing.startup_radar_id = sr_id
 
@@ -157,8 +198,8 @@ async def sync_startups(
                         existing_sources = set(existing.funding_sources or [])
                         merged_sources = sorted(existing_sources | set(s["source_names"]))
                         existing.funding_sources = merged_sources
+                    existing.startup_radar_hash = content_hash
 
-                    sr_to_crm[sr_id] = existing.id
                     result.companies_updated += 1
                     company_id = existing.id
                 else:
@@ -180,9 +221,9 @@ async def sync_startups(
                         funding_amount=s.get("amount"),
                         funding_series=(s.get("series") or "")[:50] or None,
                         funding_sources=s.get("source_names"),
+                        startup_radar_hash=content_hash,
                     )
                     db.add(company)
-                    sr_to_crm[sr_id] = company_id
                     result.companies_created += 1
                     new_company = company
 
@@ -204,24 +245,54 @@ async def sync_startups(
             # pointant une meme company pre-existante par nom/siren la re-lieraient
             # (sr_id ecrase) → regression. On ne met a jour qu'APRES commit.
             if new_company is not None:
-                by_sr_id[sr_id] = new_company
-            elif linked_company is not None:
-                # La company vient d'etre liee a SR : elle sort des index nom/siren
-                # (qui n'indexent que les companies sans startup_radar_id) et entre
-                # dans by_sr_id.
-                by_sr_id[sr_id] = linked_company
-                if linked_orig_siren and by_siren.get(linked_orig_siren) is linked_company:
-                    del by_siren[linked_orig_siren]
-                if linked_orig_name is not None and by_name.get(linked_orig_name) is linked_company:
-                    del by_name[linked_orig_name]
+                entities[company_id] = new_company
+            index.link(sr_id, company_id, content_hash)
+            if sr_to_crm is not None:
+                sr_to_crm[sr_id] = company_id
 
         except Exception as e:
             result.errors.append(f"Startup {s.get('name', sr_id)}: {e}")
 
     await db.flush()
+
+
+async def sync_startups(
+    db: AsyncSession,
+    client: StartupRadarClient,
+    user: User,
+    organization_id: uuid.UUID,
+    startups: list[dict] | None = None,
+    force: bool = False,
+) -> tuple[SyncResult, dict[str, uuid.UUID]]:
+    """Synchroniser une liste de startups SR en Companies CRM (une seule page).
+
+    Toutes les entites creees sont taggees `organization_id` et les recherches
+    d'idempotence sont scopees a cette org (isolation multi-tenant).
+
+    Perf (fix N+1) : index d'idempotence pre-charges en UNE requete (cf.
+    load_startup_index) au lieu de 3 SELECT par startup.
+
+    startups : liste SR deja lue par l'appelant ; None = lecture via
+    client.get_startups(). La full sync passe par sync_startup_page en flux.
+
+    Retourne (result_partiel, sr_id_to_company_id_map).
+    """
+    result = SyncResult()
+    sr_to_crm: dict[str, uuid.UUID] = {}
+
+    if startups is None:
+        try:
+            startups = await client.get_startups()
+        except StartupRadarError as e:
+            result.errors.append(f"Fetch startups: {e}")
+            return result, sr_to_crm
+
+    index = await load_startup_index(db, organization_id)
+    await sync_startup_page(db, startups, user, organization_id, index, result, sr_to_crm, force)
     logger.info(
-        "[SRSync] Startups: %d creees, %d mises a jour",
+        "[SRSync] Startups: %d creees, %d mises a jour, %d inchangees",
         result.companies_created,
         result.companies_updated,
+        result.companies_unchanged,
     )
     return result, sr_to_crm
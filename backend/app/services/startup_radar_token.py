@@ -0,0 +1,161 @@
+# =============================================================================
+# FGA CRM - Startup Radar : cache partage du token d'authentification (Redis)
+# =============================================================================
+"""Token SR partage entre syncs, tasks Celery et workers.
+
+- cle : empreinte (sha256) de l'URL SR + credentials — jamais le mot de passe
+  en clair, et un changement de credentials change la cle ;
+- TTL Redis = echeance du token (expires_in de /auth/login, sinon claim `exp`
+  du JWT, sinon startup_radar_token_ttl_seconds) moins une marge : un token
+  servi par le cache est toujours valide ;
+- single-flight : un seul process se re-authentifie (verrou SET NX), les autres
+  attendent le token qu'il publie ;
+- 401 : le token rejete est retire (seulement s'il est encore celui du cache).
+
+Best-effort : Redis KO -> login direct (comportement d'avant le cache).
+
+Client Redis cree a la volee a chaque operation (pas de singleton lie a une
+boucle asyncio — cf. trends/cache.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+
+import redis.asyncio as redis_async
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PREFIX = "startup_radar:token:"
+_LOCK_PREFIX = "startup_radar:token-lock:"
+# Verrou de refresh : au-dela, un login bloque n'empeche plus les autres
+_LOCK_TTL_SECONDS = 30
+_WAIT_STEP_SECONDS = 0.1
+
+# DEL conditionnel : ne retire que le token rejete (pas celui deja renouvele)
+_INVALIDATE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _redis_url() -> str:
+    return os.getenv("REDIS_URL", settings.redis_url)
+
+
+def _client() -> redis_async.Redis:
+    return redis_async.from_url(_redis_url(), decode_responses=True)
+
+
+def credentials_key(base_url: str, email: str, password: str) -> str:
+    """Empreinte des credentials SR (cle du token partage)."""
+    raw = f"{base_url}\n{email}\n{password}".encode()
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def token_expiry(login_response: dict, token: str) -> float:
+    """Echeance (epoch) du token : expires_in, sinon claim exp du JWT, sinon TTL config."""
+    now = time.time()
+    expires_in = login_response.get("expires_in")
+    if isinstance(expires_in, int | float) and expires_in > 0:
+        return now + expires_in
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        if isinstance(claims.get("exp"), int | float):
+            return float(claims["exp"])
+    except (IndexError, ValueError, AttributeError):
+        pass
+    return now + settings.startup_radar_token_ttl_seconds
+
+
+async def get_token(key: str) -> str | None:
+    """Token partage encore valide, ou None (absent, expire, Redis KO)."""
+    client = _client()
+    try:
+        return await client.get(f"{_TOKEN_PREFIX}{key}")
+    except Exception as exc:  # noqa: BLE001 — cache best-effort
+        logger.warning("[StartupRadar] Lecture du token partage echouee : %s", exc)
+        return None
+    finally:
+        await client.aclose()
+
+
+async def store_token(key: str, token: str, expires_at: float) -> None:
+    """Publier le token jusqu'a son echeance (moins la marge). Best-effort."""
+    ttl = int(expires_at - time.time() - settings.startup_radar_token_refresh_margin_seconds)
+    if ttl <= 0:
+        return
+    client = _client()
+    try:
+        await client.set(f"{_TOKEN_PREFIX}{key}", token, ex=ttl)
+    except Exception as exc:  # noqa: BLE001 — cache best-effort
+        logger.warning("[StartupRadar] Ecriture du token partage echouee : %s", exc)
+    finally:
+        await client.aclose()
+
+
+async def invalidate_token(key: str, stale: str) -> None:
+    """Retirer un token rejete (401) s'il est encore celui du cache."""
+    client = _client()
+    try:
+        await client.eval(_INVALIDATE_LUA, 1, f"{_TOKEN_PREFIX}{key}", stale)
+    except Exception as exc:  # noqa: BLE001 — cache best-effort
+        logger.warning("[StartupRadar] Invalidation du token partage echouee : %s", exc)
+    finally:
+        await client.aclose()
+
+
+async def acquire_refresh_lock(key: str) -> bool:
+    """True si l'appelant doit se re-authentifier (verrou pris, ou Redis KO)."""
+    client = _client()
+    try:
+        return bool(await client.set(f"{_LOCK_PREFIX}{key}", "1", nx=True, ex=_LOCK_TTL_SECONDS))
+    except Exception as exc:  # noqa: BLE001 — sans verrou : login direct
+        logger.warning("[StartupRadar] Verrou de refresh indisponible : %s", exc)
+        return True
+    finally:
+        await client.aclose()
+
+
+async def release_refresh_lock(key: str) -> None:
+    client = _client()
+    try:
+        await client.delete(f"{_LOCK_PREFIX}{key}")
+    except Exception as exc:  # noqa: BLE001 — le TTL du verrou le liberera
+        logger.warning("[StartupRadar] Liberation du verrou de refresh echouee : %s", exc)
+    finally:
+        await client.aclose()
+
+
+async def wait_for_token(key: str, timeout: float = _LOCK_TTL_SECONDS) -> str | None:
+    """Attendre le token publie par le process qui detient le verrou.
+
+    None si le verrou est libere sans token (login en echec chez lui), au
+    timeout, ou Redis KO : l'appelant se re-authentifie alors lui-meme.
+    """
+    deadline = time.monotonic() + timeout
+    client = _client()
+    try:
+        while time.monotonic() < deadline:
+            token = await client.get(f"{_TOKEN_PREFIX}{key}")
+            if token:
+                return token
+            if not await client.exists(f"{_LOCK_PREFIX}{key}"):
+                return None
+            await asyncio.sleep(_WAIT_STEP_SECONDS)
+    except Exception as exc:  # noqa: BLE001 — cache best-effort
+        logger.warning("[StartupRadar] Attente du token partage echouee : %s", exc)
+    finally:
+        await client.aclose()
+    return None
@@ -60,12 +60,42 @@ app.conf.update(
 #         "args": (7,),  # days_back = 7
 #     },
 app.conf.beat_schedule = {
+    # Scheduler GEO — planification de la nuit (cadences dues -> batches etales
+    # sur geo_schedule_window_start/end), avant l'ouverture de la fenetre.
+    "geo-schedule-plan-nightly": {
+        "task": "app.tasks.geo.geo_schedule_plan_task",
+        "schedule": crontab(hour=0, minute=30),
+        "args": (),
+    },
+    # Scheduler GEO — envoi des batches planifies arrives a echeance (eta).
+    # Pas d'apply_async(eta=...) : une eta de plusieurs heures depasse le
+    # visibility_timeout Redis (re-livraison) ; la file reste en base.
+    "geo-schedule-dispatch": {
+        "task": "app.tasks.geo.geo_schedule_dispatch_task",
+        "schedule": crontab(minute="*/5"),
+        "args": (),
+    },
     # Metriques GEO — calcul quotidien a 07:00 (apres les runs nocturnes)
     "geo-compute-metrics-daily": {
         "task": "app.tasks.geo.geo_compute_metrics_task",
         "schedule": crontab(hour=7, minute=0),
         "args": (),
     },
+    # Retention GEO — raw_answer > geo_raw_answer_hot_days vers le stockage froid.
+    # Nocturne, hors fenetre des runs et avant le calcul des metriques.
+    "geo-archive-raw-answers-daily": {
+        "task": "app.tasks.geo.geo_archive_raw_answers_task",
+        "schedule": crontab(hour=3, minute=30),
+        "args": (),
+    },
+    # Partitions mensuelles (geo_runs, activities) — creation anticipee des mois
+    # a venir. Quotidien : une execution manquee ne laisse jamais un mois sans
+    # partition (marge = partitions_months_ahead).
+    "partitions-ensure-daily": {
+        "task": "app.tasks.partitions.partitions_ensure_task",
+        "schedule": crontab(hour=2, minute=0),
+        "args": (),
+    },
     # Enrichissement — filet de securite : finalise les bulks sans callback webhook
     # (timeout). Horaire ; le webhook (includeResults) reste le chemin nominal.
     "enrichment-reconcile-bulks-hourly": {
@@ -73,13 +103,58 @@ app.conf.beat_schedule = {
         "schedule": crontab(minute=15),
         "args": (),
     },
+    # Enrichissement — callbacks bulk stages non traites (envoi en file rate,
+    # worker mort en cours de traitement). Le webhook planifie deja la task.
+    "enrichment-drain-callbacks": {
+        "task": "app.tasks.enrichment.enrichment_drain_callbacks_task",
+        "schedule": crontab(minute="*"),
+        "args": (),
+    },
+    # Enrichissement — jobs inline "running" sans heartbeat (worker mort) :
+    # re-enfiles, reprise depuis les checkpoints (sans re-depense de credits).
+    "enrichment-resume-stalled-jobs": {
+        "task": "app.tasks.enrichment.enrichment_resume_stalled_jobs_task",
+        "schedule": crontab(minute="*/5"),
+        "args": (),
+    },
+    # Enrichissement — pre-chauffage nocturne du cache de resolution gouv (SIREN
+    # du CRM sans entree valide) + purge des entrees expirees. Hors heures ouvrees.
+    "enrichment-prewarm-gouv-cache-nightly": {
+        "task": "app.tasks.enrichment.enrichment_prewarm_gouv_cache_task",
+        "schedule": crontab(hour=4, minute=0),
+        "args": (),
+    },
+    # Enrichissement — purge nocturne du cache de verifications email (adresses
+    # et domaines mail expires).
+    "enrichment-purge-verification-cache-nightly": {
+        "task": "app.tasks.enrichment.enrichment_purge_verification_cache_task",
+        "schedule": crontab(hour=4, minute=15),
+        "args": (),
+    },
+    # Lead Engine — consumer des evenements (outbox lead_events) restes en
+    # attente : envoi en file rate apres commit, echec precedent. Le commit de
+    # l'ecriture planifie deja la task (chemin nominal, signaux en secondes).
+    "lead-engine-process-events": {
+        "task": "app.tasks.lead_engine.lead_engine_process_events_task",
+        "schedule": crontab(minute="*"),
+        "args": (),
+    },
     # Lead Engine — detecteur de signaux (funding_detected / mmf_gap). Horaire,
     # decale de l'enrichissement. Kill switch : LEAD_ENGINE_ENABLED.
+    # Filet de rattrapage de la detection sur ecriture (evenements en echec,
+    # ecritures hors ORM). Incremental : lignes modifiees depuis le dernier scan.
     "lead-engine-scan-hourly": {
         "task": "app.tasks.lead_engine.lead_engine_scan_task",
         "schedule": crontab(minute=45),
         "args": (),
     },
+    # Lead Engine — rescan complet quotidien : rattrape ce que seul le temps
+    # change (cle de dedup expiree, seuil modifie). Hors heures ouvrees.
+    "lead-engine-full-scan-nightly": {
+        "task": "app.tasks.lead_engine.lead_engine_scan_task",
+        "schedule": crontab(hour=3, minute=45),
+        "args": (True,),
+    },
 }
 
 # Decouverte automatique : autodiscover_tasks scanne pour `tasks.py` dans
@@ -92,6 +167,7 @@ from app.tasks import (  # noqa: E402, F401, I001  — register tasks
     funding_sync,
     geo,
     lead_engine,
+    partitions,
     startup_radar_full_sync,
     trends,
 )
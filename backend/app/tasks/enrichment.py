@@ -2,7 +2,16 @@
 # FGA CRM - Celery Tasks : enrichissement d'emails B2B (feature Compass)
 # =============================================================================
 """Task Celery d'enrichissement (mode company | batch | icp). Async via
-asyncio.run + task_session_maker (NullPool). job_id transite en str."""
+asyncio.run + task_session_maker (NullPool). job_id transite en str.
+
+Callbacks bulk Icypeas : traitement d'un callback stage par le webhook
+(enrichment_process_callback_task) + drain beat des callbacks en attente.
+
+Reprise : les jobs running sans heartbeat (worker mort) sont re-enfiles par le
+beat (enrichment_resume_stalled_jobs_task) et reprennent depuis leurs checkpoints.
+
+Cache gouv : pre-chauffage nocturne des SIREN du CRM (enrichment_prewarm_gouv_cache_task).
+Cache des verifications email : purge nocturne des entrees expirees."""
 
 import asyncio
 import logging
@@ -10,8 +19,17 @@ from uuid import UUID
 
 from app.config import settings
 from app.db.session import task_session_maker
-from app.services.enrichment.bulk_callback import reconcile_stuck_bulks
+from app.services.enrichment.adapters.gouv import GouvCompanySource
+from app.services.enrichment.bulk_callback import (
+    drain_staged_callbacks,
+    process_staged_callback,
+    reconcile_stuck_bulks,
+)
+from app.services.enrichment.checkpoints import find_stalled_jobs
+from app.services.enrichment.factory import close_provider_clients
+from app.services.enrichment.gouv_cache import GouvResolutionCache, prewarm_gouv_cache
 from app.services.enrichment.orchestrator import run_enrichment_job
+from app.services.enrichment.verification_cache import purge_verification_cache
 from app.tasks.celery_app import app
 
 logger = logging.getLogger(__name__)
@@ -20,13 +38,17 @@ logger = logging.getLogger(__name__)
 async def _run(job_id: str) -> dict:
     from app.models.enrichment import EnrichmentJob
 
-    async with task_session_maker() as db:
-        job = await db.get(EnrichmentJob, UUID(job_id))
-        if job is None:
-            logger.warning("[Enrichment task] job %s introuvable", job_id)
-            return {"job_id": job_id, "status": "not_found"}
-        await run_enrichment_job(db, job)
-        return {"job_id": job_id, "status": job.status}
+    try:
+        async with task_session_maker() as db:
+            job = await db.get(EnrichmentJob, UUID(job_id))
+            if job is None:
+                logger.warning("[Enrichment task] job %s introuvable", job_id)
+                return {"job_id": job_id, "status": "not_found"}
+            await run_enrichment_job(db, job)
+            return {"job_id": job_id, "status": job.status}
+    finally:
+        # Client Icypeas lie a la loop de CETTE tache : ferme avant asyncio.run
+        await close_provider_clients()
 
 
 @app.task(
@@ -47,6 +69,29 @@ def enrichment_run_job_task(self, job_id: str) -> dict:
         raise
 
 
+async def _stalled() -> list[str]:
+    async with task_session_maker() as db:
+        return [str(job_id) for job_id in await find_stalled_jobs(db)]
+
+
+@app.task(name="app.tasks.enrichment.enrichment_resume_stalled_jobs_task")
+def enrichment_resume_stalled_jobs_task() -> dict:
+    """Task Celery (beat) — re-enfile les jobs running dont le worker est mort.
+
+    La prise atomique (claim_job) empeche deux executions du meme job.
+    """
+    try:
+        job_ids = asyncio.run(_stalled())
+    except Exception as exc:
+        logger.exception("[Enrichment task] erreur detection jobs bloques : %s", exc)
+        raise
+    for job_id in job_ids:
+        enrichment_run_job_task.delay(job_id)
+    if job_ids:
+        logger.info("[Enrichment task] %d job(s) bloque(s) re-enfile(s)", len(job_ids))
+    return {"resumed": len(job_ids)}
+
+
 async def _reconcile() -> dict:
     async with task_session_maker() as db:
         n = await reconcile_stuck_bulks(db, timeout_hours=settings.enrichment_bulk_timeout_hours)
@@ -64,3 +109,77 @@ def enrichment_reconcile_bulks_task() -> dict:
     except Exception as exc:
         logger.exception("[Enrichment reconcile] erreur : %s", exc)
         raise
+
+
+async def _process_callback(callback_id: str) -> dict:
+    async with task_session_maker() as db:
+        return await process_staged_callback(db, UUID(callback_id))
+
+
+@app.task(name="app.tasks.enrichment.enrichment_process_callback_task")
+def enrichment_process_callback_task(callback_id: str) -> dict:
+    """Task Celery — traite un callback bulkDone stage (chunks). En cas d'echec,
+    le callback reste en base et le drain beat le reprend."""
+    try:
+        return asyncio.run(_process_callback(callback_id))
+    except Exception as exc:
+        logger.exception("[Enrichment callback] erreur %s : %s", callback_id, exc)
+        raise
+
+
+async def _drain() -> dict:
+    async with task_session_maker() as db:
+        return {"processed": await drain_staged_callbacks(db)}
+
+
+@app.task(name="app.tasks.enrichment.enrichment_drain_callbacks_task")
+def enrichment_drain_callbacks_task() -> dict:
+    """Task Celery (beat) — traite les callbacks stages restes en attente."""
+    try:
+        result = asyncio.run(_drain())
+        if result["processed"]:
+            logger.info("[Enrichment callback] drain : %s callback(s) traite(s)", result["processed"])
+        return result
+    except Exception as exc:
+        logger.exception("[Enrichment callback] erreur drain : %s", exc)
+        raise
+
+
+async def _prewarm() -> dict:
+    async with task_session_maker() as db:
+        source = GouvCompanySource(cache=GouvResolutionCache(task_session_maker))
+        return await prewarm_gouv_cache(
+            db, source, limit=settings.enrichment_gouv_prewarm_limit,
+        )
+
+
+@app.task(name="app.tasks.enrichment.enrichment_prewarm_gouv_cache_task")
+def enrichment_prewarm_gouv_cache_task() -> dict:
+    """Task Celery (beat) — purge le cache gouv expire et resout les SIREN du CRM
+    sans entree valide (les jobs suivants ne paient plus la resolution)."""
+    if settings.enrichment_company_source != "gouv":
+        return {"skipped": "company_source"}
+    try:
+        result = asyncio.run(_prewarm())
+        logger.info("[Enrichment] pre-chauffage cache gouv : %s", result)
+        return result
+    except Exception as exc:
+        logger.exception("[Enrichment] erreur pre-chauffage cache gouv : %s", exc)
+        raise
+
+
+async def _purge_verifications() -> dict:
+    async with task_session_maker() as db:
+        return await purge_verification_cache(db)
+
+
+@app.task(name="app.tasks.enrichment.enrichment_purge_verification_cache_task")
+def enrichment_purge_verification_cache_task() -> dict:
+    """Task Celery (beat) — purge les verifications et domaines mail expires."""
+    try:
+        result = asyncio.run(_purge_verifications())
+        logger.info("[Enrichment] purge cache verifications : %s", result)
+        return result
+    except Exception as exc:
+        logger.exception("[Enrichment] erreur purge cache verifications : %s", exc)
+        raise
@@ -4,7 +4,13 @@
 """Tasks Celery du module GEO.
 
 - geo_run_batch_task : execute un batch de runs (collect -> extract -> store)
+  puis calcule aussitot les metriques du jour de la marque sur ce moteur
 - geo_compute_metrics_task : calcule/met a jour les metriques quotidiennes
+  (les deux rafraichissent le cache materialise du dashboard des marques touchees)
+- geo_archive_raw_answers_task : retention (raw_answer anciens -> stockage froid)
+- geo_schedule_plan_task : planifie la nuit (cadences dues -> batches etales)
+- geo_schedule_dispatch_task : reprend les batches bloques puis envoie les
+  batches planifies dont l'eta est passee
 
 Celery ne supporte pas nativement les coroutines : on wrappe via asyncio.run.
 Tous les IDs transitent en str (JSON-serializable) et sont convertis en UUID
@@ -13,13 +19,22 @@ dans la coroutine.
 
 import asyncio
 import logging
-from datetime import date
+from datetime import UTC, date, datetime, timedelta
 from uuid import UUID
 
 from app.db.session import task_session_maker
 from app.services.geo.audit import run_audit_job
+from app.services.geo.dashboard import refresh_brand_dashboards
 from app.services.geo.pipeline import execute_geo_batch
-from app.services.geo.scorer import compute_all_metrics
+from app.services.geo.retention import archive_raw_answers
+from app.services.geo.scheduler import (
+    claim_batch_run,
+    claim_due_batches,
+    mark_batch_finished,
+    plan_night,
+    reap_stale_batches,
+)
+from app.services.geo.scorer import compute_all_metrics, compute_daily_metrics
 from app.tasks.celery_app import app
 
 logger = logging.getLogger(__name__)
@@ -32,21 +47,47 @@ async def _run_batch(
     n_runs: int,
     country: str,
     language: str,
+    scheduled_batch_id: str | None = None,
+    task_id: str | None = None,
 ) -> dict:
-    """Wrapper async — cree sa propre session DB (pas d'injection FastAPI)."""
+    """Wrapper async — cree sa propre session DB (pas d'injection FastAPI).
+
+    Batch planifie : demarre seulement si ce message (task_id) le reclame ; un
+    message perime (batch repris puis renvoye, deja termine) ne fait rien.
+    """
     brand_uuid = UUID(brand_id)
     prompt_uuids = [UUID(p) for p in prompt_ids]
+    batch_uuid = UUID(scheduled_batch_id) if scheduled_batch_id else None
 
     async with task_session_maker() as db:
-        result = await execute_geo_batch(
-            db,
-            brand_id=brand_uuid,
-            engine=engine,
-            prompt_ids=prompt_uuids,
-            n_runs=n_runs,
-            country=country,
-            language=language,
-        )
+        if batch_uuid is not None and not await claim_batch_run(db, batch_uuid, task_id or ""):
+            logger.warning(
+                "[GEO task] batch %s non reclame par %s (deja pris ou termine), skip",
+                batch_uuid, task_id,
+            )
+            return {"total": 0, "success": 0, "failed": 0, "skipped": True}
+        started = datetime.now(UTC)
+        try:
+            result = await execute_geo_batch(
+                db,
+                brand_id=brand_uuid,
+                engine=engine,
+                prompt_ids=prompt_uuids,
+                n_runs=n_runs,
+                country=country,
+                language=language,
+            )
+        except Exception:
+            if batch_uuid is not None:
+                await db.rollback()
+                await mark_batch_finished(db, batch_uuid, task_id or "", 0, 0, error=True)
+            raise
+        if batch_uuid is not None:
+            await mark_batch_finished(
+                db, batch_uuid, task_id or "", result["success"], result["failed"],
+            )
+        await _compute_brand_metrics(db, brand_uuid, engine, started)
+        await refresh_brand_dashboards(db, [brand_uuid])
     # Les RunResult ne sont pas JSON-serializables — on ne renvoie que les compteurs.
     return {
         "total": result["total"],
@@ -55,6 +96,24 @@ async def _run_batch(
     }
 
 
+async def _compute_brand_metrics(db, brand_id: UUID, engine: str, started: datetime) -> None:
+    """Metriques de la marque sur ce moteur, des la fin du batch (pas a 07:00).
+
+    Un batch nocturne peut chevaucher minuit UTC : chaque jour touche est recalcule
+    (upsert — le passage de 07:00 reste valable et idempotent).
+    """
+    day = started.date()
+    last = datetime.now(UTC).date()
+    while day <= last:
+        try:
+            await compute_daily_metrics(db, brand_id, day, engine)
+            await db.commit()
+        except Exception as exc:  # noqa: BLE001 — le batch reste acquis
+            await db.rollback()
+            logger.error("[GEO task] metriques brand=%s jour=%s : %s", brand_id, day, exc)
+        day += timedelta(days=1)
+
+
 @app.task(
     name="app.tasks.geo.geo_run_batch_task",
     bind=True,
@@ -69,15 +128,22 @@ def geo_run_batch_task(
     n_runs: int = 3,
     country: str = "FR",
     language: str = "fr",
+    scheduled_batch_id: str | None = None,
 ) -> dict:
-    """Task Celery — execute un batch de runs GEO."""
+    """Task Celery — execute un batch de runs GEO.
+
+    scheduled_batch_id : batch de la file nocturne (suivi de statut), si planifie.
+    """
     logger.info(
         "[GEO task] batch demarre brand=%s engine=%s prompts=%d n_runs=%d",
         brand_id, engine, len(prompt_ids), n_runs,
     )
     try:
         result = asyncio.run(
-            _run_batch(brand_id, engine, prompt_ids, n_runs, country, language)
+            _run_batch(
+                brand_id, engine, prompt_ids, n_runs, country, language,
+                scheduled_batch_id, self.request.id,
+            )
         )
         logger.info("[GEO task] batch termine : %s", result)
         return result
@@ -90,7 +156,9 @@ async def _compute_metrics(target_date: str | None) -> dict:
     """Wrapper async pour le calcul des metriques."""
     parsed: date | None = date.fromisoformat(target_date) if target_date else None
     async with task_session_maker() as db:
-        return await compute_all_metrics(db, target_date=parsed)
+        result = await compute_all_metrics(db, target_date=parsed)
+        await refresh_brand_dashboards(db, [UUID(b) for b in result["brands"]])
+    return result
 
 
 @app.task(name="app.tasks.geo.geo_compute_metrics_task", bind=True)
@@ -117,6 +185,29 @@ def geo_compute_metrics_task(
         raise
 
 
+async def _archive_raw_answers(older_than_days: int | None) -> dict:
+    """Wrapper async du job de retention (session dediee — NullPool)."""
+    async with task_session_maker() as db:
+        report = await archive_raw_answers(db, older_than_days=older_than_days)
+    return report.as_dict()
+
+
+@app.task(name="app.tasks.geo.geo_archive_raw_answers_task", bind=True)
+def geo_archive_raw_answers_task(self, older_than_days: int | None = None) -> dict:
+    """Task Celery — archive les raw_answer anciens et rapporte l'espace recupere.
+
+    older_than_days : defaut settings.geo_raw_answer_hot_days.
+    """
+    logger.info("[GEO task] retention demarre older_than_days=%s", older_than_days)
+    try:
+        result = asyncio.run(_archive_raw_answers(older_than_days))
+        logger.info("[GEO task] retention terminee : %s", result)
+        return result
+    except Exception as exc:
+        logger.exception("[GEO task] erreur fatale retention : %s", exc)
+        raise
+
+
 async def _run_audit(audit_job_id: str) -> dict:
     """Charge le job d'audit et l'execute (session dediee — NullPool)."""
     from app.models.geo import GeoAuditJob
@@ -146,3 +237,72 @@ def geo_audit_visibility_task(self, audit_job_id: str) -> dict:
     except Exception as exc:
         logger.exception("[GEO audit task] erreur fatale %s : %s", audit_job_id, exc)
         raise
+
+
+async def _plan_night() -> dict:
+    async with task_session_maker() as db:
+        return await plan_night(db)
+
+
+@app.task(name="app.tasks.geo.geo_schedule_plan_task", bind=True)
+def geo_schedule_plan_task(self) -> dict:
+    """Task Celery — planifie les batches de la nuit (cadences dues). Idempotent."""
+    try:
+        result = asyncio.run(_plan_night())
+        logger.info("[GEO scheduler task] planification : %s", result)
+        return result
+    except Exception as exc:
+        logger.exception("[GEO scheduler task] erreur fatale planification : %s", exc)
+        raise
+
+
+async def _dispatch_due() -> dict:
+    """Envoyer a Celery les batches dont l'eta est passee.
+
+    Les batches bloques (queued / running sans suite) sont d'abord repris. Le
+    claim (planned -> queued, task_id, dispatched_at) est commite AVANT l'envoi
+    sous ce task_id : un batch parti n'est jamais renvoye par un echec ulterieur
+    et le worker le reclame meme s'il demarre avant la fin du dispatch. Envoi en
+    echec : le batch repasse `planned` (sans consommer d'essai) ; claim perdu
+    (crash entre commit et envoi) : repris par le reaper.
+    """
+    dispatched = 0
+    async with task_session_maker() as db:
+        report = await reap_stale_batches(db)
+        batches = await claim_due_batches(db)
+        await db.commit()
+        for batch in batches:
+            try:
+                geo_run_batch_task.apply_async(  # type: ignore[attr-defined]
+                    kwargs={
+                        "brand_id": str(batch.brand_id),
+                        "engine": batch.engine,
+                        "prompt_ids": list(batch.prompt_ids),
+                        "n_runs": batch.n_runs,
+                        "scheduled_batch_id": str(batch.id),
+                    },
+                    task_id=batch.task_id,
+                )
+            except Exception as exc:  # noqa: BLE001 — broker KO : batch replanifie
+                logger.error("[GEO scheduler task] envoi batch %s KO : %s", batch.id, exc)
+                batch.status = "planned"
+                batch.task_id = None
+                batch.dispatched_at = None
+                batch.attempts -= 1
+            else:
+                dispatched += 1
+            await db.commit()
+    return {"dispatched": dispatched, **report}
+
+
+@app.task(name="app.tasks.geo.geo_schedule_dispatch_task", bind=True)
+def geo_schedule_dispatch_task(self) -> dict:
+    """Task Celery — envoie les batches planifies arrives a echeance."""
+    try:
+        result = asyncio.run(_dispatch_due())
+        if any(result.values()):
+            logger.info("[GEO scheduler task] envoi : %s", result)
+        return result
+    except Exception as exc:
+        logger.exception("[GEO scheduler task] erreur fatale envoi : %s", exc)
+        raise
@@ -1,10 +1,14 @@
 # =============================================================================
 # FGA CRM - Celery Tasks : module Lead Engine
 # =============================================================================
-"""Task periodique du detecteur de signaux Lead Engine.
+"""Tasks du detecteur de signaux Lead Engine.
 
+- lead_engine_process_events_task : consomme les evenements metier de l'outbox
+  (lead_events) — planifiee apres chaque commit qui en emet, drain beat minute ;
 - lead_engine_scan_task : scanne toutes les orgs actives et cree les signaux
-  (funding_detected / mmf_gap) manquants — beat horaire (celery_app).
+  (funding_detected / mmf_gap) manquants — filet de rattrapage : beat horaire
+  incremental (lignes modifiees depuis le watermark), rescan complet quotidien
+  (full=True).
 
 Celery ne supporte pas nativement les coroutines : on wrappe via asyncio.run.
 Kill switch : settings.lead_engine_enabled (skip silencieux + log).
@@ -16,23 +20,53 @@ import logging
 from app.config import settings
 from app.db.session import task_session_maker
 from app.services.lead_engine.detector import scan_all_orgs
+from app.services.lead_engine.events import process_lead_events
 from app.tasks.celery_app import app
 
 logger = logging.getLogger(__name__)
 
 
-async def _scan() -> dict:
-    """Wrapper async — cree sa propre session DB (pas d'injection FastAPI)."""
-    async with task_session_maker() as db:
-        return await scan_all_orgs(db)
+async def _scan(full: bool = False) -> dict:
+    """Wrapper async — une session DB par org (task_session_maker, NullPool)."""
+    return await scan_all_orgs(full=full, session_factory=task_session_maker)
 
 
 @app.task(name="app.tasks.lead_engine.lead_engine_scan_task")
-def lead_engine_scan_task() -> dict:
-    """Scanner les signaux Lead Engine de toutes les organisations actives."""
+def lead_engine_scan_task(full: bool = False) -> dict:
+    """Scanner les signaux Lead Engine de toutes les organisations actives.
+
+    full=False : incremental (watermarks par org et detecteur) ; True : complet.
+    """
     if not settings.lead_engine_enabled:
         logger.info("[LeadEngine] Scan desactive (lead_engine_enabled=false)")
         return {"skipped": True}
-    result = asyncio.run(_scan())
-    logger.info("[LeadEngine] Scan global : %s", result)
+    result = asyncio.run(_scan(full))
+    logger.info(
+        "[LeadEngine] Scan global%s : %s",
+        " complet" if full else "",
+        {k: v for k, v in result.items() if k != "per_org"},
+    )
+    for report in result["per_org"][:5]:
+        logger.info("[LeadEngine] Org la plus lente : %s", report)
     return result
+
+
+async def _process_events() -> dict:
+    async with task_session_maker() as db:
+        return await process_lead_events(db)
+
+
+@app.task(name="app.tasks.lead_engine.lead_engine_process_events_task")
+def lead_engine_process_events_task() -> dict:
+    """Evaluer les evenements Lead Engine en attente (detection sur ecriture).
+
+    Idempotente : plusieurs executions concurrentes se partagent la file
+    (SKIP LOCKED) ; un evenement non traite reste en base pour la suivante.
+    """
+    if not settings.lead_engine_enabled:
+        return {"skipped": True}
+    try:
+        return asyncio.run(_process_events())
+    except Exception as exc:
+        logger.exception("[LeadEngine] Erreur consumer d'evenements : %s", exc)
+        raise
@@ -0,0 +1,33 @@
+# =============================================================================
+# FGA CRM - Celery Tasks : maintenance des partitions
+# =============================================================================
+"""Task periodique de creation anticipee des partitions mensuelles.
+
+- partitions_ensure_task : garantit les partitions geo_runs / activities du mois
+  courant + settings.partitions_months_ahead mois — beat quotidien (celery_app).
+
+Celery ne supporte pas nativement les coroutines : on wrappe via asyncio.run.
+"""
+
+import asyncio
+import logging
+
+from app.db.partitions import ensure_future_partitions
+from app.db.session import task_session_maker
+from app.tasks.celery_app import app
+
+logger = logging.getLogger(__name__)
+
+
+async def _ensure() -> list[str]:
+    """Wrapper async — cree sa propre session DB (pas d'injection FastAPI)."""
+    async with task_session_maker() as db:
+        return await ensure_future_partitions(db)
+
+
+@app.task(name="app.tasks.partitions.partitions_ensure_task")
+def partitions_ensure_task() -> dict:
+    """Creer les partitions mensuelles a venir (idempotent)."""
+    ensured = asyncio.run(_ensure())
+    logger.info("[Partitions] task terminee : %d partitions", len(ensured))
+    return {"ensured": ensured}
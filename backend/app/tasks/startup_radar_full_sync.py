@@ -44,7 +44,7 @@ logger = logging.getLogger(__name__)
 MAX_STORED_ERRORS = 50
 
 
-async def _run_full_sync(user_id: str) -> dict:
+async def _run_full_sync(user_id: str, force: bool = False) -> dict:
     """Charge l'owner (celui qui a clique) dans une session dediee puis lance
     la full sync. Retourne le SyncResult serialise en dict."""
     async with task_session_maker() as db:
@@ -59,7 +59,7 @@ async def _run_full_sync(user_id: str) -> dict:
 
         # Isolation multi-tenant : les entites creees sont rattachees a l'org du
         # user declencheur (organization_id NOT NULL depuis le contract).
-        result = await full_sync(db, user, user.organization_id)
+        result = await full_sync(db, user, user.organization_id, force=force)
         return dataclasses.asdict(result)
 
 
@@ -76,20 +76,23 @@ def _cap_errors(result: dict) -> dict:
 
 
 @app.task(name="app.tasks.startup_radar_full_sync.full_sync_task", bind=True)
-def full_sync_task(self, user_id: str, job_id: str, started_at: str) -> dict:
+def full_sync_task(
+    self, user_id: str, job_id: str, started_at: str, force: bool = False,
+) -> dict:
     """Full sync SR -> CRM en tache de fond.
 
     Args:
         user_id: owner des entites creees (celui qui a lance la sync).
         job_id: identifiant du job (valeur du verrou pose par l'endpoint).
         started_at: timestamp ISO du lancement (pour le statut).
+        force: resync complete (ignore les empreintes de contenu SR).
 
     Le statut 'running' a deja ete pose par l'endpoint. Ici on ecrit le statut
     final (completed/failed) et on libere le verrou dans tous les cas.
     """
-    logger.info("[FullSync] Demarrage job=%s user=%s", job_id, user_id)
+    logger.info("[FullSync] Demarrage job=%s user=%s force=%s", job_id, user_id, force)
     try:
-        result = _cap_errors(asyncio.run(_run_full_sync(user_id)))
+        result = _cap_errors(asyncio.run(_run_full_sync(user_id, force)))
         set_status_sync(build_status(
             job_id=job_id,
             status=STATUS_COMPLETED,
@@ -0,0 +1,89 @@
+"""
+Benchmark — cascade d'enrichissement hors ligne (services/enrichment/simulator.py).
+
+Fait passer des societes synthetiques dans la phase reseau du pipeline inline
+(_source_people -> _lookup_person, meme CreditLedger, memes bornes de
+concurrence) avec des fournisseurs simules, et compare des configurations :
+- ordre des finders : cout croissant (prod) vs premium d'abord
+- concurrence societes x personnes
+
+Rapporte par configuration : personnes/s, credits par email trouve, p50/p95 de
+latence par societe, appels/credits par fournisseur (temps simule : les
+latences sont compressees par TIME_SCALE, les metriques restent comparables).
+
+Usage (aucune base, aucun appel reseau) :
+    python -m scripts.bench_enrichment_waterfall [config.json] [companies]
+
+config.json : une SimulationConfig (ou une liste) au format de
+SimulationConfig.from_dict ; sans fichier, les configurations ci-dessous.
+"""
+
+import asyncio
+import json
+import sys
+
+from app.services.enrichment.simulator import (
+    ProviderProfile,
+    SimulationConfig,
+    run_simulation,
+)
+
+TIME_SCALE = 0.01  # 100x plus rapide que les latences simulees
+
+LEADS = ProviderProfile(name="leads", cost=0.02, hit_rate=0.8, latency_ms=400, latency_sigma=0.4)
+CHEAP = ProviderProfile(name="finder-cheap", cost=0.5, hit_rate=0.5, latency_ms=800,
+                        latency_sigma=0.5)
+PREMIUM = ProviderProfile(name="finder-premium", cost=1.0, hit_rate=0.85, latency_ms=1500,
+                          latency_sigma=0.6, error_rate=0.01, max_concurrency=10)
+VERIFY = ProviderProfile(name="verifier", cost=0.1, hit_rate=0.7, latency_ms=300,
+                         latency_sigma=0.3)
+
+
+def _presets(companies: int) -> dict[str, SimulationConfig]:
+    def _config(finders, company_concurrency=4, person_concurrency=3):
+        return SimulationConfig(
+            people_sources=[LEADS], finders=finders, verifiers=[VERIFY],
+            companies=companies, company_concurrency=company_concurrency,
+            person_concurrency=person_concurrency, time_scale=TIME_SCALE,
+        )
+
+    return {
+        "cheap_first": _config([CHEAP, PREMIUM]),
+        "premium_first": _config([PREMIUM, CHEAP]),
+        "premium_only": _config([PREMIUM]),
+        "cheap_first_c8_p3": _config([CHEAP, PREMIUM], company_concurrency=8),
+        "cheap_first_c8_p6": _config([CHEAP, PREMIUM], company_concurrency=8,
+                                     person_concurrency=6),
+    }
+
+
+def _load(path: str, companies: int | None) -> dict[str, SimulationConfig]:
+    with open(path) as fh:
+        raw = json.load(fh)
+    items = raw if isinstance(raw, list) else [raw]
+    configs = {}
+    for i, item in enumerate(items):
+        name = item.pop("label", f"config_{i + 1}")
+        if companies:
+            item["companies"] = companies
+        configs[name] = SimulationConfig.from_dict(item)
+    return configs
+
+
+async def _run(configs: dict[str, SimulationConfig]) -> dict:
+    # Sequentiel : chaque run mesure sa propre concurrence
+    return {name: (await run_simulation(config)).to_dict() for name, config in configs.items()}
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    path = next((a for a in args if a.endswith(".json")), None)
+    counts = [int(a) for a in args if a.isdigit()]
+    companies = counts[0] if counts else None
+    configs = _load(path, companies) if path else _presets(companies or 200)
+    results = asyncio.run(_run(configs))
+    print(json.dumps(results, indent=2))  # noqa: T201 — sortie du benchmark
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark — memoire de la full sync Startup Radar : en flux vs listes completes.
+
+Sert un faux catalogue SR pagine (httpx.MockTransport, items generes a la volee)
+et le synchronise dans une base SQLite jetable, selon deux modes :
+- stream : full_sync (pages -> ecriture -> commit + point de reprise, index compacts)
+- list   : catalogue materialise (get_startups/get_investors/get_contacts) puis
+  sync_startups / sync_investors / sync_contacts / sync_audits, un seul commit
+
+Chaque mode tourne dans son propre process (RSS non pollue par l'autre) et
+rapporte : duree, pic RSS (ru_maxrss), pic tracemalloc, RSS avant sync,
+compteurs du SyncResult.
+
+Usage (aucune base a fournir, aucun appel reseau) :
+    python -m scripts.bench_startup_radar_sync [startups] [stream|list]
+
+Catalogue : `startups` startups (defaut 20 000), 3 contacts par startup,
+1 investisseur pour 10 startups.
+"""
+
+import asyncio
+import dataclasses
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+import httpx
+
+MODES = ("stream", "list")
+CONTACTS_PER_STARTUP = 3
+
+
+def _items(path: str, start: int, stop: int, startups: int) -> list[dict]:
+    if path == "/startups":
+        return [
+            {
+                "id": f"s{i}", "name": f"Startup {i}", "sector": "SaaS",
+                "website": f"https://startup{i}.example", "description": "x" * 200,
+                "status": "active",
+            }
+            for i in range(start, stop)
+        ]
+    if path == "/investors":
+        return [{"id": i, "name": f"Fonds {i}", "startups_count": i % 40} for i in range(start, stop)]
+    return [
+        {
+            "id": f"c{i}", "first_name": f"Prenom{i}", "last_name": f"Nom{i}",
+            "email": f"p{i}@startup{i // CONTACTS_PER_STARTUP}.example", "title": "CEO",
+            "startup_id": f"s{i // CONTACTS_PER_STARTUP}",
+        }
+        for i in range(start, stop)
+    ]
+
+
+def _transport(startups: int) -> httpx.MockTransport:
+    totals = {
+        "/startups": startups,
+        "/investors": startups // 10,
+        "/contacts": startups * CONTACTS_PER_STARTUP,
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/api/v1")
+        if path not in totals:
+            return httpx.Response(404)  # audits : aucun dans le faux SR
+        page = int(request.url.params["page"])
+        size = int(request.url.params["size"])
+        total = totals[path]
+        start = (page - 1) * size
+        return httpx.Response(200, json={
+            "items": _items(path, start, min(start + size, total), startups),
+            "page": page,
+            "pages": max(1, -(-total // size)),
+        })
+
+    return httpx.MockTransport(handler)
+
+
+async def _child(mode: str, startups: int, db_path: str) -> dict:
+    # Imports app ici : le process parent ne fait que lancer / agreger
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.asyncio import (
+        AsyncSession,
+        async_sessionmaker,
+        create_async_engine,
+    )
+    from sqlalchemy.types import JSON
+
+    from app.models import Base
+    from app.models.organization import Organization
+    from app.models.user import User
+    from app.services import startup_radar_sync
+    from app.services.startup_radar import StartupRadarClient
+    from app.services.startup_radar_sync import runner
+
+    # JSONB -> JSON pour SQLite (cf. tests/conftest.py)
+    for table in Base.metadata.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, JSONB):
+                column.type = JSON()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False, autoflush=False,
+    )
+
+    def _client() -> StartupRadarClient:
+        return StartupRadarClient(
+            base_url="http://sr.bench/api/v1", transport=_transport(startups), max_rps=0,
+        )
+
+    async with session_maker() as db:
+        org = Organization(id=uuid.uuid4(), name="Bench", slug="bench", is_active=True)
+        user = User(
+            id=uuid.uuid4(), email="bench@fga.fr", hashed_password="-",
+            full_name="Bench", role="admin", is_active=True, organization_id=org.id,
+        )
+        db.add_all([org, user])
+        await db.commit()
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        started = time.perf_counter()
+        if mode == "stream":
+            runner.StartupRadarClient = _client
+            result = await startup_radar_sync.full_sync(db, user, org.id)
+        else:
+            async with _client() as client:
+                result = startup_radar_sync.SyncResult()
+                startups_list = await client.get_startups()
+                partial, sr_to_crm = await startup_radar_sync.sync_startups(
+                    db, client, user, org.id, startups=startups_list,
+                )
+                startup_radar_sync._merge_results(result, partial)
+                for partial in (
+                    await startup_radar_sync.sync_investors(db, client, user, org.id),
+                    await startup_radar_sync.sync_contacts(db, client, user, sr_to_crm, org.id),
+                    await startup_radar_sync.sync_audits(
+                        db, client, user, sr_to_crm, startups_list, org.id,
+                    ),
+                ):
+                    startup_radar_sync._merge_results(result, partial)
+                await db.commit()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    await engine.dispose()
+    counters = dataclasses.asdict(result)
+    counters["errors"] = len(counters["errors"])
+    return {
+        "mode": mode,
+        "startups": startups,
+        "seconds": round(elapsed, 2),
+        # ru_maxrss : Ko sous Linux
+        "rss_before_mb": round(rss_before / 1024, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "tracemalloc_peak_mb": round(peak / 2**20, 1),
+        "result": {k: v for k, v in counters.items() if v},
+    }
+
+
+def _run_mode(mode: str, startups: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run(  # noqa: S603 — relance de ce module, arguments maitrises
+            [sys.executable, "-m", "scripts.bench_startup_radar_sync", "--child", mode,
+             str(startups), os.path.join(tmp, "bench.db")],
+            check=True, capture_output=True, text=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        _, mode, startups, db_path = args
+        report = asyncio.run(_child(mode, int(startups), db_path))
+        print(json.dumps(report))  # noqa: T201 — sortie lue par le process parent
+        return
+    counts = [int(a) for a in args if a.isdigit()]
+    modes = [a for a in args if a in MODES] or list(MODES)
+    startups = counts[0] if counts else 20_000
+    results = [_run_mode(mode, startups) for mode in modes]
+    print(json.dumps(results, indent=2))  # noqa: T201 — sortie du benchmark
+
+
+if __name__ == "__main__":
+    main()
@@ -114,3 +114,34 @@ async def test_activities_unauthenticated(client: AsyncClient):
     """Acces sans token = 403."""
     response = await client.get("/api/v1/activities/")
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_list_activities_date_window(
+    client: AsyncClient, auth_headers: dict, db_session, test_user
+):
+    """Fenetre date_from/date_to inclusive sur created_at (plage elaguable)."""
+    from datetime import UTC, datetime
+
+    from app.models.activity import Activity
+
+    for day in (1, 15, 28):
+        db_session.add(Activity(
+            type="note",
+            subject=f"jour {day}",
+            user_id=test_user.id,
+            organization_id=test_user.organization_id,
+            created_at=datetime(2026, 2, day, 12, tzinfo=UTC),
+        ))
+    await db_session.commit()
+
+    response = await client.get(
+        "/api/v1/activities/?date_from=2026-02-15&date_to=2026-02-28",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    subjects = {a["subject"] for a in response.json()["items"]}
+    assert subjects == {"jour 15", "jour 28"}
+
+    bad = await client.get("/api/v1/activities/?date_from=15-02-2026", headers=auth_headers)
+    assert bad.status_code == 422
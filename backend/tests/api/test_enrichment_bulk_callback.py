@@ -1,20 +1,33 @@
-"""Tests W2 : traitement du callback webhook Icypeas (bulk) + endpoint HMAC."""
+"""Tests W2 : traitement du callback webhook Icypeas (bulk) + endpoint HMAC +
+ingestion stagee (re-livraison, reprise par chunks, benchmark 5000 items)."""
 
 from __future__ import annotations
 
 import hashlib
 import hmac
+import time
+import uuid
 from datetime import UTC, datetime
 
 import pytest
 from httpx import AsyncClient
-from sqlalchemy import select
+from sqlalchemy import event, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.contact import Contact
-from app.models.enrichment import EnrichmentBulk, EnrichmentBulkItem, EnrichmentJob
-from app.services.enrichment.bulk_callback import process_bulk_callback
+from app.models.enrichment import (
+    EnrichmentBulk,
+    EnrichmentBulkCallback,
+    EnrichmentBulkItem,
+    EnrichmentJob,
+)
+from app.services.enrichment import bulk_callback
+from app.services.enrichment.bulk_callback import (
+    process_bulk_callback,
+    process_staged_callback,
+    stage_bulk_callback,
+)
 
 _WEBHOOK_PATH = "/api/v1/integrations/icypeas/webhook"
 
@@ -180,3 +193,189 @@ async def test_webhook_replay_guard_fails_open_on_redis_error(client: AsyncClien
 
     r = await client.post(_WEBHOOK_PATH, json=body)
     assert r.status_code == 200
+
+
+# ---------------------------------------------------------------------------
+# Ingestion stagee : accuse rapide, chunks, reprise, re-livraison
+# ---------------------------------------------------------------------------
+
+def _bulk_results(n: int, *, found_every: int = 1) -> dict:
+    results = []
+    for i in range(n):
+        found = i % found_every == 0
+        results.append({
+            "results": {"firstname": f"P{i}", "lastname": "Test",
+                        "emails": [{"email": f"p{i}@fast-growth.fr", "certainty": "ultra_sure"}]
+                        if found else []},
+            "status": "DEBITED" if found else "NOT_FOUND",
+            "userData": {"externalId": f"ext-{i}"},
+        })
+    return {"file": "BIG", "total": n, "type": "email-search", "results": results}
+
+
+async def _seed_big_bulk(db: AsyncSession, org_id, n: int) -> EnrichmentBulk:
+    job = EnrichmentJob(mode="batch", status="awaiting_results", target_json={}, organization_id=org_id)
+    db.add(job)
+    await db.flush()
+    bulk = EnrichmentBulk(
+        file="BIG", task="email-search", status="awaiting_results", total=n,
+        organization_id=org_id, job_id=job.id,
+    )
+    db.add(bulk)
+    await db.flush()
+    await db.execute(insert(EnrichmentBulkItem), [
+        {"bulk_id": bulk.id, "external_id": f"ext-{i}", "organization_id": org_id,
+         "status": "pending",
+         "context_json": {"company": {"siren": "123", "name": "FGA", "domain": "fast-growth.fr"},
+                          "person": {"first_name": f"P{i}", "last_name": "Test", "role": "CTO"}}}
+        for i in range(n)
+    ])
+    await db.commit()
+    return bulk
+
+
+@pytest.mark.asyncio
+async def test_stage_bulk_callback_redelivery_is_noop(db_session: AsyncSession, test_org):
+    await _seed_bulk(db_session, test_org.id, "FILE3")
+    first = await stage_bulk_callback(db_session, _callback_data("FILE3"))
+    again = await stage_bulk_callback(db_session, _callback_data("FILE3"))
+    assert first["duplicate"] is False
+    assert again == {**first, "duplicate": True}  # meme ligne de staging
+    assert await db_session.scalar(select(func.count()).select_from(EnrichmentBulkCallback)) == 1
+    # Rien n'est traite a la reception
+    assert await db_session.scalar(select(func.count()).select_from(Contact)) == 0
+
+    res = await process_staged_callback(db_session, uuid.UUID(first["callback_id"]))
+    assert res["found"] == 2
+    # Traitement concurrent/rejoue du meme callback : reclame une seule fois
+    assert (await process_staged_callback(db_session, uuid.UUID(first["callback_id"])))["skipped"]
+    assert await db_session.scalar(select(func.count()).select_from(Contact)) == 2
+
+
+@pytest.mark.asyncio
+async def test_staged_callback_resumes_after_failure(db_session: AsyncSession, test_org, monkeypatch):
+    """Crash au 2e chunk : le 1er reste commite (curseur), la reprise finit le
+    bulk sans double comptage."""
+    monkeypatch.setattr(settings, "enrichment_callback_chunk_size", 2)
+    bulk = await _seed_big_bulk(db_session, test_org.id, 5)
+    staged = await stage_bulk_callback(db_session, _bulk_results(5, found_every=2))
+    callback_id = uuid.UUID(staged["callback_id"])
+
+    real_chunk = bulk_callback._process_chunk
+    calls = {"n": 0}
+
+    async def crash_second(db, bulk, chunk, *, suppressions=None):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("worker tue")
+        return await real_chunk(db, bulk, chunk, suppressions=suppressions)
+
+    monkeypatch.setattr(bulk_callback, "_process_chunk", crash_second)
+    with pytest.raises(RuntimeError):
+        await process_staged_callback(db_session, callback_id)
+    callback = await db_session.get(EnrichmentBulkCallback, callback_id, populate_existing=True)
+    assert (callback.status, callback.items_processed) == ("received", 2)
+    await db_session.refresh(bulk)
+    assert (bulk.done, bulk.found) == (2, 1)
+
+    # Reprise (drain beat) a partir du 3e resultat
+    assert await bulk_callback.drain_staged_callbacks(db_session) == 1
+    await db_session.refresh(bulk)
+    assert (bulk.status, bulk.done, bulk.found, bulk.valid) == ("done", 5, 3, 3)
+    job = await db_session.get(EnrichmentJob, bulk.job_id, populate_existing=True)
+    assert job.status == "done"
+    assert (job.stats_json["emails_found"], job.stats_json["valid"]) == (3, 3)
+
+
+@pytest.mark.asyncio
+async def test_always_failing_callback_stops_after_max_attempts(
+    db_session: AsyncSession, test_org, monkeypatch, caplog,
+):
+    """Echec hors items (parsing) a chaque essai : failed + alerte au dernier,
+    plus repris par le drain."""
+    monkeypatch.setattr(settings, "enrichment_callback_max_attempts", 2)
+    await _seed_bulk(db_session, test_org.id, "FILE5")
+    staged = await stage_bulk_callback(db_session, _callback_data("FILE5"))
+    callback_id = uuid.UUID(staged["callback_id"])
+
+    def _broken(_data):
+        raise ValueError("payload illisible")
+
+    monkeypatch.setattr(bulk_callback, "parse_bulk_callback", _broken)
+    with pytest.raises(ValueError):
+        await process_staged_callback(db_session, callback_id)
+    callback = await db_session.get(EnrichmentBulkCallback, callback_id, populate_existing=True)
+    assert (callback.status, callback.attempts) == ("received", 1)
+
+    # 2e essai (drain) : dernier -> failed, alerte
+    assert await bulk_callback.drain_staged_callbacks(db_session) == 0
+    callback = await db_session.get(EnrichmentBulkCallback, callback_id, populate_existing=True)
+    assert (callback.status, callback.attempts, callback.error) == ("failed", 2, "payload illisible")
+    assert any(r.levelname == "ERROR" and "abandonne" in r.message for r in caplog.records)
+
+    assert await bulk_callback.drain_staged_callbacks(db_session) == 0
+    assert (await process_staged_callback(db_session, callback_id))["skipped"]
+    callback = await db_session.get(EnrichmentBulkCallback, callback_id, populate_existing=True)
+    assert callback.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_webhook_stages_and_enqueues(client: AsyncClient, db_session: AsyncSession, test_org, monkeypatch):
+    from app.tasks.enrichment import enrichment_process_callback_task
+
+    monkeypatch.setattr(settings, "icypeas_webhook_verify", False)
+    monkeypatch.setattr(settings, "app_env", "development")
+    queued: list[str] = []
+    monkeypatch.setattr(enrichment_process_callback_task, "delay", queued.append)
+    await _seed_bulk(db_session, test_org.id, "FILE4")
+
+    body = {"signature": "x", "timestamp": "t", "data": _callback_data("FILE4")}
+    r = await client.post(_WEBHOOK_PATH, json=body)
+    assert r.status_code == 200
+    assert r.json()["callback_id"] == queued[0]
+    # Re-livraison : acceptee, pas re-planifiee
+    r2 = await client.post(_WEBHOOK_PATH, json=body)
+    assert r2.json()["duplicate"] is True
+    assert len(queued) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_callback_5000_items_benchmark(
+    db_session: AsyncSession, test_org, record_property,
+):
+    """Callback synthetique de 5000 items : traitement en chunks ensemblistes
+    (requetes ~ nb de chunks, pas d'items). Durees rapportees, pas assertees
+    (instables sur un runner charge)."""
+    from tests.conftest import test_engine
+
+    n = 5000
+    bulk = await _seed_big_bulk(db_session, test_org.id, n)
+    data = _bulk_results(n, found_every=2)
+
+    started = time.perf_counter()
+    staged = await stage_bulk_callback(db_session, data)
+    ack_time = time.perf_counter() - started
+
+    statements = {"n": 0}
+
+    def _count(*_a, **_k):
+        statements["n"] += 1
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        started = time.perf_counter()
+        res = await process_staged_callback(db_session, uuid.UUID(staged["callback_id"]))
+        process_time = time.perf_counter() - started
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _count)
+
+    assert res == {"matched": True, "done": n, "found": n // 2, "total": n}
+    await db_session.refresh(bulk)
+    assert bulk.valid == n // 2
+    assert await db_session.scalar(
+        select(func.count()).select_from(Contact).where(Contact.organization_id == test_org.id)
+    ) == n // 2
+    chunks = -(-n // settings.enrichment_callback_chunk_size)
+    assert statements["n"] <= 20 * chunks, statements["n"]
+    record_property("ack_ms", round(ack_time * 1000))
+    record_property("process_ms", round(process_time * 1000))
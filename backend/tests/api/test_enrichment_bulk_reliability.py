@@ -52,10 +52,10 @@ async def test_bulk_callback_marks_person_fresh(db_session: AsyncSession, test_o
     # #5 : le mode bulk doit marquer la personne fraiche (sinon re-run re-facture tout)
     touched: list[str] = []
 
-    async def fake_touch(key, ttl, *, client=None):
-        touched.append(key)
+    async def fake_touch_many(keys, ttl, *, client=None):
+        touched.extend(keys)
 
-    monkeypatch.setattr(freshness, "touch", fake_touch)
+    monkeypatch.setattr(freshness, "touch_many", fake_touch_many)
     await _seed(db_session, test_org.id, "F1", ["ext-1"])
 
     res = await bulk_callback.process_bulk_callback(db_session, {"file": "F1", "results": [_found("ext-1", "a@acme.fr")]})
@@ -66,12 +66,17 @@ async def test_bulk_callback_marks_person_fresh(db_session: AsyncSession, test_o
 
 @pytest.mark.asyncio
 async def test_bulk_callback_isolates_failing_item(db_session: AsyncSession, test_org, monkeypatch):
-    # #1 : un item qui plante est marque 'error' et n'annule pas les autres (pas de 500)
-    async def flaky(db, bulk, item, res, *, fresh_client=None):
+    # #1 : un item qui plante est marque 'error' et n'annule pas les autres (pas de 500).
+    # Le chunk en lot echoue d'abord, puis le repli item par item isole la ligne.
+    async def failing_chunk(db, bulk, pairs, *, suppressions=None):
+        raise ValueError("collision")
+
+    async def flaky(db, bulk, item, res, *, suppressions=None):
         if item.external_id == "ext-1":
             raise ValueError("boom")
         item.status = "found"
 
+    monkeypatch.setattr(bulk_callback, "_resolve_chunk", failing_chunk)
     monkeypatch.setattr(bulk_callback, "_resolve_item", flaky)
     await _seed(db_session, test_org.id, "F2", ["ext-1", "ext-2"])
 
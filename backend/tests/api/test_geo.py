@@ -7,23 +7,39 @@
 - scorer.compute_daily_metrics : formules visibility/sov/sentiment/reco
 - pipeline.execute_geo_run : matching marque + guard anti-doublon (collecteur/
   extracteur mockes — aucun appel reseau)
+- retention : archivage des raw_answer anciens + rehydratation en vue detail
+- dashboard : cache materialise versionne par marque, ETag/304, repli sans Redis
+- gaps : requete SQL unique — parite avec l'ancien calcul Python + pagination
+- scheduler : etalement des eta sur la fenetre nocturne (budget moteur),
+  cadence every_days, idempotence, dispatch des batches dus, file /schedules
 """
 
-from datetime import UTC, date, datetime
-from uuid import uuid4
+from datetime import UTC, date, datetime, timedelta
+from uuid import UUID, uuid4
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.geo import GeoBrand, GeoPrompt, GeoRun
+from app.models.geo import GeoBrand, GeoPrompt, GeoRun, GeoSchedule, GeoScheduledBatch
 from app.schemas.geo import (
     ExtractionResult,
     GeoSentiment,
     MarqueTrouvee,
 )
+from app.services.geo import dashboard as geo_dashboard
 from app.services.geo import pipeline as geo_pipeline
 from app.services.geo.collector import CollectorResult
+from app.services.geo.gaps import find_gaps, suggest_action
+from app.services.geo.retention import archive_raw_answers
+from app.services.geo.scheduler import (
+    claim_due_batches,
+    night_window,
+    plan_night,
+    queue_overview,
+    reap_stale_batches,
+)
 from app.services.geo.scorer import compute_daily_metrics
 
 # ---------------------------------------------------------------------------
@@ -435,3 +451,645 @@ async def test_pipeline_no_match_brand_not_mentioned(
     run = await db_session.get(GeoRun, result.run_id)
     assert run.brand_mentioned is False
     assert run.brand_position is None
+
+
+# ---------------------------------------------------------------------------
+# Retention — stockage froid des raw_answer
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_archive_moves_only_old_raw_answers(db_session: AsyncSession):
+    brand, prompt = await _seed_brand(db_session)
+    old_text = "FGA est cite. " * 200
+    old = _make_run(
+        brand, prompt, run_index=1, raw_answer=old_text,
+        run_at=datetime.now(UTC) - timedelta(days=120),
+    )
+    recent = _make_run(brand, prompt, run_index=2, raw_answer="recent")
+    db_session.add_all([old, recent])
+    await db_session.commit()
+
+    report = await archive_raw_answers(db_session, older_than_days=90, batch_size=1)
+    assert report.runs_archived == 1
+    assert report.bytes_raw == len(old_text.encode())
+    assert 0 < report.bytes_compressed < report.bytes_raw
+    assert report.bytes_reclaimed == report.bytes_raw - report.bytes_compressed
+
+    await db_session.refresh(old)
+    await db_session.refresh(recent)
+    assert old.raw_answer is None
+    assert old.raw_answer_archived_at is not None
+    assert recent.raw_answer == "recent"
+    assert recent.raw_answer_archived_at is None
+
+    # Idempotent : un second passage ne trouve plus rien
+    again = await archive_raw_answers(db_session, older_than_days=90)
+    assert again.runs_archived == 0
+
+
+@pytest.mark.asyncio
+async def test_run_detail_rehydrates_archived_answer(
+    client: AsyncClient, auth_headers: dict, db_session: AsyncSession
+):
+    brand = await _create_brand(client, auth_headers)
+    prompt = await _create_prompt(client, auth_headers, brand["id"])
+    run = GeoRun(
+        prompt_id=UUID(prompt["id"]),
+        brand_id=UUID(brand["id"]),
+        engine="perplexity",
+        run_at=datetime.now(UTC) - timedelta(days=200),
+        raw_answer="Reponse archivee",
+        citations=[],
+        brands_found=[],
+    )
+    db_session.add(run)
+    await db_session.commit()
+    await archive_raw_answers(db_session, older_than_days=90)
+
+    listing = await client.get(
+        f"/api/v1/geo/runs?brand_id={brand['id']}", headers=auth_headers
+    )
+    assert listing.status_code == 200
+    item = listing.json()["items"][0]
+    assert item["raw_answer"] is None
+    assert item["raw_answer_archived_at"] is not None
+
+    detail = await client.get(f"/api/v1/geo/runs/{run.id}", headers=auth_headers)
+    assert detail.status_code == 200
+    assert detail.json()["raw_answer"] == "Reponse archivee"
+
+    missing = await client.get(f"/api/v1/geo/runs/{uuid4()}", headers=auth_headers)
+    assert missing.status_code == 404
+
+
+# ---------------------------------------------------------------------------
+# Dashboard — cache materialise + ETag
+# ---------------------------------------------------------------------------
+
+class _FakeRedis:
+    """Redis en memoire minimal : GET / SET (NX) / INCR."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = str(value)
+        return True
+
+    async def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+        return int(self.store[key])
+
+    async def aclose(self):
+        pass
+
+
+async def _seed_dashboard_runs(
+    client: AsyncClient, headers: dict, db: AsyncSession
+) -> tuple[dict, GeoPrompt]:
+    brand = await _create_brand(client, headers)
+    prompt = await _create_prompt(client, headers, brand["id"])
+    for idx, engine in enumerate(["perplexity", "openai", "perplexity"]):
+        db.add(GeoRun(
+            prompt_id=UUID(prompt["id"]),
+            brand_id=UUID(brand["id"]),
+            engine=engine,
+            run_index=idx + 1,
+            run_at=datetime.now(UTC) - timedelta(days=1),
+            citations=[{"url": "https://a.fr/x", "domain": "a.fr"}],
+            brands_found=[{"nom": "Rival"}, {"nom": "FGA"}],
+        ))
+    await db.commit()
+    return brand, prompt
+
+
+@pytest.mark.asyncio
+async def test_dashboard_etag_304_and_version_invalidation(
+    client: AsyncClient, auth_headers: dict, db_session: AsyncSession, monkeypatch
+):
+    fake = _FakeRedis()
+    monkeypatch.setattr(geo_dashboard, "_client", lambda: fake)
+    brand, _ = await _seed_dashboard_runs(client, auth_headers, db_session)
+    url = f"/api/v1/geo/brands/{brand['id']}/dashboard?engine=perplexity"
+
+    first = await client.get(url, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.json()["top_sources"] == [{"domain": "a.fr", "count": 2}]
+
+    cached = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    # Fin de batch -> bump de version : l'ancien ETag n'est plus valide.
+    await geo_dashboard.refresh_brand_dashboards(db_session, [UUID(brand["id"])])
+    fresh = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_refresh_materialises_default_window(
+    client: AsyncClient, auth_headers: dict, db_session: AsyncSession, monkeypatch
+):
+    fake = _FakeRedis()
+    monkeypatch.setattr(geo_dashboard, "_client", lambda: fake)
+    brand, _ = await _seed_dashboard_runs(client, auth_headers, db_session)
+
+    written = await geo_dashboard.refresh_brand_dashboards(
+        db_session, [UUID(brand["id"])]
+    )
+    # 2 dashboards (perplexity, openai) + concurrents (tous, perplexity, openai)
+    assert written == 5
+
+    async def _no_build():
+        raise AssertionError("payload materialise attendu, pas de recalcul")
+
+    monkeypatch.setattr(geo_dashboard, "build_competitors", lambda *a: _no_build())
+    resp = await client.get(
+        f"/api/v1/geo/brands/{brand['id']}/competitors", headers=auth_headers
+    )
+    assert resp.status_code == 200
+    # Top N par moteur fusionne : Rival et FGA cites dans les 3 runs.
+    assert {c["nom"]: c["mentions"] for c in resp.json()} == {"Rival": 3, "FGA": 3}
+
+
+@pytest.mark.asyncio
+async def test_dashboard_without_redis_serves_fresh(
+    client: AsyncClient, auth_headers: dict, db_session: AsyncSession, monkeypatch
+):
+    async def _down(*_a, **_k):
+        return None
+
+    monkeypatch.setattr(geo_dashboard, "get_version", _down)
+    monkeypatch.setattr("app.api.v1.geo.dashboard.get_version", _down)
+    brand, _ = await _seed_dashboard_runs(client, auth_headers, db_session)
+
+    resp = await client.get(
+        f"/api/v1/geo/brands/{brand['id']}/competitors?engine=openai",
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    assert "etag" not in resp.headers
+    assert [c["nom"] for c in resp.json()] == ["Rival", "FGA"]
+
+
+@pytest.mark.asyncio
+async def test_competitors_bounded_per_engine_keeps_recent_runs(
+    db_session: AsyncSession, monkeypatch
+):
+    """Un moteur a fort volume n'evince pas les autres ; les runs recents gagnent."""
+    monkeypatch.setattr(geo_dashboard, "MAX_RUNS_PER_ENGINE", 2)
+    brand, prompt = await _seed_brand(db_session)
+    now = datetime.now(UTC)
+    for idx in range(6):
+        # 2 runs les plus recents -> "Recent", les anciens -> "Old"
+        db_session.add(_make_run(
+            brand, prompt, engine="perplexity", run_index=idx + 1,
+            run_at=now - timedelta(hours=idx + 1),
+            brands_found=[{"nom": "Recent" if idx < 2 else "Old"}],
+        ))
+    db_session.add(_make_run(
+        brand, prompt, engine="openai", run_at=now - timedelta(days=2),
+        brands_found=[{"nom": "Rare"}],
+    ))
+    await db_session.flush()
+
+    result = await geo_dashboard.build_competitors(
+        db_session, brand.id, None, (now - timedelta(days=7)).date(), now.date()
+    )
+    assert {c["nom"]: c["mentions"] for c in result} == {"Recent": 2, "Rare": 1}
+
+
+# ---------------------------------------------------------------------------
+# Gaps — requete SQL unique (parite avec l'ancien calcul Python)
+# ---------------------------------------------------------------------------
+
+async def _legacy_gaps(db: AsyncSession, brand_id, engine: str, cutoff: datetime) -> list[dict]:
+    """Reference : ancien calcul Python de brand_gaps (sans les plafonds 200/2000)."""
+    from collections import defaultdict
+
+    prompts = (await db.execute(
+        select(GeoPrompt)
+        .where(GeoPrompt.brand_id == brand_id, GeoPrompt.active.is_(True))
+        .order_by(GeoPrompt.created_at, GeoPrompt.id)
+    )).scalars().all()
+    runs = (await db.execute(
+        select(GeoRun)
+        .where(
+            GeoRun.prompt_id.in_([p.id for p in prompts]),
+            GeoRun.engine == engine,
+            GeoRun.run_at >= cutoff,
+        )
+        .order_by(GeoRun.run_at.desc())
+    )).scalars().all()
+    by_prompt: dict = defaultdict(list)
+    for run in runs:
+        if len(by_prompt[run.prompt_id]) < 10:
+            by_prompt[run.prompt_id].append(run)
+
+    gaps = []
+    for prompt in prompts:
+        recent = by_prompt.get(prompt.id, [])
+        if not recent:
+            continue
+        mentions = sum(1 for r in recent if r.brand_mentioned)
+        total = len(recent)
+        if mentions and mentions / total >= 0.5:
+            continue
+        sources: dict[str, int] = {}
+        brands: dict[str, int] = {}
+        if mentions == 0:
+            for run in recent:
+                for cit in run.citations or []:
+                    if cit.get("domain", ""):
+                        sources[cit["domain"]] = sources.get(cit["domain"], 0) + 1
+                for entry in run.brands_found or []:
+                    if entry.get("nom", ""):
+                        brands[entry["nom"]] = brands.get(entry["nom"], 0) + 1
+        top_sources = sorted(sources.items(), key=lambda x: -x[1])[:5]
+        top_brands = sorted(brands.items(), key=lambda x: -x[1])[:5]
+        gaps.append({
+            "prompt_id": str(prompt.id),
+            "prompt_text": prompt.text,
+            "intent": prompt.intent,
+            "priority": prompt.priority,
+            "runs_checked": total,
+            "mentions": mentions,
+            "visibility_rate": round(mentions / total * 100, 1) if mentions else 0.0,
+            "top_competitor_sources": [{"domain": d, "count": c} for d, c in top_sources],
+            "top_competitors": [{"nom": n, "count": c} for n, c in top_brands],
+            "last_run_at": recent[0].run_at.isoformat(),
+            "action_suggestion": suggest_action(prompt.intent, top_sources),
+        })
+    gaps.sort(key=lambda g: (not g["priority"], g["visibility_rate"]))
+    return gaps
+
+
+async def _seed_gap_fixtures(db: AsyncSession, brand: GeoBrand) -> None:
+    """Prompts varies : gap total, partiel, couvert, >10 runs, hors fenetre, inactif."""
+    now = datetime.now(UTC)
+    domains = ["g2.com", "reddit.com", "a.fr", "b.fr", "wikipedia.org", "c.fr", "d.fr"]
+    rivals = ["Rival", "Other", "Third", "Fourth", "Fifth", "Sixth"]
+    # (intent, priority, active, [(jours, mentionne), ...])
+    specs = [
+        ("comparatif", False, True, [(1, False)] * 3),
+        ("transactionnel", True, True, [(d, d % 3 == 0) for d in range(1, 14)]),
+        ("informationnel", False, True, [(1, True), (2, False), (3, False)]),
+        ("comparatif", True, True, [(1, True), (2, True), (3, False)]),
+        ("informationnel", True, True, [(d, False) for d in range(1, 13)]),
+        ("comparatif", False, True, [(40, False), (2, True), (3, False), (4, False)]),
+        ("transactionnel", False, False, [(1, False)] * 2),
+        ("informationnel", False, True, []),
+    ]
+    for p_idx, (intent, priority, active, runs) in enumerate(specs):
+        prompt = GeoPrompt(
+            brand_id=brand.id, text=f"q{p_idx}", intent=intent,
+            priority=priority, active=active,
+            created_at=now - timedelta(days=100 - p_idx),
+        )
+        db.add(prompt)
+        await db.flush()
+        for r_idx, (days_ago, mentioned) in enumerate(runs):
+            n = p_idx + r_idx
+            db.add(_make_run(
+                brand, prompt, run_index=r_idx + 1,
+                run_at=now - timedelta(days=days_ago, minutes=r_idx),
+                brand_mentioned=mentioned,
+                citations=[
+                    {"domain": domains[(n + k) % len(domains)]} for k in range(n % 4)
+                ] + [{"url": "sans-domaine"}],
+                brands_found=[{"nom": rivals[(n * k) % len(rivals)]} for k in range(1 + n % 3)],
+            ))
+            # Autre moteur : ne doit jamais compter
+            db.add(_make_run(
+                brand, prompt, engine="openai", run_index=r_idx + 1,
+                run_at=now - timedelta(days=days_ago, minutes=r_idx),
+                brand_mentioned=False,
+            ))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_gaps_sql_matches_legacy_python(db_session: AsyncSession):
+    brand, _ = await _seed_brand(db_session)
+    await _seed_gap_fixtures(db_session, brand)
+    now = datetime.now(UTC)
+    cutoff = now - timedelta(days=30)
+
+    expected = await _legacy_gaps(db_session, brand.id, "perplexity", cutoff)
+    items, total = await find_gaps(
+        db_session, brand.id, "perplexity", cutoff, now + timedelta(days=1), limit=100,
+    )
+    assert total == len(expected) == 5
+    assert items == expected
+
+    # Pages successives = decoupage de la liste complete, total constant
+    page1, total1 = await find_gaps(
+        db_session, brand.id, "perplexity", cutoff, now + timedelta(days=1), limit=2,
+    )
+    page3, total3 = await find_gaps(
+        db_session, brand.id, "perplexity", cutoff, now + timedelta(days=1),
+        offset=4, limit=2,
+    )
+    assert (page1, total1) == (expected[:2], 5)
+    assert (page3, total3) == (expected[4:], 5)
+    beyond, total_beyond = await find_gaps(
+        db_session, brand.id, "perplexity", cutoff, now + timedelta(days=1), offset=10,
+    )
+    assert (beyond, total_beyond) == ([], 5)
+
+
+@pytest.mark.asyncio
+async def test_gaps_endpoint_paginates(client: AsyncClient, auth_headers: dict, db_session):
+    brand = await _create_brand(client, auth_headers)
+    for idx in range(3):
+        prompt = await _create_prompt(client, auth_headers, brand["id"], text=f"q{idx}")
+        db_session.add(GeoRun(
+            prompt_id=UUID(prompt["id"]), brand_id=UUID(brand["id"]),
+            engine="perplexity", run_at=datetime.now(UTC) - timedelta(hours=idx + 1),
+            citations=[], brands_found=[{"nom": "Rival"}], brand_mentioned=False,
+        ))
+    await db_session.commit()
+
+    resp = await client.get(
+        f"/api/v1/geo/brands/{brand['id']}/gaps?engine=perplexity&page=2&size=2",
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["total"], body["pages"], body["page"]) == (3, 2, 2)
+    assert len(body["items"]) == 1
+    assert body["items"][0]["top_competitors"] == [{"nom": "Rival", "count": 1}]
+
+
+# ---------------------------------------------------------------------------
+# Scheduler nocturne
+# ---------------------------------------------------------------------------
+
+async def _seed_schedule(
+    db: AsyncSession, slug: str, prompts: int = 2, **kwargs
+) -> GeoSchedule:
+    brand = GeoBrand(slug=slug, name=slug.upper())
+    db.add(brand)
+    await db.flush()
+    db.add_all(
+        GeoPrompt(brand_id=brand.id, text=f"{slug} q{i}", intent="comparatif")
+        for i in range(prompts)
+    )
+    schedule = GeoSchedule(brand_id=brand.id, engine="perplexity", n_runs=3, **kwargs)
+    db.add(schedule)
+    await db.flush()
+    return schedule
+
+
+async def _batches(db: AsyncSession, night: date) -> list[GeoScheduledBatch]:
+    return list(
+        (
+            await db.execute(
+                select(GeoScheduledBatch)
+                .where(GeoScheduledBatch.night == night)
+                .order_by(GeoScheduledBatch.eta)
+            )
+        ).scalars().all()
+    )
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+@pytest.mark.asyncio
+async def test_plan_night_spreads_within_window(db_session: AsyncSession):
+    await _seed_schedule(db_session, "alpha")
+    await _seed_schedule(db_session, "beta", prompts=1)
+    await db_session.commit()
+    night = date(2026, 3, 10)
+    start, end = night_window(night)
+
+    report = await plan_night(db_session, night)
+    assert (report["planned"], report["runs"]) == (2, 9)
+
+    batches = await _batches(db_session, night)
+    assert sorted(b.runs_planned for b in batches) == [3, 6]
+    # 9 runs << budget perplexity : etalement sur toute la fenetre, au prorata
+    assert _utc(batches[0].eta) == start
+    assert _utc(batches[1].eta) == start + (end - start) * batches[0].runs_planned / 9
+    assert all(_utc(b.eta) < end for b in batches)
+
+    # Re-planification de la meme nuit : aucun doublon
+    again = await plan_night(db_session, night)
+    assert again["planned"] == 0
+    assert len(await _batches(db_session, night)) == 2
+
+
+@pytest.mark.asyncio
+async def test_plan_night_respects_engine_budget_and_cadence(
+    db_session: AsyncSession, monkeypatch
+):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "geo_engine_runs_per_hour", {"perplexity": 2})
+    await _seed_schedule(db_session, "alpha")
+    await _seed_schedule(db_session, "beta", every_days=2)
+    await db_session.commit()
+    night = date(2026, 3, 10)
+    start, _ = night_window(night)
+
+    await plan_night(db_session, night)
+    batches = await _batches(db_session, night)
+    # 12 runs a 2 runs/h = 6 h > fenetre de 5 h : le debit prime sur la fenetre
+    assert _utc(batches[1].eta) == start + timedelta(hours=3)
+
+    # Nuit suivante : seule la cadence quotidienne est due
+    next_night = night + timedelta(days=1)
+    assert (await plan_night(db_session, next_night))["planned"] == 1
+    assert (await plan_night(db_session, next_night + timedelta(days=1)))["planned"] == 2
+
+
+@pytest.mark.asyncio
+async def test_claim_due_batches_only_past_eta(db_session: AsyncSession):
+    await _seed_schedule(db_session, "alpha")
+    await _seed_schedule(db_session, "beta")
+    await db_session.commit()
+    night = date(2026, 3, 10)
+    start, _ = night_window(night)
+    await plan_night(db_session, night)
+
+    claimed = await claim_due_batches(db_session, now=start + timedelta(minutes=1))
+    await db_session.commit()
+    assert len(claimed) == 1
+    statuses = [b.status for b in await _batches(db_session, night)]
+    assert statuses == ["queued", "planned"]
+    assert await claim_due_batches(db_session, now=start + timedelta(minutes=1)) == []
+
+
+@pytest.mark.asyncio
+async def test_dispatch_commits_claim_before_publish(db_session: AsyncSession, monkeypatch):
+    from app.tasks import geo as geo_tasks
+    from tests.conftest import test_session_maker
+
+    await _seed_schedule(db_session, "alpha")
+    await _seed_schedule(db_session, "beta")
+    await db_session.commit()
+    night = date(2026, 3, 10)
+    await plan_night(db_session, night)
+
+    sent: list[tuple[str, str]] = []
+
+    def _apply_async(kwargs, task_id):
+        # 1er envoi accepte, 2e refuse par le broker
+        if sent:
+            raise ConnectionError("broker down")
+        sent.append((kwargs["scheduled_batch_id"], task_id))
+
+    monkeypatch.setattr(geo_tasks, "task_session_maker", test_session_maker)
+    monkeypatch.setattr(geo_tasks.geo_run_batch_task, "apply_async", _apply_async)
+    result = await geo_tasks._dispatch_due()
+    assert result == {"dispatched": 1, "requeued": 0, "failed": 0}
+
+    batches = await _batches(db_session, night)
+    for batch in batches:
+        await db_session.refresh(batch)
+    by_status = {b.status: b for b in batches}
+    # Envoye sous le task_id du claim ; envoi en echec : replanifie sans essai
+    assert sent == [(str(by_status["queued"].id), by_status["queued"].task_id)]
+    assert by_status["queued"].attempts == 1
+    assert by_status["queued"].dispatched_at is not None
+    planned = by_status["planned"]
+    assert (planned.attempts, planned.dispatched_at, planned.task_id) == (0, None, None)
+
+
+@pytest.mark.asyncio
+async def test_stale_batch_message_does_not_run(db_session: AsyncSession, monkeypatch):
+    from app.tasks import geo as geo_tasks
+    from tests.conftest import test_session_maker
+
+    await _seed_schedule(db_session, "alpha")
+    await db_session.commit()
+    night = date(2026, 3, 10)
+    await plan_night(db_session, night)
+    (batch,) = await claim_due_batches(db_session, now=datetime.now(UTC))
+    await db_session.commit()
+    first_task = batch.task_id
+
+    executed: list[str] = []
+
+    async def _execute(db, **kwargs):
+        executed.append(kwargs["engine"])
+        return {"total": 0, "success": 0, "failed": 0}
+
+    async def _noop(*_a, **_k):
+        return None
+
+    monkeypatch.setattr(geo_tasks, "task_session_maker", test_session_maker)
+    monkeypatch.setattr(geo_tasks, "execute_geo_batch", _execute)
+    monkeypatch.setattr(geo_tasks, "_compute_brand_metrics", _noop)
+    monkeypatch.setattr(geo_tasks, "refresh_brand_dashboards", _noop)
+
+    async def _run(task_id: str) -> dict:
+        return await geo_tasks._run_batch(
+            str(batch.brand_id), batch.engine, list(batch.prompt_ids), batch.n_runs,
+            "FR", "fr", str(batch.id), task_id,
+        )
+
+    # Reaper puis nouvel envoi : seul le dernier message demarre le batch
+    batch.status, batch.task_id = "queued", "task-2"
+    await db_session.commit()
+    assert (await _run(first_task))["skipped"] is True
+    assert "skipped" not in await _run("task-2")
+    assert executed == ["perplexity"]
+    await db_session.refresh(batch)
+    assert batch.status == "done"
+
+    # Redelivery acks_late apres la fin : ne rouvre pas le batch
+    assert (await _run("task-2"))["skipped"] is True
+    await db_session.refresh(batch)
+    assert (batch.status, executed) == ("done", ["perplexity"])
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_then_fails_stale_batches(db_session: AsyncSession):
+    from app.config import settings
+
+    for slug in ("alpha", "beta", "gamma", "delta"):
+        await _seed_schedule(db_session, slug)
+    await db_session.commit()
+    night = date(2026, 3, 10)
+    await plan_night(db_session, night)
+    now = datetime.now(UTC)
+    stale = now - timedelta(minutes=settings.geo_schedule_stale_running_minutes + 1)
+    lost, dead_worker, exhausted, fresh = await _batches(db_session, night)
+    lost.status, lost.dispatched_at, lost.attempts = "queued", stale, 1
+    dead_worker.status, dead_worker.started_at, dead_worker.attempts = "running", stale, 1
+    exhausted.status, exhausted.dispatched_at = "queued", stale
+    exhausted.attempts = settings.geo_schedule_max_attempts
+    fresh.status, fresh.dispatched_at, fresh.attempts = "queued", now, 1
+    await db_session.commit()
+
+    assert await reap_stale_batches(db_session, now=now) == {"requeued": 2, "failed": 1}
+    assert [b.status for b in (lost, dead_worker, exhausted, fresh)] == [
+        "planned", "planned", "failed", "queued",
+    ]
+    # Replanifies : reclames au prochain dispatch (eta deja passee)
+    assert len(await claim_due_batches(db_session, now=now)) == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_overview_counts_stored_runs_of_running_batch(db_session: AsyncSession):
+    schedule = await _seed_schedule(db_session, "alpha")
+    await db_session.commit()
+    night = date(2026, 3, 10)
+    await plan_night(db_session, night)
+    (batch,) = await _batches(db_session, night)
+    now = datetime.now(UTC)
+    batch.status, batch.started_at = "running", now - timedelta(minutes=5)
+    prompt_id = UUID(batch.prompt_ids[0])
+    db_session.add_all(
+        GeoRun(
+            prompt_id=prompt_id, brand_id=schedule.brand_id, engine="perplexity",
+            run_index=i, run_at=now - timedelta(minutes=1), citations=[], brands_found=[],
+        )
+        for i in (1, 2)
+    )
+    await db_session.commit()
+
+    overview = await queue_overview(db_session, all_orgs=True, now=now)
+    # 2 prompts x 3 runs planifies, 2 deja stockes
+    assert overview["engines"][0]["runs_pending"] == batch.runs_planned - 2 == 4
+
+
+@pytest.mark.asyncio
+async def test_schedule_endpoints_and_queue(
+    client: AsyncClient, auth_headers: dict, db_session: AsyncSession, monkeypatch
+):
+    from app.config import settings
+
+    brand = await _create_brand(client, auth_headers)
+    await _create_prompt(client, auth_headers, brand["id"])
+    url = f"/api/v1/geo/brands/{brand['id']}/schedules/perplexity"
+    resp = await client.put(url, json={"every_days": 1, "n_runs": 2}, headers=auth_headers)
+    assert resp.status_code == 422
+
+    monkeypatch.setattr(settings, "perplexity_api_key", "test-key")
+    resp = await client.put(url, json={"every_days": 1, "n_runs": 2}, headers=auth_headers)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["n_runs"] == 2
+
+    await plan_night(db_session, date(2026, 3, 10))
+    resp = await client.get("/api/v1/geo/schedules/queue", headers=auth_headers)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [e["engine"] for e in body["engines"]] == ["perplexity"]
+    assert body["engines"][0]["runs_pending"] == 2
+    assert len(body["items"]) == 1
+
+    resp = await client.delete(url, headers=auth_headers)
+    assert resp.status_code == 204
+    resp = await client.get("/api/v1/geo/schedules/queue", headers=auth_headers)
+    assert resp.json()["engines"] == []
@@ -0,0 +1,120 @@
+# =============================================================================
+# FGA CRM - Tests Lead Engine : pagination keyset + agregats en SQL
+# =============================================================================
+"""Liste de l'inbox en keyset (curseur stable malgre les ex aequo de
+created_at), KPI + total en une requete groupee, funnel agrege en SQL sans
+plafond de volume — nombre de requetes verifie."""
+
+from __future__ import annotations
+
+import uuid
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.lead_engine import LeadSignal
+from app.models.user import User
+from tests.conftest import test_engine
+
+NOW = datetime.now(UTC)
+
+
+@contextmanager
+def _signal_queries():
+    """Requetes emises sur lead_signals pendant le bloc."""
+    statements: list[str] = []
+
+    def _log(_conn, _cursor, statement, *_a):
+        if "FROM lead_signals" in statement:
+            statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _log)
+    try:
+        yield statements
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _log)
+
+
+def _signal(org_id: uuid.UUID, created_at: datetime, **kwargs) -> LeadSignal:
+    signal_type = kwargs.pop("signal_type", "funding_detected")
+    return LeadSignal(
+        organization_id=org_id, signal_type=signal_type,
+        dedup_key=f"{signal_type}:{uuid.uuid4()}", payload_json=kwargs.pop("payload_json", {}),
+        created_at=created_at, updated_at=created_at, **kwargs,
+    )
+
+
+async def test_keyset_pages_are_stable_and_complete(
+    client: AsyncClient, auth_headers: dict, db_session: AsyncSession, test_user: User,
+):
+    org_id = test_user.organization_id
+    # 45 signaux sur 15 instants : 3 ex aequo par created_at
+    db_session.add_all(
+        _signal(org_id, NOW - timedelta(minutes=i // 3), status="ignored" if i % 5 == 0 else "new")
+        for i in range(45)
+    )
+    await db_session.commit()
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"size": 20, "status": "new", **({"cursor": cursor} if cursor else {})}
+        r = await client.get("/api/v1/lead-engine/signals", params=params, headers=auth_headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["total"] == 36
+        seen += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 36
+    expected = (await db_session.execute(
+        select(LeadSignal.id)
+        .where(LeadSignal.status == "new")
+        .order_by(LeadSignal.created_at.desc(), LeadSignal.id.desc())
+    )).scalars().all()
+    assert seen == [str(sid) for sid in expected]  # ordre (created_at, id) desc
+
+    r = await client.get(
+        "/api/v1/lead-engine/signals", params={"cursor": "pas-un-curseur"}, headers=auth_headers,
+    )
+    assert r.status_code == 422
+
+
+async def test_list_and_funnel_query_counts(
+    client: AsyncClient, auth_headers: dict, db_session: AsyncSession, test_user: User,
+):
+    org_id = test_user.organization_id
+    sent = {"draft": {"subject": "s"}, "action": {"kind": "outreach"}}
+    db_session.add_all([
+        # Au-dela de l'ancien plafond de 5 000 lignes lues en Python
+        *(_signal(org_id, NOW - timedelta(seconds=i)) for i in range(5_010)),
+        _signal(org_id, NOW, signal_type="mmf_gap", status="actioned", payload_json=sent),
+        _signal(org_id, NOW, signal_type="mmf_gap", payload_json={"draft": {"subject": "s"}}),
+        _signal(org_id, NOW - timedelta(days=10), signal_type="mmf_gap", status="ignored"),
+    ])
+    await db_session.commit()
+
+    with _signal_queries() as statements:
+        r = await client.get("/api/v1/lead-engine/signals", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    # Page + compteurs groupes (KPI et total) : plus de COUNT par indicateur
+    assert len(statements) == 2
+    body = r.json()
+    assert body["total"] == 5_013
+    assert body["stats"] == {
+        "new_total": 5_011, "new_funding": 5_010, "new_mmf": 1,
+        "actioned_7d": 1, "ignored_7d": 0,
+    }
+
+    with _signal_queries() as statements:
+        r = await client.get("/api/v1/lead-engine/funnel", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert len(statements) == 1
+    body = r.json()
+    assert body["p2_funding"] == {"detected": 5_010, "actioned": 0, "drafted": 0, "sent": 0}
+    assert body["p1_mmf_gap"] == {"detected": 3, "actioned": 1, "drafted": 2, "sent": 1}
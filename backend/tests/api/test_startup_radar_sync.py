@@ -79,14 +79,37 @@ async def test_sync_enqueues_and_returns_202(
     assert body["job_id"]
     assert body["started_at"]
 
-    # La task a ete enqueue avec (user_id, job_id, started_at) — owner = le clickeur
+    # La task a ete enqueue avec (user_id, job_id, started_at, force) — owner = le clickeur
     assert fake_task.calls == [
-        (str(test_user.id), body["job_id"], body["started_at"]),
+        (str(test_user.id), body["job_id"], body["started_at"], False),
     ]
     # Le statut 'running' a ete ecrit immediatement
     assert status_writes and status_writes[-1]["status"] == "running"
 
 
+@pytest.mark.asyncio
+async def test_sync_force_is_forwarded_to_task(
+    client: AsyncClient, auth_headers: dict, monkeypatch,
+):
+    """?force=true : resync complete (empreintes SR ignorees) transmise a la task."""
+    fake_task = _FakeTask()
+
+    async def fake_acquire(job_id):  # noqa: ARG001
+        return True
+
+    async def fake_set(payload):  # noqa: ARG001
+        return None
+
+    monkeypatch.setattr("app.services.sync_status.try_acquire_lock", fake_acquire)
+    monkeypatch.setattr("app.services.sync_status.set_status_async", fake_set)
+    monkeypatch.setattr("app.api.v1.integrations.startup_radar.full_sync_task", fake_task)
+
+    resp = await client.post(f"{SYNC_URL}?force=true", headers=auth_headers)
+
+    assert resp.status_code == 202
+    assert fake_task.calls[0][3] is True
+
+
 @pytest.mark.asyncio
 async def test_sync_conflict_returns_409_when_locked(
     client: AsyncClient, auth_headers: dict, monkeypatch,
@@ -283,7 +306,7 @@ def test_full_sync_task_writes_completed_and_releases_lock(monkeypatch):
     writes: list[dict] = []
     released: list[bool] = []
 
-    async def fake_run(user_id):  # noqa: ARG001
+    async def fake_run(user_id, force=False):  # noqa: ARG001
         return _full_result_dict(companies_created=3, contacts_created=2)
 
     monkeypatch.setattr(sr_task, "_run_full_sync", fake_run)
@@ -307,7 +330,7 @@ def test_full_sync_task_writes_failed_and_releases_lock(monkeypatch):
     writes: list[dict] = []
     released: list[bool] = []
 
-    async def fake_run(user_id):  # noqa: ARG001
+    async def fake_run(user_id, force=False):  # noqa: ARG001
         raise RuntimeError("explosion sync")
 
     monkeypatch.setattr(sr_task, "_run_full_sync", fake_run)
@@ -26,6 +26,7 @@ from app.main import app
 from app.models import Base
 from app.models.organization import Organization
 from app.models.user import User
+from app.services.lead_engine import events as lead_events
 
 # ---------------------------------------------------------------------------
 # BDD de test — SQLite async sur FICHIER (./test.db)
@@ -99,6 +100,13 @@ async def setup_database():
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+def _no_lead_event_dispatch(monkeypatch: pytest.MonkeyPatch):
+    """Pas de broker en test : le commit qui emet des evenements Lead Engine ne
+    met pas le consumer en file (les tests l'appellent directement)."""
+    monkeypatch.setattr(lead_events, "_enqueue_consumer", lambda: None)
+
+
 # ---------------------------------------------------------------------------
 # Session DB pour les tests
 # ---------------------------------------------------------------------------
@@ -0,0 +1,214 @@
+"""Ecriture CRM ensembliste (upsert_contacts) : parite randomisee avec des
+upsert_contact successifs (precedence de fusion) + nombre de requetes borne."""
+
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company as CrmCompany
+from app.models.contact import Contact
+from app.models.enrichment import EnrichmentProvenance
+from app.models.organization import Organization
+from app.services.enrichment import crm_writer
+from app.services.enrichment.crm_writer import (
+    ContactWrite,
+    upsert_contact,
+    upsert_contacts,
+)
+from app.services.enrichment.ports import Company, PersonCandidate
+from app.services.enrichment.provenance import record_provenance_many
+from tests.conftest import test_engine
+
+_EMAILS = [f"p{i}@acme.fr" for i in range(6)]
+_LINKEDINS = [f"https://linkedin.com/in/p{i}" for i in range(6)]
+
+# Societes du lot : siren connu, domaine connu (siren inconnu), nouvelles
+# (domaine / siren seul / ni l'un ni l'autre -> creee a chaque fois)
+_COMPANIES = [
+    Company(siren="100000001", name="Alpha", domain="alpha.fr"),
+    Company(siren="100000002", name="Beta", domain="beta.fr"),
+    Company(siren="100000009", name="Gamma bis", domain="gamma.fr"),
+    Company(siren="100000010", name="Nova", domain="nova.fr"),
+    Company(siren="100000011", name="Solo"),
+    Company(siren="", name="Anonyme"),
+]
+
+
+async def _seed(db: AsyncSession, rng: random.Random) -> tuple[uuid.UUID, dict]:
+    """Org avec societes + contacts existants (cles uniques, created_at croissants).
+
+    Retourne (org_id, {contact_id: etiquette}).
+    """
+    org = Organization(id=uuid.uuid4(), name="Org", slug=f"o-{uuid.uuid4().hex[:8]}")
+    db.add(org)
+    companies = [
+        CrmCompany(name="Alpha", siren="100000001", domain="alpha.fr", organization_id=org.id),
+        CrmCompany(name="Beta", siren="100000002", organization_id=org.id),
+        CrmCompany(name="Gamma", domain="gamma.fr", organization_id=org.id),
+    ]
+    db.add_all(companies)
+    await db.flush()
+
+    emails, linkedins = _EMAILS[:], _LINKEDINS[:]
+    rng.shuffle(emails)
+    rng.shuffle(linkedins)
+    labels: dict = {}
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    for i in range(4):
+        contact = Contact(
+            first_name=f"S{i}", last_name="Seed", organization_id=org.id,
+            email=emails.pop() if rng.random() < 0.7 else None,  # noqa: S311
+            linkedin_url=linkedins.pop() if rng.random() < 0.7 else None,  # noqa: S311
+            company_id=rng.choice(companies).id,  # noqa: S311
+            created_at=base + timedelta(minutes=i),
+        )
+        db.add(contact)
+        await db.flush()
+        labels[contact.id] = f"s{i}"
+    return org.id, labels
+
+
+def _random_writes(rng: random.Random, n: int) -> list[ContactWrite]:
+    writes = []
+    for _ in range(n):
+        person = PersonCandidate(
+            first_name=rng.choice(["Ana", "Bob", "Cid"]),  # noqa: S311
+            last_name=rng.choice(["Roy", "Lee"]),  # noqa: S311
+            title_raw=rng.choice(["CTO", "VP Sales", "Fondateur"]),  # noqa: S311
+            source=rng.choice(["icypeas", "mock"]),  # noqa: S311
+            linkedin_url=rng.choice([*_LINKEDINS, None, None]),  # noqa: S311
+            role=rng.choice(["CTO", "FOUNDER", None]),  # noqa: S311
+        )
+        email = rng.choice([*_EMAILS, None, None])  # noqa: S311
+        writes.append(ContactWrite(
+            company=rng.choice(_COMPANIES), person=person, email=email,  # noqa: S311
+            email_status="not_found" if email is None else rng.choice(["valid", "unknown"]),  # noqa: S311
+        ))
+    return writes
+
+
+async def _snapshot(db: AsyncSession, org_id, labels: dict, ids: list[uuid.UUID]):
+    """Etat comparable entre deux orgs : etiquettes stables au lieu des uuid."""
+    for contact_id in ids:
+        labels.setdefault(contact_id, f"n{len(labels)}")
+    companies = {
+        c.id: (c.name, c.siren, c.domain)
+        for c in (
+            await db.execute(select(CrmCompany).where(CrmCompany.organization_id == org_id))
+        ).scalars().all()
+    }
+    contacts = (
+        await db.execute(
+            select(Contact)
+            .where(Contact.organization_id == org_id)
+            .execution_options(populate_existing=True)
+        )
+    ).scalars().all()
+    rows = sorted(
+        (
+            labels[c.id], c.first_name, c.last_name, c.email, c.email_status, c.title,
+            c.is_decision_maker, c.linkedin_url, c.source, c.enrichment_source,
+            companies.get(c.company_id),
+        )
+        for c in contacts
+    )
+    return [labels[i] for i in ids], rows, sorted(companies.values(), key=str)
+
+
+@pytest.mark.parametrize("seed", range(12))
+async def test_upsert_contacts_matches_sequential_upsert(
+    db_session: AsyncSession, seed: int
+):
+    """Meme lot aleatoire (collisions email/LinkedIn intra-lot, societes creees
+    puis reutilisees) : etat final et contact_id identiques au chemin unitaire."""
+    writes = _random_writes(random.Random(seed), 20)  # noqa: S311
+    legacy_org, legacy_labels = await _seed(db_session, random.Random(1000 + seed))  # noqa: S311
+    bulk_org, bulk_labels = await _seed(db_session, random.Random(1000 + seed))  # noqa: S311
+
+    legacy_ids = [
+        await upsert_contact(
+            db_session, company=w.company, person=w.person, email=w.email,
+            email_status=w.email_status, organization_id=legacy_org,
+        )
+        for w in writes
+    ]
+    await db_session.flush()
+
+    statements = {"n": 0}
+
+    def _count(*_a, **_k):
+        statements["n"] += 1
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        bulk_ids = await upsert_contacts(db_session, writes, bulk_org)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _count)
+    # 4 IN (siren, domaine, email, LinkedIn) + INSERT societes + upsert contacts
+    assert statements["n"] <= 6
+    await db_session.commit()
+
+    assert await _snapshot(db_session, bulk_org, bulk_labels, bulk_ids) == await _snapshot(
+        db_session, legacy_org, legacy_labels, legacy_ids
+    )
+
+
+async def test_upsert_contacts_company_race_keeps_existing(
+    db_session: AsyncSession, test_org, monkeypatch
+):
+    """Societe creee par un autre worker entre la resolution et l'INSERT (meme
+    org + domaine) : ON CONFLICT DO NOTHING, la ligne existante est reutilisee."""
+    writes = [ContactWrite(
+        company=Company(siren="100000010", name="Nova", domain="nova.fr"),
+        person=PersonCandidate(first_name="A", last_name="B", title_raw="CTO", source="mock"),
+        email="a@nova.fr", email_status="valid",
+    )]
+    existing = CrmCompany(name="Nova SAS", domain="nova.fr", organization_id=test_org.id)
+    db_session.add(existing)
+    await db_session.flush()
+
+    real_first_by_key = crm_writer._first_by_key
+    calls = {"n": 0}
+
+    async def _stale_resolution(db, column, keys, organization_id):
+        calls["n"] += 1
+        if calls["n"] <= 2:  # siren + domaine : l'autre worker n'a pas encore ecrit
+            return {}
+        return await real_first_by_key(db, column, keys, organization_id)
+
+    monkeypatch.setattr(crm_writer, "_first_by_key", _stale_resolution)
+    [contact_id] = await upsert_contacts(db_session, writes, test_org.id)
+    contact = await db_session.get(Contact, contact_id)
+    assert contact.company_id == existing.id
+    companies = (
+        await db_session.execute(
+            select(CrmCompany).where(CrmCompany.organization_id == test_org.id)
+        )
+    ).scalars().all()
+    assert len(companies) == 1
+
+
+async def test_record_provenance_many(db_session: AsyncSession, test_org):
+    contact = Contact(first_name="A", last_name="B", organization_id=test_org.id)
+    db_session.add(contact)
+    await db_session.flush()
+    await record_provenance_many(db_session, [
+        {"entity_type": "person", "field": "name", "source": "mock",
+         "contact_id": contact.id, "organization_id": test_org.id},
+        {"entity_type": "email", "field": "email", "source": "icypeas",
+         "contact_id": contact.id, "organization_id": test_org.id},
+    ])
+    await record_provenance_many(db_session, [])
+    rows = (
+        await db_session.execute(
+            select(EnrichmentProvenance).where(EnrichmentProvenance.contact_id == contact.id)
+        )
+    ).scalars().all()
+    assert sorted(r.field for r in rows) == ["email", "name"]
+    assert {r.legal_basis for r in rows} == {"legitimate_interest"}
@@ -0,0 +1,112 @@
+"""Fraicheur par lot (fresh_keys / touch_many) : un aller-retour Redis par
+societe, TTL conserve, fail-open. Mesure sur un stub Redis local."""
+
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.enrichment import freshness
+from app.services.enrichment.adapters.mock import (
+    MockCompanySource,
+    MockEmailFinder,
+    MockEmailVerifier,
+    MockPeopleSource,
+)
+from app.services.enrichment.credit_ledger import CreditLedger
+from app.services.enrichment.modes.company import _process_company
+from app.services.enrichment.ports import Company
+
+
+class _StubPipeline:
+    def __init__(self, redis: _StubRedis) -> None:
+        self._redis = redis
+        self._ops: list[tuple[str, str, int | None]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self._ops.append((key, value, ex))
+        return self
+
+    async def execute(self):
+        self._redis.round_trips += 1
+        for key, value, ex in self._ops:
+            self._redis.store[key] = (value, ex)
+        return [True] * len(self._ops)
+
+
+class _StubRedis:
+    """Redis local minimal : compte les allers-retours reseau."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, tuple[str, int | None]] = {}
+        self.round_trips = 0
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.store[k][0] if k in self.store else None for k in keys]
+
+    def pipeline(self, transaction=True):
+        return _StubPipeline(self)
+
+
+async def test_fresh_keys_and_touch_many_one_round_trip_each():
+    redis = _StubRedis()
+    await freshness.touch_many(["a", "b", "c"], 60, client=redis)
+    assert redis.round_trips == 1
+    # TTL inchange : ttl_days en secondes, sur la clef prefixee
+    assert redis.store["enrichment:fresh:a"] == ("1", 60 * 86400)
+
+    fresh = await freshness.fresh_keys(["a", "x", "c", "y", "b"], client=redis)
+    assert fresh == {"a", "b", "c"}
+    assert redis.round_trips == 2
+
+    # Lots vides : aucun aller-retour
+    assert await freshness.fresh_keys([], client=redis) == set()
+    await freshness.touch_many([], 60, client=redis)
+    assert redis.round_trips == 2
+
+
+async def test_fresh_keys_fail_open():
+    class _Down:
+        async def mget(self, keys):
+            raise ConnectionError("redis down")
+
+    assert await freshness.fresh_keys(["a"], client=_Down()) == set()
+
+
+async def test_process_company_freshness_round_trips(db_session: AsyncSession, test_org):
+    """3 decideurs : 1 MGET + 1 pipeline SET EX, puis 1 seul MGET au re-run."""
+    redis = _StubRedis()
+    company = Company(siren="123456789", name="Acme", domain="acme.fr")
+
+    async def _run() -> dict:
+        stats = {
+            "companies": 0, "people_found": 0, "emails_found": 0, "valid": 0,
+            "suppressed": 0, "skipped_fresh": 0,
+        }
+        await _process_company(
+            db_session, company=company, company_src=MockCompanySource(),
+            people_srcs=[MockPeopleSource()], finders=[MockEmailFinder()],
+            verifiers=[MockEmailVerifier()],
+            ledger=CreditLedger(max_per_run=settings.enrichment_max_credits_per_run),
+            org_id=test_org.id, stats=stats, fresh_client=redis,
+        )
+        await db_session.commit()
+        return stats
+
+    first = await _run()
+    assert first["people_found"] == 3
+    assert redis.round_trips == 2
+    enriched = len(redis.store)
+    assert enriched == first["emails_found"] > 0
+
+    redis.round_trips = 0
+    second = await _run()
+    assert redis.round_trips == 1  # personnes sans email : rien a marquer
+    assert second["skipped_fresh"] == enriched
@@ -0,0 +1,224 @@
+"""Cache partage des resolutions gouv (GouvResolutionCache) : siren / nom /
+candidats domaine, cache negatif, TTL, echec reseau (API, timeout d'un
+candidat domaine) jamais mis en cache,
+prechargement en lot, hit-rate et pre-chauffage."""
+
+from __future__ import annotations
+
+import socket
+from datetime import UTC, datetime, timedelta
+
+import httpx
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company as CrmCompany
+from app.models.enrichment import EnrichmentDomainCheck, EnrichmentGouvCache
+from app.services.enrichment.adapters import gouv
+from app.services.enrichment.adapters.gouv import GouvCompanySource
+from app.services.enrichment.gouv_cache import GouvResolutionCache, prewarm_gouv_cache
+from app.services.enrichment.ports import Company
+from tests.conftest import test_engine, test_session_maker
+
+
+def _result(siren: str, name: str) -> dict:
+    return {
+        "siren": siren, "nom_raison_sociale": name, "activite_principale": "62.01Z",
+        "etat_administratif": "A", "tranche_effectif_salarie": "12",
+    }
+
+
+class _Gouv:
+    """Faux recherche-entreprises : SIREN connus, compte les appels reseau."""
+
+    def __init__(self, known: dict[str, str], *, up: bool = True) -> None:
+        self.known = known
+        self.up = up
+        self.calls = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if not self.up:
+            return httpx.Response(503)
+        q = request.url.params["q"]
+        if q in self.known:
+            return httpx.Response(200, json={"results": [_result(q, self.known[q])]})
+        by_name = [s for s, n in self.known.items() if n.lower() == q.lower()]
+        return httpx.Response(200, json={"results": [_result(s, self.known[s]) for s in by_name]})
+
+
+def _no_such_host(request: httpx.Request) -> httpx.Response:
+    # Comme httpx/httpcore : ConnectError cause par getaddrinfo (nom inexistant)
+    raise httpx.ConnectError("no such host") from socket.gaierror(
+        socket.EAI_NONAME, "Name or service not known",
+    )
+
+
+def _source(api: _Gouv) -> GouvCompanySource:
+    # Nouveau cache a chaque source = un autre job (memo vide) : seule la table est partagee.
+    return GouvCompanySource(
+        transport=httpx.MockTransport(api.handler),
+        cache=GouvResolutionCache(test_session_maker),
+    )
+
+
+async def test_siren_cached_across_jobs_including_negative():
+    api = _Gouv({"552081317": "ACME"})
+    first = _source(api)
+    assert (await first.get_by_siren("552081317")).name == "ACME"
+    assert await first.get_by_siren("999999999") is None
+    assert api.calls == 2
+
+    second = _source(api)
+    company = await second.get_by_siren("552081317")
+    assert company == Company(
+        siren="552081317", name="ACME", naf="62.01Z", active=True, size_band="20-49",
+    )
+    assert await second.get_by_siren("999999999") is None  # negatif en cache
+    assert api.calls == 2
+    assert second.cache_metrics()["siren"] == {
+        "hits": 1, "negative_hits": 1, "misses": 0, "hit_rate": 1.0,
+    }
+
+
+async def test_network_failure_not_cached(monkeypatch):
+    monkeypatch.setattr(gouv, "_INITIAL_BACKOFF_S", 0.0)
+    api = _Gouv({"552081317": "ACME"}, up=False)
+    assert await _source(api).get_by_siren("552081317") is None
+    api.up = True
+    assert (await _source(api).get_by_siren("552081317")).name == "ACME"
+    async with test_session_maker() as db:
+        payloads = (await db.execute(select(EnrichmentGouvCache.payload_json))).scalars().all()
+    assert [p["name"] for p in payloads] == ["ACME"]
+
+
+async def test_expired_entry_is_a_miss():
+    api = _Gouv({"552081317": "ACME"})
+    await _source(api).get_by_siren("552081317")
+    async with test_session_maker() as db:
+        await db.execute(
+            update(EnrichmentGouvCache)
+            .values(expires_at=datetime.now(UTC) - timedelta(minutes=1))
+        )
+        await db.commit()
+    await _source(api).get_by_siren("552081317")
+    assert api.calls == 2
+
+
+async def test_search_by_name_keyed_on_normalized_name():
+    api = _Gouv({"552081317": "Societe Generale"})
+    assert (await _source(api).search_by_name("Societe Generale")).siren == "552081317"
+    again = _source(api)
+    assert (await again.search_by_name("  SOCIÉTÉ   générale ")).siren == "552081317"
+    assert api.calls == 1
+    assert again.cache_metrics()["name"]["hits"] == 1
+
+
+async def test_prefetch_reads_cache_in_one_query():
+    api = _Gouv({str(500000000 + i): f"Boite {i}" for i in range(30)})
+    warm = _source(api)
+    for siren in api.known:
+        await warm.get_by_siren(siren)
+
+    source = _source(api)
+    statements = {"n": 0}
+
+    def _count(*_a, **_k):
+        statements["n"] += 1
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        await source.prefetch(sirens=list(api.known))
+        for siren in api.known:
+            await source.get_by_siren(siren)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _count)
+    assert statements["n"] == 1
+    assert api.calls == 30  # aucun appel reseau apres le pre-remplissage
+    assert source.cache_metrics()["siren"]["hit_rate"] == 1.0
+
+
+async def test_domain_candidates_cached():
+    checked: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        checked.append(request.url.host)
+        if request.url.host == "acme-corp.fr":
+            return httpx.Response(200)
+        return _no_such_host(request)
+
+    def _domain_source() -> GouvCompanySource:
+        return GouvCompanySource(
+            transport=httpx.MockTransport(handler),
+            cache=GouvResolutionCache(test_session_maker),
+        )
+
+    company = Company(siren="1", name="Acme Corp")
+    assert await _domain_source().resolve_domain(company) == "acme-corp.fr"
+    network = len(checked)
+    assert network > 0
+
+    again = _domain_source()
+    assert await again.resolve_domain(company) == "acme-corp.fr"
+    assert len(checked) == network  # candidats morts (TTL negatif) + gagnant en cache
+    assert again.cache_metrics()["domain"]["hits"] == 1
+    async with test_session_maker() as db:
+        rows = dict((await db.execute(
+            select(EnrichmentDomainCheck.domain, EnrichmentDomainCheck.responds)
+        )).all())
+    assert rows["acme-corp.fr"] is True
+    assert rows["acmecorp.fr"] is False
+
+
+async def test_domain_timeouts_are_not_cached():
+    checked: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        checked.append(request.url.host)
+        if request.url.host == "lent.fr":
+            raise httpx.ConnectTimeout("timeout", request=request)
+        if request.url.host == "lent.com":
+            return httpx.Response(404)
+        return _no_such_host(request)
+
+    def _domain_source() -> GouvCompanySource:
+        return GouvCompanySource(
+            transport=httpx.MockTransport(handler),
+            cache=GouvResolutionCache(test_session_maker),
+        )
+
+    company = Company(siren="1", name="Lent")
+    assert await _domain_source().resolve_domain(company) is None
+    async with test_session_maker() as db:
+        rows = dict((await db.execute(
+            select(EnrichmentDomainCheck.domain, EnrichmentDomainCheck.responds)
+        )).all())
+    # 404 : reponse certaine (cache negatif) ; timeout : rien de memorise
+    assert rows == {"lent.com": False}
+
+    checked.clear()
+    assert await _domain_source().resolve_domain(company) is None
+    assert set(checked) == {"lent.fr"}  # seul le candidat indetermine est reteste
+
+
+async def test_prewarm_resolves_uncached_crm_sirens(db_session: AsyncSession, test_org):
+    api = _Gouv({"552081317": "ACME", "732829320": "BETA"})
+    db_session.add_all([
+        CrmCompany(name="Acme", siren="552081317", organization_id=test_org.id),
+        CrmCompany(name="Acme bis", siren="552081317", organization_id=test_org.id),
+        CrmCompany(name="Beta", siren="732829320", organization_id=test_org.id),
+        CrmCompany(name="Sans siren", organization_id=test_org.id),
+    ])
+    db_session.add(EnrichmentGouvCache(
+        kind="siren", key="111111111", payload_json=None,
+        expires_at=datetime.now(UTC) - timedelta(days=1),
+    ))
+    await db_session.commit()
+
+    result = await prewarm_gouv_cache(db_session, _source(api), limit=100)
+    assert result == {"candidates": 2, "resolved": 2, "purged": 1}
+
+    # Deuxieme passage : tout est deja en cache valide
+    result = await prewarm_gouv_cache(db_session, _source(api), limit=100)
+    assert result == {"candidates": 0, "resolved": 0, "purged": 0}
+    assert api.calls == 2
@@ -7,6 +7,7 @@ soumission -> {success, item:{_id, status}} ; read -> {items:[{results:{emails:[
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import hmac
 import json
@@ -202,7 +203,19 @@ async def test_http_error_degrades_to_none():
 
     assert await IcypeasEmailFinder(_client(handler)).find(_PERSON, "x.fr") is None
     res = await IcypeasEmailVerifier(_client(handler)).verify("x@y.fr")
-    assert res.status == "invalid"  # fail-safe : deny by default
+    # Pas de verdict : unknown (non deliverable, jamais mis en cache)
+    assert res.status == "unknown"
+
+
+async def test_verifier_timeout_is_unknown():
+    def handler(request):
+        if request.url.path.endswith("/email-verification"):
+            return _resp(_submit_ok("v"))
+        return _resp(_read("IN_PROGRESS", []))  # jamais terminal
+
+    res = await IcypeasEmailVerifier(_client(handler)).verify("x@y.fr")
+    assert res.status == "unknown"
+    assert res.confidence == 0.0
 
 
 # ---------------------------------------------------------------------------
@@ -324,3 +337,161 @@ def test_parse_bulk_callback_not_found_item():
     assert items[0]["external_id"] == "e9"
     assert items[0]["email"] is None
     assert items[0]["status"] == "NOT_FOUND"
+
+
+# ---------------------------------------------------------------------------
+# Polling adaptatif multiplexe — faux serveur Icypeas local (completion pilotee)
+# ---------------------------------------------------------------------------
+
+
+class _FakeIcypeas:
+    """Serveur Icypeas local : chaque recherche aboutit `duration(n)` s apres soumission."""
+
+    def __init__(self, duration) -> None:
+        self._duration = duration
+        self._done_at: dict[str, float] = {}
+        self.reads: dict[str, int] = {}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        if request.url.path.endswith("/email-search"):
+            sid = f"s{len(self._done_at)}"
+            self._done_at[sid] = loop.time() + self._duration(len(self._done_at))
+            return _resp(_submit_ok(sid))
+        sid = json.loads(request.content)["id"]
+        self.reads[sid] = self.reads.get(sid, 0) + 1
+        if loop.time() < self._done_at[sid]:
+            return _resp(_read("IN_PROGRESS", []))
+        return _resp(_read("DEBITED", [{"email": f"{sid}@acme.fr", "certainty": "ultra_sure"}]))
+
+
+async def test_concurrent_lookups_share_one_poll_loop(monkeypatch):
+    """30 recherches concurrentes : un seul client HTTP, une seule boucle de polling."""
+    loops = {"n": 0}
+    real_poll_loop = IcypeasClient._poll_loop
+
+    async def _counting_poll_loop(self, state):
+        loops["n"] += 1
+        await real_poll_loop(self, state)
+
+    monkeypatch.setattr(IcypeasClient, "_poll_loop", _counting_poll_loop)
+    server = _FakeIcypeas(lambda n: 0.05 + (n % 5) * 0.03)
+    client = IcypeasClient(
+        "k", transport=httpx.MockTransport(server.handler),
+        first_poll_s=0.02, poll_interval_s=0.1, max_wait_s=2.0,
+    )
+    results = await asyncio.gather(*(
+        client.find_email("A", f"B{i}", "acme.fr") for i in range(30)
+    ))
+    assert all(r and r["status"] == "DEBITED" for r in results)
+    assert loops["n"] == 1  # tous les reads passent par la boucle partagee
+    http = client._state.http
+    await client.find_email("A", "C", "acme.fr")
+    assert client._state.http is http  # client poole reutilise
+    stats = client.latency_stats()["email-search"]
+    assert stats["count"] == 31
+    assert stats["p50_ms"] <= stats["p90_ms"] <= stats["p99_ms"]
+    await client.aclose()
+
+
+def test_each_task_closes_its_client_and_reports_its_own_latency(monkeypatch):
+    """Une loop par tache Celery : le pool HTTP de la tache est ferme a sa fin et
+    les percentiles du job ne portent que sur ses recherches."""
+    from app.config import settings
+    from app.services.enrichment import factory
+
+    server = _FakeIcypeas(lambda n: 0.03)
+    client = IcypeasClient(
+        "k", transport=httpx.MockTransport(server.handler),
+        first_poll_s=0.02, poll_interval_s=0.1, max_wait_s=2.0,
+    )
+    monkeypatch.setattr(settings, "icypeas_api_key", "k")
+    monkeypatch.setattr(factory, "_shared_icypeas", client)
+    monkeypatch.setattr(factory, "_shared_icypeas_key", "k")
+    pools: list[httpx.AsyncClient] = []
+
+    async def _task(n: int) -> dict:
+        try:
+            await asyncio.gather(*(client.find_email("A", f"T{i}", "acme.fr") for i in range(n)))
+            pools.append(client._state.http)
+            return factory.provider_latency_stats()["email-search"]
+        finally:
+            await factory.close_provider_clients()
+
+    assert asyncio.run(_task(2))["count"] == 2
+    assert asyncio.run(_task(3))["count"] == 3
+    assert client.latency_stats()["email-search"]["count"] == 5  # fenetre du process
+    assert len(pools) == 2 and all(pool.is_closed for pool in pools)
+    assert client._state is None
+
+
+async def test_adaptive_polling_targets_observed_latency():
+    """Completion ~0.2 s : une fois l'historique appris, ~1 read par recherche et
+    une latence proche de la completion (vs intervalle fixe plafonne a 0.5 s)."""
+    server = _FakeIcypeas(lambda n: 0.2)
+    client = IcypeasClient(
+        "k", transport=httpx.MockTransport(server.handler),
+        first_poll_s=0.05, poll_interval_s=0.5, max_wait_s=3.0,
+    )
+    await asyncio.gather(*(client.find_email("A", f"W{i}", "acme.fr") for i in range(12)))
+    warmup_reads = sum(server.reads.values())
+
+    await asyncio.gather(*(client.find_email("A", f"M{i}", "acme.fr") for i in range(12)))
+    measured_reads = sum(server.reads.values()) - warmup_reads
+
+    # Nombre de reads (deterministe) plutot qu'une duree murale
+    assert measured_reads <= 2 * 12
+    assert measured_reads < warmup_reads
+    stats = client.latency_stats()["email-search"]
+    assert stats["p50_ms"] >= 200  # jamais observe avant la completion
+    await client.aclose()
+
+
+async def test_malformed_read_fails_only_its_search():
+    """Read inattendu (liste JSON) : la recherche concernee -> None, les autres
+    aboutissent et la boucle partagee survit."""
+    server = _FakeIcypeas(lambda n: 0.05)
+    real_handler = server.handler
+
+    async def _handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/read") and json.loads(request.content)["id"] == "s0":
+            return httpx.Response(200, json=[{"status": "DEBITED"}])
+        return await real_handler(request)
+
+    client = IcypeasClient(
+        "k", transport=httpx.MockTransport(_handler),
+        first_poll_s=0.02, poll_interval_s=0.1, max_wait_s=2.0,
+    )
+    first = await client.find_email("A", "B0", "acme.fr")
+    others = await asyncio.gather(*(client.find_email("A", f"B{i}", "acme.fr") for i in range(1, 4)))
+    assert first is None
+    assert all(r and r["status"] == "DEBITED" for r in others)
+    await client.aclose()
+
+
+async def test_crashed_poll_loop_releases_all_callers(monkeypatch):
+    """Boucle de polling en echec : aucun appelant ne reste bloque."""
+    server = _FakeIcypeas(lambda n: 0.05)
+    client = IcypeasClient(
+        "k", transport=httpx.MockTransport(server.handler),
+        first_poll_s=0.02, poll_interval_s=0.1, max_wait_s=2.0,
+    )
+
+    async def _boom(self, state, pending):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(IcypeasClient, "_poll_one", _boom)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(client.find_email("A", f"B{i}", "acme.fr") for i in range(3))), timeout=5,
+    )
+    assert results == [None, None, None]
+    await client.aclose()
+
+
+def test_next_delay_backoff_capped():
+    client = IcypeasClient("k", first_poll_s=0.5, poll_interval_s=2.0)
+    first = client._next_delay("email-search", 0.0, None)
+    assert first == 0.5
+    second = client._next_delay("email-search", first, first)
+    assert first < second <= 2.0
+    assert client._next_delay("email-search", 20.0, 1.9) == 2.0  # plafond
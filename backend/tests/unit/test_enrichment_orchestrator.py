@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
+
 import pytest
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -22,10 +25,10 @@ def _no_redis(monkeypatch: pytest.MonkeyPatch):
         return None
 
     async def _never_fresh(*a, **k):
-        return False
+        return set()
 
-    monkeypatch.setattr(freshness, "touch", _noop)
-    monkeypatch.setattr(freshness, "is_fresh", _never_fresh)
+    monkeypatch.setattr(freshness, "touch_many", _noop)
+    monkeypatch.setattr(freshness, "fresh_keys", _never_fresh)
 
 
 async def test_run_enrichment_job_company_mode(db_session: AsyncSession, test_org):
@@ -116,7 +119,7 @@ async def test_no_email_decision_makers_stay_retryable(
     """Regression : un decideur ecrit SANS email ne doit PAS etre marque 'frais'.
     Sinon il serait gele enrichment_refresh_days (60j) et son email ne pourrait
     jamais etre complete par un run ulterieur (ex: via le domaine du lead, #31).
-    -> freshness.touch ne doit PAS etre appele quand aucun email n'est trouve."""
+    -> aucune clef marquee fraiche quand aucun email n'est trouve."""
     from app.services.enrichment import factory
 
     class _NoEmailFinder:
@@ -131,11 +134,11 @@ async def test_no_email_decision_makers_stay_retryable(
 
     touch_calls = {"n": 0}
 
-    async def _spy_touch(*a, **k):
-        touch_calls["n"] += 1
+    async def _spy_touch_many(keys, *a, **k):
+        touch_calls["n"] += len(keys)
 
     # Remplace le noop du fixture _no_redis par un spy (applique apres le fixture).
-    monkeypatch.setattr(freshness, "touch", _spy_touch)
+    monkeypatch.setattr(freshness, "touch_many", _spy_touch_many)
 
     job = EnrichmentJob(
         mode="company", status="queued",
@@ -307,11 +310,11 @@ async def test_rgpd_rejects_non_pro_emails(db_session: AsyncSession, monkeypatch
 
 
 async def test_freshness_skips_recently_enriched(db_session: AsyncSession, monkeypatch, test_org):
-    # is_fresh -> True : la personne a ete enrichie recemment -> skip, aucune depense.
-    async def _always_fresh(*a, **k):
-        return True
+    # Toutes les clefs fraiches : personnes enrichies recemment -> skip, aucune depense.
+    async def _always_fresh(keys, *a, **k):
+        return set(keys)
 
-    monkeypatch.setattr(freshness, "is_fresh", _always_fresh)
+    monkeypatch.setattr(freshness, "fresh_keys", _always_fresh)
 
     job = EnrichmentJob(
         mode="company", status="queued",
@@ -371,3 +374,108 @@ async def test_company_failure_is_isolated(db_session: AsyncSession, monkeypatch
     # Le travail des societes saines est bien persiste (checkpoint par societe).
     contacts = (await db_session.execute(select(func.count()).select_from(Contact))).scalar()
     assert contacts >= 1
+
+
+class _Latency:
+    """Latence simulee des providers + pic d'appels simultanes observe."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def wait(self) -> None:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+
+def _slow_providers(monkeypatch, latency: _Latency) -> None:
+    from app.services.enrichment.adapters.mock import (
+        MockEmailFinder,
+        MockEmailVerifier,
+        MockPeopleSource,
+    )
+
+    class _SlowPeople(MockPeopleSource):
+        async def find_people(self, company, roles):
+            await latency.wait()
+            return await super().find_people(company, roles)
+
+    class _SlowFinder(MockEmailFinder):
+        async def find(self, person, domain):
+            await latency.wait()
+            return await super().find(person, domain)
+
+    class _SlowVerifier(MockEmailVerifier):
+        async def verify(self, email):
+            await latency.wait()
+            return await super().verify(email)
+
+    monkeypatch.setattr(orchestrator, "get_people_sources", lambda: [_SlowPeople()])
+    monkeypatch.setattr(orchestrator, "get_email_finders", lambda: [_SlowFinder()])
+    monkeypatch.setattr(orchestrator, "get_email_verifiers", lambda: [_SlowVerifier()])
+
+
+async def _timed_batch_job(db_session: AsyncSession, org_id, sirens: list[str]):
+    job = EnrichmentJob(
+        mode="batch", status="queued",
+        target_json={"kind": "batch", "sirens": sirens}, organization_id=org_id,
+    )
+    db_session.add(job)
+    await db_session.commit()
+    started = time.perf_counter()
+    await run_enrichment_job(db_session, job)
+    elapsed = time.perf_counter() - started
+    await db_session.refresh(job)
+    return job, elapsed
+
+
+async def test_worker_pool_speedup_with_fake_latency(
+    db_session: AsyncSession, test_org, monkeypatch
+):
+    """Simulation providers lents (50 ms/appel) : meme resultat, pool >= 2x plus
+    rapide que le sequentiel, et appels simultanes bornes par les deux niveaux."""
+    from app.config import settings
+
+    latency = _Latency(0.05)
+    _slow_providers(monkeypatch, latency)
+
+    monkeypatch.setattr(settings, "enrichment_company_concurrency", 1)
+    monkeypatch.setattr(settings, "enrichment_person_concurrency", 1)
+    seq_job, seq_time = await _timed_batch_job(
+        db_session, test_org.id, [str(111111110 + i) for i in range(6)]
+    )
+    assert latency.peak == 1
+
+    latency.peak = 0
+    monkeypatch.setattr(settings, "enrichment_company_concurrency", 4)
+    monkeypatch.setattr(settings, "enrichment_person_concurrency", 3)
+    par_job, par_time = await _timed_batch_job(
+        db_session, test_org.id, [str(222222220 + i) for i in range(6)]
+    )
+
+    assert par_job.status == seq_job.status == "done"
+    for key in ("companies", "people_found", "companies_processed", "errors"):
+        assert par_job.stats_json[key] == seq_job.stats_json[key], key
+    assert par_job.stats_json["companies_processed"] == 6
+    assert 1 < latency.peak <= 4 * 3
+    assert par_time * 2 < seq_time, (par_time, seq_time)
+
+
+async def test_worker_pool_respects_run_budget(
+    db_session: AsyncSession, test_org, monkeypatch
+):
+    """Plafond par run tenu malgre les appels finder/verif concurrents."""
+    from app.config import settings
+
+    _slow_providers(monkeypatch, _Latency(0.01))
+    monkeypatch.setattr(settings, "enrichment_max_credits_per_run", 5)
+    job, _ = await _timed_batch_job(
+        db_session, test_org.id, [str(333333330 + i) for i in range(8)]
+    )
+    assert job.status == "done"
+    assert job.stats_json["credits_spent"] <= 5
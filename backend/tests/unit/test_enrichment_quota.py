@@ -1,8 +1,11 @@
-"""Tests C3 (bug hunt) : plafond credits/run respecte par resultat (#6) et
-comportement fail-open (dev) / fail-closed (prod) du quota Redis (#12)."""
+"""Tests C3 (bug hunt) : plafond credits/run respecte par resultat (#6),
+reservations concurrentes du ledger, et comportement fail-open (dev) /
+fail-closed (prod) du quota Redis (#12)."""
 
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 
 from app.config import settings
@@ -40,6 +43,29 @@ async def test_source_people_respects_run_budget(db_session):
     assert len(people) == 3
 
 
+@pytest.mark.asyncio
+async def test_ledger_reservations_never_overshoot_under_concurrency():
+    # 10 appels concurrents a 1 credit, budget 4 : seuls 4 partent, les misses
+    # liberent leur reservation (budget rendu aux suivants).
+    ledger = CreditLedger(max_per_run=4)
+    calls = {"n": 0}
+
+    async def _call(i: int) -> None:
+        if not ledger.reserve(1.0):
+            return
+        calls["n"] += 1
+        await asyncio.sleep(0)
+        if i % 2:
+            ledger.settle("finder", 1.0)
+        else:
+            ledger.release(1.0)
+
+    await asyncio.gather(*(_call(i) for i in range(10)))
+    assert calls["n"] == 4
+    assert ledger.spent_this_run() == 2.0   # 2 hits factures, 2 misses liberes
+    assert ledger.can_spend(2.0) and not ledger.can_spend(2.5)
+
+
 class _FakeDownRedis:
     async def eval(self, *a, **k):
         raise ConnectionError("redis down")
@@ -0,0 +1,219 @@
+"""Reprise d'un job inline tue en plein milieu (fault injection) : seules les
+societes / personnes restantes sont traitees, aucun credit n'est re-debite, et
+l'etat final est celui d'un run sans incident. Un job contacts lent mais vivant
+(heartbeat) n'est jamais repris par un 2e worker."""
+
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.enrichment import EnrichmentJob, EnrichmentJobCheckpoint
+from app.models.organization import Organization
+from app.services.enrichment import freshness, orchestrator
+from app.services.enrichment.adapters.mock import (
+    MockEmailFinder,
+    MockEmailVerifier,
+    MockPeopleSource,
+)
+from app.services.enrichment.checkpoints import claim_job, find_stalled_jobs
+from app.services.enrichment.orchestrator import run_enrichment_job
+from tests.conftest import test_session_maker
+
+_SIRENS = [str(333333330 + i) for i in range(5)]
+
+
+class _WorkerKilled(BaseException):
+    """Arret brutal du worker (non rattrape par les `except Exception`)."""
+
+
+class _Calls:
+    def __init__(self, kill_at_find: int | None = None) -> None:
+        self.people: Counter = Counter()
+        self.finds: Counter = Counter()  # appels aboutis (factures ou non)
+        self.verifies: Counter = Counter()
+        self.kill_at_find = kill_at_find
+        self.find_attempts = 0
+        self.dead = False  # process tue : plus aucun appel n'aboutit
+
+
+@pytest.fixture(autouse=True)
+def _no_redis(monkeypatch: pytest.MonkeyPatch):
+    async def _noop(*a, **k):
+        return None
+
+    async def _never_fresh(*a, **k):
+        return set()
+
+    monkeypatch.setattr(freshness, "touch_many", _noop)
+    monkeypatch.setattr(freshness, "fresh_keys", _never_fresh)
+    # Un appel provider a la fois : au kill, aucun appel abouti mais non committe
+    # (seule fenetre de double debit, documentee dans checkpoints.py).
+    monkeypatch.setattr(settings, "enrichment_company_concurrency", 1)
+    monkeypatch.setattr(settings, "enrichment_person_concurrency", 1)
+
+
+def _providers(monkeypatch, calls: _Calls) -> None:
+    class _People(MockPeopleSource):
+        async def find_people(self, company, roles):
+            calls.people[company.siren] += 1
+            return await super().find_people(company, roles)
+
+    class _Finder(MockEmailFinder):
+        async def find(self, person, domain):
+            calls.find_attempts += 1
+            if calls.dead or calls.find_attempts == calls.kill_at_find:
+                calls.dead = True
+                raise _WorkerKilled
+            calls.finds[(person.first_name, person.last_name, domain)] += 1
+            return await super().find(person, domain)
+
+    class _Verifier(MockEmailVerifier):
+        async def verify(self, email):
+            calls.verifies[email] += 1
+            return await super().verify(email)
+
+    monkeypatch.setattr(orchestrator, "get_people_sources", lambda: [_People()])
+    monkeypatch.setattr(orchestrator, "get_email_finders", lambda: [_Finder()])
+    monkeypatch.setattr(orchestrator, "get_email_verifiers", lambda: [_Verifier()])
+
+
+async def _batch_job(db: AsyncSession, org_id) -> EnrichmentJob:
+    job = EnrichmentJob(
+        mode="batch", status="queued",
+        target_json={"kind": "batch", "sirens": _SIRENS}, organization_id=org_id,
+    )
+    db.add(job)
+    await db.commit()
+    return job
+
+
+async def _contacts(db: AsyncSession, org_id) -> list[tuple]:
+    rows = (
+        await db.execute(select(Contact).where(Contact.organization_id == org_id))
+    ).scalars().all()
+    return sorted((c.first_name, c.last_name, c.email, c.email_status) for c in rows)
+
+
+async def test_killed_job_resumes_without_double_charge(
+    db_session: AsyncSession, test_org, monkeypatch
+):
+    # Reference : meme lot, autre org, sans incident
+    ref_org = Organization(id=uuid.uuid4(), name="Ref", slug=f"ref-{uuid.uuid4().hex[:8]}")
+    db_session.add(ref_org)
+    await db_session.commit()
+    ref_calls = _Calls()
+    _providers(monkeypatch, ref_calls)
+    ref_job = await _batch_job(db_session, ref_org.id)
+    await run_enrichment_job(db_session, ref_job)
+    await db_session.refresh(ref_job)
+    assert ref_job.status == "done"
+    ref_stats = dict(ref_job.stats_json)
+
+    # Run tue au 8e appel finder (3e societe, une personne deja checkpointee)
+    calls = _Calls(kill_at_find=8)
+    _providers(monkeypatch, calls)
+    job = await _batch_job(db_session, test_org.id)
+    job_id, org_id, ref_org_id = job.id, test_org.id, ref_org.id
+    with pytest.raises(BaseExceptionGroup) as killed:
+        await run_enrichment_job(db_session, job)
+    assert killed.group_contains(_WorkerKilled)
+    await db_session.rollback()
+    calls.dead = False  # nouveau worker
+    job = await db_session.get(EnrichmentJob, job_id)
+
+    assert job.status == "running"
+    done = (
+        await db_session.execute(
+            select(func.count()).select_from(EnrichmentJobCheckpoint).where(
+                EnrichmentJobCheckpoint.job_id == job_id,
+                EnrichmentJobCheckpoint.kind == "company",
+                EnrichmentJobCheckpoint.status == "done",
+            )
+        )
+    ).scalar_one()
+    assert done == 2
+
+    # Worker vivant (heartbeat frais) : ni reprise ni double execution
+    await run_enrichment_job(db_session, job)
+    assert sum(calls.people.values()) == 3
+    assert await find_stalled_jobs(db_session) == []
+
+    # Heartbeat perime -> detecte par le beat, repris depuis les checkpoints
+    await db_session.execute(
+        update(EnrichmentJob)
+        .where(EnrichmentJob.id == job_id)
+        .values(updated_at=datetime.now(UTC) - timedelta(hours=1))
+    )
+    await db_session.commit()
+    assert await find_stalled_jobs(db_session) == [job_id]
+    await run_enrichment_job(db_session, job)
+    await db_session.refresh(job)
+
+    assert job.status == "done"
+    # Sourcing : une fois par societe. Lookups : une fois par personne (le seul
+    # rappel est l'appel interrompu, jamais facture).
+    assert calls.people == Counter(_SIRENS)
+    assert set(calls.finds.values()) == {1}
+    assert sum(calls.finds.values()) == sum(ref_calls.finds.values())
+    assert calls.verifies == ref_calls.verifies
+
+    for key in (
+        "companies", "people_found", "emails_found", "valid", "companies_processed",
+        "errors", "credits_spent",
+    ):
+        assert job.stats_json[key] == ref_stats[key], key
+    assert await _contacts(db_session, org_id) == await _contacts(db_session, ref_org_id)
+
+
+async def test_slow_live_contacts_job_is_not_claimed(
+    db_session: AsyncSession, test_org, monkeypatch
+):
+    monkeypatch.setattr(settings, "enrichment_job_heartbeat_seconds", 0)
+    company = Company(name="Acme", domain="acme.fr", organization_id=test_org.id)
+    db_session.add(company)
+    await db_session.flush()
+    for i in range(3):
+        db_session.add(Contact(
+            first_name=f"P{i}", last_name="Lent", organization_id=test_org.id,
+            company_id=company.id,
+        ))
+    job = EnrichmentJob(
+        mode="contacts", status="queued", organization_id=test_org.id,
+        target_json={"kind": "contacts", "all_missing_email": True},
+    )
+    db_session.add(job)
+    await db_session.commit()
+    job_id = job.id
+    claims: list[bool] = []
+
+    class _SlowFinder(MockEmailFinder):
+        async def find(self, person, domain):
+            async with test_session_maker() as other:
+                # 2e worker (beat) pendant l'appel : le heartbeat le tient a l'ecart
+                assert await find_stalled_jobs(other) == []
+                claims.append(await claim_job(other, await other.get(EnrichmentJob, job_id)))
+                # Appel provider plus long que le seuil de reprise
+                await other.execute(
+                    update(EnrichmentJob)
+                    .where(EnrichmentJob.id == job_id)
+                    .values(updated_at=datetime.now(UTC) - timedelta(hours=1))
+                )
+                await other.commit()
+            return await super().find(person, domain)
+
+    monkeypatch.setattr(orchestrator, "get_email_finders", lambda: [_SlowFinder()])
+    monkeypatch.setattr(orchestrator, "get_email_verifiers", lambda: [MockEmailVerifier()])
+    await run_enrichment_job(db_session, job)
+    await db_session.refresh(job)
+
+    assert claims == [False, False, False]
+    assert job.status == "done"
@@ -1,13 +1,162 @@
-"""Tests P2 (DB) : SuppressionService + ProvenanceService."""
+"""Tests P2 (DB) : SuppressionService (+ index en memoire : parite, version,
+micro-benchmark) + ProvenanceService."""
 
 from __future__ import annotations
 
-from sqlalchemy import func, select
+import random
+import time
+import uuid
+
+import pytest
+from sqlalchemy import event, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.enrichment import EnrichmentProvenance
+from app.models.enrichment import EnrichmentProvenance, EnrichmentSuppression
+from app.services.enrichment import suppression
 from app.services.enrichment.provenance import record_provenance
-from app.services.enrichment.suppression import add_suppression, is_suppressed
+from app.services.enrichment.suppression import (
+    add_suppression,
+    is_suppressed,
+    load_suppression_index,
+)
+
+
+class _FakeRedis:
+    store: dict[str, str] = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = str(value)
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, "0")) + 1)
+        return int(self.store[key])
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    _FakeRedis.store = {}
+    monkeypatch.setattr(suppression, "_client", _FakeRedis)
+    monkeypatch.setattr(suppression, "_INDEX_CACHE", {})
+    return _FakeRedis
+
+
+async def _seed_random_suppressions(db: AsyncSession, org_id, rng: random.Random) -> list:
+    """Entrees variees (casse stockee telle quelle hors add_suppression, autre org,
+    org NULL) + requetes candidates (hits, quasi-hits, misses)."""
+    other_org = uuid.uuid4()
+    queries = []
+    for i in range(300):
+        email = f"User{i}@Dom{i % 17}.fr"
+        domain = f"Blocked{i % 23}.COM"
+        linkedin = f" https://linkedin.com/in/p{i} "
+        org = rng.choice([org_id, org_id, other_org, None])
+        kind = rng.choice(["email", "domain", "linkedin", "raw_email"])
+        db.add(EnrichmentSuppression(
+            organization_id=org, reason="opt_out",
+            email=email.lower() if kind == "email" else email if kind == "raw_email" else None,
+            domain=domain.lower() if kind == "domain" else None,
+            linkedin_url=linkedin.strip() if kind == "linkedin" else None,
+        ))
+        queries += [
+            {"email": email}, {"email": f"  {email.upper()} "}, {"email": f"x{i}@nope.fr"},
+            {"domain": domain}, {"domain": f"other{i}.com"},
+            {"linkedin_url": linkedin}, {"linkedin_url": linkedin.upper()},
+            {"email": email, "domain": f"other{i}.com"},
+        ]
+    await db.commit()
+    return queries
+
+
+async def test_suppression_index_parity_with_db(
+    db_session: AsyncSession, test_org, fake_redis, monkeypatch
+):
+    rng = random.Random(42)  # noqa: S311 — jeu de donnees reproductible
+    queries = await _seed_random_suppressions(db_session, test_org.id, rng)
+    queries.append({})
+
+    exact = await load_suppression_index(db_session, test_org.id)
+    monkeypatch.setattr(suppression, "BLOOM_THRESHOLD", 0)
+    monkeypatch.setattr(suppression, "_INDEX_CACHE", {})
+    bloom = await load_suppression_index(db_session, test_org.id)
+    assert exact.bloom is None and bloom.bloom is not None
+
+    hits = 0
+    for org in (test_org.id, None):
+        for q in queries:
+            expected = await is_suppressed(db_session, organization_id=org, **q)
+            hits += expected
+            if org == test_org.id:
+                for index in (exact, bloom):
+                    got = await is_suppressed(db_session, organization_id=org, index=index, **q)
+                    assert got == expected, q
+    assert hits > 0
+
+
+async def test_suppression_index_cached_until_version_bump(
+    db_session: AsyncSession, test_org, fake_redis
+):
+    oid = test_org.id
+    first = await load_suppression_index(db_session, oid)
+    assert await load_suppression_index(db_session, oid) is first  # meme version
+
+    await add_suppression(db_session, reason="bounce", organization_id=oid, email="b@acme.fr")
+    fresh = await load_suppression_index(db_session, oid)
+    assert fresh is not first
+    assert fresh.may_contain(email="B@acme.fr") is True
+    assert first.may_contain(email="b@acme.fr") is False
+
+
+async def test_suppression_index_without_redis_always_reloads(
+    db_session: AsyncSession, test_org, monkeypatch
+):
+    async def _down(organization_id):
+        return None
+
+    monkeypatch.setattr(suppression, "get_version", _down)
+    first = await load_suppression_index(db_session, test_org.id)
+    assert await load_suppression_index(db_session, test_org.id) is not first
+
+
+async def test_suppression_index_micro_benchmark(
+    db_session: AsyncSession, test_org, fake_redis
+):
+    """Index : zero requete par candidat et >= 10x plus rapide que la requete DB."""
+    from tests.conftest import test_engine
+
+    rng = random.Random(7)  # noqa: S311
+    queries = (await _seed_random_suppressions(db_session, test_org.id, rng))[:400]
+    index = await load_suppression_index(db_session, test_org.id)
+
+    statements = {"n": 0}
+
+    def _count(*_a, **_k):
+        statements["n"] += 1
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        started = time.perf_counter()
+        for q in queries:
+            await is_suppressed(db_session, organization_id=test_org.id, index=index, **q)
+        index_time = time.perf_counter() - started
+        assert statements["n"] == 0
+
+        started = time.perf_counter()
+        for q in queries:
+            await is_suppressed(db_session, organization_id=test_org.id, **q)
+        db_time = time.perf_counter() - started
+        assert statements["n"] == len(queries)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _count)
+    assert index_time * 10 < db_time, (index_time, db_time)
 
 
 async def test_suppression_email_and_domain(db_session: AsyncSession, test_org):
@@ -0,0 +1,214 @@
+"""Cache des verifications email : adresse reutilisee entre jobs (sans appel ni
+credit), domaine catch_all court-circuitant les verifications par adresse, TTL,
+pas de court-circuit negatif, echecs provider (unknown) jamais appris,
+metriques d'appels evites."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.enrichment import (
+    EnrichmentJob,
+    EnrichmentMailDomain,
+    EnrichmentVerificationCache,
+)
+from app.services.enrichment import freshness, orchestrator
+from app.services.enrichment.adapters.mock import MockEmailVerifier
+from app.services.enrichment.orchestrator import run_enrichment_job
+from app.services.enrichment.ports import EmailVerifier, VerificationResult
+from app.services.enrichment.verification_cache import (
+    CachedEmailVerifier,
+    VerificationCache,
+    purge_verification_cache,
+)
+from tests.conftest import test_session_maker
+
+
+class _Verifier(EmailVerifier):
+    """Verifier scripte par domaine : compte les appels."""
+
+    name = "icypeas"
+    cost_per_check = 1.0
+
+    def __init__(self, statuses: dict[str, str]) -> None:
+        self.statuses = statuses
+        self.calls: list[str] = []
+
+    async def verify(self, email: str) -> VerificationResult:
+        self.calls.append(email)
+        status = self.statuses.get(email.split("@")[1], "valid")
+        return VerificationResult(email=email, status=status, confidence=0.95, source=self.name)
+
+
+def _cached(inner: EmailVerifier) -> CachedEmailVerifier:
+    # Nouveau cache = autre job (memo vide) : seule la table est partagee.
+    return CachedEmailVerifier(inner, VerificationCache(test_session_maker))
+
+
+async def test_address_result_reused_across_jobs():
+    inner = _Verifier({})
+    first = _cached(inner)
+    assert await first.cached("Julie.Martin@Acme.fr") is None
+    await first.verify("julie.martin@acme.fr")
+    await first.flush()  # fin de societe : resultats ecrits en lot
+
+    second = _cached(inner)
+    hit = await second.cached("julie.martin@acme.fr ")
+    assert hit == VerificationResult(
+        email="julie.martin@acme.fr", status="valid", confidence=0.95, source="icypeas",
+    )
+    assert inner.calls == ["julie.martin@acme.fr"]
+    assert second.cache_metrics()["email_hits"] == 1
+
+
+async def test_catch_all_domain_skips_per_address_checks():
+    inner = _Verifier({"catchall.fr": "catch_all", "strict.fr": "invalid"})
+    first = _cached(inner)
+    await first.verify("a@catchall.fr")
+    await first.verify("a@strict.fr")
+    # Meme job : memo du domaine (avant meme l'ecriture)
+    assert (await first.cached("b@catchall.fr")).status == "catch_all"
+    await first.flush()
+
+    second = _cached(inner)
+    hit = await second.cached("c@catchall.fr")
+    assert (hit.status, hit.confidence, hit.source) == ("catch_all", 0.95, "icypeas")
+    # Adresse invalide : rien appris sur le domaine, l'autre adresse est verifiee
+    assert await second.cached("b@strict.fr") is None
+    assert inner.calls == ["a@catchall.fr", "a@strict.fr"]
+
+    metrics = second.cache_metrics()
+    assert (metrics["domain_hits"], metrics["misses"], metrics["calls_saved"]) == (1, 1, 1)
+    async with test_session_maker() as db:
+        domains = {
+            d.domain: (d.catch_all, d.accepts_mail, d.checks)
+            for d in (await db.execute(select(EnrichmentMailDomain))).scalars()
+        }
+    assert domains == {"catchall.fr": (True, True, 1), "strict.fr": (False, None, 1)}
+
+
+async def test_failed_verification_is_not_cached():
+    # Provider KO / timeout : l'adaptateur rend unknown (pas de verdict)
+    inner = _Verifier({"down.fr": "unknown", "catchall.fr": "catch_all"})
+    first = _cached(inner)
+    await first.verify("a@catchall.fr")
+    await first.verify("julie@down.fr")
+    assert await first.cached("julie@down.fr") is None  # re-verifiable dans le job
+    # Un echec ne desapprend pas un domaine catch_all connu
+    await first._cache.put(
+        VerificationResult(email="b@catchall.fr", status="unknown", confidence=0.0, source="icypeas"),
+    )
+    await first.flush()
+
+    second = _cached(inner)
+    assert await second.cached("julie@down.fr") is None
+    assert (await second.cached("c@catchall.fr")).status == "catch_all"
+    async with test_session_maker() as db:
+        emails = (await db.execute(select(EnrichmentVerificationCache.email))).scalars().all()
+        domains = (await db.execute(select(EnrichmentMailDomain.domain))).scalars().all()
+    assert emails == ["a@catchall.fr"]
+    assert domains == ["catchall.fr"]
+
+
+async def test_expired_entries_are_misses_and_purged():
+    inner = _Verifier({})
+    cached = _cached(inner)
+    await cached.verify("julie@acme.fr")
+    await cached.flush()
+    past = datetime.now(UTC) - timedelta(minutes=1)
+    async with test_session_maker() as db:
+        await db.execute(update(EnrichmentVerificationCache).values(expires_at=past))
+        await db.execute(update(EnrichmentMailDomain).values(expires_at=past))
+        await db.commit()
+        assert await _cached(inner).cached("julie@acme.fr") is None
+        assert await purge_verification_cache(db) == {"emails": 1, "domains": 1}
+
+
+async def test_company_lookups_and_writes_share_sessions():
+    """Prefetch : une session (un IN par kind) pour toute une societe ; une
+    adresse trouvee par le finder : une session (adresse + domaine) ; les
+    resultats appris : une session au flush."""
+    opened = {"n": 0}
+
+    def _factory():
+        opened["n"] += 1
+        return test_session_maker()
+
+    inner = _Verifier({"catchall.fr": "catch_all"})
+    warm = CachedEmailVerifier(inner, VerificationCache(_factory))
+    for email in ("a@acme.fr", "b@acme.fr", "a@catchall.fr"):
+        await warm.verify(email)
+    assert opened["n"] == 0  # tampon
+    await warm.flush()
+    assert opened["n"] == 1
+
+    opened["n"] = 0
+    job = CachedEmailVerifier(inner, VerificationCache(_factory))
+    await job.prefetch(
+        domains=["acme.fr", "catchall.fr", "new.fr"],
+        emails=["a@acme.fr", "b@acme.fr", "c@acme.fr"],
+    )
+    assert opened["n"] == 1
+    assert (await job.cached("a@acme.fr")).status == "valid"
+    assert (await job.cached("z@catchall.fr")).status == "catch_all"
+    assert await job.cached("c@acme.fr") is None  # absent memorise : pas de relecture
+    assert opened["n"] == 1
+    assert await job.cached("d@other.fr") is None  # hors prefetch : une session
+    assert opened["n"] == 2
+    async with test_session_maker() as db:
+        checks = (await db.execute(
+            select(EnrichmentMailDomain.checks).where(EnrichmentMailDomain.domain == "acme.fr")
+        )).scalar_one()
+    assert checks == 2  # observations agregees dans le lot
+
+
+@pytest.fixture
+def _no_redis(monkeypatch: pytest.MonkeyPatch):
+    async def _noop(*a, **k):
+        return None
+
+    async def _never_fresh(*a, **k):
+        return set()
+
+    monkeypatch.setattr(freshness, "touch_many", _noop)
+    monkeypatch.setattr(freshness, "fresh_keys", _never_fresh)
+
+
+async def test_second_job_pays_no_verification(
+    db_session: AsyncSession, test_org, monkeypatch, _no_redis
+):
+    calls: list[str] = []
+
+    class _Counting(MockEmailVerifier):
+        async def verify(self, email):
+            calls.append(email)
+            return await super().verify(email)
+
+    monkeypatch.setattr(
+        orchestrator, "get_email_verifiers", lambda: [_cached(_Counting())],
+    )
+
+    async def _run() -> dict:
+        job = EnrichmentJob(
+            mode="company", status="queued",
+            target_json={"kind": "company", "siren": "552081317"},
+            organization_id=test_org.id,
+        )
+        db_session.add(job)
+        await db_session.commit()
+        await run_enrichment_job(db_session, job)
+        return dict(job.stats_json)
+
+    first = await _run()
+    checked = len(calls)
+    assert checked > 0
+    second = await _run()
+    assert len(calls) == checked
+    assert second["valid"] == first["valid"]
+    assert second["credits_spent"] == pytest.approx(first["credits_spent"] - 0.1 * checked)
+    assert second["verify_cache"]["calls_saved"] == checked
+    assert second["verify_cache"]["verify_calls"] == 0
@@ -0,0 +1,183 @@
+"""Detection Lead Engine sur ecriture : evenements outbox ecrits dans la
+transaction de la donnee (annules avec elle), consumer scope aux seules cibles,
+consumer planifie apres commit, org en echec isolee puis failed."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.activity import Activity
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.deal import Deal
+from app.models.lead_engine import LeadEvent, LeadSignal
+from app.models.organization import Organization
+from app.services.lead_engine import detector, events
+from app.services.lead_engine.events import process_lead_events
+
+RECENT = date.today() - timedelta(days=5)
+
+
+def _funded(org_id: uuid.UUID, **kwargs) -> Company:
+    return Company(
+        name=f"Startup {uuid.uuid4().hex[:6]}", organization_id=org_id,
+        startup_radar_id=f"sr-{uuid.uuid4().hex[:6]}", funding_date=RECENT, **kwargs,
+    )
+
+
+async def _events(db: AsyncSession) -> list[LeadEvent]:
+    return list((await db.execute(
+        select(LeadEvent).order_by(LeadEvent.event_type).execution_options(populate_existing=True)
+    )).scalars())
+
+
+async def _signal_keys(db: AsyncSession) -> set[str]:
+    return set((await db.execute(select(LeadSignal.dedup_key))).scalars())
+
+
+async def test_writes_emit_events_in_same_transaction(
+    db_session: AsyncSession, test_user, monkeypatch: pytest.MonkeyPatch,
+):
+    org_id, user_id = test_user.organization_id, test_user.id
+    dispatched: list[bool] = []
+    monkeypatch.setattr(events, "_enqueue_consumer", lambda: dispatched.append(True))
+
+    # Transaction annulee : ni societe ni evenement, rien a planifier
+    db_session.add(_funded(org_id))
+    await db_session.flush()
+    await db_session.rollback()
+    assert await _events(db_session) == []
+    # Commit suivant sans evenement : rien a planifier (drapeau efface au rollback)
+    db_session.add(Company(name="Neutre", organization_id=org_id))
+    await db_session.commit()
+    assert dispatched == []
+
+    funded = _funded(org_id)
+    unfunded = Company(name="Sans levee", organization_id=org_id)
+    inbound = Contact(first_name="Lea", last_name="M", source="nomo-ia", organization_id=org_id)
+    manual = Contact(first_name="Jo", last_name="D", source="manual", organization_id=org_id)
+    db_session.add_all([funded, unfunded, inbound, manual])
+    await db_session.flush()
+    db_session.add(Activity(
+        organization_id=org_id, type="audit", subject="Audit messaging", user_id=user_id,
+        company_id=unfunded.id, metadata_={"audit_type": "messaging", "messaging_score": "20"},
+    ))
+    db_session.add(Activity(
+        organization_id=org_id, type="note", subject="Note", user_id=user_id,
+        company_id=funded.id,
+    ))
+    await db_session.commit()
+
+    assert dispatched == [True]
+    assert [(e.event_type, e.company_id, e.contact_id) for e in await _events(db_session)] == [
+        ("audit_recorded", unfunded.id, None),
+        ("funding_updated", funded.id, None),
+        ("inbound_contact", None, inbound.id),
+    ]
+
+    # Edition hors champs funding : pas d'evenement ; levee modifiee : evenement
+    funded.description = "maj"
+    await db_session.commit()
+    assert len(await _events(db_session)) == 3
+    funded.funding_amount = 2_000_000
+    await db_session.commit()
+    assert len(await _events(db_session)) == 4
+    assert dispatched == [True, True]
+
+
+async def test_consumer_evaluates_only_event_targets(
+    db_session: AsyncSession, test_user, monkeypatch: pytest.MonkeyPatch,
+):
+    org_id = test_user.organization_id
+    # Societe financee SANS evenement (ecrite detection desactivee) : laissee au scan
+    monkeypatch.setattr(settings, "lead_engine_events_enabled", False)
+    db_session.add(_funded(org_id))
+    await db_session.commit()
+    monkeypatch.setattr(settings, "lead_engine_events_enabled", True)
+
+    hot = _funded(org_id)
+    in_pipeline = _funded(org_id)
+    inbound = Contact(first_name="Lea", last_name="M", source="plein-phare", organization_id=org_id)
+    db_session.add_all([hot, in_pipeline, inbound])
+    await db_session.flush()
+    db_session.add_all([
+        Deal(title="Ouvert", organization_id=org_id, company_id=in_pipeline.id, stage="proposal"),
+        Activity(
+            organization_id=org_id, type="audit", subject="Audit messaging", user_id=test_user.id,
+            company_id=hot.id, metadata_={"audit_type": "messaging", "messaging_score": "20"},
+        ),
+    ])
+    await db_session.commit()
+
+    created = await process_lead_events(db_session)
+
+    assert created == {
+        "funding_detected": 1, "mmf_gap": 1, "inbound_new": 1, "events": 4,
+    }
+    assert await _signal_keys(db_session) == {
+        f"funding:{hot.id}", f"mmf:{hot.id}", f"inbound:{inbound.id}",
+    }
+    assert await _events(db_session) == []  # evenements traites supprimes
+
+    # Re-emission (nouvelle levee) : dedup temporelle, pas de second signal
+    hot.funding_amount = 5_000_000
+    await db_session.commit()
+    assert (await process_lead_events(db_session))["funding_detected"] == 0
+    assert (await process_lead_events(db_session))["events"] == 0
+
+
+async def test_failing_org_keeps_its_events_until_max_attempts(
+    db_session: AsyncSession, test_user, monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, "lead_engine_event_max_attempts", 2)
+    other = Organization(id=uuid.uuid4(), name="Autre", slug=f"o-{uuid.uuid4().hex[:8]}", is_active=True)
+    db_session.add(other)
+    await db_session.commit()
+    broken_org = test_user.organization_id
+    db_session.add_all([_funded(broken_org), _funded(other.id)])
+    await db_session.commit()
+
+    real_funding = detector._DETECTORS["funding"]
+
+    async def _flaky(db, org_id, since=None, targets=None):
+        if org_id == broken_org:
+            raise RuntimeError("boom")
+        return await real_funding(db, org_id, since, targets)
+
+    monkeypatch.setitem(detector._DETECTORS, "funding", _flaky)
+
+    assert (await process_lead_events(db_session))["funding_detected"] == 1
+    (pending,) = await _events(db_session)
+    assert (pending.organization_id, pending.status, pending.attempts) == (broken_org, "pending", 1)
+    assert pending.error == "boom"
+
+    await process_lead_events(db_session)
+    (failed,) = await _events(db_session)
+    assert (failed.status, failed.attempts) == ("failed", 2)
+    assert (await process_lead_events(db_session))["events"] == 0  # plus reprise
+
+
+async def test_consumer_locks_each_org_in_stable_order(
+    db_session: AsyncSession, test_user, monkeypatch: pytest.MonkeyPatch,
+):
+    other = Organization(id=uuid.uuid4(), name="Autre", slug=f"o-{uuid.uuid4().hex[:8]}", is_active=True)
+    db_session.add(other)
+    await db_session.commit()
+    db_session.add_all([_funded(test_user.organization_id), _funded(other.id)])
+    await db_session.commit()
+
+    locked: list[uuid.UUID] = []
+
+    async def _record(_db, org_id):
+        locked.append(org_id)
+
+    monkeypatch.setattr(events, "_lock_org_detection", _record)
+    assert (await process_lead_events(db_session))["funding_detected"] == 2
+    # Verrou de detection par org, pris dans un ordre stable (pas d'interblocage)
+    assert locked == sorted([test_user.organization_id, other.id])
@@ -0,0 +1,145 @@
+"""Scan Lead Engine incremental : watermark par org et detecteur, seules les
+lignes modifiees depuis sont relues (societes, audits, contacts, deals), scan
+sans changement quasi gratuit, rescan complet (full=True) inchange."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, date, datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.activity import Activity
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.deal import Deal
+from app.models.lead_engine import LeadScanWatermark, LeadSignal
+from app.services.lead_engine.detector import scan_org
+from tests.conftest import test_engine
+
+RECENT = date.today() - timedelta(days=5)
+HOUR_AGO = datetime.now(UTC) - timedelta(hours=1)
+DAY_AGO = datetime.now(UTC) - timedelta(days=1)
+
+
+@pytest.fixture(autouse=True)
+def _no_overlap(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "lead_engine_watermark_overlap_minutes", 0)
+
+
+def _funded(org_id: uuid.UUID, **kwargs) -> Company:
+    return Company(
+        name=f"Startup {uuid.uuid4().hex[:6]}", organization_id=org_id,
+        startup_radar_id=f"sr-{uuid.uuid4().hex[:6]}", funding_date=RECENT, **kwargs,
+    )
+
+
+async def _age(db: AsyncSession, model, ids, when: datetime = DAY_AGO) -> None:
+    """Lignes modifiees AVANT le dernier scan (updated_at explicite)."""
+    await db.execute(update(model).where(model.id.in_(ids)).values(updated_at=when))
+    await db.commit()
+
+
+async def _rewind_watermarks(db: AsyncSession, org_id: uuid.UUID) -> None:
+    """Dernier scan il y a une heure : seules les lignes plus recentes sont relues."""
+    await db.execute(
+        update(LeadScanWatermark)
+        .where(LeadScanWatermark.organization_id == org_id)
+        .values(scanned_at=HOUR_AGO)
+    )
+    await db.commit()
+
+
+async def _signal_keys(db: AsyncSession, org_id: uuid.UUID) -> set[str]:
+    return set((await db.execute(
+        select(LeadSignal.dedup_key).where(LeadSignal.organization_id == org_id)
+    )).scalars())
+
+
+async def test_incremental_scan_reads_only_changed_rows(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    old = _funded(org_id)
+    db_session.add(old)
+    await db_session.commit()
+    await _age(db_session, Company, [old.id])
+
+    # Premier scan : pas de watermark -> complet, watermarks poses
+    assert (await scan_org(db_session, org_id))["funding_detected"] == 1
+    detectors = set((await db_session.execute(
+        select(LeadScanWatermark.detector).where(LeadScanWatermark.organization_id == org_id)
+    )).scalars())
+    assert detectors == {"funding", "mmf", "inbound"}
+
+    # Signal supprime : seul un rescan de la societe (non modifiee) le recreerait
+    await db_session.execute(delete(LeadSignal).where(LeadSignal.organization_id == org_id))
+    new = _funded(org_id)
+    inbound = Contact(first_name="Lea", last_name="M", source="nomo-ia", organization_id=org_id)
+    db_session.add_all([new, inbound])
+    await db_session.commit()
+    db_session.add(Activity(
+        organization_id=org_id, type="audit", subject="Audit messaging", user_id=test_user.id,
+        company_id=new.id, metadata_={"audit_type": "messaging", "messaging_score": "20"},
+    ))
+    await db_session.commit()
+    await _rewind_watermarks(db_session, org_id)
+
+    created = await scan_org(db_session, org_id)
+    assert created == {"funding_detected": 1, "mmf_gap": 1, "inbound_new": 1}
+    assert await _signal_keys(db_session, org_id) == {
+        f"funding:{new.id}", f"mmf:{new.id}", f"inbound:{inbound.id}",
+    }
+
+    # Rescan complet : la societe non modifiee est relue
+    created = await scan_org(db_session, org_id, full=True)
+    assert created == {"funding_detected": 1, "mmf_gap": 0, "inbound_new": 0}
+    assert f"funding:{old.id}" in await _signal_keys(db_session, org_id)
+
+
+async def test_closed_deal_makes_unchanged_company_eligible(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    company = _funded(org_id)
+    db_session.add(company)
+    await db_session.commit()
+    deal = Deal(title="Ouvert", organization_id=org_id, company_id=company.id, stage="proposal")
+    db_session.add(deal)
+    await db_session.commit()
+    await _age(db_session, Company, [company.id])
+    await _age(db_session, Deal, [deal.id])
+
+    assert (await scan_org(db_session, org_id))["funding_detected"] == 0  # en pipeline
+    await _rewind_watermarks(db_session, org_id)
+    assert (await scan_org(db_session, org_id))["funding_detected"] == 0
+
+    deal.stage = "lost"
+    await db_session.commit()
+    await _rewind_watermarks(db_session, org_id)
+    assert (await scan_org(db_session, org_id))["funding_detected"] == 1
+
+
+async def test_scan_without_changes_skips_lookups(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    companies = [_funded(org_id) for _ in range(300)]
+    db_session.add_all(companies)
+    await db_session.commit()
+    await _age(db_session, Company, [c.id for c in companies])
+    assert (await scan_org(db_session, org_id))["funding_detected"] == 300
+    await _rewind_watermarks(db_session, org_id)
+
+    statements: list[str] = []
+
+    def _log(_conn, _cursor, statement, *_a):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _log)
+    try:
+        created = await scan_org(db_session, org_id)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _log)
+
+    assert created == {"funding_detected": 0, "mmf_gap": 0, "inbound_new": 0}
+    # Ni dedup (signaux de l'org) ni pipeline relus : aucun candidat
+    assert not [s for s in statements if "FROM lead_signals" in s]
+    assert len(statements) <= 10
@@ -0,0 +1,95 @@
+"""Scan Lead Engine de toutes les orgs : fenetre de concurrence bornee, une
+session par org, budget de temps par org, echec isole, rapport par org."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.company import Company
+from app.models.lead_engine import LeadSignal
+from app.models.organization import Organization
+from app.services.lead_engine import detector
+from tests.conftest import test_session_maker
+
+RECENT = date.today() - timedelta(days=5)
+
+
+async def _orgs(db: AsyncSession, n: int, funded: bool = False) -> list[uuid.UUID]:
+    orgs = [
+        Organization(id=uuid.uuid4(), name=f"Org {i}", slug=f"org-{uuid.uuid4().hex[:8]}", is_active=True)
+        for i in range(n)
+    ]
+    db.add_all(orgs)
+    await db.commit()
+    if funded:
+        db.add_all(
+            Company(
+                name=f"Startup {i}", organization_id=org.id,
+                startup_radar_id=f"sr-{i}", funding_date=RECENT,
+            )
+            for i, org in enumerate(orgs)
+        )
+        await db.commit()
+    return [org.id for org in orgs]
+
+
+async def test_many_orgs_scanned_in_parallel_with_isolation(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "lead_engine_scan_concurrency", 5)
+    monkeypatch.setattr(settings, "lead_engine_org_scan_timeout_seconds", 0.2)
+    org_ids = await _orgs(db_session, 40)
+    failing, hanging = org_ids[3], org_ids[7]
+    state = {"in_flight": 0, "max": 0, "sessions": set()}
+
+    async def _fake_scan(db, org_id, full=False):
+        state["sessions"].add(id(db))
+        state["in_flight"] += 1
+        state["max"] = max(state["max"], state["in_flight"])
+        try:
+            if org_id == failing:
+                raise RuntimeError("boom")
+            await asyncio.sleep(5 if org_id == hanging else 0.02)
+            return {"funding_detected": 1, "mmf_gap": 0, "inbound_new": 2}
+        finally:
+            state["in_flight"] -= 1
+
+    monkeypatch.setattr(detector, "scan_org", _fake_scan)
+    result = await detector.scan_all_orgs(session_factory=test_session_maker)
+
+    assert state["max"] == 5
+    assert len(state["sessions"]) >= 5  # une session par org (pas la session partagee)
+    # 40 orgs a 20 ms par fenetre de 5 : ~8 x 20 ms (+ budget de l'org bloquee)
+    assert result["duration_ms"] < 40 * 20
+    assert (result["orgs"], result["orgs_failed"], result["orgs_timed_out"]) == (40, 1, 1)
+    assert (result["funding_detected"], result["inbound_new"]) == (38, 76)
+
+    reports = {r["org_id"]: r for r in result["per_org"]}
+    assert reports[str(failing)]["status"] == "error"
+    assert reports[str(hanging)]["status"] == "timeout"
+    assert 200 <= reports[str(hanging)]["duration_ms"] < 1000
+    assert result["per_org"][0]["org_id"] == str(hanging)  # plus lentes d'abord
+    ok = reports[str(org_ids[0])]
+    assert (ok["status"], ok["funding_detected"], ok["inbound_new"]) == ("ok", 1, 2)
+
+
+async def test_real_scan_across_orgs(db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "lead_engine_scan_concurrency", 4)
+    org_ids = await _orgs(db_session, 25, funded=True)
+
+    result = await detector.scan_all_orgs(session_factory=test_session_maker)
+
+    assert result["funding_detected"] == 25
+    assert result["orgs_failed"] == result["orgs_timed_out"] == 0
+    assert all(r["duration_ms"] >= 0 for r in result["per_org"])
+    per_org = dict((await db_session.execute(
+        select(LeadSignal.organization_id, func.count()).group_by(LeadSignal.organization_id)
+    )).all())
+    assert per_org == dict.fromkeys(org_ids, 1)
@@ -0,0 +1,45 @@
+# =============================================================================
+# FGA CRM - Tests partitionnement mensuel (nommage, DDL, no-op SQLite)
+# =============================================================================
+
+from datetime import date
+
+import pytest
+
+from app.db.partitions import (
+    add_months,
+    ensure_future_partitions,
+    local_index_ddl,
+    partition_ddl,
+    partition_name,
+)
+
+
+def test_add_months_crosses_year():
+    assert add_months(date(2026, 11, 20), 1) == date(2026, 12, 1)
+    assert add_months(date(2026, 11, 20), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 5), -1) == date(2025, 12, 1)
+
+
+def test_partition_ddl_month_bounds():
+    ddl = partition_ddl("geo_runs", date(2026, 12, 17))
+    assert partition_name("geo_runs", date(2026, 12, 1)) == "geo_runs_y2026m12"
+    assert "CREATE TABLE IF NOT EXISTS geo_runs_y2026m12 PARTITION OF geo_runs" in ddl
+    assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in ddl
+
+
+def test_partition_ddl_rejects_unknown_table():
+    with pytest.raises(ValueError):
+        partition_ddl("contacts", date(2026, 1, 1))
+
+
+def test_local_unique_index_only_for_geo_runs():
+    ddl = local_index_ddl("geo_runs", date(2026, 7, 9))
+    assert ddl is not None
+    assert "uq_geo_runs_y2026m07_prompt_engine_idx_day ON geo_runs_y2026m07" in ddl
+    assert local_index_ddl("activities", date(2026, 7, 9)) is None
+
+
+@pytest.mark.asyncio
+async def test_ensure_future_partitions_noop_on_sqlite(db_session):
+    assert await ensure_future_partitions(db_session, months_ahead=2) == []
@@ -0,0 +1,188 @@
+"""Phase audits du sync SR : lectures en parallele (fenetre bornee), audits deja
+importes ni relus ni dupliques (un seul SELECT), liste des startups de la phase
+startups reutilisee par full_sync, appels SR et duree rapportes."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.activity import Activity
+from app.models.company import Company
+from app.services.startup_radar_sync import full_sync, runner, sync_audits
+
+_LATENCY = 0.02
+
+
+class _FakeSR:
+    """Faux client SR : latence par appel, compteur d'appels et d'appels en vol."""
+
+    def __init__(self, startups: list[dict]):
+        self.startups = startups
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def _call(self, name: str, payload):
+        self.calls.append(name)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(_LATENCY)
+        finally:
+            self.in_flight -= 1
+        return payload
+
+    async def authenticate(self) -> None:
+        return None
+
+    async def get_startups(self) -> list[dict]:
+        return await self._call("startups", self.startups)
+
+    async def get_investors(self) -> list[dict]:
+        return []
+
+    async def get_contacts(self) -> list[dict]:
+        return []
+
+    async def iter_pages(self, path: str, start_page: int = 1):
+        # Listes SR sur une seule page (full_sync en flux)
+        items = await getattr(self, f"get_{path.strip('/')}")()
+        yield start_page, 1, items
+
+    async def get_analysis(self, sr_id: str):
+        return await self._call("analysis", {"positioning": "B2B", "value_proposition": "vp"})
+
+    async def get_detailed_audit(self, sr_id: str):
+        if sr_id == "s3":
+            await self._call("detailed", None)
+            raise RuntimeError("SR 500")
+        return await self._call("detailed", {
+            "status": "completed",
+            "result": {"executive_summary": {"total_score": 70}, "full_report": "# rapport"},
+        })
+
+    async def get_presentation(self, sr_id: str):
+        return await self._call("presentation", {"slug": f"p-{sr_id}", "public_url": "u"})
+
+    async def get_geo_audit(self, sr_id: str):
+        return await self._call("geo", {"status": "running"})
+
+    def get_detailed_audit_file_urls(self, sr_id: str) -> tuple[str, str]:
+        return f"{sr_id}.md", f"{sr_id}.docx"
+
+
+async def _companies(db: AsyncSession, org_id, n: int) -> dict:
+    companies = [Company(name=f"Startup {i}", organization_id=org_id) for i in range(n)]
+    db.add_all(companies)
+    await db.flush()
+    return {f"s{i}": c.id for i, c in enumerate(companies)}
+
+
+async def _audit_count(db: AsyncSession, org_id) -> int:
+    return (await db.execute(
+        select(func.count()).select_from(Activity)
+        .where(Activity.organization_id == org_id, Activity.type == "audit")
+    )).scalar_one()
+
+
+async def test_audits_fetched_concurrently_and_not_refetched(
+    db_session: AsyncSession, test_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "startup_radar_audit_concurrency", 4)
+    org_id = test_user.organization_id
+    sr_to_crm = await _companies(db_session, org_id, 12)
+    startups = [{"id": sr_id, "name": f"Startup {sr_id}"} for sr_id in sr_to_crm]
+    client = _FakeSR(startups)
+
+    started = time.perf_counter()
+    result = await sync_audits(db_session, client, test_user, sr_to_crm, startups, org_id)
+    elapsed = time.perf_counter() - started
+
+    # 12 x (analysis, detailed, geo) + 11 presentations (s3 en erreur)
+    assert result.audits_api_calls == len(client.calls) == 47
+    assert client.max_in_flight == 4
+    # ~47 x 20 ms en serie ; ~12 startups / 4 x 4 appels en fenetre
+    assert elapsed < 47 * _LATENCY / 2
+    assert result.audits_duration_ms > 0
+    assert result.audits_created == 12 + 11
+    assert result.errors == ["DetailedAudit Startup s3: SR 500"]
+
+    pres = (await db_session.execute(
+        select(Activity.metadata_).where(Activity.subject == "Audit detaille: Startup s1")
+    )).scalar_one()
+    assert (pres["presentation_slug"], pres["file_md_url"]) == ("p-s1", "s1.md")
+
+    # Deuxieme passe : seuls le detaille de s3 et les GEO (pas termines) sont relus
+    again = _FakeSR(startups)
+    result = await sync_audits(db_session, again, test_user, sr_to_crm, startups, org_id)
+    assert result.audits_created == 0
+    assert sorted(set(again.calls)) == ["detailed", "geo"]
+    assert result.audits_api_calls == 13
+    assert await _audit_count(db_session, org_id) == 23
+
+
+async def test_same_company_audits_not_duplicated(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    company_id = (await _companies(db_session, org_id, 1))["s0"]
+    startups = [{"id": "a", "name": "Acme"}, {"id": "b", "name": "Acme"}]
+    result = await sync_audits(
+        db_session, _FakeSR(startups), test_user, {"a": company_id, "b": company_id},
+        startups, org_id,
+    )
+    assert result.audits_created == 2
+    assert await _audit_count(db_session, org_id) == 2
+
+
+async def test_bad_audit_row_is_isolated(db_session: AsyncSession, test_user):
+    """Une ligne non ecrivable echoue seule (erreur rattachee), le lot est ecrit."""
+
+    class _BadRowSR(_FakeSR):
+        async def get_analysis(self, sr_id: str):
+            analysis = await super().get_analysis(sr_id)
+            if sr_id == "s1":
+                analysis["strengths"] = {"non serialisable en JSON"}
+            return analysis
+
+    org_id = test_user.organization_id
+    sr_to_crm = await _companies(db_session, org_id, 3)
+    startups = [{"id": sr_id, "name": f"Startup {sr_id}"} for sr_id in sr_to_crm]
+    result = await sync_audits(db_session, _BadRowSR(startups), test_user, sr_to_crm, startups, org_id)
+
+    # 3 analyses + 3 detailles, sauf l'analyse de s1
+    assert result.audits_created == 5
+    assert [e.split(":")[0] for e in result.errors] == ["Analysis Startup s1"]
+    assert await _audit_count(db_session, org_id) == 5
+
+
+@pytest.mark.parametrize("fail", [False, True])
+async def test_full_sync_reads_startups_once(db_session: AsyncSession, test_user, monkeypatch, fail):
+    client = _FakeSR([{"id": "s1", "name": "Alpha"}, {"id": "s2", "name": "Beta"}])
+    if fail:
+        async def _down():
+            raise runner.StartupRadarError("SR down")
+
+        client.get_startups = _down
+    monkeypatch.setattr(runner, "StartupRadarClient", lambda: client)
+
+    result = await full_sync(db_session, test_user, test_user.organization_id)
+
+    if fail:
+        assert result.errors == ["Fetch startups: SR down"]
+        assert client.calls == []
+    else:
+        assert client.calls.count("startups") == 1
+        assert result.companies_created == 2
+        assert result.audits_created == 4
+        assert result.audits_api_calls == 6 + 2
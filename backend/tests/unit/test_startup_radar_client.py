@@ -0,0 +1,125 @@
+"""StartupRadarClient : pagination concurrente (fenetre bornee, ordre conserve),
+retry par page, plafond de debit — contre un faux serveur SR a latence injectee."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services import startup_radar
+from app.services.startup_radar import StartupRadarClient, StartupRadarError
+
+
+class _FakeSR:
+    """Faux SR pagine : `total` items, latence par requete, echecs scriptes par page."""
+
+    def __init__(self, total: int, *, latency: float = 0.0, failures: dict | None = None):
+        self.total = total
+        self.latency = latency
+        self.failures = dict(failures or {})  # page -> nb de 503 avant succes
+        self.requests: list[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        size = int(request.url.params["size"])
+        self.requests.append(page)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self.failures.get(page):
+            self.failures[page] -= 1
+            return httpx.Response(503, text="busy")
+        start = (page - 1) * size
+        items = [{"id": i} for i in range(start, min(start + size, self.total))]
+        pages = -(-self.total // size)
+        return httpx.Response(200, json={"items": items, "page": page, "pages": pages})
+
+
+def _client(sr: _FakeSR, **kw) -> StartupRadarClient:
+    kw.setdefault("max_rps", 0)
+    return StartupRadarClient(
+        base_url="http://sr.test/api/v1", transport=httpx.MockTransport(sr.handler), **kw,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(startup_radar, "SR_RETRY_BACKOFF", 0.0)
+
+
+async def _timed_pull(sr: _FakeSR, **kw) -> tuple[list[dict], float]:
+    async with _client(sr, **kw) as client:
+        started = time.perf_counter()
+        items = await client._get_all_pages("/startups", size=50)
+    return items, time.perf_counter() - started
+
+
+async def test_pages_fetched_concurrently_in_order():
+    serial_sr = _FakeSR(500, latency=0.03)
+    serial, serial_s = await _timed_pull(serial_sr, page_concurrency=1)
+    sr = _FakeSR(500, latency=0.03)
+    items, elapsed = await _timed_pull(sr, page_concurrency=4)
+
+    assert items == serial == [{"id": i} for i in range(500)]
+    assert sorted(sr.requests) == list(range(1, 11))
+    assert serial_sr.max_in_flight == 1
+    assert sr.max_in_flight == 4
+    # 10 pages a 30 ms : ~300 ms en serie, ~1 + ceil(9/4) = 4 allers-retours en fenetre
+    assert elapsed < serial_s / 2
+
+
+async def test_failed_page_retried_alone():
+    sr = _FakeSR(250, failures={3: 2})
+    items, _ = await _timed_pull(sr)
+    assert items == [{"id": i} for i in range(250)]
+    assert sorted(sr.requests) == [1, 2, 3, 3, 3, 4, 5]
+
+
+async def test_exhausted_retries_raise(monkeypatch):
+    monkeypatch.setattr(startup_radar.settings, "startup_radar_max_retries", 1)
+    sr = _FakeSR(250, failures={4: 5})
+    with pytest.raises(StartupRadarError, match="503"):
+        await _timed_pull(sr)
+
+
+async def test_rate_cap_spaces_requests():
+    sr = _FakeSR(300)
+    _, elapsed = await _timed_pull(sr, page_concurrency=6, max_rps=20)
+    assert len(sr.requests) == 6
+    assert elapsed >= 5 / 20 * 0.9
+
+
+async def test_single_page_and_missing_endpoint():
+    sr = _FakeSR(10)
+    items, _ = await _timed_pull(sr)
+    assert len(items) == 10 and sr.requests == [1]
+
+    client = StartupRadarClient(
+        base_url="http://sr.test/api/v1", max_rps=0,
+        transport=httpx.MockTransport(lambda r: httpx.Response(404)),
+    )
+    assert await client._get_all_pages("/startups") == []  # hors contexte : client ponctuel
+
+
+async def test_iter_pages_reads_ahead_within_window():
+    sr = _FakeSR(1_000)
+    async with _client(sr, page_concurrency=3) as client:
+        seen = []
+        async for page, total_pages, items in client.iter_pages("/startups", size=50, start_page=4):
+            await asyncio.sleep(0.01)  # consommateur lent (ecritures BDD)
+            # Lecture en avance bornee : au plus 3 pages demandees non consommees
+            assert max(sr.requests) - page <= 3
+            seen.append((page, total_pages, items[0]["id"]))
+            if page == 8:
+                break
+    assert seen == [(p, 20, (p - 1) * 50) for p in range(4, 9)]
+    # Pages 9-10 en vol a l'arret : annulees, rien au-dela
+    assert sorted(sr.requests) == list(range(4, 11))
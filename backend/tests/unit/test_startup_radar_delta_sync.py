@@ -0,0 +1,120 @@
+"""Sync SR en delta : empreinte du payload par entite, entites inchangees ignorees
+(aucune ecriture), compteurs crees / mis a jour / inchanges, resync forcee."""
+
+from __future__ import annotations
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.models.contact import Contact
+from app.services.startup_radar_sync import sync_contacts, sync_investors, sync_startups
+from tests.conftest import test_engine
+
+
+class _Client:
+    def __init__(self, startups=None, investors=None, contacts=None):
+        self.startups = startups or []
+        self.investors = investors or []
+        self.contacts = contacts or []
+
+    async def get_startups(self) -> list[dict]:
+        return self.startups
+
+    async def get_investors(self) -> list[dict]:
+        return self.investors
+
+    async def get_contacts(self) -> list[dict]:
+        return self.contacts
+
+
+def _writes():
+    """Compteur des INSERT / UPDATE emis sur le moteur de test."""
+    writes: list[str] = []
+
+    def _count(_conn, _cursor, statement, *_a):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE")):
+            writes.append(statement)
+
+    return writes, _count
+
+
+async def _sync_counting(coro_factory):
+    writes, listener = _writes()
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        return await coro_factory(), writes
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+
+async def test_unchanged_startups_skipped_and_force_rewrites(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    startups = [
+        {"id": f"s{i}", "name": f"Startup {i}", "sector": "SaaS", "description": "v1"}
+        for i in range(5)
+    ]
+    first, _ = await sync_startups(db_session, _Client(startups), test_user, org_id)
+    assert first.companies_created == 5
+
+    # Edition CRM locale : conservee tant que le payload SR ne change pas
+    company = (await db_session.execute(
+        select(Company).where(Company.startup_radar_id == "s0")
+    )).scalar_one()
+    company.description = "note commerciale"
+    await db_session.flush()
+
+    startups[1] = {**startups[1], "description": "v2"}
+    # Champ non mappe : ne change pas l'empreinte
+    startups[2] = {**startups[2], "logo_color": "#fff"}
+    (result, sr_to_crm), writes = await _sync_counting(
+        lambda: sync_startups(db_session, _Client(startups), test_user, org_id)
+    )
+    assert (result.companies_created, result.companies_updated, result.companies_unchanged) == (0, 1, 4)
+    assert len(sr_to_crm) == 5  # inchangees toujours mappees (contacts, audits)
+    assert len(writes) == 1
+    assert company.description == "note commerciale"
+
+    forced, _ = await sync_startups(db_session, _Client(startups), test_user, org_id, force=True)
+    assert (forced.companies_updated, forced.companies_unchanged) == (5, 0)
+    assert company.description == "v1"
+
+
+async def test_unchanged_investors_and_contacts_not_rewritten(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    investors = [{"id": i, "name": f"Fonds {i}", "startups_count": i} for i in range(1, 4)]
+    contacts = [
+        {"id": f"c{i}", "first_name": "A", "last_name": f"B{i}", "startup_id": "s1"}
+        for i in range(3)
+    ]
+    client = _Client(investors=investors, contacts=contacts)
+    await sync_investors(db_session, client, test_user, org_id)
+    await sync_contacts(db_session, client, test_user, {}, org_id)
+
+    investors[0] = {**investors[0], "startups_count": 9}
+    result, writes = await _sync_counting(
+        lambda: sync_investors(db_session, client, test_user, org_id)
+    )
+    assert (result.investors_updated, result.investors_unchanged) == (1, 2)
+    assert len(writes) == 1
+
+    result, writes = await _sync_counting(
+        lambda: sync_contacts(db_session, client, test_user, {}, org_id)
+    )
+    assert (result.contacts_updated, result.contacts_unchanged, writes) == (0, 3, [])
+
+    # Payload identique mais startup desormais synchronisee : le lien company change
+    company = Company(name="S1", startup_radar_id="s1", organization_id=org_id)
+    db_session.add(company)
+    await db_session.flush()
+    result = await sync_contacts(db_session, client, test_user, {"s1": company.id}, org_id)
+    assert (result.contacts_updated, result.contacts_unchanged) == (3, 0)
+    linked = (await db_session.execute(
+        select(Contact.company_id).where(Contact.organization_id == org_id)
+    )).scalars().all()
+    assert linked == [company.id] * 3
+
+    forced = await sync_contacts(
+        db_session, client, test_user, {"s1": company.id}, org_id, force=True,
+    )
+    assert (forced.contacts_updated, forced.contacts_unchanged) == (3, 0)
@@ -0,0 +1,168 @@
+"""Sync SR investisseurs / contacts ensembliste : nombre de requetes borne sur un
+gros lot (pre-chargement + upserts par chunks), liaison des fiches manuelles par
+email / LinkedIn / nom, dedup intra-batch, item fautif isole de son chunk."""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.models.contact import Contact
+from app.services.startup_radar_sync import sync_contacts, sync_investors
+
+
+class _Client:
+    def __init__(self, contacts: list[dict] | None = None, investors: list[dict] | None = None):
+        self.contacts = contacts or []
+        self.investors = investors or []
+
+    async def get_contacts(self) -> list[dict]:
+        return self.contacts
+
+    async def get_investors(self) -> list[dict]:
+        return self.investors
+
+
+@asynccontextmanager
+async def _count_statements(db: AsyncSession):
+    """Requetes emises sur la connexion de `db` seulement (pas celles d'autres
+    sessions du moteur de test)."""
+    statements = {"n": 0}
+    conn = (await db.connection()).sync_connection
+
+    def _count(*_a, **_k):
+        statements["n"] += 1
+
+    event.listen(conn, "before_cursor_execute", _count)
+    try:
+        yield statements
+    finally:
+        event.remove(conn, "before_cursor_execute", _count)
+
+
+def _sr_contact(i: int, **extra) -> dict:
+    return {
+        "id": f"c{i}", "first_name": f"Prenom{i}", "last_name": f"Nom{i}",
+        "email": f"p{i}@acme.fr", "title": "CEO", "startup_id": "s1", **extra,
+    }
+
+
+async def test_large_contact_sync_uses_few_statements(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    company = Company(name="Acme", organization_id=org_id)
+    db_session.add(company)
+    await db_session.flush()
+    sr_to_crm = {"s1": company.id}
+
+    first = _Client([_sr_contact(i) for i in range(2_000)])
+    await sync_contacts(db_session, first, test_user, sr_to_crm, org_id)
+
+    # 2 000 contacts connus (dont 500 modifies) + 8 000 nouveaux
+    contacts = [
+        _sr_contact(i, title="CTO" if i < 500 else "CEO") for i in range(10_000)
+    ]
+    async with _count_statements(db_session) as statements:
+        result = await sync_contacts(db_session, _Client(contacts), test_user, sr_to_crm, org_id)
+    # Ancien chemin : SELECT + SAVEPOINT + RELEASE par item (~30 000 requetes).
+    # Ici : 1 pre-chargement + (SAVEPOINT, upsert, RELEASE) par chunk de 500
+    # (~53) ; borne large, l'ordre de grandeur suffit a distinguer les chemins.
+    assert statements["n"] <= 120
+    assert (result.contacts_created, result.contacts_updated, result.contacts_unchanged) == (
+        8_000, 500, 1_500,
+    )
+    assert result.errors == []
+
+    counts = dict(
+        (await db_session.execute(
+            select(Contact.title, func.count())
+            .where(Contact.organization_id == org_id)
+            .group_by(Contact.title)
+        )).all()
+    )
+    assert counts == {"CTO": 500, "CEO": 9_500}
+
+    # Re-sync a l'identique : rien a reecrire, seul le pre-chargement reste
+    async with _count_statements(db_session) as statements:
+        await sync_contacts(db_session, _Client(contacts), test_user, sr_to_crm, org_id)
+    assert statements["n"] == 1
+
+
+async def test_contacts_link_manual_records_and_dedupe_batch(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    by_email = Contact(
+        first_name="Alice", last_name="Martin", email="Alice@Acme.fr",
+        email_pattern_used="first.last", organization_id=org_id,
+    )
+    by_linkedin = Contact(
+        first_name="Bob", last_name="Durand", linkedin_url="https://linkedin.com/in/bob/",
+        organization_id=org_id,
+    )
+    db_session.add_all([by_email, by_linkedin])
+    await db_session.flush()
+
+    client = _Client([
+        {"id": "a", "first_name": "Alice", "email": "alice@acme.fr ", "email_pattern_used": "flast"},
+        {"id": "b", "first_name": "Bob", "linkedin_url": "https://linkedin.com/in/bob"},
+        {"id": "n", "first_name": "Nina", "last_name": "Roux", "title": "CEO"},
+        {"id": "n", "first_name": "Nina", "last_name": "Roux", "title": "CTO"},
+    ])
+    result = await sync_contacts(db_session, client, test_user, {}, org_id)
+    assert (result.contacts_created, result.contacts_updated) == (1, 3)
+
+    rows = {
+        c.startup_radar_id: c
+        for c in (await db_session.execute(
+            select(Contact).where(Contact.organization_id == org_id)
+            .execution_options(populate_existing=True)
+        )).scalars()
+    }
+    assert set(rows) == {"a", "b", "n"}
+    assert rows["a"].id == by_email.id
+    assert rows["a"].email_pattern_used == "first.last"
+    assert rows["b"].id == by_linkedin.id
+    assert (rows["n"].title, rows["n"].source) == ("CTO", "startup_radar")
+
+
+async def test_bad_contact_isolated_from_its_chunk(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    client = _Client([
+        _sr_contact(1), _sr_contact(2, first_name=None), _sr_contact(3),
+    ])
+    result = await sync_contacts(db_session, client, test_user, {}, org_id)
+
+    assert result.contacts_created == 2
+    assert len(result.errors) == 1 and result.errors[0].startswith("Contact  Nom2:")
+    ids = set(
+        (await db_session.execute(
+            select(Contact.startup_radar_id).where(Contact.organization_id == org_id)
+        )).scalars()
+    )
+    assert ids == {"c1", "c3"}
+
+
+async def test_investors_upserted_in_bulk(db_session: AsyncSession, test_user):
+    org_id = test_user.organization_id
+    manual = Company(name="Partech", custom_fields={"note": "vu au salon"}, organization_id=org_id)
+    db_session.add(manual)
+    await db_session.flush()
+
+    investors = [
+        {"id": 1, "name": "PARTECH", "startups_count": 12},
+        *({"id": i, "name": f"Fonds {i}", "total_funding_amount": i} for i in range(2, 1_202)),
+    ]
+    async with _count_statements(db_session) as statements:
+        result = await sync_investors(db_session, _Client(investors=investors), test_user, org_id)
+    # Index compact + relecture de la ligne liee + (SAVEPOINT, upsert, RELEASE) x 3 chunks
+    assert statements["n"] <= 11
+    assert (result.investors_created, result.investors_updated, result.errors) == (1_200, 1, [])
+
+    linked = (await db_session.execute(
+        select(Company).where(Company.startup_radar_id == "inv:1")
+        .execution_options(populate_existing=True)
+    )).scalar_one()
+    assert linked.id == manual.id
+    assert linked.industry == "Capital-risque"
+    assert linked.custom_fields == {"note": "vu au salon", "portfolio_size": 12}
@@ -0,0 +1,172 @@
+"""Full sync SR en flux : un commit (ecritures + point de reprise) par page,
+reprise a la derniere page committee apres interruption, point de reprise
+perime ou d'un autre mode ignore, point de reprise supprime en fin de sync."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.startup_radar import StartupRadarSyncCheckpoint
+from app.services.startup_radar_sync import full_sync, runner
+
+_PAGE = 10
+
+
+class _Crash(Exception):
+    """Worker tue en pleine sync (hors StartupRadarError : la sync s'arrete)."""
+
+
+class _PagedSR:
+    """Faux SR pagine : catalogue par endpoint, pages lues journalisees,
+    interruption scriptee (endpoint, page)."""
+
+    def __init__(self, catalogue: dict[str, list[dict]], crash_at: tuple[str, int] | None = None):
+        self.catalogue = catalogue
+        self.crash_at = crash_at
+        self.reads: list[tuple[str, int]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def authenticate(self) -> None:
+        return None
+
+    async def iter_pages(self, path: str, start_page: int = 1):
+        items = self.catalogue.get(path, [])
+        total_pages = max(1, -(-len(items) // _PAGE))
+        for page in range(start_page, total_pages + 1):
+            if (path, page) == self.crash_at:
+                raise _Crash(path)
+            self.reads.append((path, page))
+            yield page, total_pages, items[(page - 1) * _PAGE:page * _PAGE]
+
+    async def get_analysis(self, sr_id: str):
+        return None
+
+    async def get_detailed_audit(self, sr_id: str):
+        return None
+
+    async def get_presentation(self, sr_id: str):
+        return None
+
+    async def get_geo_audit(self, sr_id: str):
+        return None
+
+
+def _catalogue() -> dict[str, list[dict]]:
+    return {
+        "/startups": [{"id": f"s{i}", "name": f"Startup {i}"} for i in range(25)],
+        "/investors": [{"id": i, "name": f"Fonds {i}"} for i in range(12)],
+        "/contacts": [
+            {"id": f"c{i}", "first_name": "A", "last_name": f"B{i}", "startup_id": f"s{i % 25}"}
+            for i in range(45)
+        ],
+    }
+
+
+async def _checkpoint(db: AsyncSession, org_id) -> StartupRadarSyncCheckpoint | None:
+    return (await db.execute(
+        select(StartupRadarSyncCheckpoint)
+        .where(StartupRadarSyncCheckpoint.organization_id == org_id)
+        .execution_options(populate_existing=True)
+    )).scalar_one_or_none()
+
+
+async def _count(db: AsyncSession, model, org_id) -> int:
+    return (await db.execute(
+        select(func.count()).select_from(model).where(model.organization_id == org_id)
+    )).scalar_one()
+
+
+async def test_each_page_committed_with_checkpoint(db_session: AsyncSession, test_user, monkeypatch):
+    client = _PagedSR(_catalogue())
+    monkeypatch.setattr(runner, "StartupRadarClient", lambda: client)
+    commits = []
+    commit = db_session.commit
+
+    async def _commit():
+        checkpoint = await _checkpoint(db_session, test_user.organization_id)
+        commits.append(checkpoint and (checkpoint.phase, checkpoint.next_page))
+        await commit()
+
+    monkeypatch.setattr(db_session, "commit", _commit)
+    result = await full_sync(db_session, test_user, test_user.organization_id)
+
+    # 3 + 2 + 5 pages SR, 1 page d'audits (25 startups liees), commit final
+    assert commits == [
+        ("startups", 2), ("startups", 3), ("startups", 4),
+        ("investors", 2), ("investors", 3),
+        *(("contacts", p) for p in range(2, 7)),
+        ("audits", 2),
+        None,
+    ]
+    assert (result.companies_created, result.investors_created, result.contacts_created) == (25, 12, 45)
+    assert result.errors == []
+    assert await _checkpoint(db_session, test_user.organization_id) is None
+
+
+async def test_interrupted_sync_resumes_at_last_committed_page(
+    db_session: AsyncSession, test_user, monkeypatch
+):
+    org_id = test_user.organization_id
+    crashing = _PagedSR(_catalogue(), crash_at=("/contacts", 3))
+    monkeypatch.setattr(runner, "StartupRadarClient", lambda: crashing)
+    with pytest.raises(_Crash):
+        await full_sync(db_session, test_user, org_id)
+
+    checkpoint = await _checkpoint(db_session, org_id)
+    assert (checkpoint.phase, checkpoint.next_page) == ("contacts", 3)
+    assert checkpoint.result_json["contacts_created"] == 20
+    assert await _count(db_session, Contact, org_id) == 20
+
+    resumed = _PagedSR(_catalogue())
+    monkeypatch.setattr(runner, "StartupRadarClient", lambda: resumed)
+    result = await full_sync(db_session, test_user, org_id)
+
+    # Ni startups ni investors relus, contacts repris a la page 3
+    assert resumed.reads == [("/contacts", 3), ("/contacts", 4), ("/contacts", 5)]
+    # Compteurs cumules sur les deux passes
+    assert (result.companies_created, result.investors_created, result.contacts_created) == (25, 12, 45)
+    assert await _count(db_session, Contact, org_id) == 45
+    linked = (await db_session.execute(
+        select(func.count()).select_from(Contact)
+        .where(Contact.organization_id == org_id, Contact.company_id.is_not(None))
+    )).scalar_one()
+    assert linked == 45  # mapping startups reconstruit depuis la base
+    assert await _checkpoint(db_session, org_id) is None
+
+
+@pytest.mark.parametrize("stale", ["age", "force"])
+async def test_stale_or_other_mode_checkpoint_ignored(
+    db_session: AsyncSession, test_user, monkeypatch, stale
+):
+    org_id = test_user.organization_id
+    db_session.add(StartupRadarSyncCheckpoint(
+        organization_id=org_id, phase="contacts", next_page=4,
+        force=stale == "force", result_json={"companies_created": 99},
+    ))
+    await db_session.commit()
+    if stale == "age":
+        await db_session.execute(
+            update(StartupRadarSyncCheckpoint)
+            .where(StartupRadarSyncCheckpoint.organization_id == org_id)
+            .values(updated_at=datetime.now(UTC) - timedelta(days=2))
+        )
+        await db_session.commit()
+
+    client = _PagedSR(_catalogue())
+    monkeypatch.setattr(runner, "StartupRadarClient", lambda: client)
+    result = await full_sync(db_session, test_user, org_id)
+
+    assert client.reads[0] == ("/startups", 1)
+    assert result.companies_created == 25
+    assert await _count(db_session, Company, org_id) == 25 + 12
@@ -0,0 +1,148 @@
+"""Token SR partage (Redis) : reutilise entre clients / runs (pas de login),
+TTL cale sur l'expiration du JWT, single-flight du login, 401 -> token retire
+puis re-auth et requete rejouee une seule fois, Redis KO -> login direct."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import startup_radar_token
+from app.services.startup_radar import StartupRadarClient
+
+
+class _FakeRedis:
+    """Redis en memoire minimal : GET / SET (NX, EX) / DELETE / EXISTS / EVAL."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+        self.ttl: dict[str, int] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = str(value)
+        self.ttl[key] = ex
+        return True
+
+    async def delete(self, key):
+        return int(self.store.pop(key, None) is not None)
+
+    async def exists(self, key):
+        return int(key in self.store)
+
+    async def eval(self, _script, _numkeys, key, stale):
+        # _INVALIDATE_LUA : DEL seulement si la valeur est encore `stale`
+        return await self.delete(key) if self.store.get(key) == stale else 0
+
+    async def aclose(self):
+        pass
+
+
+class _DownRedis:
+    """Chaque commande echoue (connexion refusee) ; aclose reste sans effet."""
+
+    def __getattr__(self, _name):
+        async def _fail(*_a, **_k):
+            raise ConnectionError("redis down")
+
+        return _fail
+
+    async def aclose(self):
+        pass
+
+
+def _jwt(n: int, ttl: int = 3600) -> str:
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": time.time() + ttl, "n": n}).encode())
+    return f"h.{claims.decode().rstrip('=')}.sig"
+
+
+class _FakeSR:
+    """Faux SR : /auth/login emet un nouveau JWT, GET exige le token courant."""
+
+    def __init__(self, login_latency: float = 0.0) -> None:
+        self.logins = 0
+        self.valid: str | None = None
+        self.login_latency = login_latency
+        self.unauthorized = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/auth/login"):
+            self.logins += 1
+            await asyncio.sleep(self.login_latency)
+            self.valid = _jwt(self.logins)
+            return httpx.Response(200, json={"access_token": self.valid, "token_type": "bearer"})
+        if request.headers.get("Authorization") != f"Bearer {self.valid}":
+            self.unauthorized += 1
+            return httpx.Response(401, json={"detail": "expired"})
+        return httpx.Response(200, json={"id": request.url.path.rsplit("/", 1)[-1]})
+
+
+@pytest.fixture()
+def redis(monkeypatch: pytest.MonkeyPatch) -> _FakeRedis:
+    fake = _FakeRedis()
+    monkeypatch.setattr(startup_radar_token, "_client", lambda: fake)
+    return fake
+
+
+def _client(sr: _FakeSR) -> StartupRadarClient:
+    return StartupRadarClient(
+        base_url="http://sr.test/api/v1", email="sync@fga.fr", password="secret",
+        transport=httpx.MockTransport(sr.handler), max_rps=0,
+    )
+
+
+async def test_token_shared_across_clients_until_expiry(redis: _FakeRedis):
+    sr = _FakeSR()
+    async with _client(sr) as first:
+        assert await first.authenticate() == sr.valid
+    # Run suivant (autre task / worker) : pas de login
+    async with _client(sr) as partial:
+        assert await partial.authenticate() == sr.valid
+        assert await partial.get_analysis("s1") == {"id": "s1"}
+    assert sr.logins == 1
+
+    (key,) = (k for k in redis.store if k.startswith("startup_radar:token:"))
+    assert "secret" not in key and "sync@fga.fr" not in key
+    # TTL = exp du JWT moins la marge de refresh
+    assert 3600 - settings.startup_radar_token_refresh_margin_seconds - 5 <= redis.ttl[key] <= 3600
+
+
+async def test_401_refreshes_once_for_concurrent_requests(redis: _FakeRedis):
+    sr = _FakeSR()
+    async with _client(sr) as client:
+        await client.authenticate()
+        sr.valid = "revoked-server-side"
+
+        results = await asyncio.gather(*(client.get_analysis(f"s{i}") for i in range(5)))
+
+    assert results == [{"id": f"s{i}"} for i in range(5)]
+    assert sr.logins == 2  # un seul re-login pour les 5 requetes en 401
+    assert list(redis.store.values()) == [sr.valid]  # token rejete remplace
+
+
+async def test_single_flight_login_across_workers(redis: _FakeRedis):
+    sr = _FakeSR(login_latency=0.05)
+    clients = [_client(sr) for _ in range(6)]
+    tokens = await asyncio.gather(*(c.authenticate() for c in clients))
+    assert sr.logins == 1
+    assert set(tokens) == {sr.valid}
+    assert not [k for k in redis.store if k.startswith("startup_radar:token-lock:")]
+
+
+async def test_redis_down_falls_back_to_direct_login(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(startup_radar_token, "_client", lambda: _DownRedis())
+    sr = _FakeSR()
+    async with _client(sr) as client:
+        assert await client.authenticate() == sr.valid
+        assert await client.get_analysis("s1") == {"id": "s1"}
+    assert sr.logins == 1
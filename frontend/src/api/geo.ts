@@ -7,7 +7,7 @@
 
 import api from './http';
 import type {
-  GeoBrand, GeoPrompt, GeoDashboard, GeoGap, GeoAlert,
+  GeoBrand, GeoPrompt, GeoDashboard, GeoGap, GeoGapList, GeoAlert,
   GeoHealth, GeoRunTriggerResponse, GeoEngine,
   GeoBrandInput, GeoPromptInput, GeoBrandOverview,
 } from '../types/geo';
@@ -76,8 +76,13 @@ export const getGeoGaps = async (
   engine: GeoEngine,
   days = 7,
 ): Promise<GeoGap[]> => {
-  const r = await api.get(`/geo/brands/${brandId}/gaps`, { params: { engine, days } });
-  return Array.isArray(r.data) ? (r.data as GeoGap[]) : [];
+  // Reponse paginee (tri serveur : prioritaires puis visibilite croissante) —
+  // le dashboard n'affiche que la 1re page.
+  const r = await api.get(`/geo/brands/${brandId}/gaps`, {
+    params: { engine, days, page: 1, size: 100 },
+  });
+  const data = r.data as GeoGapList | undefined;
+  return Array.isArray(data?.items) ? data.items : [];
 };
 
 // --- Alerts (P3) ---
@@ -16,6 +16,7 @@ export const listLeadSignals = async (params: {
   signal_type?: LeadSignalType;
   page?: number;
   size?: number;
+  cursor?: string;
 }): Promise<LeadSignalList> => {
   const r = await api.get('/lead-engine/signals', { params });
   return r.data as LeadSignalList;
@@ -96,7 +96,7 @@ const inboundSignal: LeadSignal = {
 
 function list(items: LeadSignal[]): LeadSignalList {
   return {
-    items, total: items.length, page: 1, size: 20,
+    items, total: items.length, page: 1, size: 20, next_cursor: null,
     stats: {
       new_total: items.length,
       new_funding: items.filter((s) => s.signal_type === 'funding_detected').length,
@@ -7,6 +7,9 @@ export type EnrichmentJobStatus = 'queued' | 'running' | 'awaiting_results' | 'd
 
 export interface EnrichmentJobStats {
   companies?: number;
+  // Progression du pipeline inline (checkpoint par societe)
+  companies_total?: number;
+  companies_processed?: number;
   people_found?: number;
   emails_found?: number;
   valid?: number;
@@ -84,6 +84,8 @@ export interface GeoRun {
   brand_sentiment: GeoSentiment | null;
   brand_recommended: boolean | null;
   appearance: boolean | null;
+  // Non-null : raw_answer archive (null en liste, relu via GET /geo/runs/{id})
+  raw_answer_archived_at?: string | null;
   created_at: string;
 }
 
@@ -128,6 +130,14 @@ export interface GeoGap {
   action_suggestion: string;
 }
 
+export interface GeoGapList {
+  items: GeoGap[];
+  total: number;
+  page: number;
+  size: number;
+  pages: number;
+}
+
 // Reponse de GET /brands/{id}/alerts (dicts bruts cote backend)
 export interface GeoAlert {
   alert_type: 'sov_drop' | 'visibility_zero' | 'sentiment_negative' | 'competitor_overtake';
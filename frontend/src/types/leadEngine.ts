@@ -61,6 +61,7 @@ export interface LeadSignalList {
   total: number;
   page: number;
   size: number;
+  next_cursor: string | null;  // curseur keyset de la page suivante (null = fin)
   stats: LeadSignalStats;
 }
 